@@ -75,6 +75,8 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--debug", action="store_true", help="启用调试模式")
     parser.add_argument("--config-dir", "--config", type=str, help="指定配置目录")
     parser.add_argument("--url", type=str, help="要下载的视频URL")
+    parser.add_argument("--analyze", type=str, nargs="+", metavar="URL", help="并发分析一个或多个URL")
+    parser.add_argument("--analyze-concurrency", type=int, default=4, help="批量分析的并发数")
     parser.add_argument("--allow-multiple", action="store_true", help="允许运行多个应用实例")
 
     # Enhanced configuration arguments
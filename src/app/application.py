@@ -253,6 +253,7 @@ class Application(QApplication):
         """Initialize task scheduler"""
         self.task_scheduler = TaskScheduler(self._config_dir)
         self.task_scheduler.register_handler("download", self._handle_download_task)
+        self.task_scheduler.register_handler("bandwidth_limit", self._handle_bandwidth_limit_task)
 
     def _init_main_window(self) -> None:
         """Initialize main window"""
@@ -348,6 +349,8 @@ class Application(QApplication):
         # Start download manager
         logger.info("Starting download manager")
         self.download_manager.start()
+        if self.settings.get("download", "resume_on_startup", True):
+            self.download_manager.resume_interrupted_tasks()
 
         logger.info("Starting task scheduler")
         self.task_scheduler.start()
@@ -527,6 +530,10 @@ class Application(QApplication):
             task_id = self.download_manager.add_task(task)
             logger.debug(f"Created task with ID: {task_id}")
 
+            if task_data.get("bandwidth_limit"):
+                self.download_manager.set_task_bandwidth_limit(
+                    task_id, int(task_data["bandwidth_limit"]))
+
             # Start task immediately
             logger.info(f"Starting scheduled task: {task.name}")
             self.download_manager.start_task(task_id)
@@ -547,6 +554,28 @@ class Application(QApplication):
                     f"Failed to start scheduled task: {task_data.get('name', 'Unknown')}"
                 )
 
+    def _handle_bandwidth_limit_task(self, task_data) -> None:
+        """Handle bandwidth limit task, e.g. capping daytime usage
+
+        Args:
+            task_data (dict): Task configuration data; ``limit`` is the global
+                limit in bytes per second (0 removes it), and ``host`` applies
+                the limit to one host instead
+        """
+        try:
+            limit = int(task_data.get("limit", 0))
+            host = task_data.get("host")
+            if host:
+                self.download_manager.set_host_bandwidth_limit(host, limit)
+            else:
+                self.download_manager.set_bandwidth_limit(limit)
+
+            if task_data.get("persist", False) and not host:
+                self.settings.set("download", "bandwidth_limit", limit)
+                self.settings.save_settings()
+        except Exception as e:
+            logger.error(f"Error processing bandwidth limit task: {e}", exc_info=True)
+
     def _init_system_tray(self) -> None:
         """Initialize system tray"""
         from src.gui.widgets.system_tray import SystemTrayIcon
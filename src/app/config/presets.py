@@ -96,7 +96,11 @@ class PresetManager:
                     "retry_delay": 1.0,
                     "request_timeout": 30,
                     "chunk_size": 65536,
-                    "bandwidth_limit": 0
+                    "bandwidth_limit": 0,
+                    "segment_workers": 12,
+                    "range_coalesce_size": 16777216,
+                    "split_connections": 8,
+                    "prewarm_connections": 8
                 },
                 "network": {
                     "connection_pool_size": 50,
@@ -158,7 +162,11 @@ class PresetManager:
                     "retry_delay": 3.0,
                     "request_timeout": 120,
                     "chunk_size": 4096,
-                    "bandwidth_limit": 0
+                    "bandwidth_limit": 0,
+                    "segment_workers": 2,
+                    "merge_mode": "append",
+                    "playlist_cache_entries": 64,
+                    "prewarm_connections": 1
                 },
                 "network": {
                     "connection_pool_size": 5,
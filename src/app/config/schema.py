@@ -187,6 +187,117 @@ class ConfigurationSchema:
                 min_value=1,
                 max_value=50
             ),
+            "segment_workers": ConfigurationField(
+                name="segment_workers",
+                type=ConfigurationType.INTEGER,
+                default=4,
+                description="Number of segments downloaded in parallel within a task",
+                min_value=1,
+                max_value=32
+            ),
+            "engine": ConfigurationField(
+                name="engine",
+                type=ConfigurationType.STRING,
+                default="thread",
+                description="Download engine (async requires aiohttp)",
+                enum_values=["thread", "async"]
+            ),
+            "merge_mode": ConfigurationField(
+                name="merge_mode",
+                type=ConfigurationType.STRING,
+                default="auto",
+                description="How segments are merged (auto and append write them into the output while "
+                            "downloading where possible, concat merges them with FFmpeg afterwards)",
+                enum_values=["auto", "append", "concat"]
+            ),
+            "async_connection_limit": ConfigurationField(
+                name="async_connection_limit",
+                type=ConfigurationType.INTEGER,
+                default=100,
+                description="Maximum open connections shared by all tasks of the async engine",
+                min_value=1,
+                max_value=1000
+            ),
+            "range_coalesce_size": ConfigurationField(
+                name="range_coalesce_size",
+                type=ConfigurationType.INTEGER,
+                default=4194304,
+                description="Largest single Range request for adjacent byte-range segments (bytes, 0 = one request per segment)",
+                min_value=0,
+                max_value=268435456
+            ),
+            "split_threshold": ConfigurationField(
+                name="split_threshold",
+                type=ConfigurationType.INTEGER,
+                default=33554432,
+                description="Files at least this large are downloaded as parallel byte ranges (bytes, 0 = never)",
+                min_value=0
+            ),
+            "split_connections": ConfigurationField(
+                name="split_connections",
+                type=ConfigurationType.INTEGER,
+                default=4,
+                description="Parallel range requests per large file",
+                min_value=1,
+                max_value=32
+            ),
+            "playlist_cache_entries": ConfigurationField(
+                name="playlist_cache_entries",
+                type=ConfigurationType.INTEGER,
+                default=256,
+                description="Playlists kept in the analysis cache (0 disables caching)",
+                min_value=0,
+                max_value=100000
+            ),
+            "playlist_cache_on_disk": ConfigurationField(
+                name="playlist_cache_on_disk",
+                type=ConfigurationType.BOOLEAN,
+                default=True,
+                description="Keep cached playlists in the cache directory across runs"
+            ),
+            "variant_deadline_minutes": ConfigurationField(
+                name="variant_deadline_minutes",
+                type=ConfigurationType.INTEGER,
+                default=0,
+                description="Pick the best variant that finishes within this many minutes (0 disables)",
+                min_value=0,
+                max_value=10080
+            ),
+            "analysis_concurrency": ConfigurationField(
+                name="analysis_concurrency",
+                type=ConfigurationType.INTEGER,
+                default=4,
+                description="URLs analyzed at the same time by batch import",
+                min_value=1,
+                max_value=64
+            ),
+            "http_transport": ConfigurationField(
+                name="http_transport",
+                type=ConfigurationType.STRING,
+                default="http1",
+                description="Segment transport (http2 multiplexes requests per host over one connection, requires httpx[http2])",
+                enum_values=["http1", "http2"]
+            ),
+            "http2_hosts": ConfigurationField(
+                name="http2_hosts",
+                type=ConfigurationType.ARRAY,
+                default=[],
+                description="Hosts whose segments use the http2 transport regardless of http_transport"
+            ),
+            "prewarm_connections": ConfigurationField(
+                name="prewarm_connections",
+                type=ConfigurationType.INTEGER,
+                default=2,
+                description="Connections opened to the segment host when a task starts (0 disables)",
+                min_value=0,
+                max_value=32
+            ),
+            "resume_on_startup": ConfigurationField(
+                name="resume_on_startup",
+                type=ConfigurationType.BOOLEAN,
+                default=True,
+                description="Queue downloads interrupted in the previous run again at startup"
+            ),
             "max_retries": ConfigurationField(
                 name="max_retries",
                 type=ConfigurationType.INTEGER,
@@ -277,6 +388,12 @@ class ConfigurationSchema:
                 min_value=0,
                 max_value=3600
             ),
+            "dns_cache_enabled": ConfigurationField(
+                name="dns_cache_enabled",
+                type=ConfigurationType.BOOLEAN,
+                default=False,
+                description="Cache host lookups for the whole process (wraps socket.getaddrinfo, so other libraries share the cache)"
+            ),
             "keep_alive_timeout": ConfigurationField(
                 name="keep_alive_timeout",
                 type=ConfigurationType.NUMBER,
@@ -197,7 +197,22 @@ class Settings:
                 "retry_delay": 2,
                 "request_timeout": 60,
                 "chunk_size": 8192,
-                "bandwidth_limit": 0
+                "bandwidth_limit": 0,
+                "segment_workers": 4,
+                "engine": "thread",
+                "merge_mode": "auto",
+                "async_connection_limit": 100,
+                "range_coalesce_size": 4194304,
+                "split_threshold": 33554432,
+                "split_connections": 4,
+                "playlist_cache_entries": 256,
+                "playlist_cache_on_disk": True,
+                "variant_deadline_minutes": 0,
+                "analysis_concurrency": 4,
+                "http_transport": "http1",
+                "http2_hosts": [],
+                "prewarm_connections": 2,
+                "resume_on_startup": True
             },
             "advanced": {
                 "proxy": "",
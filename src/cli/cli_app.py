@@ -136,6 +136,11 @@ class CLIApplication:
             logger.error("Required components not initialized")
             return 1
 
+        # Batch analysis of one or more URLs
+        if getattr(self.cli_args, 'analyze', None):
+            concurrency = getattr(self.cli_args, 'analyze_concurrency', 4) or 4
+            return self.command_handler.analyze_urls(self.cli_args.analyze, concurrency)
+
         # Check if URL is provided for direct download
         if hasattr(self.cli_args, 'url') and self.cli_args.url:
             output = getattr(self.cli_args, 'output_dir', None)
@@ -5,7 +5,7 @@ Command handlers for CLI operations
 
 import time
 import threading
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pathlib import Path
 from loguru import logger
 
@@ -54,7 +54,53 @@ class CommandHandler:
         logger.info(f"Analyzing URL: {url}")
         self.ui.display_info(tr("cli.commands.analyze.started", url=url))
         return 0
-    
+
+    def analyze_urls(self, urls: List[str], concurrency: int = 4) -> int:
+        """
+        Analyze several URLs concurrently and display each result as it completes
+
+        Args:
+            urls: URLs to analyze
+            concurrency: Number of URLs analyzed at the same time
+
+        Returns:
+            int: Exit code, 1 if any URL failed
+        """
+        logger.info(f"Analyzing {len(urls)} URLs with concurrency {concurrency}")
+        self.ui.display_info(tr("cli.commands.analyze.batch_started", count=len(urls)))
+
+        analyzer = MediaAnalyzer(settings=self._analyzer_settings(),
+                                 connection_pool=self.download_manager.connection_pool)
+        failed = 0
+        for url, result in analyzer.analyze_many(urls, concurrency=concurrency):
+            if not result.get("success"):
+                failed += 1
+                self.ui.display_error(f"{url}: " + tr("cli.commands.analyze.failed",
+                                                      error=result.get("error", "Unknown error")))
+                continue
+
+            self.ui.display_success(url)
+            variant = result.get("selected_variant")
+            if variant:
+                self.ui.display_info(f"  Variant: {variant.get('resolution', 'unknown')} "
+                                     f"@ {variant.get('bandwidth', 0)} bps")
+            self.ui.display_info(f"  Segments: {result.get('segment_count', 0)}")
+            self.ui.display_info(f"  Duration: {result.get('total_duration', 0):.2f}s")
+            self.ui.display_info(f"  Encryption: {result.get('encryption', 'none')}")
+
+        self.ui.display_info(tr("cli.commands.analyze.batch_completed",
+                                count=len(urls), failed=failed))
+        return 1 if failed else 0
+
+    def _analyzer_settings(self) -> Dict[str, Any]:
+        """Analyzer settings with the variant deadline and per-task connection count"""
+        deadline_minutes = self.settings.get("download", "variant_deadline_minutes", 0)
+        return {
+            **self.settings.settings,
+            "deadline": deadline_minutes * 60 if deadline_minutes else None,
+            "connections": self.settings.get("download", "max_workers_per_task", 1)
+        }
+
     def download(self, url: str, output: Optional[str] = None) -> int:
         """
         Download video from URL
@@ -72,8 +118,10 @@ class CommandHandler:
 
             # Step 1: Analyze URL
             self.ui.display_info(tr("cli.commands.analyze.started", url=url))
-            analyzer = MediaAnalyzer(settings=self.settings.settings)
+            analyzer = MediaAnalyzer(settings=self._analyzer_settings())
             analysis_result = analyzer.analyze_url(url)
+            if analysis_result.get("success") and analysis_result.get("type") == "master":
+                analysis_result = analyzer.resolve_variant(analysis_result)
 
             if not analysis_result.get("success"):
                 error_msg = analysis_result.get("error", "Unknown error")
@@ -90,6 +138,8 @@ class CommandHandler:
             self.ui.display_info(f"  Segments: {segment_count}")
             self.ui.display_info(f"  Duration: {duration:.2f}s")
             self.ui.display_info(f"  Encryption: {encryption}")
+            if analysis_result.get("is_live"):
+                self.ui.display_info("  Live stream: recording until the playlist ends")
 
             # Step 2: Determine output path
             if not output:
@@ -106,7 +156,13 @@ class CommandHandler:
                 segments=segment_count,
                 output_file=output,
                 settings=self.settings,
-                priority=TaskPriority.HIGH
+                priority=TaskPriority.HIGH,
+                segment_manifest=analysis_result.get("manifest"),
+                live_playlist_url=(analysis_result.get("playlist_url")
+                                   if analysis_result.get("is_live") else None),
+                variants=analysis_result.get("variants"),
+                variant_url=(analysis_result.get("selected_variant") or {}).get("url"),
+                renditions=analysis_result.get("renditions")
             )
 
             # Step 4: Add task to download manager
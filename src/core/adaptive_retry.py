@@ -15,6 +15,8 @@ from enum import Enum
 from collections import defaultdict, deque
 import logging
 
+from .host_key import DEFAULT_MAX_HOSTS, HostLRU, host_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -125,12 +127,17 @@ class HostRetryMetrics:
 
 
 class AdaptiveRetryManager:
-    """Intelligent retry manager with network-aware strategies"""
+    """Intelligent retry manager with network-aware strategies.
+
+    Hosts may be given as URLs; they are normalized with ``host_key`` and
+    metrics are kept for at most ``max_hosts`` recently used hosts.
+    """
     
-    def __init__(self, default_config: Optional[RetryConfig] = None) -> None:
+    def __init__(self, default_config: Optional[RetryConfig] = None,
+                 max_hosts: int = DEFAULT_MAX_HOSTS) -> None:
         self.default_config = default_config or RetryConfig()
         self.host_configs: Dict[str, RetryConfig] = {}
-        self.host_metrics: Dict[str, HostRetryMetrics] = {}
+        self.host_metrics: HostLRU = HostLRU(max_hosts)
         self.lock = threading.RLock()
         
         # Global network conditions
@@ -144,6 +151,7 @@ class AdaptiveRetryManager:
     
     def configure_host(self, host: str, config: RetryConfig) -> None:
         """Configure retry settings for a specific host"""
+        host = host_key(host)
         with self.lock:
             self.host_configs[host] = config
             logger.debug(f"Configured retry settings for host: {host}")
@@ -151,6 +159,7 @@ class AdaptiveRetryManager:
     def get_retry_delay(self, host: str, attempt_number: int, reason: RetryReason,
                        last_response_time: float = 0.0) -> float:
         """Calculate adaptive retry delay"""
+        host = host_key(host)
         with self.lock:
             config = self.host_configs.get(host, self.default_config)
             metrics = self.host_metrics.get(host)
@@ -270,6 +279,7 @@ class AdaptiveRetryManager:
     def should_retry(self, host: str, attempt_number: int, reason: RetryReason,
                    error_message: str = "") -> bool:
         """Determine if operation should be retried"""
+        host = host_key(host)
         with self.lock:
             config = self.host_configs.get(host, self.default_config)
             metrics = self.host_metrics.get(host)
@@ -316,9 +326,9 @@ class AdaptiveRetryManager:
                       success: bool, response_time: float = 0.0, 
                       error_message: str = "") -> None:
         """Record retry attempt for learning"""
+        host = host_key(host)
         with self.lock:
-            if host not in self.host_metrics:
-                self.host_metrics[host] = HostRetryMetrics(host)
+            metrics = self.host_metrics.get_or_create(host, lambda: HostRetryMetrics(host))
             
             attempt = RetryAttempt(
                 attempt_number=attempt_number,
@@ -330,7 +340,7 @@ class AdaptiveRetryManager:
                 error_message=error_message
             )
             
-            self.host_metrics[host].record_attempt(attempt)
+            metrics.record_attempt(attempt)
             
             # Update global network conditions based on patterns
             self._update_global_conditions()
@@ -359,6 +369,7 @@ class AdaptiveRetryManager:
     
     def get_host_stats(self, host: str) -> Dict[str, Any]:
         """Get retry statistics for a host"""
+        host = host_key(host)
         with self.lock:
             metrics = self.host_metrics.get(host)
             if not metrics:
@@ -389,6 +400,7 @@ class AdaptiveRetryManager:
     
     def reset_host_metrics(self, host: str) -> None:
         """Reset metrics for a specific host"""
+        host = host_key(host)
         with self.lock:
             if host in self.host_metrics:
                 del self.host_metrics[host]
@@ -11,9 +11,10 @@ import statistics
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from collections import defaultdict, deque
-from urllib.parse import urlparse
 import logging
 
+from .host_key import DEFAULT_MAX_HOSTS, HostLRU, host_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,6 +30,8 @@ class NetworkMetrics:
     last_updated: float = field(default_factory=time.time)
     connection_failures: int = 0
     timeout_failures: int = 0
+    # (bytes, seconds) of recent successful transfers
+    transfers: deque = field(default_factory=lambda: deque(maxlen=50))
     
     def add_response_time(self, response_time: float, success: bool) -> None:
         """Add a response time measurement"""
@@ -43,6 +46,17 @@ class NetworkMetrics:
             
         self.success_rate = self.successful_requests / self.total_requests if self.total_requests > 0 else 1.0
     
+    def add_transfer(self, bytes_transferred: int, seconds: float) -> None:
+        """Add a completed transfer for throughput estimation"""
+        self.transfers.append((bytes_transferred, seconds))
+    
+    def get_throughput(self) -> float:
+        """Get per-connection throughput in bytes per second (0 if unknown)"""
+        total_seconds = sum(seconds for _, seconds in self.transfers)
+        if total_seconds <= 0:
+            return 0.0
+        return float(sum(size for size, _ in self.transfers) / total_seconds)
+    
     def get_avg_response_time(self) -> float:
         """Get average response time"""
         if not self.response_times:
@@ -80,9 +94,11 @@ class TimeoutConfig:
 class AdaptiveTimeoutManager:
     """Manages adaptive timeouts based on network conditions and performance"""
     
-    def __init__(self, config: Optional[TimeoutConfig] = None) -> None:
+    def __init__(self, config: Optional[TimeoutConfig] = None,
+                 max_hosts: int = DEFAULT_MAX_HOSTS) -> None:
         self.config = config or TimeoutConfig()
-        self.host_metrics: Dict[str, NetworkMetrics] = {}
+        # Metrics for the most recently used hosts, keyed by host_key()
+        self.host_metrics: HostLRU = HostLRU(max_hosts)
         self.lock = threading.RLock()
         
         # Global network condition tracking
@@ -97,8 +113,7 @@ class AdaptiveTimeoutManager:
     
     def get_host_from_url(self, url: str) -> str:
         """Extract host from URL"""
-        parsed = urlparse(url)
-        return f"{parsed.scheme}://{parsed.netloc}"
+        return host_key(url)
     
     def get_timeouts(self, url: str) -> Tuple[float, float]:
         """Get adaptive timeouts for connection and read operations"""
@@ -142,17 +157,16 @@ class AdaptiveTimeoutManager:
             return (adaptive_connection_timeout, adaptive_read_timeout)
     
     def record_request(self, url: str, response_time: float, success: bool, 
-                      error_type: Optional[str] = None) -> None:
+                      error_type: Optional[str] = None, bytes_transferred: int = 0) -> None:
         """Record request performance for adaptive learning"""
         host = self.get_host_from_url(url)
         
         with self.lock:
             # Get or create host metrics
-            if host not in self.host_metrics:
-                self.host_metrics[host] = NetworkMetrics(host)
-            
-            metrics = self.host_metrics[host]
+            metrics = self.host_metrics.get_or_create(host, lambda: NetworkMetrics(host))
             metrics.add_response_time(response_time, success)
+            if success and bytes_transferred > 0 and response_time > 0:
+                metrics.add_transfer(bytes_transferred, response_time)
             
             # Track specific error types
             if not success and error_type:
@@ -201,6 +215,19 @@ class AdaptiveTimeoutManager:
         logger.debug(f"Network quality updated: {self.network_quality_score:.3f} "
                     f"(success={success_component:.3f}, stability={time_stability:.3f})")
     
+    def get_host_throughput(self, url: str, min_samples: int = 1) -> float:
+        """Get measured per-connection throughput to a host in bytes per second.
+
+        Returns 0 when fewer than ``min_samples`` transfers have been recorded.
+        """
+        host = self.get_host_from_url(url)
+        
+        with self.lock:
+            metrics = self.host_metrics.get(host)
+            if not metrics or len(metrics.transfers) < min_samples:
+                return 0.0
+            return float(metrics.get_throughput())
+    
     def get_host_stats(self, url: str) -> Dict[str, Any]:
         """Get statistics for a specific host"""
         host = self.get_host_from_url(url)
@@ -218,6 +245,7 @@ class AdaptiveTimeoutManager:
                 "p95_response_time": metrics.get_percentile_response_time(95.0),
                 "connection_failures": metrics.connection_failures,
                 "timeout_failures": metrics.timeout_failures,
+                "throughput": metrics.get_throughput(),
                 "is_stable": metrics.is_stable(),
                 "last_updated": metrics.last_updated
             }
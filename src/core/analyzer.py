@@ -1,11 +1,25 @@
 # src/core/analyzer.py
 import re
+import time
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from urllib.parse import urljoin
 from loguru import logger
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Generator, Iterable, Tuple
+
+from .segment_manifest import SegmentManifest
+from .m3u8_parser import EncryptionMethod, parse_media_playlist
+from .playlist_cache import playlist_cache
+from .connection_pool import ConnectionPoolManager
+from .variant_selector import variant_selector
+from .renditions import MediaRendition, load_rendition_manifests, parse_media_tag, select_renditions
+
+# URLs analyzed at the same time by batch analysis
+DEFAULT_ANALYSIS_CONCURRENCY = 4
+
+_MEDIA_ATTRIBUTE_PATTERN = re.compile(r'([A-Z0-9-]+)=(?:"([^"]*)"|([^",]*))')
 
 
 class EncryptionType(Enum):
@@ -15,12 +29,21 @@ class EncryptionType(Enum):
     CUSTOM = "custom"
 
 
+_ENCRYPTION_TYPES = {
+    EncryptionMethod.AES_128: EncryptionType.AES_128,
+    EncryptionMethod.SAMPLE_AES: EncryptionType.SAMPLE_AES,
+    EncryptionMethod.UNKNOWN: EncryptionType.CUSTOM,
+}
+
+
 @dataclass
 class StreamInfo:
     resolution: str
     bandwidth: int
     url: str
     codec: Optional[str] = None
+    audio_group: Optional[str] = None
+    subtitles_group: Optional[str] = None
 
 
 @dataclass
@@ -38,13 +61,22 @@ class M3U8Info:
 class MediaAnalyzer:
     """Media Analyzer for intelligent media processing"""
 
-    def __init__(self, settings: Optional[Dict[str, Any]] = None) -> None:
+    def __init__(self, settings: Optional[Dict[str, Any]] = None,
+                 connection_pool: Optional[ConnectionPoolManager] = None) -> None:
         self.settings: Dict[str, Any] = settings or {}
+        # Requests go through pooled keep-alive sessions when a pool is given
+        self.connection_pool = connection_pool
         self.user_agent: str = self.settings.get("user_agent",
                                                  "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
         self.timeout: int = self.settings.get("timeout", 30)
         self.verify_ssl: bool = self.settings.get("verify_ssl", True)
         self.proxy: Optional[str] = self.settings.get("proxy", None)
+        # Seconds a download should finish within; steers variant selection
+        self.deadline: Optional[float] = self.settings.get("deadline", None)
+        self.connections: int = self.settings.get("connections", 1)
+        # Preferred languages of separate audio and subtitle renditions
+        self.audio_language: Optional[str] = self.settings.get("audio_language", None)
+        self.subtitle_language: Optional[str] = self.settings.get("subtitle_language", None)
         logger.debug(
             f"MediaAnalyzer initialized with timeout={self.timeout}, verify_ssl={self.verify_ssl}")
 
@@ -120,6 +152,131 @@ class MediaAnalyzer:
             logger.error(f"Error analyzing M3U8: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
 
+    def analyze_many(self, urls: Iterable[str], concurrency: int = DEFAULT_ANALYSIS_CONCURRENCY,
+                     resolve_variants: bool = True
+                     ) -> Generator[Tuple[str, Dict[str, Any]], None, None]:
+        """
+        Analyze several URLs concurrently, yielding results as they complete
+
+        Master playlists are resolved to their selected variant in the same
+        worker pool, so one slow master does not hold up the other URLs.
+        Closing the generator early cancels the analyses not yet started.
+
+        Args:
+            urls (Iterable[str]): URLs to analyze
+            concurrency (int): Number of URLs analyzed at the same time
+            resolve_variants (bool): Analyze the selected variant of master playlists
+
+        Yields:
+            Tuple[str, Dict[str, Any]]: Input URL and its analysis result, in completion order
+        """
+        url_list = list(urls)
+        if not url_list:
+            return
+
+        workers = max(1, min(concurrency, len(url_list)))
+        logger.info(f"Analyzing {len(url_list)} URLs with {workers} workers")
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="MediaAnalyzer")
+        # Future -> (input URL, master result if the future resolves its variant)
+        pending: Dict[Future, Tuple[str, Optional[Dict[str, Any]]]] = {}
+        try:
+            for url in url_list:
+                pending[executor.submit(self.analyze_url, url)] = (url, None)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, master = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Error analyzing URL {url}: {e}")
+                        result = {"success": False, "error": str(e)}
+
+                    if (master is None and resolve_variants and result.get("success")
+                            and result.get("type") == "master"):
+                        pending[executor.submit(self.resolve_variant, result)] = (url, result)
+                        continue
+
+                    yield url, result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def select_variant(self, variants: List[Dict[str, Any]],
+                       duration: float = 0.0) -> Dict[str, Any]:
+        """
+        Select the variant of a master playlist to download
+
+        Args:
+            variants (List[Dict[str, Any]]): Variants as returned by ``analyze_m3u8``
+            duration (float): Media duration in seconds, if known
+
+        Returns:
+            Dict[str, Any]: The highest bandwidth variant, or with a deadline and a
+                known duration, the highest one expected to download in time
+        """
+        return variant_selector.select(
+            variants, duration, self.deadline, connections=self.connections) or variants[0]
+
+    def resolve_variant(self, master: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analyze the variant of a master playlist result that should be downloaded
+
+        The highest variant is analyzed first; with a deadline, its duration
+        then decides whether a lower variant has to be analyzed instead. The
+        variant's separate audio and subtitle renditions are loaded alongside.
+
+        Args:
+            master (Dict[str, Any]): Successful master playlist result
+
+        Returns:
+            Dict[str, Any]: Media playlist result of the selected variant, with
+                ``master_url``, ``variants``, ``selected_variant`` and
+                ``renditions`` added
+        """
+        variants = master["variants"]
+        variant = self.select_variant(variants)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="MediaAnalyzer-Renditions") as executor:
+            renditions_future = executor.submit(self._load_renditions, master, variant)
+            result = self.analyze_m3u8(variant["url"])
+            renditions = renditions_future.result()
+
+        if self.deadline and result.get("success"):
+            fitting = self.select_variant(variants, result.get("total_duration", 0.0))
+            if fitting["url"] != variant["url"]:
+                logger.info(f"Variant {variant['resolution']} would miss the deadline, "
+                            f"using {fitting['resolution']}")
+                groups = (variant.get("audio_group"), variant.get("subtitles_group"))
+                variant = fitting
+                result = self.analyze_m3u8(variant["url"])
+                if (variant.get("audio_group"), variant.get("subtitles_group")) != groups:
+                    renditions = self._load_renditions(master, variant)
+
+        merged = self._merge_variant_result(master, variant, result)
+        merged["renditions"] = renditions
+        return merged
+
+    def _load_renditions(self, master: Dict[str, Any],
+                         variant: Dict[str, Any]) -> List[MediaRendition]:
+        """Select a variant's separate renditions and load their manifests in parallel"""
+        selected = select_renditions(
+            master.get("renditions", []), variant.get("audio_group"),
+            variant.get("subtitles_group"), self.audio_language, self.subtitle_language)
+        return load_rendition_manifests(
+            selected, lambda url: self.analyze_m3u8(url).get("manifest"))
+
+    def _merge_variant_result(self, master: Dict[str, Any], variant: Dict[str, Any],
+                              variant_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Combine a master playlist result with the analysis of its selected variant"""
+        result = dict(variant_result)
+        result["master_url"] = master["base_url"]
+        result["variants"] = master["variants"]
+        result["selected_variant"] = variant
+        if not result.get("success"):
+            result["error"] = (f"Selected variant failed: "
+                               f"{variant_result.get('error', 'Unknown error')}")
+        return result
+
     def extract_media_from_page(self, url: str) -> List[str]:
         """
         Extract media URLs from web page
@@ -219,17 +376,15 @@ class MediaAnalyzer:
                                              "https": self.proxy} if self.proxy else None
 
         try:
-            response = requests.get(
-                url,
-                headers=headers,
-                timeout=self.timeout,
-                verify=self.verify_ssl,
-                proxies=proxies
-            )
+            response = playlist_cache.fetch(
+                url, headers,
+                lambda request_url, request_headers: self._http_get(
+                    request_url, request_headers, proxies))
 
             if response.status_code == 200:
                 logger.debug(
-                    f"Successfully fetched content ({len(response.text)} bytes)")
+                    f"Successfully fetched content ({len(response.text)} bytes"
+                    f"{', cached' if response.from_cache else ''})")
                 return response.text
             else:
                 logger.warning(
@@ -240,6 +395,27 @@ class MediaAnalyzer:
             logger.error(f"Error fetching content: {e}", exc_info=True)
             return ""
 
+    def _http_get(self, url: str, headers: Dict[str, str],
+                  proxies: Optional[Dict[str, str]]) -> requests.Response:
+        """GET a URL, over a pooled session when a connection pool is set"""
+        if self.connection_pool is None:
+            return requests.get(url, headers=headers, timeout=self.timeout,
+                                verify=self.verify_ssl, proxies=proxies)
+
+        lease = self.connection_pool.acquire(url)
+        start_time = time.time()
+        success = False
+        bytes_transferred = 0
+        try:
+            response = lease.session.get(url, headers=headers, timeout=self.timeout,
+                                         verify=self.verify_ssl, proxies=proxies)
+            success = response.status_code < 500
+            bytes_transferred = len(response.content)
+            return response
+        finally:
+            self.connection_pool.release(lease, success, bytes_transferred,
+                                         time.time() - start_time)
+
     def _parse_master_playlist(self, content: str, base_url: str) -> Dict[str, Any]:
         """
         Parse master playlist (contains multiple stream variants)
@@ -253,14 +429,24 @@ class MediaAnalyzer:
         """
         logger.info("Parsing master playlist")
         variants: List[StreamInfo] = []
+        renditions: List[MediaRendition] = []
         lines = [line.strip() for line in content.splitlines() if line.strip()]
 
         for i, line in enumerate(lines):
-            if line.startswith('#EXT-X-STREAM-INF:'):
+            if line.startswith('#EXT-X-MEDIA:'):
+                attributes = {match.group(1): match.group(2) if match.group(2) is not None
+                              else match.group(3)
+                              for match in _MEDIA_ATTRIBUTE_PATTERN.finditer(line[13:])}
+                rendition = parse_media_tag(attributes, base_url)
+                if rendition is not None:
+                    renditions.append(rendition)
+            elif line.startswith('#EXT-X-STREAM-INF:'):
                 # Parse stream information
                 resolution = re.search(r'RESOLUTION=(\d+x\d+)', line)
                 bandwidth = re.search(r'BANDWIDTH=(\d+)', line)
                 codec = re.search(r'CODECS="([^"]+)"', line)
+                audio_group = re.search(r'AUDIO="([^"]+)"', line)
+                subtitles_group = re.search(r'SUBTITLES="([^"]+)"', line)
 
                 if i+1 < len(lines) and not lines[i+1].startswith('#'):
                     # Next line should contain the variant URL
@@ -274,7 +460,9 @@ class MediaAnalyzer:
                             1) if resolution else "unknown",
                         bandwidth=int(bandwidth.group(1)) if bandwidth else 0,
                         url=variant_url,
-                        codec=codec.group(1) if codec else None
+                        codec=codec.group(1) if codec else None,
+                        audio_group=audio_group.group(1) if audio_group else None,
+                        subtitles_group=subtitles_group.group(1) if subtitles_group else None
                     )
                     variants.append(variant)
                     logger.debug(
@@ -288,6 +476,7 @@ class MediaAnalyzer:
                 "success": True,
                 "type": "master",
                 "variants": [vars(v) for v in variants],
+                "renditions": renditions,
                 "base_url": base_url
             }
         else:
@@ -298,6 +487,10 @@ class MediaAnalyzer:
         """
         Parse media playlist (contains segments)
 
+        Segments are parsed by ``M3U8Parser``, so byte ranges
+        (#EXT-X-BYTERANGE) and initialization sections (#EXT-X-MAP) reach
+        the manifest as they do for tasks created from the parser.
+
         Args:
             content (str): M3U8 content
             base_url (str): Base URL for resolving relative paths
@@ -306,57 +499,8 @@ class MediaAnalyzer:
             Dict[str, Any]: Parsed media playlist information
         """
         logger.info("Parsing media playlist")
-        segments: List[str] = []
-        duration = 0.0
-        encryption = EncryptionType.NONE
-        key_url = None
-        iv = None
-        encryption_details: Dict[str, Any] = {}
-
-        lines = [line.strip() for line in content.splitlines() if line.strip()]
-
-        for i, line in enumerate(lines):
-            if line.startswith('#EXTINF:'):
-                # Parse segment duration
-                match = re.search(r'#EXTINF:([0-9.]+)', line)
-                if match:
-                    segment_duration = float(match.group(1))
-                    duration += segment_duration
-
-                    if i+1 < len(lines) and not lines[i+1].startswith('#'):
-                        # Next line should contain the segment URL
-                        segment_url = lines[i+1]
-                        # Resolve relative URL
-                        if not segment_url.startswith('http'):
-                            segment_url = urljoin(base_url, segment_url)
-                        segments.append(segment_url)
-
-            elif line.startswith('#EXT-X-KEY:'):
-                # Parse encryption information
-                method_match = re.search(r'METHOD=([A-Z0-9-]+)', line)
-                if method_match:
-                    method = method_match.group(1)
-                    if method == "AES-128":
-                        encryption = EncryptionType.AES_128
-                    elif method == "SAMPLE-AES":
-                        encryption = EncryptionType.SAMPLE_AES
-                    else:
-                        encryption = EncryptionType.CUSTOM
-
-                    encryption_details["method"] = method
-
-                uri_match = re.search(r'URI="([^"]+)"', line)
-                if uri_match:
-                    key_url = uri_match.group(1)
-                    # Resolve relative URL
-                    if not key_url.startswith('http'):
-                        key_url = urljoin(base_url, key_url)
-                    encryption_details["key_url"] = key_url
-
-                iv_match = re.search(r'IV=0x([0-9a-fA-F]+)', line)
-                if iv_match:
-                    iv = iv_match.group(1)
-                    encryption_details["iv"] = iv
+        stream = parse_media_playlist(content, base_url)
+        segments = [segment.url for segment in stream.segments]
 
         # Return the parsed information
         if segments:
@@ -366,19 +510,28 @@ class MediaAnalyzer:
                 "success": True,
                 "type": "media",
                 "segments": segments,
+                "manifest": SegmentManifest.from_segments(stream.segments, stream.media_sequence),
                 "segment_count": len(segments),
-                "total_duration": round(duration, 2),
-                "encryption": encryption.value,
-                "base_url": base_url
+                "total_duration": round(stream.duration, 2),
+                "encryption": _ENCRYPTION_TYPES.get(stream.encryption, EncryptionType.NONE).value,
+                "base_url": base_url,
+                # Live playlists keep growing until #EXT-X-ENDLIST appears
+                "is_live": stream.is_live,
+                "playlist_url": base_url,
+                "target_duration": stream.target_duration
             }
 
-            if encryption != EncryptionType.NONE:
-                logger.info(f"Media is encrypted using {encryption.value}")
-                result["encryption_details"] = encryption_details
-                if key_url:
-                    result["key_url"] = key_url
-                if iv:
+            if stream.encryption != EncryptionMethod.NONE:
+                logger.info(f"Media is encrypted using {result['encryption']}")
+                encryption_details: Dict[str, Any] = {"method": stream.encryption.value}
+                if stream.key_url:
+                    encryption_details["key_url"] = stream.key_url
+                    result["key_url"] = stream.key_url
+                if stream.key_iv:
+                    iv = stream.key_iv[2:] if stream.key_iv.lower().startswith("0x") else stream.key_iv
+                    encryption_details["iv"] = iv
                     result["iv"] = iv
+                result["encryption_details"] = encryption_details
 
             return result
         else:
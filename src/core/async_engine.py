@@ -0,0 +1,600 @@
+"""
+Asyncio Download Engine for VidTanium
+
+This module runs the segment downloads of all tasks on a single asyncio event
+loop with a shared keep-alive HTTP connection pool, instead of one worker
+thread per task plus a segment thread pool per task. Task preparation, merging
+and file I/O reuse the thread engine's ``DownloadManager`` code and run on a
+small executor, so ``EventDispatcher`` events and ``TaskStatus`` transitions are
+identical for both engines.
+
+Segments are fetched with the same features as the thread engine: an
+interrupted segment resumes from its partial file recorded in the resume
+journal (``Range`` with ``If-Range``), adjacent byte ranges are coalesced into
+one request, large resources are split into parallel ranges and deadline tasks
+may switch variants mid-download. Coalesced and split requests reuse the thread
+engine's blocking helpers on a request executor. The ``http2`` transport only
+applies to the thread engine's connection pool; the async engine speaks
+HTTP/1.1 through aiohttp and logs this once per task.
+
+Requires the optional ``aiohttp`` dependency.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Coroutine, Deque, Dict, List, Optional, TYPE_CHECKING
+import logging
+
+from .byte_ranges import RangeTrimmer, range_header, resume_validator, validator_checksum
+from .decryptor import AES_BLOCK_SIZE, SegmentDecryptor
+from .variant_selector import variant_selector
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    aiohttp = None  # type: ignore[assignment]
+    AIOHTTP_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from .downloader import DownloadManager, DownloadTask, SegmentFetchOptions
+    from .live_playlist import LivePlaylistFollower
+
+logger = logging.getLogger(__name__)
+
+# Bytes of a segment buffered in memory before they are written to its file
+_WRITE_BUFFER_SIZE = 256 * 1024
+# Bytes written between two records of an in-progress segment in the resume journal
+_PARTIAL_RECORD_BYTES = 1024 * 1024
+
+
+class AsyncDownloadEngine:
+    """Runs task downloads as coroutines on one background event loop"""
+
+    def __init__(self, manager: "DownloadManager", blocking_workers: int = 4) -> None:
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("aiohttp is required for the async download engine")
+
+        self.manager = manager
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: Optional[threading.Thread] = None
+        self.session: Optional["aiohttp.ClientSession"] = None
+        self.futures: Dict[str, "Future[None]"] = {}
+        # Set on the loop whenever a running task is paused, resumed or canceled
+        self.state_events: Dict[str, asyncio.Event] = {}
+        self.lock = threading.RLock()
+
+        # Task preparation and merging may block for a long time (key fetch,
+        # ffmpeg), so they get their own executor apart from short file I/O
+        self.task_executor = ThreadPoolExecutor(
+            max_workers=blocking_workers, thread_name_prefix="VidTanium-AsyncTask")
+        self.io_executor = ThreadPoolExecutor(
+            max_workers=blocking_workers * 2, thread_name_prefix="VidTanium-AsyncIO")
+        # Coalesced range, split download and variant playlist requests go
+        # through the thread engine's blocking helpers
+        self.request_executor = ThreadPoolExecutor(
+            max_workers=blocking_workers * 2, thread_name_prefix="VidTanium-AsyncRequest")
+
+    def start(self) -> None:
+        """Start the event loop thread if it is not running"""
+        with self.lock:
+            if self.loop_thread and self.loop_thread.is_alive():
+                return
+
+            self.loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run_loop() -> None:
+                assert self.loop is not None
+                asyncio.set_event_loop(self.loop)
+                self.loop.call_soon(started.set)
+                self.loop.run_forever()
+
+            self.loop_thread = threading.Thread(
+                target=run_loop, name="VidTanium-AsyncEngine", daemon=True)
+            self.loop_thread.start()
+            started.wait()
+            logger.info("Async download engine started")
+
+    def submit(self, task_id: str) -> "Future[None]":
+        """Schedule a task download on the event loop"""
+        self.start()
+        assert self.loop is not None
+        future = asyncio.run_coroutine_threadsafe(self._run_task(task_id), self.loop)
+        with self.lock:
+            self.futures[task_id] = future
+        future.add_done_callback(lambda _: self._forget(task_id, future))
+        return future
+
+    def _forget(self, task_id: str, future: "Future[None]") -> None:
+        with self.lock:
+            if self.futures.get(task_id) is future:
+                del self.futures[task_id]
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        """Cancel running downloads and stop the event loop"""
+        with self.lock:
+            loop, loop_thread = self.loop, self.loop_thread
+            futures = list(self.futures.values())
+            self.loop = None
+            self.loop_thread = None
+
+        if loop is None or loop_thread is None:
+            return
+
+        for future in futures:
+            future.cancel()
+
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_session(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Error closing async HTTP session: {e}")
+
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+        self.task_executor.shutdown(wait=False)
+        self.io_executor.shutdown(wait=False)
+        self.request_executor.shutdown(wait=False)
+        logger.info("Async download engine stopped")
+
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        """Get the shared HTTP session, creating it on first use"""
+        if self.session is None or self.session.closed:
+            settings = self.manager.settings
+            connection_limit = 100
+            verify_ssl = True
+            if settings:
+                connection_limit = int(settings.get("download", "async_connection_limit", 100))
+                verify_ssl = bool(settings.get("advanced", "verify_ssl", True))
+
+            connector_options: Dict[str, Any] = {}
+            if not verify_ssl:
+                connector_options["ssl"] = False
+            connector = aiohttp.TCPConnector(
+                limit=connection_limit,
+                limit_per_host=0,
+                keepalive_timeout=self.manager.default_pool_config.keep_alive_timeout,
+                **connector_options
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def _close_session(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _run_task(self, task_id: str) -> None:
+        """Download, merge and finish a task"""
+        manager = self.manager
+        task = manager.tasks.get(task_id)
+        if not task:
+            logger.warning(f"Task not found in async engine: {task_id}")
+            return
+
+        loop = asyncio.get_running_loop()
+        error_context = manager._create_task_error_context(task)
+        options: Optional["SegmentFetchOptions"] = None
+        rendition_futures: List["Future[Optional[Dict[str, str]]]"] = []
+
+        state_event = asyncio.Event()
+        self.state_events[task_id] = state_event
+        task.state_listener = lambda: self._wake(loop, state_event)
+
+        if manager.settings and manager.settings.get("download", "http_transport", "http1") == "http2":
+            logger.info(f"Task {task.name} uses HTTP/1.1: the http2 transport only applies "
+                        f"to the thread engine")
+
+        try:
+            prepared_options, pending_segments, segment_files = await loop.run_in_executor(
+                self.task_executor, manager._prepare_task_download, task, error_context)
+            options = prepared_options
+            follower = manager._start_live_follower(task, prepared_options)
+
+            segment_workers = manager._get_segment_workers()
+            # Renditions run as threaded sub-downloads next to the video segments
+            rendition_futures = manager._start_rendition_downloads(
+                task, prepared_options, segment_workers)
+            logger.info(
+                f"Downloading {task.segments} segments for task: {task.name} "
+                f"({segment_workers} concurrent segment requests)")
+            await self._run_segments(
+                task, pending_segments, segment_files, prepared_options, follower)
+            if rendition_futures:
+                # Wait here rather than blocking a task executor thread in the merge
+                await asyncio.gather(*(asyncio.wrap_future(future) for future in rendition_futures),
+                                     return_exceptions=True)
+
+            await loop.run_in_executor(
+                self.task_executor, manager._finish_task_download, task, prepared_options,
+                segment_files, rendition_futures)
+        except asyncio.CancelledError:
+            task.save_progress()
+            raise
+        except Exception as e:
+            await loop.run_in_executor(
+                self.task_executor, manager._fail_task_download, task, e, error_context)
+        finally:
+            task.rendition_stop_event.set()
+            if rendition_futures:
+                # Let the stopped rendition threads exit before their temp files go
+                await asyncio.wait([asyncio.wrap_future(future) for future in rendition_futures])
+            manager._stop_live_follower(task_id)
+            manager._close_merge(options)
+            task.close_journal()
+            task.state_listener = None
+            self.state_events.pop(task_id, None)
+            with manager.lock:
+                manager.active_tasks.discard(task_id)
+
+    @staticmethod
+    def _wake(loop: asyncio.AbstractEventLoop, event: asyncio.Event) -> None:
+        """Set an event of the loop from any thread"""
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            # The loop is already closed, nothing is waiting anymore
+            pass
+
+    async def _run_segments(self, task: "DownloadTask", pending_segments: List[int],
+                            segment_files: List[Optional[str]],
+                            options: "SegmentFetchOptions",
+                            follower: Optional["LivePlaylistFollower"] = None) -> None:
+        """Download pending segments with a fixed number of segment coroutines.
+
+        Each coroutine takes the next pending segment together with any
+        byte-contiguous successors, as the thread engine's pool does. With a
+        live ``follower`` the segments it appends are downloaded in further
+        rounds until the playlist ends.
+        """
+        manager = self.manager
+        loop = asyncio.get_running_loop()
+        session = await self._get_session()
+        pending: Deque[int] = deque(pending_segments)
+        coalesce_size = manager._get_range_coalesce_size()
+        # Held while segments are taken, so a variant switch sees a stable backlog
+        dispatch_lock = asyncio.Lock()
+        completed_since_save = 0
+
+        async def record(index: int, ts_filename: Optional[str]) -> None:
+            nonlocal completed_since_save
+            manager._record_segment_result(task, index, ts_filename, segment_files)
+            if ts_filename:
+                completed_since_save += 1
+                if options.merger is not None:
+                    await loop.run_in_executor(
+                        self.io_executor, manager._advance_merge, options, index, ts_filename)
+            if completed_since_save >= 10 or not ts_filename:
+                completed_since_save = 0
+                await loop.run_in_executor(self.io_executor, task.save_progress)
+
+        async def segment_worker() -> None:
+            while not task.canceled_event.is_set():
+                async with dispatch_lock:
+                    if not pending:
+                        return
+                    group = manager._take_segment_group(task, pending, coalesce_size)
+
+                completed: Dict[int, str] = {}
+                if len(group) > 1:
+                    completed = await loop.run_in_executor(
+                        self.request_executor, manager._download_coalesced_ranges,
+                        task, group, options)
+                for index in group:
+                    # Segments a coalesced request did not deliver are retried one by one
+                    ts_filename = completed.get(index) or await self._download_segment(
+                        session, task, index, options)
+                    if task.canceled_event.is_set() and ts_filename is None:
+                        continue
+                    await record(index, ts_filename)
+
+        background = [asyncio.create_task(self._report_progress(task))]
+        if task.variants:
+            background.append(asyncio.create_task(
+                self._check_variant_switch(task, pending, options, dispatch_lock)))
+        try:
+            workers = min(manager._get_segment_workers(), len(pending))
+            await self._run_workers([segment_worker() for _ in range(workers)])
+
+            while follower is not None and not task.canceled_event.is_set():
+                new_indexes = manager._take_live_segments(task, follower, segment_files)
+                if not new_indexes:
+                    if follower.finished:
+                        break
+                    await loop.run_in_executor(self.io_executor, follower.wait_for_segments, 0.5)
+                    continue
+                pending.extend(new_indexes)
+                workers = min(manager._get_segment_workers(), len(new_indexes))
+                await self._run_workers([segment_worker() for _ in range(workers)])
+        finally:
+            for background_task in background:
+                background_task.cancel()
+        manager._emit_progress(task.task_id, task.progress)
+
+    async def _check_variant_switch(self, task: "DownloadTask", pending: Deque[int],
+                                    options: "SegmentFetchOptions",
+                                    dispatch_lock: asyncio.Lock) -> None:
+        """Periodically let the thread engine's planner move pending segments to another variant"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(variant_selector.config.switch_check_interval)
+            if not task.variants or not pending:
+                continue
+            async with dispatch_lock:
+                try:
+                    await loop.run_in_executor(
+                        self.request_executor, self.manager._maybe_switch_variant,
+                        task, pending, options)
+                except Exception as e:
+                    logger.warning(f"Variant switch check failed for {task.name}: {e}")
+
+    @staticmethod
+    async def _run_workers(workers: List[Coroutine[Any, Any, None]]) -> None:
+        """Run worker coroutines, canceling the others as soon as one fails"""
+        tasks = [asyncio.ensure_future(worker) for worker in workers]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for worker_task in tasks:
+                worker_task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _report_progress(self, task: "DownloadTask", interval: float = 0.5) -> None:
+        """Periodically update the task speed and emit progress events"""
+        last_sample_time = time.time()
+        last_sample_bytes = task.progress["downloaded_bytes"]
+        while True:
+            await asyncio.sleep(interval)
+            current_time = time.time()
+            with task.lock:
+                downloaded_bytes = task.progress["downloaded_bytes"]
+                task.update_speed(
+                    downloaded_bytes - last_sample_bytes, current_time - last_sample_time)
+            last_sample_time = current_time
+            last_sample_bytes = downloaded_bytes
+            self.manager._emit_progress(task.task_id, task.progress)
+
+    async def _wait_while_paused(self, task: "DownloadTask") -> None:
+        """Wait until the task is resumed or canceled"""
+        while task.paused_event.is_set() and not task.canceled_event.is_set():
+            state_event = self.state_events[task.task_id]
+            # A state change after the check above schedules set() behind this clear()
+            state_event.clear()
+            await state_event.wait()
+
+    async def _download_segment(self, session: "aiohttp.ClientSession", task: "DownloadTask",
+                                i: int, options: "SegmentFetchOptions") -> Optional[str]:
+        """Download a single segment with retries.
+
+        Returns the path of the completed segment file, or ``None`` if the
+        segment failed or the task was canceled. As in the thread engine, an
+        interrupted attempt keeps its partial file and the next one asks for
+        the rest of the segment with ``Range`` and ``If-Range``, and large
+        resources are fetched as parallel ranges.
+        """
+        manager = self.manager
+        loop = asyncio.get_running_loop()
+
+        await self._wait_while_paused(task)
+        if task.canceled_event.is_set():
+            return None
+
+        ts_filename = os.path.join(options.temp_dir, f"segment_{i}.ts")
+        temp_filename = f"{ts_filename}.temp"
+        segment_url = manager._get_segment_url(task, i)
+        task.progress["current_file"] = f"Segment {i+1}/{task.segments}"
+        proxy: Optional[str] = None
+        if manager.settings:
+            proxy = str(manager.settings.get("advanced", "proxy", "")) or None
+
+        byte_range = manager._get_segment_range(task, i)
+        request_headers = options.headers
+        if byte_range is not None:
+            request_headers = dict(options.headers, Range=range_header(*byte_range))
+        # Validator of the response the partial file came from, sent as If-Range
+        validator: Optional[str] = None
+
+        for attempt in range(options.max_retries):
+            if task.canceled_event.is_set():
+                return None
+
+            if not manager.circuit_breaker_manager.can_execute(segment_url):
+                logger.warning(f"Circuit breaker is OPEN for {segment_url}, skipping attempt")
+                await asyncio.sleep(options.retry_delay * (attempt + 1))
+                continue
+
+            conn_timeout, read_timeout = manager.timeout_manager.get_timeouts(segment_url)
+            timeout = aiohttp.ClientTimeout(
+                total=None, sock_connect=conn_timeout, sock_read=read_timeout)
+            segment_start_time = time.time()
+            try:
+                # Rotated keys may need a (blocking, cached) key fetch
+                key_data = await loop.run_in_executor(
+                    self.io_executor, manager._get_segment_key, task, i, options)
+                partial = task.get_partial_segment(i)
+                resume_from = await loop.run_in_executor(
+                    self.io_executor, manager._partial_offset, partial, temp_filename,
+                    AES_BLOCK_SIZE if key_data else 1)
+                # Encrypted segments are fetched from one block earlier: that
+                # ciphertext block is the CBC IV of the rest
+                fetch_from = resume_from - AES_BLOCK_SIZE if key_data and resume_from else resume_from
+                attempt_headers = request_headers
+                if resume_from:
+                    attempt_headers = dict(options.headers, Range=(
+                        range_header(byte_range[0] + fetch_from, byte_range[1] - fetch_from)
+                        if byte_range is not None else range_header(fetch_from)))
+                    if validator is not None and partial is not None and \
+                            validator_checksum(validator) == partial.checksum:
+                        attempt_headers["If-Range"] = validator
+
+                split_size = 0
+                written = 0
+                async with session.get(segment_url, headers=attempt_headers,
+                                       timeout=timeout, proxy=proxy) as response:
+                    if response.status != 200 and not (
+                            (byte_range is not None or resume_from) and response.status == 206):
+                        if resume_from and response.status == 416:
+                            # The partial file does not fit the resource any more
+                            logger.warning(f"Cannot resume segment {i}, downloading it again")
+                            await loop.run_in_executor(self.io_executor, _remove_file, temp_filename)
+                        raise Exception(f"HTTP {response.status}: {response.reason}")
+
+                    resumed = bool(resume_from) and response.status == 206
+                    if resumed and partial is not None and validator_checksum(
+                            resume_validator(response.headers) or "") != partial.checksum:
+                        # Without If-Range support the server cannot tell us the resource changed
+                        logger.warning(f"Segment {i} changed since it was interrupted, downloading it again")
+                        await loop.run_in_executor(self.io_executor, _remove_file, temp_filename)
+                        continue
+                    validator = resume_validator(response.headers)
+                    if not resumed and partial is not None:
+                        # The partial file is about to be overwritten
+                        await loop.run_in_executor(
+                            self.io_executor, task.record_partial_segment, i, 0, 0)
+                    elif resumed:
+                        logger.debug(f"Resuming segment {i} from byte {resume_from}")
+
+                    total_size = response.content_length or 0
+                    if not resumed and byte_range is None and await loop.run_in_executor(
+                            self.io_executor, manager._should_split_download,
+                            task, i, response, total_size, options):
+                        # Only the headers were read; fetch the body as parallel ranges instead
+                        split_size = total_size
+                        response.close()
+                    else:
+                        trimmer: Optional[RangeTrimmer] = None
+                        if byte_range is not None and resumed:
+                            trimmer = RangeTrimmer(0, byte_range[1] - fetch_from)
+                        elif byte_range is not None:
+                            # A 200 answer ignored the Range header and starts at byte 0
+                            trimmer = RangeTrimmer(
+                                byte_range[0] if response.status == 200 else 0, byte_range[1])
+                        # CBC state is carried across chunks; a resumed download
+                        # takes its IV from the first block received
+                        decryptor = SegmentDecryptor(
+                            key_data, None if resumed else manager._get_segment_iv(task, i)
+                        ) if key_data else None
+
+                        f = await loop.run_in_executor(
+                            self.io_executor, open, temp_filename, "r+b" if resumed else "wb")
+                        try:
+                            if resumed:
+                                await loop.run_in_executor(self.io_executor, f.truncate, resume_from)
+                                await loop.run_in_executor(self.io_executor, f.seek, resume_from)
+                            written = await self._receive_segment(
+                                response, task, i, f, options, segment_url, trimmer, decryptor,
+                                validator, resume_from if resumed else 0)
+                        finally:
+                            await loop.run_in_executor(self.io_executor, f.close)
+
+                if split_size:
+                    if not await loop.run_in_executor(
+                            self.request_executor, manager._download_split_segment, task,
+                            segment_url, split_size, ts_filename, options, validator):
+                        if task.canceled_event.is_set():
+                            return None
+                        await asyncio.sleep(options.retry_delay * (attempt + 1))
+                        continue
+                    written = split_size
+                else:
+                    if task.canceled_event.is_set():
+                        if not await loop.run_in_executor(
+                                self.io_executor, manager._keep_partial_segment,
+                                task, i, temp_filename, validator):
+                            await loop.run_in_executor(self.io_executor, _remove_file, temp_filename)
+                        return None
+                    await loop.run_in_executor(self.io_executor, os.replace, temp_filename, ts_filename)
+
+                response_time = time.time() - segment_start_time
+                manager._record_segment_attempt(segment_url, attempt, response_time,
+                                                bytes_transferred=written)
+
+                accepted = await loop.run_in_executor(
+                    self.io_executor, manager._accept_segment, task, i, ts_filename, written)
+                if not accepted:
+                    continue
+
+                logger.debug(f"Successfully downloaded segment {i+1}/{task.segments}")
+                return ts_filename
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                manager._record_segment_attempt(
+                    segment_url, attempt, time.time() - segment_start_time, e)
+                if not await loop.run_in_executor(
+                        self.io_executor, manager._keep_partial_segment,
+                        task, i, temp_filename, validator):
+                    await loop.run_in_executor(self.io_executor, _remove_file, temp_filename)
+                logger.warning(
+                    f"Failed to download segment {i} (attempt {attempt+1}/{options.max_retries}): {e}")
+                await asyncio.sleep(options.retry_delay * (attempt + 1))
+
+        return None
+
+    async def _receive_segment(self, response: "aiohttp.ClientResponse", task: "DownloadTask",
+                               i: int, f: BinaryIO, options: "SegmentFetchOptions",
+                               segment_url: str, trimmer: Optional[RangeTrimmer],
+                               decryptor: Optional[SegmentDecryptor], validator: Optional[str],
+                               offset: int) -> int:
+        """Stream a segment response into its file, opened at ``offset``.
+
+        Only up to _WRITE_BUFFER_SIZE bytes are held in memory at a time. With
+        a ``validator`` the size written so far is recorded in the resume
+        journal every _PARTIAL_RECORD_BYTES. Returns the bytes written.
+        """
+        manager = self.manager
+        loop = asyncio.get_running_loop()
+        buffer = bytearray()
+        written = 0
+        recorded = 0
+        try:
+            async for chunk in response.content.iter_chunked(options.chunk_size):
+                await self._wait_while_paused(task)
+                if task.canceled_event.is_set():
+                    break
+                if trimmer is not None:
+                    if trimmer.done:
+                        break
+                    chunk = trimmer.trim(chunk)
+                    if not chunk:
+                        continue
+                buffer += decryptor.update(chunk) if decryptor else chunk
+                if len(buffer) >= _WRITE_BUFFER_SIZE:
+                    await loop.run_in_executor(self.io_executor, f.write, buffer)
+                    written += len(buffer)
+                    buffer.clear()
+                    if validator is not None and written - recorded >= _PARTIAL_RECORD_BYTES:
+                        recorded = written
+                        await loop.run_in_executor(
+                            self.io_executor, task.record_partial_segment,
+                            i, offset + written, validator_checksum(validator))
+                with task.lock:
+                    task.progress["downloaded_bytes"] += len(chunk)
+
+                throttle = manager.bandwidth_limiter.reserve(
+                    len(chunk), task.task_id, segment_url)
+                if throttle > 0:
+                    await asyncio.sleep(throttle)
+
+            if decryptor and not task.canceled_event.is_set():
+                buffer += decryptor.finalize()
+        finally:
+            # Write out what arrived, so an interrupted download resumes after it
+            if buffer:
+                await loop.run_in_executor(self.io_executor, f.write, buffer)
+                written += len(buffer)
+        return written
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,178 @@
+"""
+Bandwidth Limiter for VidTanium
+
+This module provides a hierarchical token bucket that caps download bandwidth
+globally and, optionally, per task and per host. Download loops charge every
+received chunk to the limiter; a chunk is charged to all buckets that apply to
+it at once and the caller sleeps for the longest resulting deficit, so
+concurrent segment downloads share the budget without being serialized.
+"""
+
+import time
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Any
+import logging
+
+from .host_key import host_key
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BandwidthLimiterConfig:
+    """Configuration for bandwidth limiter behavior"""
+    burst_seconds: float = 1.0      # Bucket capacity, in seconds of traffic at the limit
+    min_burst: int = 64 * 1024      # Minimum bucket capacity in bytes
+    max_wait: float = 5.0           # Longest single sleep, so limit changes apply quickly
+
+
+class TokenBucket:
+    """Token bucket that can go into debt.
+
+    ``reserve`` always takes the requested tokens and returns how long the
+    caller must wait for the balance to recover, which costs one short locked
+    update per chunk regardless of chunk rate.
+    """
+
+    def __init__(self, rate: float, config: Optional[BandwidthLimiterConfig] = None) -> None:
+        self.config = config or BandwidthLimiterConfig()
+        self.lock = threading.Lock()
+        self.rate = 0.0
+        self.capacity = 0.0
+        self.tokens = 0.0
+        self.updated_at = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate: float) -> None:
+        """Change the rate in bytes per second, keeping any current debt"""
+        with self.lock:
+            self._refill(time.monotonic())
+            was_unlimited = self.rate <= 0
+            self.rate = max(0.0, float(rate))
+            self.capacity = max(float(self.config.min_burst),
+                                self.rate * self.config.burst_seconds)
+            # A newly enabled limit starts with a full burst
+            self.tokens = self.capacity if was_unlimited else min(self.tokens, self.capacity)
+
+    def reserve(self, amount: int) -> float:
+        """Take ``amount`` tokens and return the seconds to wait before using them"""
+        with self.lock:
+            if self.rate <= 0:
+                return 0.0
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def _refill(self, now: float) -> None:
+        """Add tokens for the time elapsed since the last update; caller holds the lock"""
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+class BandwidthLimiter:
+    """Global, per-task and per-host bandwidth limits for download traffic"""
+
+    def __init__(self, config: Optional[BandwidthLimiterConfig] = None) -> None:
+        self.config = config or BandwidthLimiterConfig()
+        self.global_bucket = TokenBucket(0, self.config)
+        self.task_buckets: Dict[str, TokenBucket] = {}
+        self.host_buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.RLock()
+
+        # Statistics
+        self.throttled_bytes = 0
+        self.total_wait = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any limit is configured"""
+        return bool(self.global_bucket.rate > 0 or self.task_buckets or self.host_buckets)
+
+    def set_global_limit(self, bytes_per_second: Optional[int]) -> None:
+        """Set the limit for all downloads; 0 or ``None`` removes it"""
+        self.global_bucket.set_rate(bytes_per_second or 0)
+        logger.info(f"Global bandwidth limit set to {bytes_per_second} bytes/sec"
+                    if bytes_per_second else "Global bandwidth limit removed")
+
+    def set_task_limit(self, task_id: str, bytes_per_second: Optional[int]) -> None:
+        """Set the limit for one task; 0 or ``None`` removes it"""
+        with self.lock:
+            self._set_bucket(self.task_buckets, task_id, bytes_per_second)
+
+    def set_host_limit(self, host: str, bytes_per_second: Optional[int]) -> None:
+        """Set the limit for one host (or any URL on it); 0 or ``None`` removes it"""
+        with self.lock:
+            self._set_bucket(self.host_buckets, host_key(host), bytes_per_second)
+
+    def remove_task(self, task_id: str) -> None:
+        """Drop the limit of a finished or removed task"""
+        with self.lock:
+            self.task_buckets.pop(task_id, None)
+
+    def _set_bucket(self, buckets: Dict[str, TokenBucket], key: str,
+                    bytes_per_second: Optional[int]) -> None:
+        if not bytes_per_second:
+            buckets.pop(key, None)
+        elif key in buckets:
+            buckets[key].set_rate(bytes_per_second)
+        else:
+            buckets[key] = TokenBucket(bytes_per_second, self.config)
+
+    def reserve(self, amount: int, task_id: Optional[str] = None,
+                url: Optional[str] = None) -> float:
+        """Charge ``amount`` bytes to every applicable bucket.
+
+        Returns the seconds the caller should wait before reading more data;
+        callers that cannot block (the asyncio engine) sleep on their own.
+        """
+        if not self.enabled:
+            return 0.0
+
+        wait = self.global_bucket.reserve(amount)
+        task_bucket = self.task_buckets.get(task_id) if task_id else None
+        if task_bucket is not None:
+            wait = max(wait, task_bucket.reserve(amount))
+        if url and self.host_buckets:
+            host_bucket = self.host_buckets.get(host_key(url))
+            if host_bucket is not None:
+                wait = max(wait, host_bucket.reserve(amount))
+
+        wait = min(wait, self.config.max_wait)
+        if wait > 0:
+            with self.lock:
+                self.throttled_bytes += amount
+                self.total_wait += wait
+        return wait
+
+    def consume(self, amount: int, task_id: Optional[str] = None, url: Optional[str] = None,
+                cancel_event: Optional[threading.Event] = None) -> None:
+        """Charge ``amount`` bytes and block until they fit within the limits.
+
+        The wait ends early if ``cancel_event`` is set.
+        """
+        wait = self.reserve(amount, task_id, url)
+        if wait <= 0:
+            return
+        if cancel_event is not None:
+            cancel_event.wait(wait)
+        else:
+            time.sleep(wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get bandwidth limiter statistics"""
+        with self.lock:
+            return {
+                "global_limit": self.global_bucket.rate,
+                "task_limits": {task_id: bucket.rate for task_id, bucket in self.task_buckets.items()},
+                "host_limits": {host: bucket.rate for host, bucket in self.host_buckets.items()},
+                "throttled_bytes": self.throttled_bytes,
+                "total_wait": self.total_wait
+            }
+
+
+# Global bandwidth limiter instance
+bandwidth_limiter = BandwidthLimiter()
@@ -0,0 +1,100 @@
+"""
+Byte Range Helpers for VidTanium
+
+This module provides the small pieces shared by the download engines for
+fetching ``#EXT-X-BYTERANGE`` segments with HTTP ``Range`` requests: building
+the header, trimming a response to one range when a server ignores ``Range``
+and answers ``200``, and splitting one coalesced response back into the
+segments it covers. It also holds the validator helpers used to resume an
+interrupted segment download with ``Range`` and ``If-Range``.
+"""
+
+from typing import Iterable, Iterator, Mapping, Optional
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def range_header(offset: int, length: Optional[int] = None) -> str:
+    """Build a ``Range`` header value for ``length`` bytes starting at ``offset``
+
+    Without a ``length`` the range runs to the end of the resource.
+    """
+    if length is None:
+        return f"bytes={offset}-"
+    return f"bytes={offset}-{offset + length - 1}"
+
+
+def resume_validator(headers: Mapping[str, str]) -> Optional[str]:
+    """Get the validator of a response that can be sent in ``If-Range``
+
+    That is a strong ``ETag``, or else ``Last-Modified``; weak ETags are not
+    allowed in ``If-Range``.
+    """
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified") or None
+
+
+def validator_checksum(validator: str) -> int:
+    """Get the CRC-32 of a validator, as kept in the resume journal"""
+    return zlib.crc32(validator.encode("utf-8")) & 0xFFFFFFFF
+
+
+class RangeTrimmer:
+    """Trims a stream of chunks to ``length`` bytes after skipping ``skip`` bytes"""
+
+    def __init__(self, skip: int, length: int) -> None:
+        self.skip = skip
+        self.remaining = length
+
+    @property
+    def done(self) -> bool:
+        """Whether the whole range has been passed through"""
+        return self.remaining <= 0
+
+    def trim(self, chunk: bytes) -> bytes:
+        """Get the part of ``chunk`` that lies inside the range"""
+        if self.skip:
+            if len(chunk) <= self.skip:
+                self.skip -= len(chunk)
+                return b""
+            chunk = chunk[self.skip:]
+            self.skip = 0
+        if len(chunk) > self.remaining:
+            chunk = chunk[:self.remaining]
+        self.remaining -= len(chunk)
+        return chunk
+
+
+class ChunkSplitter:
+    """Splits one chunk stream into consecutive pieces of known lengths.
+
+    Used for coalesced range responses: each ``take`` yields exactly the bytes
+    of the next segment, carrying over whatever a chunk holds past its end.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self.chunks: Iterator[bytes] = iter(chunks)
+        self.leftover: Optional[bytes] = None
+
+    def take(self, length: int) -> Iterator[bytes]:
+        """Yield the next ``length`` bytes; stops early if the stream ends"""
+        remaining = length
+        chunk: Optional[bytes]
+        while remaining > 0:
+            if self.leftover:
+                chunk, self.leftover = self.leftover, None
+            else:
+                chunk = next(self.chunks, None)
+                if chunk is None:
+                    return
+                if not chunk:
+                    continue
+            if len(chunk) > remaining:
+                self.leftover = chunk[remaining:]
+                chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            yield chunk
@@ -13,6 +13,8 @@ from enum import Enum
 from collections import deque
 import logging
 
+from .host_key import DEFAULT_MAX_HOSTS, HostLRU, host_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -310,11 +312,17 @@ class CircuitBreaker:
 
 
 class CircuitBreakerManager:
-    """Manager for multiple circuit breakers"""
+    """Manager for per-host circuit breakers.
+
+    URLs passed to the manager are normalized with ``host_key``, so all
+    requests to one server share a breaker. At most ``max_hosts`` breakers are
+    kept; the least recently used are evicted.
+    """
     
-    def __init__(self, default_config: Optional[CircuitBreakerConfig] = None) -> None:
+    def __init__(self, default_config: Optional[CircuitBreakerConfig] = None,
+                 max_hosts: int = DEFAULT_MAX_HOSTS) -> None:
         self.default_config = default_config or CircuitBreakerConfig()
-        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self.circuit_breakers: HostLRU = HostLRU(max_hosts)
         self.host_configs: Dict[str, CircuitBreakerConfig] = {}
         self.lock = threading.RLock()
         
@@ -325,16 +333,17 @@ class CircuitBreakerManager:
         logger.info("Circuit breaker manager initialized")
     
     def get_circuit_breaker(self, host: str) -> CircuitBreaker:
-        """Get or create circuit breaker for host"""
+        """Get or create circuit breaker for a host or URL"""
+        host = host_key(host)
         with self.lock:
-            if host not in self.circuit_breakers:
-                config = self.host_configs.get(host, self.default_config)
-                self.circuit_breakers[host] = CircuitBreaker(host, config)
-            
-            return self.circuit_breakers[host]
+            return self.circuit_breakers.get_or_create(
+                host,
+                lambda: CircuitBreaker(host, self.host_configs.get(host, self.default_config))
+            )
     
     def configure_host(self, host: str, config: CircuitBreakerConfig) -> None:
         """Configure circuit breaker for specific host"""
+        host = host_key(host)
         with self.lock:
             self.host_configs[host] = config
             
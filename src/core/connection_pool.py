@@ -3,16 +3,24 @@ Enhanced HTTP Connection Pool Manager for VidTanium
 
 This module provides sophisticated connection pooling with per-host limits,
 connection reuse, health monitoring, and automatic cleanup capabilities.
+Each session is used by one caller at a time: callers acquire a per-host
+connection slot (waiting in FIFO order when the host is at its limit) and get
+a lease that is released in O(1). Sessions are created by the transport
+configured for the host: HTTP/1.1 by default, or HTTP/2 where all of a host's
+sessions multiplex their requests over one shared connection. Connections to
+a host can be opened ahead of the first request with ``prewarm``.
 """
 
+import socket
 import time
 import threading
 import weakref
 import logging
-from typing import Dict, Optional, Set, Tuple, Any, List
+from typing import Deque, Dict, Optional, Set, Tuple, Any, List
 from dataclasses import dataclass, field
-from urllib.parse import urlparse
 from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -20,6 +28,8 @@ from urllib3.poolmanager import PoolManager
 from urllib3.exceptions import MaxRetryError, TimeoutError as UrllibTimeoutError
 
 from .exceptions import NetworkException, ConnectionTimeoutException, ErrorContext
+from .host_key import host_key
+from .dns_cache import dns_cache
 from .resource_manager import register_for_cleanup, ResourceType
 
 logger = logging.getLogger(__name__)
@@ -48,6 +58,10 @@ class HostPoolConfig:
     backoff_factor: float = 0.3
     keep_alive_timeout: float = 300.0  # 5 minutes
     health_check_interval: float = 60.0  # 1 minute
+    acquire_timeout: float = 120.0  # Max wait for a free connection slot
+    # Transport creating the host's sessions: "http1", or "http2" to multiplex
+    # all requests over one connection (slots then bound concurrent streams)
+    transport: str = "http1"
 
 
 @dataclass
@@ -78,6 +92,69 @@ class ConnectionInfo:
         return self.session is other.session and self.host == other.host
 
 
+class HostConnectionSlots:
+    """Bounded connection slots for one host with FIFO-fair waiters"""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = max(1, limit)
+        self.in_use = 0
+        self.waiters: Deque[threading.Event] = deque()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take a slot, waiting behind earlier callers if none is free"""
+        with self.lock:
+            if not self.waiters and self.in_use < self.limit:
+                self.in_use += 1
+                return True
+            waiter = threading.Event()
+            self.waiters.append(waiter)
+
+        if waiter.wait(timeout):
+            return True
+
+        with self.lock:
+            # The slot may have been handed over right as the wait timed out
+            if waiter.is_set():
+                return True
+            self.waiters.remove(waiter)
+            return False
+
+    def release(self) -> None:
+        """Return a slot, handing it directly to the longest waiting caller"""
+        with self.lock:
+            self.in_use = max(0, self.in_use - 1)
+            self._grant_waiters()
+
+    def set_limit(self, limit: int) -> None:
+        """Change the number of slots, waking waiters if it grew"""
+        with self.lock:
+            self.limit = max(1, limit)
+            self._grant_waiters()
+
+    def _grant_waiters(self) -> None:
+        """Hand free slots to waiters in arrival order; caller holds the lock"""
+        while self.waiters and self.in_use < self.limit:
+            self.in_use += 1
+            self.waiters.popleft().set()
+
+
+@dataclass(eq=False)
+class ConnectionLease:
+    """Exclusive use of a pooled connection until it is released"""
+    connection: ConnectionInfo
+    slots: HostConnectionSlots
+    released: bool = False
+
+    @property
+    def session(self) -> requests.Session:
+        return self.connection.session
+
+    @property
+    def host(self) -> str:
+        return self.connection.host
+
+
 class EnhancedHTTPAdapter(HTTPAdapter):
     """Enhanced HTTP adapter with better connection management"""
     
@@ -112,6 +189,23 @@ class EnhancedHTTPAdapter(HTTPAdapter):
         return super().init_poolmanager(*args, **kwargs)
 
 
+class SessionTransport:
+    """Creates the sessions of pooled connections; the default uses HTTP/1.1"""
+
+    name = "http1"
+
+    def create_session(self, host: str, config: HostPoolConfig) -> requests.Session:
+        """Create a session for a host, one TCP connection per session"""
+        session = requests.Session()
+        adapter = EnhancedHTTPAdapter(config)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self) -> None:
+        """Release connections shared between sessions, if any"""
+
+
 class ConnectionPoolManager:
     """Enhanced connection pool manager with per-host limits and health monitoring"""
     
@@ -121,6 +215,11 @@ class ConnectionPoolManager:
         self.connection_pools: Dict[str, List[ConnectionInfo]] = defaultdict(list)
         self.active_connections: Dict[str, Set[ConnectionInfo]] = defaultdict(set)
         self.connection_stats: Dict[str, ConnectionStats] = defaultdict(ConnectionStats)
+        self.host_slots: Dict[str, HostConnectionSlots] = {}
+        # Outstanding leases by session id, for release_session()
+        self.leases: Dict[int, ConnectionLease] = {}
+        # Session transports by HostPoolConfig.transport name
+        self.transports: Dict[str, SessionTransport] = {"http1": SessionTransport()}
         
         # Thread safety
         self.lock = threading.RLock()
@@ -165,106 +264,219 @@ class ConnectionPoolManager:
     
     def configure_host(self, host: str, config: HostPoolConfig) -> None:
         """Configure specific settings for a host"""
+        host = host_key(host)
         with self.lock:
             self.host_configs[host] = config
+            if host in self.host_slots:
+                self.host_slots[host].set_limit(config.max_connections_per_host)
             logger.debug(f"Configured connection pool for host: {host}")
     
-    def get_session(self, url: str, context: Optional[ErrorContext] = None) -> requests.Session:
-        """Get a session for the specified URL with connection pooling"""
-        parsed_url = urlparse(url)
-        host = f"{parsed_url.scheme}://{parsed_url.netloc}"
-        
+    def set_default_config(self, config: HostPoolConfig) -> None:
+        """Replace the configuration used for hosts without their own settings"""
+        with self.lock:
+            self.default_config = config
+            for host, slots in self.host_slots.items():
+                if host not in self.host_configs:
+                    slots.set_limit(config.max_connections_per_host)
+    
+    def register_transport(self, transport: SessionTransport) -> None:
+        """Make a transport selectable through ``HostPoolConfig.transport``"""
+        with self.lock:
+            self.transports[transport.name] = transport
+
+    def _get_transport(self, name: str) -> SessionTransport:
+        """Get a transport by name, loading the optional HTTP/2 transport on first use"""
+        with self.lock:
+            transport = self.transports.get(name)
+            if transport is not None:
+                return transport
+
+            if name == "http2":
+                from .http2_transport import HTTP2Transport, HTTPX_AVAILABLE
+                if HTTPX_AVAILABLE:
+                    transport = HTTP2Transport()
+                else:
+                    logger.warning("HTTP/2 transport requires httpx[http2], using HTTP/1.1")
+            else:
+                logger.warning(f"Unknown transport '{name}', using HTTP/1.1")
+
+            # Unavailable transports fall back once instead of warning per connection
+            self.transports[name] = transport or self.transports["http1"]
+            return self.transports[name]
+
+    def acquire(self, url: str, context: Optional[ErrorContext] = None,
+                timeout: Optional[float] = None) -> ConnectionLease:
+        """Acquire exclusive use of a pooled session for the URL's host.
+
+        Blocks while the host is at ``max_connections_per_host``; waiters are
+        served in arrival order. Raises ``ConnectionTimeoutException`` if no
+        slot frees up within ``timeout`` (default: the host's
+        ``acquire_timeout``).
+        """
+        host = host_key(url)
+        with self.lock:
+            config = self.host_configs.get(host, self.default_config)
+            slots = self.host_slots.get(host)
+            if slots is None:
+                slots = HostConnectionSlots(config.max_connections_per_host)
+                self.host_slots[host] = slots
+
+        wait_timeout = config.acquire_timeout if timeout is None else timeout
+        if not slots.acquire(wait_timeout):
+            logger.warning(f"No free connection slot for {host} after {wait_timeout:.1f}s")
+            raise ConnectionTimeoutException(url, int(wait_timeout), context=context)
+
+        try:
+            with self.lock:
+                connection_info = self._get_or_create_connection(host, context)
+                
+                # Update usage statistics
+                connection_info.stats.last_used = time.time()
+                connection_info.stats.requests_count += 1
+                
+                lease = ConnectionLease(connection_info, slots)
+                self.active_connections[host].add(connection_info)
+                self.leases[id(connection_info.session)] = lease
+                return lease
+        except BaseException:
+            slots.release()
+            raise
+    
+    def release(self, lease: ConnectionLease, success: bool = True,
+                bytes_transferred: int = 0, response_time: float = 0.0,
+                error: Optional[BaseException] = None) -> None:
+        """Return a leased session to the pool and free its connection slot.
+
+        ``error`` is the exception the request failed with, if any; cached
+        DNS results of the host are dropped only when it could not connect.
+        """
         with self.lock:
-            # Get or create connection
-            connection_info = self._get_or_create_connection(host, context)
+            if lease.released:
+                return
+            lease.released = True
+            connection_info = lease.connection
+            if self.leases.get(id(connection_info.session)) is lease:
+                del self.leases[id(connection_info.session)]
+            
+            # Update statistics
+            connection_info.stats.bytes_transferred += bytes_transferred
+            if not success:
+                connection_info.stats.errors_count += 1
+                connection_info.stats.is_healthy = False
             
-            # Update usage statistics
-            connection_info.stats.last_used = time.time()
-            connection_info.stats.requests_count += 1
+            # Update average response time
+            if response_time > 0:
+                current_avg = connection_info.stats.avg_response_time
+                count = connection_info.stats.requests_count
+                connection_info.stats.avg_response_time = (
+                    (current_avg * (count - 1) + response_time) / count
+                )
             
-            # Add to active connections
-            self.active_connections[host].add(connection_info)
+            # Remove from active connections
+            self.active_connections[lease.host].discard(connection_info)
+            if isinstance(error, (requests.exceptions.ConnectionError, socket.gaierror)):
+                # The host may have moved; resolve it again for the next connection
+                hostname = urlsplit(lease.host).hostname
+                if hostname:
+                    dns_cache.invalidate(hostname)
             
-            return connection_info.session
+            # Return to pool if healthy and not expired
+            if connection_info.stats.is_healthy and not connection_info.is_expired():
+                self.connection_pools[lease.host].append(connection_info)
+            else:
+                self._close_connection(connection_info)
+        
+        lease.slots.release()
+    
+    def prewarm(self, url: str, count: int, context: Optional[ErrorContext] = None) -> int:
+        """Have ``count`` connections to the URL's host open before they are needed.
+
+        Every new connection sends a ``HEAD`` request for ``url`` in parallel,
+        paying for DNS, TCP and TLS setup up front; idle pooled connections
+        count towards ``count`` and an HTTP/2 host needs only one. All
+        connections are then returned to the pool for the segment workers.
+        Returns the number of connections opened.
+        """
+        host = host_key(url)
+        with self.lock:
+            config = self.host_configs.get(host, self.default_config)
+            if self._get_transport(config.transport).name == "http2":
+                count = min(count, 1)
+        count = min(count, config.max_connections_per_host)
+        if count <= 0:
+            return 0
+
+        def warm_one() -> Tuple[Optional[ConnectionLease], bool]:
+            try:
+                lease = self.acquire(url, context, timeout=config.connection_timeout)
+            except ConnectionTimeoutException:
+                return None, False
+            if lease.connection.stats.requests_count > 1:
+                # Reused an idle connection that is already open
+                return lease, False
+            try:
+                lease.session.head(url, allow_redirects=False,
+                                   timeout=(config.connection_timeout, config.read_timeout))
+            except requests.exceptions.RequestException as e:
+                logger.debug(f"Pre-warming a connection to {host} failed: {e}")
+                self.release(lease, success=False, error=e)
+                return None, False
+            return lease, True
+
+        # Leases are held until all workers finish so each one gets its own connection
+        with ThreadPoolExecutor(max_workers=count, thread_name_prefix="VidTanium-Prewarm") as executor:
+            results = list(executor.map(lambda _: warm_one(), range(count)))
+
+        for lease, _ in results:
+            if lease is not None:
+                self.release(lease, success=True)
+        opened = sum(1 for _, new in results if new)
+        logger.debug(f"Pre-warmed {opened} new connections to {host}")
+        return opened
+
+    def get_session(self, url: str, context: Optional[ErrorContext] = None) -> requests.Session:
+        """Get a session for the specified URL with connection pooling.
+
+        The session must be returned with ``release_session``; prefer
+        ``acquire``/``release``, which avoid the lease lookup.
+        """
+        return self.acquire(url, context).session
     
     def release_session(self, session: requests.Session, url: str, 
                        success: bool = True, bytes_transferred: int = 0,
                        response_time: float = 0.0) -> None:
-        """Release a session back to the pool"""
-        parsed_url = urlparse(url)
-        host = f"{parsed_url.scheme}://{parsed_url.netloc}"
-        
+        """Release a session obtained from ``get_session`` back to the pool"""
         with self.lock:
-            # Find the connection info
-            connection_info = None
-            for conn in self.active_connections[host]:
-                if conn.session is session:
-                    connection_info = conn
-                    break
-            
-            if connection_info:
-                # Update statistics
-                connection_info.stats.bytes_transferred += bytes_transferred
-                if not success:
-                    connection_info.stats.errors_count += 1
-                    connection_info.stats.is_healthy = False
-                
-                # Update average response time
-                if response_time > 0:
-                    current_avg = connection_info.stats.avg_response_time
-                    count = connection_info.stats.requests_count
-                    connection_info.stats.avg_response_time = (
-                        (current_avg * (count - 1) + response_time) / count
-                    )
-                
-                # Remove from active connections
-                self.active_connections[host].discard(connection_info)
-                
-                # Return to pool if healthy and not expired
-                if connection_info.stats.is_healthy and not connection_info.is_expired():
-                    self.connection_pools[host].append(connection_info)
-                else:
-                    self._close_connection(connection_info)
+            lease = self.leases.get(id(session))
+        
+        if lease is not None and lease.session is session:
+            self.release(lease, success, bytes_transferred, response_time)
     
     def _get_or_create_connection(self, host: str, context: Optional[ErrorContext]) -> ConnectionInfo:
-        """Get existing connection or create new one"""
-        # Try to get from pool first
+        """Get an idle pooled connection or create a new one.
+
+        The caller holds a connection slot for the host, so the number of
+        connections in use never exceeds the host's limit.
+        """
+        # Reuse the most recently released connection, whose socket is most
+        # likely still alive
         pool = self.connection_pools[host]
         while pool:
-            connection_info = pool.pop(0)
+            connection_info = pool.pop()
             if not connection_info.is_expired() and connection_info.stats.is_healthy:
                 return connection_info
             else:
                 self._close_connection(connection_info)
         
-        # Check connection limits
         config = self.host_configs.get(host, self.default_config)
-        active_count = len(self.active_connections[host])
-        total_count = active_count + len(pool)
-        
-        if total_count >= config.max_connections_per_host:
-            # Wait for a connection to become available or reuse oldest
-            if pool:
-                return pool.pop(0)
-            elif self.active_connections[host]:
-                # Force reuse of an active connection (not ideal but prevents deadlock)
-                logger.warning(f"Connection limit reached for {host}, reusing active connection")
-                return next(iter(self.active_connections[host]))
-        
-        # Create new connection
         return self._create_new_connection(host, config, context)
     
     def _create_new_connection(self, host: str, config: HostPoolConfig, 
                              context: Optional[ErrorContext]) -> ConnectionInfo:
         """Create a new connection for the host"""
         try:
-            session = requests.Session()
-            
-            # Configure session with enhanced adapter
-            adapter = EnhancedHTTPAdapter(config)
-            session.mount('http://', adapter)
-            session.mount('https://', adapter)
-            
+            session = self._get_transport(config.transport).create_session(host, config)
+
             # Set timeouts (sessions don't have timeout attribute, it's passed to requests)
             # Store timeout in connection info for later use
             
@@ -358,6 +570,12 @@ class ConnectionPoolManager:
                 for connection_info in active_set:
                     self._close_connection(connection_info)
                 active_set.clear()
+
+            for transport in set(self.transports.values()):
+                try:
+                    transport.close()
+                except Exception as e:
+                    logger.warning(f"Error closing {transport.name} transport: {e}")
         
         logger.info("All connections cleaned up")
     
@@ -372,12 +590,17 @@ class ConnectionPoolManager:
             for host in self.connection_pools:
                 pool_size = len(self.connection_pools[host])
                 active_size = len(self.active_connections[host])
+                slots = self.host_slots.get(host)
+                config = self.host_configs.get(host, self.default_config)
 
                 if isinstance(stats["hosts"], dict):
                     stats["hosts"][host] = {
                         "pooled_connections": pool_size,
                         "active_connections": active_size,
-                        "total_connections": pool_size + active_size
+                        "total_connections": pool_size + active_size,
+                        "connection_limit": slots.limit if slots else None,
+                        "waiting_requests": len(slots.waiters) if slots else 0,
+                        "transport": self._get_transport(config.transport).name
                     }
             
             return stats
@@ -1,6 +1,12 @@
+from typing import Optional, Union
+
 from loguru import logger
 from Crypto.Cipher import AES
 
+AES_BLOCK_SIZE = 16
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
 
 def decrypt_data(data: bytes, key: bytes, iv: bytes, last_block: bool = False) -> bytes:
     """
@@ -63,3 +69,129 @@ def decrypt_data(data: bytes, key: bytes, iv: bytes, last_block: bool = False) -
             if pad_len != 0:
                 return data + b'\x00' * (16 - pad_len)
             return data
+
+
+def block_boundary(offset: int) -> int:
+    """Round a byte offset down to the start of its AES block"""
+    return offset - offset % AES_BLOCK_SIZE
+
+
+def derive_iv(iv: Optional[str], sequence_number: int) -> bytes:
+    """
+    Derive the AES-128 IV of an HLS segment
+
+    Args:
+        iv (Optional[str]): Hexadecimal ``IV`` attribute of ``#EXT-X-KEY``
+        sequence_number (int): Media sequence number of the segment
+
+    Returns:
+        bytes: 16-byte initialization vector
+    """
+    if iv:
+        hex_iv = iv[2:] if iv.lower().startswith("0x") else iv
+        return bytes.fromhex(hex_iv.rjust(AES_BLOCK_SIZE * 2, "0"))
+    # Without an explicit IV the media sequence number is used as a
+    # big-endian 128-bit integer
+    return sequence_number.to_bytes(AES_BLOCK_SIZE, "big")
+
+
+class SegmentDecryptor:
+    """
+    Streaming AES-CBC decryptor for one encrypted media segment
+
+    Keeps the CBC chain across ``update`` calls so chunks of any size can be
+    fed as they arrive. Only the undecrypted tail (at most one block) is held
+    back; PKCS7 padding is stripped once in ``finalize``.
+
+    Without an ``iv`` the decryptor resumes a segment in the middle: in CBC
+    mode every block is chained to the ciphertext block before it, so the
+    first block fed is taken as the IV and only the blocks after it are
+    decrypted. Fetch the ciphertext from one block before the resume offset.
+    """
+
+    def __init__(self, key: bytes, iv: Optional[bytes] = None) -> None:
+        if len(key) not in [16, 24, 32]:
+            raise ValueError(f"Invalid key size: {len(key)}. Must be 16, 24, or 32 bytes.")
+        if iv is not None and len(iv) != AES_BLOCK_SIZE:
+            raise ValueError(f"Invalid IV size: {len(iv)}. Must be 16 bytes.")
+
+        self._key = key
+        self._cipher = AES.new(key, AES.MODE_CBC, iv) if iv is not None else None
+        self._chain_block = bytearray()
+        self._tail = bytearray()
+        self._output = bytearray()
+
+    def update(self, data: BytesLike) -> memoryview:
+        """
+        Decrypt the next chunk of ciphertext
+
+        Args:
+            data (BytesLike): Ciphertext chunk of any length
+
+        Returns:
+            memoryview: Decrypted bytes; only valid until the next call
+        """
+        view = memoryview(data)
+        if self._cipher is None:
+            # Resuming: the previous ciphertext block is the IV of the next one
+            needed = AES_BLOCK_SIZE - len(self._chain_block)
+            self._chain_block += view[:needed]
+            view = view[needed:]
+            if len(self._chain_block) < AES_BLOCK_SIZE:
+                return memoryview(b"")
+            self._cipher = AES.new(self._key, AES.MODE_CBC, bytes(self._chain_block))
+
+        available = len(self._tail) + len(view)
+        # Always keep the last block back for finalize(), which owns padding
+        ready = ((available - 1) // AES_BLOCK_SIZE) * AES_BLOCK_SIZE if available else 0
+        if ready <= 0:
+            self._tail += view
+            return memoryview(b"")
+
+        if len(self._output) < ready:
+            self._output = bytearray(ready)
+        out = memoryview(self._output)
+
+        written = 0
+        if self._tail:
+            # Complete the held-back block with the head of this chunk
+            needed = AES_BLOCK_SIZE - len(self._tail)
+            self._tail += view[:needed]
+            view = view[needed:]
+            self._cipher.decrypt(self._tail, output=out[:AES_BLOCK_SIZE])
+            self._tail.clear()
+            written = AES_BLOCK_SIZE
+
+        direct = ready - written
+        if direct:
+            self._cipher.decrypt(view[:direct], output=out[written:ready])
+        self._tail += view[direct:]
+        return out[:ready]
+
+    def finalize(self) -> bytes:
+        """
+        Decrypt the held-back block and strip PKCS7 padding
+
+        Returns:
+            bytes: Final plaintext bytes of the segment
+
+        Raises:
+            ValueError: If the ciphertext is not a whole number of blocks
+        """
+        if not self._tail:
+            return b""
+        if len(self._tail) != AES_BLOCK_SIZE:
+            raise ValueError(
+                f"Encrypted segment is truncated: {len(self._tail)} trailing bytes")
+        if self._cipher is None:
+            raise ValueError("Encrypted segment ended before its chaining block")
+
+        last_block = self._cipher.decrypt(bytes(self._tail))
+        self._tail.clear()
+
+        pad_len = last_block[-1]
+        if 0 < pad_len <= AES_BLOCK_SIZE and last_block[-pad_len:] == bytes([pad_len]) * pad_len:
+            return last_block[:-pad_len]
+
+        logger.warning("Segment has no valid PKCS7 padding, keeping final block as-is")
+        return last_block
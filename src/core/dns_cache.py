@@ -0,0 +1,127 @@
+"""
+DNS Cache for VidTanium
+
+This module caches host name resolution for the whole process. Once installed
+it wraps ``socket.getaddrinfo``, which every new HTTP connection (requests,
+urllib3 and aiohttp alike) goes through, so opening more connections to a CDN
+host no longer repeats the lookup. Entries expire after the configured TTL and
+are dropped early when connections to the host fail, so hosts that move to
+new addresses are re-resolved. As this affects every library in the process,
+the download manager installs it only when ``network.dns_cache_enabled`` is set.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import socket
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+AddressInfo = List[Tuple[Any, ...]]
+CacheKey = Tuple[Any, ...]
+
+
+@dataclass
+class DNSCacheEntry:
+    """Resolved addresses of one lookup"""
+    addresses: AddressInfo
+    expires_at: float
+
+
+class DNSCache:
+    """TTL-bounded cache in front of ``socket.getaddrinfo``"""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.entries: "OrderedDict[CacheKey, DNSCacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+        self._resolver: Callable[..., AddressInfo] = socket.getaddrinfo
+        self._installed = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def set_ttl(self, ttl: float) -> None:
+        """Change how long lookups are cached; 0 disables caching"""
+        with self.lock:
+            self.ttl = max(0.0, ttl)
+            if not self.enabled:
+                self.entries.clear()
+
+    def resolve(self, host: Any, port: Any, family: int = 0, type: int = 0,
+                proto: int = 0, flags: int = 0) -> AddressInfo:
+        """``socket.getaddrinfo`` with cached results"""
+        if not self.enabled or not isinstance(host, (str, bytes)):
+            return self._resolver(host, port, family, type, proto, flags)
+
+        key = (host.lower(), port, family, type, proto, flags)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return list(entry.addresses)
+            self.misses += 1
+
+        # Resolve outside the lock so slow lookups do not block other hosts
+        addresses = self._resolver(host, port, family, type, proto, flags)
+        with self.lock:
+            self.entries[key] = DNSCacheEntry(list(addresses), now + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return addresses
+
+    def invalidate(self, host: Optional[str] = None) -> None:
+        """Forget the cached addresses of a host, or of all hosts"""
+        with self.lock:
+            if host is None:
+                self.entries.clear()
+                return
+            name = host.lower()
+            for key in [k for k in self.entries
+                        if (k[0].decode() if isinstance(k[0], bytes) else k[0]) == name]:
+                del self.entries[key]
+
+    def install(self) -> None:
+        """Route ``socket.getaddrinfo`` through the cache"""
+        with self.lock:
+            if self._installed:
+                return
+            self._resolver = socket.getaddrinfo
+            socket.getaddrinfo = self.resolve
+            self._installed = True
+            logger.debug(f"DNS cache installed (ttl={self.ttl:.0f}s)")
+
+    def uninstall(self) -> None:
+        """Restore the original ``socket.getaddrinfo``"""
+        with self.lock:
+            if not self._installed:
+                return
+            socket.getaddrinfo = self._resolver
+            self._installed = False
+            self.entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+# Global DNS cache instance
+dns_cache = DNSCache()
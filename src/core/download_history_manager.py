@@ -1,13 +1,18 @@
 """
 Download History Manager for VidTanium
 Provides comprehensive download history tracking with search, filtering, and management
+
+The database is kept open on one connection in WAL mode. New and updated
+entries are queued and written behind by a writer thread, many per
+transaction; reads write the queue out first, so they always see them.
 """
 
 import time
 import json
 import sqlite3
+import atexit
 import threading
-from typing import Dict, List, Optional, Any, Tuple, Callable
+from typing import Dict, List, Optional, Any, Set, Tuple, Callable
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 from pathlib import Path
@@ -134,15 +139,56 @@ class HistoryStatistics:
     common_failure_reasons: List[Tuple[str, int]]
 
 
+_INSERT_ENTRY_SQL = """
+    INSERT OR REPLACE INTO download_history (
+        entry_id, task_name, original_url, output_file, file_size,
+        status, start_time, end_time, duration, average_speed,
+        peak_speed, segments_total, segments_completed, retry_count,
+        error_message, metadata, tags
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_UPDATE_ENTRY_SQL = """
+    UPDATE download_history SET
+        task_name = ?, original_url = ?, output_file = ?, file_size = ?,
+        status = ?, start_time = ?, end_time = ?, duration = ?,
+        average_speed = ?, peak_speed = ?, segments_total = ?,
+        segments_completed = ?, retry_count = ?, error_message = ?
+    WHERE entry_id = ?
+"""
+
+_SELECT_ENTRY_SQL = "SELECT * FROM download_history WHERE entry_id = ?"
+_ENTRY_EXISTS_SQL = "SELECT 1 FROM download_history WHERE entry_id = ?"
+_DELETE_ENTRY_SQL = "DELETE FROM download_history WHERE entry_id = ?"
+
+
 class DownloadHistoryManager:
     """Comprehensive download history management system"""
     
-    def __init__(self, db_path: Optional[str] = None) -> None:
+    def __init__(self, db_path: Optional[str] = None, flush_interval: float = 1.0,
+                 max_batch: int = 256, max_retries: int = 5) -> None:
         self.db_path = db_path or "download_history.db"
+        # Queued writes are committed after at most this many seconds, or once
+        # max_batch of them are waiting
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        # Times in a row a batch is queued again after an OperationalError
+        # before its writes are tried one at a time
+        self.max_retries = max(0, max_retries)
+        self._failed_flushes = 0
+        # Guards the connection
         self.lock = threading.RLock()
         self.callbacks: List[Callable[[DownloadHistoryEntry], None]] = []
-        
+
+        # Write-behind queue of (entry ID, statement, parameters), in order
+        self._pending: List[Tuple[str, str, Tuple[Any, ...]]] = []
+        self._pending_ids: Set[str] = set()
+        self._pending_cond = threading.Condition(threading.Lock())
+        self._writer_thread: Optional[threading.Thread] = None
+        self._closed = False
+
         # Initialize database
+        self._connection = self._connect()
         self._init_database()
         
         # Cache for frequent queries
@@ -150,10 +196,23 @@ class DownloadHistoryManager:
         self._cache_timestamp = 0.0
         self._cache_ttl = 300.0  # 5 minutes
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open the long-lived database connection
+
+        The statements are constants, so sqlite3's per-connection statement
+        cache prepares each of them once.
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers proceed during a write; NORMAL syncs at checkpoints
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
     def _init_database(self) -> None:
         """Initialize SQLite database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.lock, self._connection as conn:
                 conn.execute("""
                     CREATE TABLE IF NOT EXISTS download_history (
                         entry_id TEXT PRIMARY KEY,
@@ -183,7 +242,6 @@ class DownloadHistoryManager:
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_task_name ON download_history(task_name)")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_file_size ON download_history(file_size)")
                 
-                conn.commit()
                 logger.info(f"Download history database initialized: {self.db_path}")
                 
         except Exception as e:
@@ -191,74 +249,200 @@ class DownloadHistoryManager:
             raise
     
     def add_entry(self, entry: DownloadHistoryEntry) -> bool:
-        """Add new history entry"""
+        """Add new history entry
+
+        The entry is queued and committed by the writer thread.
+        """
         try:
-            with self.lock:
-                with sqlite3.connect(self.db_path) as conn:
-                    conn.execute("""
-                        INSERT OR REPLACE INTO download_history (
-                            entry_id, task_name, original_url, output_file, file_size,
-                            status, start_time, end_time, duration, average_speed,
-                            peak_speed, segments_total, segments_completed, retry_count,
-                            error_message, metadata, tags
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        entry.entry_id, entry.task_name, entry.original_url,
-                        entry.output_file, entry.file_size, entry.status.value,
-                        entry.start_time, entry.end_time, entry.duration,
-                        entry.average_speed, entry.peak_speed, entry.segments_total,
-                        entry.segments_completed, entry.retry_count, entry.error_message,
-                        json.dumps(entry.metadata), json.dumps(entry.tags)
-                    ))
-                    conn.commit()
-                
-                # Invalidate cache
-                self._stats_cache = None
-                
-                # Trigger callbacks
-                self._trigger_callbacks(entry)
-                
-                logger.debug(f"Added history entry: {entry.task_name}")
-                return True
-                
+            self._enqueue(entry.entry_id, _INSERT_ENTRY_SQL, (
+                entry.entry_id, entry.task_name, entry.original_url,
+                entry.output_file, entry.file_size, entry.status.value,
+                entry.start_time, entry.end_time, entry.duration,
+                entry.average_speed, entry.peak_speed, entry.segments_total,
+                entry.segments_completed, entry.retry_count, entry.error_message,
+                json.dumps(entry.metadata), json.dumps(entry.tags)
+            ))
+
+            # Invalidate cache
+            self._stats_cache = None
+
+            # Trigger callbacks
+            self._trigger_callbacks(entry)
+
+            logger.debug(f"Added history entry: {entry.task_name}")
+            return True
+
         except Exception as e:
             logger.error(f"Failed to add history entry: {e}")
             return False
 
     def update_entry(self, entry: DownloadHistoryEntry) -> bool:
-        """Update an existing history entry"""
+        """Update an existing history entry
+
+        The update is queued and committed by the writer thread.
+        """
         try:
-            with self.lock:
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.execute("""
-                        UPDATE download_history SET
-                            task_name = ?, original_url = ?, output_file = ?, file_size = ?,
-                            status = ?, start_time = ?, end_time = ?, duration = ?,
-                            average_speed = ?, peak_speed = ?, segments_total = ?,
-                            segments_completed = ?, retry_count = ?, error_message = ?
-                        WHERE entry_id = ?
-                    """, (
-                        entry.task_name, entry.original_url, entry.output_file, str(entry.file_size),
-                        entry.status.value, str(entry.start_time), str(entry.end_time), str(entry.duration),
-                        str(entry.average_speed), str(entry.peak_speed), str(entry.segments_total),
-                        str(entry.segments_completed), str(entry.retry_count), entry.error_message,
-                        entry.entry_id
-                    ))
-
-                    conn.commit()
+            if not self._entry_exists(entry.entry_id):
+                logger.warning(f"No entry found with ID: {entry.entry_id}")
+                return False
 
-                    if cursor.rowcount > 0:
-                        self._trigger_callbacks(entry)
-                        logger.debug(f"Updated history entry: {entry.task_name}")
-                        return True
-                    else:
-                        logger.warning(f"No entry found with ID: {entry.entry_id}")
-                        return False
+            self._enqueue(entry.entry_id, _UPDATE_ENTRY_SQL, (
+                entry.task_name, entry.original_url, entry.output_file, entry.file_size,
+                entry.status.value, entry.start_time, entry.end_time, entry.duration,
+                entry.average_speed, entry.peak_speed, entry.segments_total,
+                entry.segments_completed, entry.retry_count, entry.error_message,
+                entry.entry_id
+            ))
+
+            self._stats_cache = None
+            self._trigger_callbacks(entry)
+            logger.debug(f"Updated history entry: {entry.task_name}")
+            return True
 
         except Exception as e:
             logger.error(f"Failed to update history entry: {e}")
             return False
 
+    def _entry_exists(self, entry_id: str) -> bool:
+        """Check whether an entry is stored or waiting to be written"""
+        with self._pending_cond:
+            if entry_id in self._pending_ids:
+                return True
+        with self.lock:
+            return self._connection.execute(_ENTRY_EXISTS_SQL, (entry_id,)).fetchone() is not None
+
+    def _enqueue(self, entry_id: str, statement: str, params: Tuple[Any, ...]) -> None:
+        """Queue a write for the writer thread, starting it if needed"""
+        with self._pending_cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("History database is closed")
+            self._pending.append((entry_id, statement, params))
+            self._pending_ids.add(entry_id)
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(
+                    target=self._writer_loop, name="VidTanium-HistoryWriter", daemon=True)
+                self._writer_thread.start()
+            elif len(self._pending) >= self.max_batch:
+                self._pending_cond.notify()
+
+    def _writer_loop(self) -> None:
+        """Commit queued writes in batches; exits once the queue is empty
+
+        A batch queued again by ``flush`` is retried after ``flush_interval``;
+        once the manager is closed, ``close`` makes the last attempt.
+        """
+        failed = False
+        while True:
+            with self._pending_cond:
+                # Let more writes join the batch
+                deadline = time.monotonic() + self.flush_interval
+                while (failed or len(self._pending) < self.max_batch) and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._pending_cond.wait(remaining)
+
+            failed = self.flush() == 0
+
+            with self._pending_cond:
+                if not self._pending or (failed and self._closed):
+                    self._writer_thread = None
+                    return
+
+    def flush(self) -> int:
+        """Commit all queued writes in one transaction
+
+        If the transaction fails with an ``OperationalError``, such as a
+        locked database, the writes are queued again ahead of any newer ones,
+        up to ``max_retries`` times in a row. On any other error, or once the
+        retries are used up, each write is committed on its own and the ones
+        that still fail are dropped.
+
+        Returns:
+            int: Number of writes committed
+        """
+        with self.lock:
+            with self._pending_cond:
+                batch, self._pending = self._pending, []
+                self._pending_ids = set()
+            if not batch:
+                return 0
+
+            try:
+                with self._connection as conn:
+                    for _, statement, params in batch:
+                        conn.execute(statement, params)
+            except sqlite3.OperationalError as e:
+                if self._failed_flushes < self.max_retries:
+                    self._failed_flushes += 1
+                    logger.error(f"Failed to write {len(batch)} history changes, will retry: {e}")
+                    with self._pending_cond:
+                        self._pending[:0] = batch
+                        self._pending_ids.update(entry_id for entry_id, _, _ in batch)
+                    return 0
+                logger.error(f"Failed to write {len(batch)} history changes after "
+                             f"{self._failed_flushes} retries, writing them one at a time: {e}")
+                written = self._write_each(batch)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write {len(batch)} history changes, "
+                             f"writing them one at a time: {e}")
+                written = self._write_each(batch)
+            else:
+                written = len(batch)
+                logger.debug(f"Wrote {written} history changes")
+
+            self._failed_flushes = 0
+            if written:
+                self._stats_cache = None
+            return written
+
+    def _write_each(self, batch: List[Tuple[str, str, Tuple[Any, ...]]]) -> int:
+        """Commit writes one per transaction, dropping the ones that fail
+
+        Returns:
+            int: Number of writes committed
+        """
+        written = 0
+        for entry_id, statement, params in batch:
+            try:
+                with self._connection as conn:
+                    conn.execute(statement, params)
+            except sqlite3.Error as e:
+                logger.error(f"Dropping history change of entry {entry_id}: {e}")
+                continue
+            written += 1
+        return written
+
+    def close(self) -> None:
+        """Write queued entries and close the database"""
+        with self._pending_cond:
+            if self._closed:
+                return
+            self._closed = True
+            writer = self._writer_thread
+            self._pending_cond.notify_all()
+        if writer is not None:
+            writer.join(timeout=5.0)
+            if writer.is_alive():
+                logger.warning("History writer did not finish in time, writing the queue directly")
+
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to write queued history changes: {e}")
+        finally:
+            with self.lock:
+                with self._pending_cond:
+                    lost = len(self._pending)
+                    self._pending = []
+                    self._pending_ids = set()
+                if lost:
+                    logger.error(f"Discarding {lost} history changes that could not be written")
+                try:
+                    self._connection.close()
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to close history database: {e}")
+
     def get_entries(
         self,
         filter_criteria: Optional[HistoryFilter] = None,
@@ -336,10 +520,8 @@ class DownloadHistoryManager:
                 if offset:
                     query += f" OFFSET {offset}"
                 
-                with sqlite3.connect(self.db_path) as conn:
-                    conn.row_factory = sqlite3.Row
-                    cursor = conn.execute(query, params)
-                    rows = cursor.fetchall()
+                self.flush()
+                rows = self._connection.execute(query, params).fetchall()
                 
                 return [self._row_to_entry(row) for row in rows]
                 
@@ -350,13 +532,9 @@ class DownloadHistoryManager:
     def get_entry(self, entry_id: str) -> Optional[DownloadHistoryEntry]:
         """Get specific history entry by ID"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute(
-                    "SELECT * FROM download_history WHERE entry_id = ?",
-                    (entry_id,)
-                )
-                row = cursor.fetchone()
+            with self.lock:
+                self.flush()
+                row = self._connection.execute(_SELECT_ENTRY_SQL, (entry_id,)).fetchone()
                 
                 return self._row_to_entry(row) if row else None
                 
@@ -368,12 +546,9 @@ class DownloadHistoryManager:
         """Delete history entry"""
         try:
             with self.lock:
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.execute(
-                        "DELETE FROM download_history WHERE entry_id = ?",
-                        (entry_id,)
-                    )
-                    conn.commit()
+                self.flush()
+                with self._connection as conn:
+                    cursor = conn.execute(_DELETE_ENTRY_SQL, (entry_id,))
                     
                     if cursor.rowcount > 0:
                         self._stats_cache = None  # Invalidate cache
@@ -399,12 +574,11 @@ class DownloadHistoryManager:
                 entry_ids = [entry.entry_id for entry in entries_to_delete]
                 placeholders = ",".join("?" * len(entry_ids))
                 
-                with sqlite3.connect(self.db_path) as conn:
+                with self._connection as conn:
                     cursor = conn.execute(
                         f"DELETE FROM download_history WHERE entry_id IN ({placeholders})",
                         entry_ids
                     )
-                    conn.commit()
                     
                     deleted_count = cursor.rowcount
                     if deleted_count > 0:
@@ -428,8 +602,9 @@ class DownloadHistoryManager:
             return self._stats_cache
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.lock:
+                self.flush()
+                conn = self._connection
                 
                 # Basic counts
                 cursor = conn.execute("""
@@ -582,3 +757,5 @@ class DownloadHistoryManager:
 
 # Global history manager instance
 download_history_manager = DownloadHistoryManager()
+# Commit entries still queued when the application exits
+atexit.register(download_history_manager.close)
@@ -2,15 +2,19 @@ import requests
 import time
 import threading
 import os
+import shutil
 import json
 import uuid
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 from queue import PriorityQueue, Queue, Empty
+from collections import deque
 from enum import Enum
-from datetime import datetime
 from loguru import logger
 from typing import (
-    Optional, List, Dict, Tuple, Set, Callable, Any, Union, Literal, Protocol, TypedDict
+    Optional, List, Dict, Deque, Tuple, Set, Callable, Any, Union, Literal, Protocol, TypedDict
 )
 
 # Enhanced error handling imports
@@ -25,17 +29,40 @@ from .exceptions import (
 from .error_handler import ErrorHandler, error_handler
 from .retry_manager import IntelligentRetryManager, retry_manager
 from .resource_manager import resource_manager, ResourceType, register_for_cleanup
-from .connection_pool import connection_pool_manager, HostPoolConfig
+from .connection_pool import connection_pool_manager, ConnectionLease, HostPoolConfig
+from .dns_cache import dns_cache
 from .adaptive_timeout import adaptive_timeout_manager
 from .memory_optimizer import memory_optimizer
 # Enhanced resource manager is now merged into resource_manager
 from .adaptive_retry import adaptive_retry_manager, RetryReason
 from .circuit_breaker import circuit_breaker_manager
+from .host_key import host_key
+from .bandwidth_limiter import BandwidthLimiter, bandwidth_limiter
 from .progressive_recovery import progressive_recovery_manager
 from .segment_validator import segment_validator, ValidationResult
 from .intelligent_recovery import intelligent_recovery_system
 from .integrity_verifier import content_integrity_verifier, IntegrityLevel
 from .event_dispatcher import get_event_dispatcher, EventType, Event
+from .segment_manifest import SegmentInit, SegmentManifest
+from .key_cache import key_cache
+from .merger import IncrementalMerger
+from .live_playlist import LivePlaylistFollower
+from .byte_ranges import (
+    ChunkSplitter, RangeTrimmer, range_header, resume_validator, validator_checksum
+)
+from .split_download import FilePart, SplitFileDownload
+from .playlist_cache import playlist_cache
+from .variant_selector import variant_selector
+from .m3u8_parser import M3U8Parser
+from .renditions import MediaRendition
+from .resume_journal import JournalEntry, RecordType, ResumeJournal, file_crc32
+from .resume_store import ResumeStore, resume_store
+from .resume_indexer import INTERRUPTED_STATUS, ResumeIndexer
+
+# Bytes written between two records of an in-progress segment in the resume journal
+PARTIAL_RECORD_BYTES = 1024 * 1024
+# Segments that are complete MP4 files unless an #EXT-X-MAP makes them fragments
+_CONTAINER_SEGMENT_EXTENSIONS = (".mp4", ".m4s", ".m4v", ".m4a")
 
 
 class TaskStatus(Enum):
@@ -78,6 +105,25 @@ class SettingsProvider(Protocol):
     def get(self, section: str, key: str, default: Any = None) -> Any: ...
 
 
+@dataclass
+class SegmentFetchOptions:
+    """Per-task parameters shared by all segment workers of a task"""
+    temp_dir: str
+    max_retries: int = 5
+    retry_delay: float = 2.0
+    chunk_size: int = 8192
+    headers: Dict[str, str] = field(default_factory=dict)
+    error_context: ErrorContext = field(default_factory=ErrorContext)
+    # Fetches key bytes for rotated keys; called through the shared key cache
+    key_fetcher: Optional[Callable[[str], bytes]] = None
+    # Merges segments into the output during the download (see _use_incremental_merge)
+    merger: Optional[IncrementalMerger] = None
+    # Segments kept from an earlier run; their checksums are verified before merging
+    resumed_segments: Set[int] = field(default_factory=set)
+    # Initialization section files (#EXT-X-MAP) by the segment they precede
+    init_files: Dict[int, str] = field(default_factory=dict)
+
+
 class DownloadTask:
     """Download task class"""
 
@@ -86,21 +132,29 @@ class DownloadTask:
     base_url: Optional[str]
     key_url: Optional[str]
     segments: Optional[int]
+    segment_manifest: Optional[SegmentManifest]
+    live_playlist_url: Optional[str]
+    variants: Optional[List[Dict[str, Any]]]
+    variant_url: Optional[str]
+    deadline: Optional[float]
+    renditions: Optional[List[MediaRendition]]
     output_file: Optional[str]
     # Assuming settings or {} results in a valid SettingsProvider
     settings: SettingsProvider
     priority: TaskPriority
     status: TaskStatus
     progress: ProgressDict
-    segments_info: Dict[str, SegmentDetail]
     downloaded_size: int
     retry_manager: Optional[ErrorHandler]  # Changed to Optional[ErrorHandler]
     key_data: Optional[bytes]
     worker_thread: Optional[threading.Thread]
     paused_event: threading.Event
     canceled_event: threading.Event
-    progress_file: Optional[str]
+    rendition_stop_event: threading.Event
+    state_listener: Optional[Callable[[], None]]
+    store: Optional[ResumeStore]
     recent_speeds: List[float]
+    lock: threading.RLock
 
     def __init__(self,
                  task_id: Optional[str] = None,
@@ -111,13 +165,52 @@ class DownloadTask:
                  output_file: Optional[str] = None,
                  # Actual settings object or dict-like
                  settings: Optional[SettingsProvider] = None,
-                 priority: TaskPriority = TaskPriority.NORMAL) -> None:
-        """Initialize download task"""
+                 priority: TaskPriority = TaskPriority.NORMAL,
+                 segment_manifest: Optional[SegmentManifest] = None,
+                 live_playlist_url: Optional[str] = None,
+                 variants: Optional[List[Dict[str, Any]]] = None,
+                 variant_url: Optional[str] = None,
+                 deadline: Optional[float] = None,
+                 renditions: Optional[List[MediaRendition]] = None,
+                 store: Optional[ResumeStore] = None) -> None:
+        """Initialize download task
+
+        A task with ``live_playlist_url`` records a live stream: the media
+        playlist is reloaded while downloading and new segments are appended
+        to ``segment_manifest`` until the playlist ends or recording is stopped.
+
+        ``variants`` are the alternatives of the master playlist that
+        ``variant_url`` was selected from; with a ``deadline`` in seconds
+        (default: the ``variant_deadline_minutes`` setting) the remaining
+        segments continue from a lower variant when the download falls behind.
+
+        ``renditions`` are separate audio and subtitle playlists of the variant
+        (with loaded manifests); they are downloaded alongside the video and
+        muxed into the output.
+
+        Resume state (completed segments, name and status) is kept in ``store``,
+        the global resume store by default; tasks without an output file keep
+        it in memory only.
+        """
         self.task_id = task_id or str(uuid.uuid4())
         self.name = name or f"Task-{self.task_id[:8]}"
         self.base_url = base_url
         self.key_url = key_url
+        # Parsed playlist segments; when present it is authoritative for the
+        # segment count and URLs
+        self.segment_manifest = segment_manifest
+        if segment_manifest is not None:
+            segments = len(segment_manifest)
+            if not key_url and segment_manifest.keys:
+                self.key_url = segment_manifest.keys[0].url
         self.segments = segments
+        self.live_playlist_url = live_playlist_url
+        self.variants = variants
+        self.variant_url = variant_url
+        self.deadline = deadline
+        # Mid-download variant switches: first segment, variant URL and bandwidth
+        self.variant_switches: List[Dict[str, Any]] = []
+        self.renditions = renditions
         self.output_file = output_file
         # If settings is None, self.settings becomes an empty dict, which might not satisfy SettingsProvider.
         # This assumes that an empty dict can be cast or used as a SettingsProvider,
@@ -144,19 +237,28 @@ class DownloadTask:
         }
 
         # Download details
-        self.segments_info = {}
         self.downloaded_size = 0
         self.key_data = None
 
+        # Guards progress, which is updated by segment workers
+        self.lock = threading.RLock()
+
         # Threads and events
         self.worker_thread = None
         self.paused_event = threading.Event()
         self.canceled_event = threading.Event()
+        # Stops the rendition sub-downloads; set by cancel() and whenever the worker exits
+        self.rendition_stop_event = threading.Event()
         # paused_event.is_set() == True means paused, False means not paused
         # Initialize as not paused (clear)
+        # Called after every pause, resume and cancel (e.g. to wake an event loop)
+        self.state_listener = None
+        # Set when the manager stopped while the task was running
+        self.interrupted = False
 
         # Progress tracking
-        self.progress_file = f"{output_file}.progress" if output_file else None
+        self.store = (store or resume_store) if output_file else None
+        self._memory_journal: Optional[ResumeJournal] = None
         self.recent_speeds = []
 
     def get_progress_percentage(self) -> float:
@@ -165,8 +267,12 @@ class DownloadTask:
             return 0.0
         return round((self.progress["completed"] / self.progress["total"]) * 100, 2)
 
-    def start(self, worker_func: Callable[[str], None]) -> None:
-        """Start task"""
+    def start(self, worker_func: Callable[[str], None], use_thread: bool = True) -> None:
+        """Start task
+
+        With ``use_thread=False`` the worker function is called directly and is
+        expected to schedule the download itself (e.g. on an event loop).
+        """
         if self.status == TaskStatus.RUNNING:
             return
 
@@ -176,6 +282,10 @@ class DownloadTask:
         self.paused_event.clear()  # Clear pause state (not paused)
         self.canceled_event.clear()  # Clear cancel flag
 
+        if not use_thread:
+            worker_func(self.task_id)
+            return
+
         # Create worker thread
         self.worker_thread = threading.Thread(
             target=worker_func,
@@ -191,6 +301,7 @@ class DownloadTask:
 
         self.status = TaskStatus.PAUSED
         self.paused_event.set()  # Set pause event
+        self._notify_state_change()
 
     def resume(self) -> None:
         """Resume task"""
@@ -198,7 +309,9 @@ class DownloadTask:
             return
 
         self.status = TaskStatus.PENDING
+        self.interrupted = False
         self.paused_event.clear()  # Clear pause event
+        self._notify_state_change()
 
     def cancel(self) -> None:
         """Cancel task"""
@@ -207,53 +320,172 @@ class DownloadTask:
 
         self.status = TaskStatus.CANCELED
         self.canceled_event.set()  # Set cancel event
+        self.rendition_stop_event.set()
         self.paused_event.set()  # Release pause to allow task to detect cancellation
+        self._notify_state_change()
+
+    def _notify_state_change(self) -> None:
+        listener = self.state_listener
+        if listener is not None:
+            listener()
+
+    def interrupt(self) -> None:
+        """Pause the task because the manager is stopping
+
+        Its resume state records it as interrupted, so it is queued again
+        the next time the manager starts.
+        """
+        if self.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELED]:
+            return
+
+        self.interrupted = True
+        self.pause()
+
+    def _resume_status(self) -> str:
+        """Status kept in the resume journal"""
+        if self.interrupted and self.status == TaskStatus.PAUSED:
+            return INTERRUPTED_STATUS
+        return self.status.value
+
+    def _resume_metadata(self) -> Dict[str, Any]:
+        """Task fields kept in the header of the resume journal"""
+        return {
+            "task_id": self.task_id,
+            "task_name": self.name,
+            "base_url": self.base_url or "",
+            "key_url": self.key_url,
+            "live_playlist_url": self.live_playlist_url,
+            "priority": self.priority.value,
+            "output_file": self.output_file,
+            "total_segments": self.segments or 0,
+            "segment_dir": f"{self.output_file}_temp",
+            "status": self._resume_status()
+        }
+
+    def _get_journal(self) -> ResumeJournal:
+        """Get the task's resume journal, creating it on first use"""
+        if self.store is None:
+            with self.lock:
+                if self._memory_journal is None:
+                    self._memory_journal = ResumeJournal(None)
+                return self._memory_journal
+        return self.store.open(self.task_id, self._resume_metadata())
+
+    def record_segment(self, index: int, size: int, mtime_ns: int = 0, checksum: int = 0) -> None:
+        """Record a completed segment in the resume state"""
+        self._get_journal().record_complete(index, size, mtime_ns, checksum)
+
+    def record_partial_segment(self, index: int, size: int, validator_checksum: int) -> None:
+        """Record the bytes of an interrupted segment kept for resuming it"""
+        self._get_journal().record_partial(index, size, validator_checksum)
+
+    def get_partial_segment(self, index: int) -> Optional[JournalEntry]:
+        """Get the recorded partial download of a segment, if any"""
+        entry = self._get_journal().get(index)
+        return entry if entry is not None and entry.state == RecordType.PARTIAL else None
+
+    def get_completed_segments(self) -> Dict[int, JournalEntry]:
+        """Get the recorded completed segments by index"""
+        if self.store is None:
+            return self._get_journal().completed()
+        return self.store.completed(self.task_id)
+
+    @property
+    def segments_info(self) -> Dict[str, SegmentDetail]:
+        """Completed segments by index string"""
+        return {
+            str(index): {"status": "completed", "size": entry.size,
+                         "timestamp": entry.mtime_ns / 1e9}
+            for index, entry in self.get_completed_segments().items()
+        }
 
     def save_progress(self) -> None:
-        """Save progress to file"""
-        if not self.progress_file:
+        """Save progress to the resume store
+
+        Completed segments are already recorded; this syncs them and records
+        the task's name and status.
+        """
+        if self.store is None:
             return
 
         try:
-            progress_data: Dict[str, Any] = {
-                "task_id": self.task_id,
-                "name": self.name,
-                "status": self.status.value,
-                "progress": self.progress,
-                "segments_info": self.segments_info,
-                "last_updated": datetime.now().isoformat()
-            }
-
-            with open(self.progress_file, 'w', encoding='utf-8') as f:
-                json.dump(progress_data, f, ensure_ascii=False, indent=2)
+            self.store.open(self.task_id, self._resume_metadata())
+            self.store.update_metadata(self.task_id, {
+                "task_name": self.name,
+                "status": self._resume_status()
+            })
+            self.store.flush(self.task_id)
             logger.debug(f"Progress saved for task {self.name}")
         except Exception as e:
             logger.error(f"Failed to save task progress: {e}", exc_info=True)
 
+    def save_manifest(self) -> None:
+        """Save the segment list so the task can be restored after a restart"""
+        if self.store is None or self.segment_manifest is None or self.live_playlist_url:
+            return
+        self.store.save_manifest(self.task_id, self.segment_manifest)
+
     def load_progress(self) -> bool:
-        """Load progress from file"""
-        if not self.progress_file or not os.path.exists(self.progress_file):
+        """Load progress from the resume store"""
+        if self.store is None:
             return False
 
         try:
-            with open(self.progress_file, 'r', encoding='utf-8') as f:
-                data: Dict[str, Any] = json.load(f)
-
-            # Restore progress information
-            if data.get("task_id") == self.task_id:
-                self.name = data.get("name", self.name)
-                self.status = TaskStatus(data.get("status", self.status.value))
-                self.progress = data.get("progress", self.progress)
-                self.segments_info = data.get(
-                    "segments_info", self.segments_info)
-                logger.info(
-                    f"Progress loaded for task {self.name}: {self.progress['completed']}/{self.progress['total']} segments completed")
-                return True
+            self._import_legacy_progress()
+            journal = self.store.get(self.task_id)
+            if journal is None:
+                return False
+
+            metadata = journal.metadata
+            completed = journal.completed()
+            status = metadata.get("status", self.status.value)
+            with self.lock:
+                self.name = metadata.get("task_name", self.name)
+                # An interrupted task is about to be started again
+                self.status = (TaskStatus.PENDING if status == INTERRUPTED_STATUS
+                               else TaskStatus(status))
+                self.progress["completed"] = len(completed)
+                self.progress["downloaded_bytes"] = sum(e.size for e in completed.values())
+            logger.info(
+                f"Progress loaded for task {self.name}: {self.progress['completed']}/{self.progress['total']} segments completed")
+            return True
         except Exception as e:
             logger.error(f"Failed to load task progress: {e}", exc_info=True)
 
         return False
 
+    def _import_legacy_progress(self) -> None:
+        """Move the completed segments of a ``.progress`` file into the resume store"""
+        assert self.store is not None
+        legacy_file = f"{self.output_file}.progress"
+        if not os.path.exists(legacy_file) or self.store.exists(self.task_id):
+            return
+
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            data: Dict[str, Any] = json.load(f)
+        if data.get("task_id") != self.task_id:
+            return
+
+        metadata = self._resume_metadata()
+        metadata["task_name"] = data.get("name", self.name)
+        metadata["status"] = data.get("status", self.status.value)
+        journal = self.store.open(self.task_id, metadata)
+        for index, detail in data.get("segments_info", {}).items():
+            if detail.get("status") == "completed":
+                journal.record_complete(int(index), detail.get("size", 0))
+        journal.flush()
+        os.remove(legacy_file)
+
+    def close_journal(self) -> None:
+        """Sync the resume journal and release it until it is needed again"""
+        if self.store is not None:
+            self.store.close(self.task_id)
+
+    def delete_progress(self) -> None:
+        """Remove the task's resume state"""
+        if self.store is not None:
+            self.store.delete(self.task_id)
+
     def update_speed(self, bytes_downloaded: int, elapsed_time: float) -> None:
         """Update download speed statistics with accurate calculation"""
         if elapsed_time > 0:
@@ -336,7 +568,7 @@ class DownloadManager:
     running: bool
     scheduler_thread: Optional[threading.Thread]
     lock: threading.RLock
-    bandwidth_limiter: Any  # Placeholder for actual type
+    bandwidth_limiter: BandwidthLimiter
     bandwidth_limit: int
     on_task_progress: Optional[Callable[[str, ProgressDict], None]]
     on_task_status_changed: Optional[Callable[[
@@ -345,27 +577,41 @@ class DownloadManager:
     on_task_failed: Optional[Callable[[str, str], None]]
     event_queue: "Queue[EventTuple]"
     event_thread: Optional[threading.Thread]
+    engine: str
+    async_engine: Any  # AsyncDownloadEngine when engine == "async"
 
     # Enhanced error handling components
     error_handler: ErrorHandler
     retry_manager: IntelligentRetryManager
     on_error_occurred: Optional[Callable[[str, VidTaniumException], None]]
 
-    def __init__(self, settings: Optional[SettingsProvider] = None) -> None:
-        """Initialize enhanced download manager with error handling"""
+    def __init__(self, settings: Optional[SettingsProvider] = None,
+                 engine: Optional[str] = None) -> None:
+        """Initialize enhanced download manager with error handling
+
+        Args:
+            settings: Settings provider
+            engine: ``"thread"`` (one worker thread per task) or ``"async"``
+                (all tasks share one asyncio event loop); defaults to the
+                ``download.engine`` setting
+        """
         self.settings = settings
         self.tasks = {}
         self.tasks_queue = PriorityQueue()
         self.active_tasks = set()
+        self.live_followers: Dict[str, LivePlaylistFollower] = {}
 
         # Controls and events
         self.running = False
         self.scheduler_thread = None
         self.lock = threading.RLock()
 
-        # Bandwidth control
-        self.bandwidth_limiter = None
+        # Bandwidth control, enforced in the segment read loops
+        self.bandwidth_limiter = bandwidth_limiter
         self.bandwidth_limit = 0
+        if settings:
+            self.set_bandwidth_limit(int(settings.get("download", "bandwidth_limit", 0)))
+            self._configure_playlist_cache(settings)
 
         # Event dispatcher (Pure Python event system)
         self.event_dispatcher = get_event_dispatcher()
@@ -403,6 +649,7 @@ class DownloadManager:
 
         # Progressive recovery management
         self.recovery_manager = progressive_recovery_manager
+        self.resume_store = resume_store
 
         # Segment validation
         self.segment_validator = segment_validator
@@ -420,11 +667,39 @@ class DownloadManager:
         # Resource management integration
         self._register_for_resource_management()
 
+        # Download engine
+        self.engine = "thread"
+        self.async_engine = None
+        self._configure_engine(engine)
+
         # Memory optimization settings
         self._max_concurrent_downloads = self._get_max_concurrent_downloads()
         self._memory_threshold = self._get_memory_threshold()
         self._last_memory_log: float = time.time()
 
+    def _configure_engine(self, engine: Optional[str]) -> None:
+        """Select the engine that runs task downloads"""
+        if engine is None and self.settings:
+            engine = str(self.settings.get("download", "engine", "thread"))
+        if engine != "async":
+            return
+
+        from .async_engine import AsyncDownloadEngine, AIOHTTP_AVAILABLE
+        if not AIOHTTP_AVAILABLE:
+            logger.warning("Async download engine requires aiohttp, falling back to thread engine")
+            return
+
+        self.engine = "async"
+        self.async_engine = AsyncDownloadEngine(self)
+        logger.info("Using async download engine")
+
+    def _start_task_worker(self, task: DownloadTask) -> None:
+        """Start a task on the configured download engine"""
+        if self.async_engine is not None:
+            task.start(self.async_engine.submit, use_thread=False)
+        else:
+            task.start(self._task_worker)
+
     def _configure_connection_pools(self) -> None:
         """Configure connection pools for optimal performance"""
         # Start connection pool monitoring
@@ -453,12 +728,34 @@ class DownloadManager:
             default_config.max_connections_per_host = max_conn_per_host
             default_config.connection_timeout = conn_timeout
             default_config.read_timeout = read_timeout
+            default_config.transport = str(self.settings.get("download", "http_transport", "http1"))
+            dns_cache.set_ttl(float(self.settings.get("network", "dns_cache_timeout", 300)))
+
+        # The DNS cache replaces socket.getaddrinfo for the whole process, so
+        # it is only installed when enabled explicitly
+        dns_cache_enabled = False
+        if self.settings:
+            dns_cache_enabled = bool(self.settings.get("network", "dns_cache_enabled", False))
+        if dns_cache_enabled and dns_cache.enabled:
+            dns_cache.install()
+        else:
+            dns_cache.uninstall()
 
         # Store default config for new hosts
         self.default_pool_config = default_config
+        self.connection_pool.set_default_config(default_config)
+
+        # Hosts served over HTTP/2 whatever the default transport
+        http2_hosts: List[str] = []
+        if self.settings:
+            http2_hosts = list(self.settings.get("download", "http2_hosts", []) or [])
+        for host in http2_hosts:
+            self.connection_pool.configure_host(
+                host if "://" in host else f"https://{host}", replace(default_config, transport="http2"))
 
         logger.info(f"Connection pools configured: max_connections={default_config.max_connections}, "
-                   f"max_per_host={default_config.max_connections_per_host}")
+                   f"max_per_host={default_config.max_connections_per_host}, "
+                   f"transport={default_config.transport}")
 
     def _register_for_resource_management(self) -> None:
         """Register this download manager for automatic resource management"""
@@ -598,13 +895,13 @@ class DownloadManager:
 
         self.running = False
 
-        # Pause all tasks
+        # Pause all tasks, recording them as interrupted so they are resumed
         with self.lock:
             active_task_ids = list(self.active_tasks)  # Iterate over a copy
             for task_id in active_task_ids:
                 task = self.tasks.get(task_id)
                 if task:
-                    task.pause()
+                    task.interrupt()
 
         # Wait for scheduler thread to end
         if self.scheduler_thread and self.scheduler_thread.is_alive():
@@ -614,9 +911,14 @@ class DownloadManager:
         if self.event_thread and self.event_thread.is_alive():
             self.event_thread.join(timeout=2)
 
-        # Save progress for all tasks
-        for task in self.tasks.values():
-            task.save_progress()
+        # Stop the event loop of the async engine
+        if self.async_engine is not None:
+            self.async_engine.shutdown()
+
+        # Save progress for all tasks; completed ones have no resume state left
+        for task in list(self.tasks.values()):
+            if task.status != TaskStatus.COMPLETED:
+                task.save_progress()
 
         # Stop all enhanced components
         try:
@@ -799,6 +1101,42 @@ class DownloadManager:
         """Get specified task"""
         return self.tasks.get(task_id)
 
+    def resume_interrupted_tasks(self) -> List[str]:
+        """Queue the downloads that were interrupted in an earlier run again
+
+        Completed segments are trusted while their files keep the recorded
+        size and mtime; their checksums are verified just before merging.
+        Returns the IDs of the queued tasks.
+        """
+        queued: List[str] = []
+        for resumable in ResumeIndexer(self.resume_store).scan():
+            if resumable.task_id in self.tasks:
+                continue
+            metadata = resumable.metadata
+            try:
+                priority = TaskPriority(metadata.get("priority", TaskPriority.NORMAL.value))
+            except ValueError:
+                priority = TaskPriority.NORMAL
+            task = DownloadTask(
+                task_id=resumable.task_id,
+                name=metadata.get("task_name"),
+                base_url=metadata.get("base_url") or None,
+                key_url=metadata.get("key_url"),
+                segments=resumable.total_segments,
+                output_file=metadata["output_file"],
+                settings=self.settings,
+                priority=priority,
+                segment_manifest=resumable.manifest,
+                store=self.resume_store
+            )
+            task.progress["completed"] = resumable.completed_segments
+            task.progress["downloaded_bytes"] = resumable.downloaded_bytes
+            queued.append(self.add_task(task))
+
+        if queued:
+            logger.info(f"Queued {len(queued)} interrupted downloads to resume")
+        return queued
+
     def start_task(self, task_id: str) -> bool:
         """Start specified task"""
         with self.lock:
@@ -816,21 +1154,12 @@ class DownloadManager:
             if task.status == TaskStatus.RUNNING:
                 return True
 
-            # Try to load progress
+            # Restore progress from the task's resume state
             task.load_progress()
 
-            # Check for existing recovery session
-            recovery_info = self.recovery_manager.get_resume_info(task_id)
-            if recovery_info and recovery_info["can_resume"]:
-                logger.info(f"Found existing recovery session for task {task_id}: "
-                           f"{recovery_info['completion_percentage']:.1f}% complete")
-                # Update task progress from recovery info
-                task.progress["completed"] = len(recovery_info["completed_segments"])
-                task.progress["downloaded_bytes"] = recovery_info["downloaded_size"]
-
             # Start task
             old_status: Optional[TaskStatus] = task.status
-            task.start(self._task_worker)
+            self._start_task_worker(task)
 
             # Add to active tasks
             self.active_tasks.add(task_id)
@@ -906,13 +1235,10 @@ class DownloadManager:
             if task_id in self.active_tasks:
                 self.active_tasks.remove(task_id)
 
-            # Delete progress file
-            if task.progress_file and os.path.exists(task.progress_file):
-                try:
-                    os.remove(task.progress_file)
-                except Exception as e:
-                    logger.error(
-                        f"Failed to delete progress file: {task.progress_file}, {e}", exc_info=True)
+            self.bandwidth_limiter.remove_task(task_id)
+
+            # Delete progress file and segment journal
+            task.delete_progress()
 
             # Delete output file
             if delete_files and task.output_file and os.path.exists(task.output_file):
@@ -1088,7 +1414,7 @@ class DownloadManager:
 
                             if task_to_start.status in [TaskStatus.PENDING, TaskStatus.PAUSED]:
                                 old_status_sched: Optional[TaskStatus] = task_to_start.status
-                                task_to_start.start(self._task_worker)
+                                self._start_task_worker(task_to_start)
                                 self.active_tasks.add(task_id_sched)
                                 self._emit_status_changed(
                                     task_id_sched, old_status_sched, task_to_start.status)
@@ -1102,12 +1428,104 @@ class DownloadManager:
                 logger.error(f"Scheduler error: {e}", exc_info=True)
                 time.sleep(1)
 
+    def _get_segment_workers(self) -> int:
+        """Get number of segments fetched concurrently within a single task"""
+        workers: int = 4
+        if self.settings:
+            workers = int(self.settings.get("download", "segment_workers", 4))
+        # Never exceed the per-host connection budget, otherwise workers of the
+        # same task would end up competing for (and sharing) pooled sessions
+        return max(1, min(workers, self.default_pool_config.max_connections_per_host))
+
+    def _get_segment_url(self, task: DownloadTask, index: int) -> str:
+        """Get the URL of a segment, preferring the parsed segment manifest"""
+        if task.segment_manifest is not None:
+            return task.segment_manifest.url(index)
+        # Legacy tasks created from a base URL and a segment count only
+        return f"{task.base_url}/index{index}.ts"
+
+    def _get_segment_range(self, task: DownloadTask, index: int) -> Optional[Tuple[int, int]]:
+        """Get the ``(offset, length)`` of a byte-range segment within its URL"""
+        if task.segment_manifest is not None:
+            return task.segment_manifest.byte_range(index)
+        return None
+
+    def _get_segment_iv(self, task: DownloadTask, index: int) -> bytes:
+        """Get the AES IV of a segment from its key tag or media sequence number"""
+        from .decryptor import derive_iv
+
+        manifest = task.segment_manifest
+        if manifest is not None:
+            key = manifest.key(index)
+            return derive_iv(key.iv if key else None, manifest.sequence_number(index))
+        return derive_iv(None, index)
+
+    def _fetch_key(self, task: DownloadTask, key_url: str, session: requests.Session,
+                   timeout: int, max_retries: int, retry_delay: float) -> bytes:
+        """Download an encryption key with retries.
+
+        Called through the shared key cache, which ensures concurrent callers
+        fetch each key URI only once.
+        """
+        for attempt in range(max_retries):
+            if task.canceled_event.is_set():
+                break
+
+            # Check if we should retry using adaptive retry manager
+            if attempt > 0:
+                retry_reason = RetryReason.UNKNOWN_ERROR  # Will be updated based on actual error
+                if not self.adaptive_retry_manager.should_retry(
+                    key_url, attempt, retry_reason
+                ):
+                    logger.warning(f"Adaptive retry manager suggests stopping retries for {key_url}")
+                    break
+
+                # Get adaptive retry delay
+                adaptive_delay = self.adaptive_retry_manager.get_retry_delay(
+                    key_url, attempt, retry_reason
+                )
+                logger.debug(f"Adaptive retry delay: {adaptive_delay:.2f}s for attempt {attempt}")
+                time.sleep(adaptive_delay)
+
+            try:
+                response = session.get(key_url, timeout=timeout)
+                if response.status_code == 200 and response.content:
+                    logger.debug(
+                        f"Successfully downloaded encryption key ({len(response.content)} bytes)")
+                    return response.content
+                logger.warning(
+                    f"Key download failed, HTTP status: {response.status_code}, retry ({attempt+1}/{max_retries})")
+            except Exception as e:
+                logger.warning(
+                    f"Key download error: {e}, retry ({attempt+1}/{max_retries})")
+            time.sleep(retry_delay * (attempt + 1))
+
+        raise DecryptionKeyException(
+            key_url=key_url or "unknown",
+            key_error="Failed to download encryption key after retries",
+            context=ErrorContext(task_id=task.task_id)
+        )
+
+    def _get_segment_key(self, task: DownloadTask, index: int,
+                         options: "SegmentFetchOptions") -> Optional[bytes]:
+        """Get the key bytes of a segment, following key rotation in the manifest"""
+        manifest = task.segment_manifest
+        if manifest is not None:
+            key = manifest.key(index)
+            if key is None:
+                # Segment is not encrypted
+                return None
+            if key.url and key.url != task.key_url and options.key_fetcher:
+                return key_cache.get_key(key.url, options.key_fetcher)
+        return task.key_data
+
+    def _wait_while_paused(self, task: DownloadTask) -> None:
+        """Block the calling worker while the task is paused"""
+        while task.paused_event.is_set() and not task.canceled_event.is_set():
+            time.sleep(0.1)
+
     def _task_worker(self, task_id: str) -> None:
         """Enhanced task worker thread function with intelligent error handling"""
-        from .decryptor import decrypt_data  # Assuming decrypt_data(bytes, bytes, bytes, bool) -> bytes
-        # Assuming merge_files(List[str], str, Optional[SettingsProvider]) -> Dict[str, Any]
-        from .merger import merge_files
-
         task = self.tasks.get(task_id)
         if not task:
             error_context = ErrorContext(task_id=task_id)
@@ -1118,550 +1536,1564 @@ class DownloadManager:
             self._handle_task_error(task_id, exception)
             return
 
-        # Create error context for this task
-        error_context = ErrorContext(
-            task_id=task_id,
+        error_context = self._create_task_error_context(task)
+        options: Optional[SegmentFetchOptions] = None
+        rendition_futures: List["Future[Optional[Dict[str, str]]]"] = []
+
+        try:
+            logger.info(
+                f"Starting task execution: {task.name} (ID: {task_id})")
+            self._start_prewarm(task)
+            options, pending_segments, segment_files = self._prepare_task_download(
+                task, error_context)
+
+            follower = self._start_live_follower(task, options)
+
+            segment_workers = self._get_segment_workers()
+            rendition_futures = self._start_rendition_downloads(task, options, segment_workers)
+            logger.info(
+                f"Downloading {task.segments} segments for task: {task.name} "
+                f"({segment_workers} parallel segment workers)")
+            self._run_segment_pool(
+                task, pending_segments, segment_files, options, segment_workers, follower)
+
+            self._finish_task_download(task, options, segment_files, rendition_futures)
+
+        except Exception as e:
+            self._fail_task_download(task, e, error_context)
+        finally:
+            self._stop_rendition_downloads(task, rendition_futures)
+            self._stop_live_follower(task_id)
+            self._close_merge(options)
+            task.close_journal()
+            with self.lock:
+                if task_id in self.active_tasks:
+                    self.active_tasks.remove(task_id)
+
+    def _start_prewarm(self, task: DownloadTask) -> None:
+        """Open connections to the segment host while the key and temp files are prepared"""
+        count = 2
+        if self.settings:
+            count = int(self.settings.get("download", "prewarm_connections", 2))
+        count = min(count, self._get_segment_workers())
+        if count <= 0 or not task.segments or task.status == TaskStatus.CANCELED:
+            return
+
+        url = self._get_segment_url(task, 0)
+        if not url.startswith(("http://", "https://")):
+            return
+        threading.Thread(target=self.connection_pool.prewarm, args=(url, count),
+                         name=f"VidTanium-Prewarm-{task.task_id[:8]}", daemon=True).start()
+
+    def _create_task_error_context(self, task: DownloadTask) -> ErrorContext:
+        """Create error context for a task"""
+        return ErrorContext(
+            task_id=task.task_id,
             task_name=task.name,
             url=task.base_url,
             file_path=task.output_file
         )
 
+    def _prepare_task_download(self, task: DownloadTask, error_context: ErrorContext
+                               ) -> Tuple["SegmentFetchOptions", List[int], List[Optional[str]]]:
+        """Fetch the key, create the temp directory and find pending segments.
+
+        Returns the per-task fetch options, the indexes still to download and
+        the segment file table with already completed segments filled in.
+        """
+        task_id = task.task_id
+        session = requests.Session()
+
+        user_agent: str = "Mozilla/5.0"
+        if self.settings:
+            user_agent = str(self.settings.get(
+                "advanced", "user_agent", "Mozilla/5.0"))
+        session.headers.update({"User-Agent": user_agent})
+
+        proxy_str: str = ""
+        if self.settings:
+            proxy_str = str(self.settings.get("advanced", "proxy", ""))
+        if proxy_str:
+            session.proxies = {"http": proxy_str, "https": proxy_str}
+
+        verify_ssl_val: bool = True
+        if self.settings:
+            verify_ssl_val = bool(self.settings.get(
+                "advanced", "verify_ssl", True))
+        session.verify = verify_ssl_val
+
+        max_retries_val: int = 5
+        retry_delay_val: float = 2.0
+        timeout_val: int = 60
+        chunk_size_val: int = 8192
+
+        if self.settings:
+            max_retries_val = int(self.settings.get(
+                "download", "max_retries", 5))
+            retry_delay_val = float(self.settings.get(
+                "download", "retry_delay", 2.0))
+            timeout_val = int(self.settings.get(
+                "download", "request_timeout", 60))
+            chunk_size_val = int(self.settings.get(
+                "download", "chunk_size", 8192))
+
+        def fetch_key(key_url: str) -> bytes:
+            return self._fetch_key(
+                task, key_url, session, timeout_val, max_retries_val, retry_delay_val)
+
+        if not task.key_data and task.key_url:
+            logger.info(f"Downloading encryption key: {task.key_url}")
+            task.progress["current_file"] = "Encryption Key"
+            task.key_data = key_cache.get_key(task.key_url, fetch_key)
+
+        if not task.output_file:
+            raise ConfigurationException(
+                setting="output_file",
+                value=None,
+                context=ErrorContext(task_id=task_id)
+            )
+
+        output_dir: str = os.path.dirname(task.output_file)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+
+        temp_dir: str = f"{task.output_file}_temp"
+        os.makedirs(temp_dir, exist_ok=True)
+
+        if task.segments is None:  # Should not happen if initialized correctly
+            task.segments = 0
+            task.progress["total"] = 0
+
+        if task.segments > 0 and not task.base_url and task.segment_manifest is None:
+            raise InvalidURLException(
+                url="",
+                reason="Base URL not specified for task segments",
+                context=ErrorContext(task_id=task_id)
+            )
+
+        options = SegmentFetchOptions(
+            temp_dir=temp_dir,
+            max_retries=max_retries_val,
+            retry_delay=retry_delay_val,
+            chunk_size=chunk_size_val,
+            headers={"User-Agent": user_agent},
+            error_context=error_context,
+            key_fetcher=fetch_key
+        )
+
+        # Record the task's metadata and segment list in its resume state
+        task.save_progress()
+        task.save_manifest()
+
+        # Segment files are tracked by index so that completion order never
+        # affects the order in which segments are merged
+        segment_files: List[Optional[str]] = [None] * task.segments
+        pending_segments: List[int] = []
+        merged_prefix = 0
+        self._download_init_sections(task, options)
+        if self._use_incremental_merge(task):
+            options.merger = IncrementalMerger(
+                task.output_file, ffmpeg_path=self._get_ffmpeg_path(),
+                init_files=options.init_files, identity=task_id)
+            merged_prefix = self._confirm_merged_prefix(task, options)
+
+        completed_segments = task.get_completed_segments()
+        for i in range(task.segments):
+            ts_filename = os.path.join(temp_dir, f"segment_{i}.ts")
+            entry = completed_segments.get(i)
+            if i < merged_prefix:
+                # Already merged into the output by an interrupted run
+                segment_files[i] = ts_filename
+            elif entry is not None and self._is_segment_unchanged(entry, ts_filename):
+                logger.debug(f"Skipping already downloaded segment {i}")
+                segment_files[i] = ts_filename
+                options.resumed_segments.add(i)
+            else:
+                pending_segments.append(i)
+
+        if options.merger is not None:
+            # Resumed segments are merged right away, so they are verified now
+            corrupted = self._verify_resumed_segments(task, options, segment_files)
+            pending_segments = sorted(pending_segments + corrupted)
+            for i, segment_file in enumerate(segment_files):
+                if segment_file and i >= merged_prefix:
+                    self._advance_merge(options, i, segment_file)
+
+        with task.lock:
+            task.progress["completed"] = task.segments - len(pending_segments)
+
+        return options, pending_segments, segment_files
+
+    def _confirm_merged_prefix(self, task: DownloadTask, options: "SegmentFetchOptions") -> int:
+        """Check the resumed merge against the resume journal
+
+        Every merged segment must be recorded as completed with the merged
+        size; the merge is rewound to the first one that is not, so it and
+        all later segments are downloaded again. Returns the confirmed
+        watermark.
+        """
+        assert options.merger is not None
+        merged_sizes = options.merger.merged_sizes
+        completed_segments = task.get_completed_segments()
+        confirmed = 0
+        for i, merged_size in enumerate(merged_sizes):
+            entry = completed_segments.get(i)
+            init_file = options.init_files.get(i)
+            init_size = os.path.getsize(init_file) if init_file and os.path.exists(init_file) else 0
+            if entry is None or entry.size + init_size != merged_size:
+                break
+            confirmed += 1
+
+        if confirmed < len(merged_sizes):
+            logger.warning(
+                f"Resume journal of task {task.name} confirms {confirmed} of "
+                f"{len(merged_sizes)} merged segments, merging again from segment {confirmed}")
+            options.merger.rewind(confirmed)
+        return confirmed
+
+    def _is_segment_unchanged(self, entry: JournalEntry, ts_filename: str) -> bool:
+        """Check a recorded segment against its file by size and mtime"""
         try:
-            logger.info(
-                f"Starting task execution: {task.name} (ID: {task_id})")
-            session = requests.Session()
-
-            user_agent: str = "Mozilla/5.0"
-            if self.settings:
-                user_agent = str(self.settings.get(
-                    "advanced", "user_agent", "Mozilla/5.0"))
-            session.headers.update({"User-Agent": user_agent})
-
-            proxy_str: str = ""
-            if self.settings:
-                proxy_str = str(self.settings.get("advanced", "proxy", ""))
-            if proxy_str:
-                session.proxies = {"http": proxy_str, "https": proxy_str}
-
-            verify_ssl_val: bool = True
-            if self.settings:
-                verify_ssl_val = bool(self.settings.get(
-                    "advanced", "verify_ssl", True))
-            session.verify = verify_ssl_val
-
-            max_retries_val: int = 5
-            retry_delay_val: float = 2.0
-            timeout_val: int = 60
-            chunk_size_val: int = 8192
-
-            if self.settings:
-                max_retries_val = int(self.settings.get(
-                    "download", "max_retries", 5))
-                retry_delay_val = float(self.settings.get(
-                    "download", "retry_delay", 2.0))
-                timeout_val = int(self.settings.get(
-                    "download", "request_timeout", 60))
-                chunk_size_val = int(self.settings.get(
-                    "download", "chunk_size", 8192))
-
-            if not task.key_data and task.key_url:
-                logger.info(f"Downloading encryption key: {task.key_url}")
-                task.progress["current_file"] = "Encryption Key"
-                for attempt in range(max_retries_val):
-                    if task.canceled_event.is_set():
-                        break
+            stat = os.stat(ts_filename)
+        except OSError:
+            return False
+        return entry.matches(stat.st_size, stat.st_mtime_ns)
 
-                    # Check if we should retry using adaptive retry manager
-                    if attempt > 0:
-                        retry_reason = RetryReason.UNKNOWN_ERROR  # Will be updated based on actual error
-                        if not self.adaptive_retry_manager.should_retry(
-                            task.key_url, attempt, retry_reason
-                        ):
-                            logger.warning(f"Adaptive retry manager suggests stopping retries for {task.key_url}")
-                            break
-
-                        # Get adaptive retry delay
-                        retry_delay = self.adaptive_retry_manager.get_retry_delay(
-                            task.key_url, attempt, retry_reason
-                        )
-                        logger.debug(f"Adaptive retry delay: {retry_delay:.2f}s for attempt {attempt}")
-                        time.sleep(retry_delay)
+    def _verify_resumed_segments(self, task: DownloadTask, options: "SegmentFetchOptions",
+                                 segment_files: List[Optional[str]]) -> List[int]:
+        """Verify the checksums of segments kept from an earlier run
+
+        Segments whose content no longer matches are removed from
+        ``segment_files``; their indices are returned.
+        """
+        indices = sorted(i for i in options.resumed_segments if segment_files[i])
+        options.resumed_segments.clear()
+        if not indices:
+            return []
+        completed_segments = task.get_completed_segments()
+
+        def is_intact(i: int) -> bool:
+            entry = completed_segments.get(i)
+            if entry is None or not entry.checksum:
+                return True
+            try:
+                return file_crc32(segment_files[i] or "") == entry.checksum
+            except OSError:
+                return False
+
+        with ThreadPoolExecutor(max_workers=self._get_segment_workers(),
+                                thread_name_prefix=f"Verify-{task.task_id[:8]}") as executor:
+            intact = list(executor.map(is_intact, indices))
+
+        corrupted = [i for i, ok in zip(indices, intact) if not ok]
+        for i in corrupted:
+            logger.warning(f"Segment {i} of task {task.name} changed since it was downloaded")
+            segment_files[i] = None
+        return corrupted
+
+    def _redownload_segments(self, task: DownloadTask, options: "SegmentFetchOptions",
+                             segment_files: List[Optional[str]], indices: List[int]) -> None:
+        """Download segments again whose resumed files turned out to be corrupt"""
+        for i in indices:
+            if task.canceled_event.is_set():
+                break
+            ts_filename = self._download_segment(task, i, options)
+            segment_files[i] = ts_filename
+            if not ts_filename:
+                with task.lock:
+                    task.progress["completed"] -= 1
+                    task.progress["failed"] += 1
 
+    def _finish_task_download(self, task: DownloadTask, options: "SegmentFetchOptions",
+                              segment_files: List[Optional[str]],
+                              rendition_futures: Optional[List["Future[Optional[Dict[str, str]]]"]] = None
+                              ) -> None:
+        """Merge downloaded segments and renditions, emit the final status and clean up"""
+        # Assuming merge_files(List[str], str, Optional[SettingsProvider]) -> Dict[str, Any]
+        from .merger import merge_files, mux_renditions
+
+        task_id = task.task_id
+        temp_dir = options.temp_dir
+        # Validated by _prepare_task_download
+        output_file = task.output_file
+        assert output_file is not None
+        if not task.canceled_event.is_set():
+            corrupted = self._verify_resumed_segments(task, options, segment_files)
+            self._redownload_segments(task, options, segment_files, corrupted)
+        successful_files: List[str] = [
+            file_path for file_path in segment_files if file_path]
+        merge_result: Dict[str, Any] = {}
+
+        if task.canceled_event.is_set():
+            logger.info(
+                f"Task canceled during segments download: {task.name}")
+            task.status = TaskStatus.CANCELED
+        elif task.progress["failed"] > 0 and task.progress["completed"] == 0:
+            logger.error(
+                f"All segments failed to download for task: {task.name}")
+            task.status = TaskStatus.FAILED
+        elif successful_files:
+            logger.info(
+                f"Starting to merge {len(successful_files)} video segments for {task.name}")
+            task.progress["current_file"] = "Merging video"
+            # Update UI before merge
+            self._emit_progress(task_id, task.progress)
+
+            # Live recordings may have added initialization sections since the start
+            self._download_init_sections(task, options)
+            if options.merger is not None:
+                # Only the tail after the contiguous watermark is left to merge
+                merge_result = options.merger.finish(len(segment_files))
+            else:
+                merge_result = merge_files(
+                    successful_files, output_file, None, merge_mode=self._get_merge_mode(),
+                    init_files=options.init_files, identity=task_id,
+                    discontinuities=(task.segment_manifest.discontinuities
+                                     if task.segment_manifest is not None else None))
+            if merge_result.get("success") and rendition_futures:
+                task.progress["current_file"] = "Muxing renditions"
+                self._emit_progress(task_id, task.progress)
+                rendition_files = [f for f in (future.result() for future in rendition_futures) if f]
+                merge_result = mux_renditions(
+                    output_file, rendition_files, self._get_ffmpeg_path())
+            if merge_result.get("success"):
+                logger.success(
+                    f"Video merge successful: {task.output_file}")
+                task.status = TaskStatus.COMPLETED
+            else:
+                logger.error(
+                    f"Video merge failed: {merge_result.get('error', 'Unknown error')}")
+                task.status = TaskStatus.FAILED
+        # No successful files and not canceled (e.g. all segments failed)
+        else:
+            logger.error(
+                f"No successfully downloaded video segments to merge for task: {task.name}")
+            task.status = TaskStatus.FAILED
+
+        task.progress["end_time"] = time.time()
+        # Assuming it was RUNNING
+        self._emit_status_changed(task_id, TaskStatus.RUNNING, task.status)
+        if task.status == TaskStatus.COMPLETED:
+            self._emit_completed(
+                task_id, True, f"Video download and merge successful: {task.output_file}")
+        elif task.status != TaskStatus.CANCELED:  # FAILED or other non-canceled states
+            error_message = "Task failed."
+            if task.progress["failed"] > 0 and task.progress["completed"] == 0:
+                error_message = "All segments failed to download."
+            elif not successful_files and (task.segments or 0) > 0:
+                error_message = "No segments were successfully downloaded to merge."
+            elif 'error' in locals().get('merge_result', {}):  # Check if merge_result exists and has error
+                error_message = f"Video merge failed: {locals()['merge_result']['error']}"
+
+            self._emit_completed(task_id, False, error_message)
+
+        auto_cleanup_val: bool = True
+        keep_temp_val: bool = False
+        if self.settings:
+            auto_cleanup_val = bool(self.settings.get(
+                "general", "auto_cleanup", True))
+            keep_temp_val = bool(self.settings.get(
+                "advanced", "keep_temp_files", False))
+
+        if merge_result.get("resumable"):
+            # The merge stopped at a missing segment; the segments after it
+            # are needed to continue it
+            logger.info(f"Keeping temporary files of task {task.name} for resuming")
+        elif auto_cleanup_val and not keep_temp_val and os.path.exists(temp_dir):
+            logger.info(f"Cleaning up temporary files in: {temp_dir}")
+            # successful_files list contains paths within temp_dir
+            for file_path in successful_files:  # These should have been merged
+                if os.path.exists(file_path):
                     try:
-                        response = session.get(
-                            task.key_url, timeout=timeout_val)
-                        if response.status_code == 200:
-                            task.key_data = response.content
-                            key_size = len(
-                                task.key_data) if task.key_data else 0
-                            logger.debug(
-                                f"Successfully downloaded encryption key ({key_size} bytes)")
-                            break
-                        else:
-                            logger.warning(
-                                f"Key download failed, HTTP status: {response.status_code}, retry ({attempt+1}/{max_retries_val})")
-                    except Exception as e:
+                        os.remove(file_path)
+                    except OSError as e:
                         logger.warning(
-                            f"Key download error: {e}, retry ({attempt+1}/{max_retries_val})")
-                    time.sleep(retry_delay_val * (attempt + 1))
-                if not task.key_data:
-                    raise DecryptionKeyException(
-                        key_url=task.key_url or "unknown",
-                        key_error="Failed to download encryption key after retries",
-                        context=ErrorContext(task_id=task_id)
-                    )
+                            f"Failed to clean up file: {file_path}, error: {e}")
+            # Attempt to remove other temp files if any (e.g. .temp parts)
+            for item in os.listdir(temp_dir):
+                item_path = os.path.join(temp_dir, item)
+                try:
+                    if os.path.isfile(item_path):
+                        os.remove(item_path)
+                except OSError as e:
+                    logger.warning(
+                        f"Failed to clean up temp item: {item_path}, error: {e}")
+            try:
+                os.rmdir(temp_dir)
+            except OSError as e:
+                logger.warning(
+                    f"Failed to delete temporary directory: {temp_dir}, error: {e} (may not be empty)")
+        if task.status == TaskStatus.COMPLETED:
+            # Nothing is left to resume
+            task.delete_progress()
+        else:
+            task.save_progress()
 
-            if not task.output_file:
-                raise ConfigurationException(
-                    setting="output_file",
-                    value=None,
-                    context=ErrorContext(task_id=task_id)
-                )
+    def _get_ffmpeg_path(self) -> Optional[str]:
+        """Get the configured FFmpeg executable, ``None`` to look it up"""
+        if self.settings:
+            return str(self.settings.get("advanced", "ffmpeg_path", "")) or None
+        return None
 
-            output_dir: str = os.path.dirname(task.output_file)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir, exist_ok=True)
+    def _start_rendition_downloads(self, task: DownloadTask, options: "SegmentFetchOptions",
+                                   segment_workers: int
+                                   ) -> List["Future[Optional[Dict[str, str]]]"]:
+        """Start downloading a task's audio and subtitle renditions in the background.
 
-            temp_dir: str = f"{task.output_file}_temp"
-            os.makedirs(temp_dir, exist_ok=True)
+        Each rendition runs as a sub-download with its own segment workers
+        (half of the video's) on the shared connection pool, so they progress
+        alongside the video segments. Live recordings only follow the video.
+        """
+        renditions = [r for r in task.renditions or [] if r.manifest is not None]
+        if not renditions or task.live_playlist_url:
+            return []
+        task.rendition_stop_event.clear()
+        if task.canceled_event.is_set():
+            return []
+
+        workers = max(1, segment_workers // 2)
+        executor = ThreadPoolExecutor(max_workers=len(renditions),
+                                      thread_name_prefix=f"VidTanium-Rendition-{task.task_id[:8]}")
+        futures = [executor.submit(self._download_rendition, task, rendition, index, options, workers)
+                   for index, rendition in enumerate(renditions)]
+        executor.shutdown(wait=False)
+        return futures
+
+    def _stop_rendition_downloads(self, task: DownloadTask,
+                                  futures: List["Future[Optional[Dict[str, str]]]"]) -> None:
+        """Stop a task's rendition sub-downloads and wait for their threads to exit"""
+        task.rendition_stop_event.set()
+        if futures:
+            wait(futures)
+
+    def _download_rendition(self, task: DownloadTask, rendition: MediaRendition, index: int,
+                            options: "SegmentFetchOptions", workers: int) -> Optional[Dict[str, str]]:
+        """Download and merge one rendition, returning its file for muxing.
+
+        The rendition is fetched as a child task sharing the parent's pause
+        event; the parent's rendition stop event cancels it. Returns ``None``
+        if it could not be downloaded completely; the video is then saved
+        without it.
+        """
+        from .merger import interleave_init_sections, merge_files_binary, merge_subtitle_segments
 
-            iv = bytes.fromhex('00000000000000000000000000000000')
-            successful_files: List[str] = []
+        child = DownloadTask(name=f"{task.name} [{rendition.type} {rendition.language or rendition.name}]",
+                             segment_manifest=rendition.manifest, settings=task.settings)
+        child.paused_event = task.paused_event
+        child.canceled_event = task.rendition_stop_event
+        child_options = replace(options, temp_dir=os.path.join(
+            options.temp_dir, f"{rendition.type}_{index}"), merger=None, init_files={})
+        os.makedirs(child_options.temp_dir, exist_ok=True)
 
-            if task.segments is None:  # Should not happen if initialized correctly
-                task.segments = 0
-                task.progress["total"] = 0
+        try:
+            if child.key_url and options.key_fetcher:
+                child.key_data = key_cache.get_key(child.key_url, options.key_fetcher)
+            self._download_init_sections(child, child_options)
+
+            with ThreadPoolExecutor(max_workers=workers,
+                                    thread_name_prefix=f"VidTanium-Segment-{child.task_id[:8]}") as executor:
+                files = list(executor.map(
+                    lambda i: self._download_segment(child, i, child_options), range(child.segments or 0)))
+
+            if child.canceled_event.is_set() or not files or not all(files):
+                logger.warning(f"{rendition.type.capitalize()} rendition '{rendition.name}' "
+                               f"incomplete, saving {task.name} without it")
+                return None
+
+            output = os.path.join(options.temp_dir, f"{rendition.type}_{index}{rendition.file_extension}")
+            segment_paths = [f for f in files if f]
+            if rendition.type == "subtitles":
+                result = merge_subtitle_segments(segment_paths, output)
+            else:
+                result = merge_files_binary(
+                    interleave_init_sections(segment_paths, child_options.init_files), output)
+            if not result.get("success"):
+                return None
+            return {"path": output, "type": rendition.type,
+                    "language": rendition.language or "", "name": rendition.name}
+        except Exception as e:
+            logger.error(f"Rendition download failed for {task.name}: {e}", exc_info=True)
+            return None
+        finally:
+            shutil.rmtree(child_options.temp_dir, ignore_errors=True)
 
-            logger.info(
-                f"Downloading {task.segments} segments for task: {task.name}")
+    def _download_init_sections(self, task: DownloadTask, options: "SegmentFetchOptions") -> None:
+        """Fetch the initialization sections (``#EXT-X-MAP``) a task's segments need.
 
-            # Create recovery session for this task
-            recovery_session = self.recovery_manager.create_recovery_session(
-                task_id, task.name, task.base_url or "", task.output_file, task.segments
-            )
+        Every section is fetched once and recorded in ``options.init_files``
+        for each segment it is written in front of at merge time: the first
+        segment using it and the first one after each discontinuity. Files
+        kept from an interrupted run are reused.
+        """
+        manifest = task.segment_manifest
+        if manifest is None:
+            return
 
-            for i in range(task.segments):
-                if task.canceled_event.is_set():
-                    break
-                while task.status == TaskStatus.PAUSED:
-                    if task.canceled_event.is_set():
-                        break
-                    time.sleep(0.5)
-                if task.canceled_event.is_set():
-                    break  # Check again after pause
+        fetched: Dict[SegmentInit, str] = {}
+        for index, path in options.init_files.items():
+            init = manifest.init_section(index)
+            if init is not None:
+                fetched[init] = path
 
-                segment_key = str(i)
-                ts_filename = os.path.join(temp_dir, f"segment_{i}.ts")
-                if segment_key in task.segments_info and task.segments_info[segment_key].get("status") == "completed" and os.path.exists(ts_filename):
-                    logger.debug(f"Skipping already downloaded segment {i}")
-                    successful_files.append(ts_filename)
-                    continue
+        for index in manifest.init_starts:
+            init = manifest.init_section(index)
+            if index in options.init_files or init is None:
+                continue
+            init_path = fetched.get(init)
+            if init_path is None:
+                init_path = os.path.join(options.temp_dir, f"init_{index}.mp4")
+                if not os.path.exists(init_path) and \
+                        not self._download_init_section(task, init, init_path, options):
+                    return
+                fetched[init] = init_path
+            options.init_files[index] = init_path
+
+    def _download_init_section(self, task: DownloadTask, init: SegmentInit, path: str,
+                               options: "SegmentFetchOptions") -> bool:
+        """Download one initialization section with retries, honoring its byte range.
+
+        Returns ``False`` if the task was canceled; raises ``NetworkException``
+        once the retries are exhausted, as no segment plays without it.
+        """
+        headers = options.headers
+        if init.byte_range is not None:
+            headers = dict(options.headers, Range=range_header(*init.byte_range))
 
-                if not task.base_url:
-                    raise InvalidURLException(
-                        url="",
-                        reason="Base URL not specified for task segments",
-                        context=ErrorContext(task_id=task_id)
-                    )
-                segment_url = f"{task.base_url}/index{i}.ts"
-                temp_filename = f"{ts_filename}.temp"
-                task.progress["current_file"] = f"Segment {i+1}/{task.segments}"
-                segment_success = False
-                segment_start_time = time.time()
+        last_error: Optional[Exception] = None
+        for attempt in range(options.max_retries):
+            if task.canceled_event.is_set():
+                return False
+            lease: Optional[ConnectionLease] = None
+            try:
+                lease = self.connection_pool.acquire(init.url, options.error_context)
+                response = lease.session.get(
+                    init.url, timeout=self.timeout_manager.get_timeouts(init.url), headers=headers)
+                if response.status_code not in (200, 206):
+                    raise Exception(f"HTTP {response.status_code}: {response.reason}")
+
+                data = response.content
+                if init.byte_range is not None and response.status_code == 200:
+                    # The server ignored the Range header and sent the whole resource
+                    offset, length = init.byte_range
+                    data = data[offset:offset + length]
+                self.connection_pool.release(lease, success=True, bytes_transferred=len(data))
+                lease = None
+
+                with open(f"{path}.temp", "wb") as f:
+                    f.write(data)
+                os.replace(f"{path}.temp", path)
+                logger.debug(f"Downloaded initialization section ({len(data)} bytes): {init.url}")
+                return True
+            except Exception as e:
+                last_error = e
+                logger.warning(f"Initialization section download failed: {e}, "
+                               f"retry ({attempt+1}/{options.max_retries})")
+            finally:
+                if lease is not None:
+                    self.connection_pool.release(lease, success=False)
+            if attempt + 1 < options.max_retries:
+                time.sleep(options.retry_delay * (attempt + 1))
+
+        raise NetworkException(
+            f"Failed to download initialization section {init.url}: {last_error}",
+            context=ErrorContext(task_id=task.task_id, url=init.url)
+        )
+
+    def _fail_task_download(self, task: DownloadTask, e: Exception,
+                            error_context: ErrorContext) -> None:
+        """Mark a task failed after an unexpected error"""
+        task_id = task.task_id
+        # Handle error with enhanced error handling system
+        self._handle_task_error(task_id, e)
+
+        # Update task status
+        task.status = TaskStatus.FAILED
+        # Assuming it was RUNNING
+        self._emit_status_changed(task_id, TaskStatus.RUNNING, task.status)
+
+        # Create user-friendly error message
+        enhanced_exception = self.error_handler.handle_exception(
+            e, error_context, f"task_{task_id}"
+        )
+        self._emit_completed(
+            task_id, False, enhanced_exception.get_user_friendly_message()
+        )
 
-                for attempt in range(max_retries_val):
-                    if task.canceled_event.is_set():
+    def _run_segment_pool(self, task: DownloadTask, pending_segments: List[int],
+                          segment_files: List[Optional[str]], options: "SegmentFetchOptions",
+                          segment_workers: int,
+                          follower: Optional[LivePlaylistFollower] = None) -> None:
+        """Download pending segments with a bounded pool of segment workers.
+
+        Segments complete out of order; all bookkeeping (``segments_info``,
+        counters, progress file, progress events) happens here on the task
+        worker thread so the segment workers never contend on it. With a live
+        ``follower`` the pool keeps running until the playlist ends, queueing
+        segments as the follower appends them.
+        """
+        # Keep a small backlog per worker so a worker never idles waiting for
+        # the dispatcher, without materializing thousands of futures up front
+        max_in_flight = segment_workers * 2
+        pending = deque(pending_segments)
+        coalesce_size = self._get_range_coalesce_size()
+        in_flight: Dict["Future[List[Optional[str]]]", List[int]] = {}
+        completed_since_save = 0
+
+        last_sample_time = time.time()
+        last_sample_bytes = task.progress["downloaded_bytes"]
+        last_variant_check = last_sample_time
+
+        with ThreadPoolExecutor(max_workers=segment_workers,
+                                thread_name_prefix=f"VidTanium-Segment-{task.task_id[:8]}") as executor:
+            while True:
+                if follower is not None:
+                    pending.extend(self._take_live_segments(task, follower, segment_files))
+
+                while pending and len(in_flight) < max_in_flight and not task.canceled_event.is_set():
+                    group = self._take_segment_group(task, pending, coalesce_size)
+                    future = executor.submit(
+                        self._download_segment_group, task, group, options)
+                    in_flight[future] = group
+
+                if not in_flight:
+                    if follower is None or follower.finished or task.canceled_event.is_set():
                         break
+                    follower.wait_for_segments(0.5)
+                    done: Set["Future[List[Optional[str]]]"] = set()
+                else:
+                    done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    group = in_flight.pop(future)
                     try:
-                        logger.debug(
-                            f"Downloading segment {i+1}/{task.segments} from {segment_url}")
+                        results = future.result()
+                    except Exception as e:
+                        logger.error(
+                            f"Segment worker crashed on segments {group}: {e}", exc_info=True)
+                        results = [None] * len(group)
 
-                        # Check circuit breaker before attempting download
-                        if not self.circuit_breaker_manager.can_execute(segment_url):
-                            logger.warning(f"Circuit breaker is OPEN for {segment_url}, skipping attempt")
-                            time.sleep(retry_delay_val * (attempt + 1))
+                    for index, ts_filename in zip(group, results):
+                        if task.canceled_event.is_set() and ts_filename is None:
                             continue
 
-                        # Use enhanced connection pooling
-                        pooled_session = self.connection_pool.get_session(
-                            segment_url,
-                            error_context
-                        )
+                        self._record_segment_result(task, index, ts_filename, segment_files)
+                        if ts_filename:
+                            self._advance_merge(options, index, ts_filename)
+                            completed_since_save += 1
+
+                        if completed_since_save >= 10 or not ts_filename:
+                            task.save_progress()
+                            completed_since_save = 0
+
+                # Aggregate throughput over all segment workers of this task
+                current_time = time.time()
+                if current_time - last_sample_time >= 0.5 or done:
+                    with task.lock:
+                        downloaded_bytes = task.progress["downloaded_bytes"]
+                        task.update_speed(
+                            downloaded_bytes - last_sample_bytes, current_time - last_sample_time)
+                    last_sample_time = current_time
+                    last_sample_bytes = downloaded_bytes
+                    self._emit_progress(task.task_id, task.progress)
+
+                if (task.variants and pending and current_time - last_variant_check
+                        >= variant_selector.config.switch_check_interval):
+                    last_variant_check = current_time
+                    self._maybe_switch_variant(task, pending, options)
+
+    def _get_variant_deadline(self, task: DownloadTask) -> float:
+        """Get the seconds a task should finish within, 0 for no deadline"""
+        if task.deadline is not None:
+            return max(0.0, task.deadline)
+        if self.settings:
+            return float(self.settings.get("download", "variant_deadline_minutes", 0)) * 60
+        return 0.0
+
+    def _maybe_switch_variant(self, task: DownloadTask, pending: Deque[int],
+                              options: "SegmentFetchOptions") -> None:
+        """Continue the pending segments from a lower variant if the deadline would be missed.
+
+        Variants of a master playlist are aligned by media sequence number, so
+        the switch happens at the first segment after the last one already
+        taken (downloaded or in flight): every segment from there on is still
+        pending and comes from the new variant, and earlier pending segments
+        of a resumed task keep the current one. The switch point is recorded
+        as a discontinuity for the merge.
+        """
+        manifest = task.segment_manifest
+        deadline = self._get_variant_deadline(task)
+        if (not deadline or not task.variants or not task.variant_url or manifest is None
+                or task.live_playlist_url or manifest.has_byte_ranges):
+            return
 
-                        # Get adaptive timeouts based on network conditions
-                        conn_timeout, read_timeout = self.timeout_manager.get_timeouts(segment_url)
-                        adaptive_timeout = (conn_timeout, read_timeout)
+        pending_indexes = set(pending)
+        start = len(manifest)
+        while start > 0 and start - 1 in pending_indexes:
+            start -= 1
+        if start >= len(manifest):
+            return
 
-                        segment_start_time = time.time()
-                        try:
-                            response = pooled_session.get(
-                                segment_url, stream=True, timeout=adaptive_timeout)
-
-                            if response.status_code != 200:
-                                # Enhanced error handling with specific status code handling
-                                error_msg = f"HTTP {response.status_code}: {response.reason}"
-
-                                if response.status_code == 404:
-                                    logger.error(f"Segment not found (404): {segment_url}")
-                                    # For 404, don't retry as the segment likely doesn't exist
-                                    if attempt >= max_retries_val - 1:
-                                        raise Exception(f"Segment not found: {error_msg}")
-                                elif response.status_code == 403:
-                                    logger.error(f"Access forbidden (403): {segment_url}")
-                                    # For 403, try with different headers or authentication
-                                    if attempt >= max_retries_val - 1:
-                                        raise Exception(f"Access denied: {error_msg}")
-                                elif response.status_code >= 500:
-                                    logger.warning(f"Server error ({response.status_code}): {segment_url}")
-                                    # Server errors are often temporary, retry with exponential backoff
-                                    retry_delay = retry_delay_val * (2 ** attempt)
-                                else:
-                                    logger.warning(f"Client error ({response.status_code}): {segment_url}")
-                                    retry_delay = retry_delay_val * (attempt + 1)
-
-                                logger.warning(
-                                    f"Segment download failed ({error_msg}), retry ({attempt+1}/{max_retries_val}) in {retry_delay:.1f}s")
-                                time.sleep(retry_delay)
-                                continue
+        start_time = task.progress.get("start_time") or time.time()
+        time_left = deadline - (time.time() - start_time)
+        remaining_duration = sum(manifest.duration(index) for index in pending)
+        candidate = variant_selector.plan_switch(
+            task.variants, task.variant_url, remaining_duration, time_left,
+            task.progress.get("speed", 0.0))
+        if candidate is None:
+            return
 
-                        except requests.exceptions.Timeout as e:
-                            logger.warning(f"Segment download timeout: {segment_url} (attempt {attempt+1}/{max_retries_val})")
-                            # Record timeout for adaptive timeout adjustment
-                            self.timeout_manager.record_request(segment_url, 0, False, "timeout")
+        new_manifest = self._load_variant_manifest(candidate["url"], options)
+        if (new_manifest is None or new_manifest.has_byte_ranges
+                or new_manifest.media_sequence != manifest.media_sequence
+                or len(new_manifest) != len(manifest)):
+            logger.warning(f"Variant {candidate['url']} is not aligned with the current one, "
+                           f"not switching to it")
+            task.variants = [v for v in task.variants if v["url"] != candidate["url"]]
+            return
 
-                            if attempt >= max_retries_val - 1:
-                                raise Exception(f"Segment download timeout after {max_retries_val} attempts: {str(e)}")
+        manifest.replace_from(start, new_manifest)
+        task.save_manifest()
+        task.variant_url = candidate["url"]
+        task.variant_switches.append(
+            {"segment": start, "url": candidate["url"], "bandwidth": candidate.get("bandwidth", 0)})
+        logger.info(f"Task {task.name} continues from segment {start} with the "
+                    f"{candidate.get('resolution', 'unknown')} variant to meet its deadline")
+
+    def _load_variant_manifest(self, url: str,
+                               options: "SegmentFetchOptions") -> Optional[SegmentManifest]:
+        """Parse a variant's media playlist into a manifest"""
+        parser = M3U8Parser()
+        streams = parser.parse_url(url, options.headers)
+        if not streams or not streams[0].segments or streams[0].init_section is not None:
+            return None
+        return SegmentManifest.from_segments(streams[0].segments, streams[0].media_sequence)
+
+    def _configure_playlist_cache(self, settings: SettingsProvider) -> None:
+        """Size the shared playlist cache and place its disk tier"""
+        playlist_cache.set_max_entries(int(settings.get("download", "playlist_cache_entries", 256)))
+        if not playlist_cache.enabled or not settings.get("download", "playlist_cache_on_disk", True):
+            playlist_cache.set_disk_directory(None)
+            return
 
-                            # Increase timeout for next attempt
-                            adaptive_timeout = (adaptive_timeout[0] * 1.5, adaptive_timeout[1] * 1.5)
-                            time.sleep(retry_delay_val * (attempt + 1))
-                            continue
+        cache_root = str(settings.get("general", "cache_directory", "") or "")
+        if not cache_root:
+            cache_root = os.path.join(os.path.expanduser("~"), ".vidtanium", "cache")
+        try:
+            playlist_cache.set_disk_directory(os.path.join(cache_root, "playlists"))
+        except OSError as e:
+            logger.warning(f"Playlist disk cache disabled: {e}")
+            playlist_cache.set_disk_directory(None)
 
-                        except requests.exceptions.ConnectionError as e:
-                            logger.warning(f"Connection error for segment: {segment_url} (attempt {attempt+1}/{max_retries_val})")
-                            # Record connection error
-                            self.timeout_manager.record_request(segment_url, 0, False, "connection")
+    def _get_range_coalesce_size(self) -> int:
+        """Get the largest Range request used for adjacent byte-range segments"""
+        if self.settings:
+            return int(self.settings.get("download", "range_coalesce_size", 4 * 1024 * 1024))
+        return 4 * 1024 * 1024
 
-                            if attempt >= max_retries_val - 1:
-                                raise Exception(f"Connection failed after {max_retries_val} attempts: {str(e)}")
+    def _take_segment_group(self, task: DownloadTask, pending: Deque[int],
+                            coalesce_size: int) -> List[int]:
+        """Take the next pending segment plus any byte-contiguous successors.
 
-                            # Wait longer for connection errors
-                            time.sleep(retry_delay_val * (attempt + 2))
-                            continue
+        Segments that are adjacent byte ranges of the same resource are
+        fetched with one ``Range`` request of at most ``coalesce_size`` bytes.
+        """
+        first = pending.popleft()
+        group = [first]
+        manifest = task.segment_manifest
+        if coalesce_size <= 0 or manifest is None or not manifest.has_byte_ranges:
+            return group
+
+        first_range = manifest.byte_range(first)
+        if first_range is None:
+            return group
+        url = manifest.url(first)
+        end = first_range[0] + first_range[1]
+        size = first_range[1]
+
+        while pending:
+            next_range = manifest.byte_range(pending[0])
+            if (next_range is None or next_range[0] != end
+                    or size + next_range[1] > coalesce_size
+                    or manifest.url(pending[0]) != url):
+                break
+            group.append(pending.popleft())
+            end += next_range[1]
+            size += next_range[1]
+        return group
+
+    def _download_segment_group(self, task: DownloadTask, group: List[int],
+                                options: "SegmentFetchOptions") -> List[Optional[str]]:
+        """Download a group of segments, returning their file paths in order.
+
+        Segments a coalesced request did not deliver are retried one by one.
+        """
+        if len(group) == 1:
+            return [self._download_segment(task, group[0], options)]
+
+        completed = self._download_coalesced_ranges(task, group, options)
+        return [completed.get(index) or self._download_segment(task, index, options)
+                for index in group]
+
+    def _download_coalesced_ranges(self, task: DownloadTask, group: List[int],
+                                   options: "SegmentFetchOptions") -> Dict[int, str]:
+        """Fetch contiguous byte-range segments with one Range request.
+
+        The response is split back into segment files at the segment
+        boundaries, each decrypted with its own key and IV. Makes a single
+        attempt and returns the segments it completed.
+        """
+        from .decryptor import SegmentDecryptor
+
+        completed: Dict[int, str] = {}
+        self._wait_while_paused(task)
+        if task.canceled_event.is_set():
+            return completed
+
+        segment_url = self._get_segment_url(task, group[0])
+        ranges: List[Tuple[int, int]] = []
+        for index in group:
+            byte_range = self._get_segment_range(task, index)
+            if byte_range is None:
+                # Only byte-range segments can share a request
+                return completed
+            ranges.append(byte_range)
+        offset = ranges[0][0]
+        length = sum(r[1] for r in ranges)
+        if not self.circuit_breaker_manager.can_execute(segment_url):
+            return completed
+
+        lease: Optional[ConnectionLease] = None
+        temp_filename: Optional[str] = None
+        start_time = time.time()
+        try:
+            lease = self.connection_pool.acquire(segment_url, options.error_context)
+            response = lease.session.get(
+                segment_url, stream=True,
+                timeout=self.timeout_manager.get_timeouts(segment_url),
+                headers=dict(options.headers, Range=range_header(offset, length)))
+            if response.status_code != 206:
+                # A 200 would stream the whole resource; fall back to single ranges
+                raise Exception(f"HTTP {response.status_code}: range request not honored")
+
+            logger.debug(f"Downloading segments {group[0]+1}-{group[-1]+1}/{task.segments} "
+                         f"with one {length} byte range request")
+            splitter = ChunkSplitter(response.iter_content(chunk_size=options.chunk_size))
+            for index, (_, segment_length) in zip(group, ranges):
+                ts_filename = os.path.join(options.temp_dir, f"segment_{index}.ts")
+                temp_filename = f"{ts_filename}.temp"
+                task.progress["current_file"] = f"Segment {index+1}/{task.segments}"
+
+                key_data = self._get_segment_key(task, index, options)
+                decryptor = SegmentDecryptor(
+                    key_data, self._get_segment_iv(task, index)) if key_data else None
+                received = 0
+                with open(temp_filename, 'wb') as f:
+                    for chunk in splitter.take(segment_length):
+                        self._wait_while_paused(task)
+                        if task.canceled_event.is_set():
+                            self.connection_pool.release(lease, success=True)
+                            lease = None
+                            return completed
+                        f.write(decryptor.update(chunk) if decryptor else chunk)
+                        received += len(chunk)
+                        with task.lock:
+                            task.progress["downloaded_bytes"] += len(chunk)
+                        self.bandwidth_limiter.consume(
+                            len(chunk), task.task_id, segment_url, task.canceled_event)
+                    if decryptor:
+                        f.write(decryptor.finalize())
+
+                if received != segment_length:
+                    raise Exception(f"Range response ended after {received} of "
+                                    f"{segment_length} bytes of segment {index}")
+                os.replace(temp_filename, ts_filename)
+                temp_filename = None
+                if self._accept_segment(task, index, ts_filename, os.path.getsize(ts_filename)):
+                    completed[index] = ts_filename
+
+            response_time = time.time() - start_time
+            self._record_segment_attempt(segment_url, 0, response_time, bytes_transferred=length)
+            self.connection_pool.release(
+                lease, success=True, bytes_transferred=length, response_time=response_time)
+            lease = None
+        except Exception as e:
+            response_time = time.time() - start_time
+            logger.warning(f"Coalesced range request for segments {group[0]}-{group[-1]} "
+                           f"failed, fetching them separately: {e}")
+            self._record_segment_attempt(segment_url, 0, response_time, e)
+        finally:
+            if lease is not None:
+                self.connection_pool.release(lease, success=False)
+            if temp_filename and os.path.exists(temp_filename):
+                try:
+                    os.remove(temp_filename)
+                except OSError:
+                    pass
+        return completed
+
+    def _should_split_download(self, task: DownloadTask, index: int, response: Any,
+                               total_size: int, options: "SegmentFetchOptions") -> bool:
+        """Whether a response body is large enough to fetch as parallel ranges"""
+        threshold = 32 * 1024 * 1024
+        if self.settings:
+            threshold = int(self.settings.get("download", "split_threshold", threshold))
+        if threshold <= 0 or total_size < threshold:
+            return False
+        if response.headers.get("accept-ranges", "").lower() != "bytes":
+            return False
+        # CBC decryption needs the whole stream in order
+        return self._get_segment_key(task, index, options) is None
+
+    def _download_split_segment(self, task: DownloadTask, segment_url: str, total_size: int,
+                                ts_filename: str, options: "SegmentFetchOptions",
+                                validator: Optional[str] = None) -> bool:
+        """Download one large resource as parallel byte ranges.
+
+        Parts are written into a preallocated, memory-mapped temp file whose
+        per-part progress survives failures, so a retry or a restarted task
+        resumes each part where it stopped. Progress is bound to the
+        resource's ``validator``; when a part finds the resource changed the
+        split is discarded and the next attempt starts over.
+        """
+        connections = 4
+        if self.settings:
+            connections = int(self.settings.get("download", "split_connections", connections))
+        temp_filename = f"{ts_filename}.temp"
+        split = SplitFileDownload(temp_filename, total_size, connections, validator=validator)
+        pending_parts = split.pending_parts
+        logger.info(f"Downloading {total_size} bytes from {segment_url} "
+                    f"as {len(pending_parts)} parallel ranges")
+
+        split.open()
+        try:
+            with ThreadPoolExecutor(max_workers=len(pending_parts) or 1,
+                                    thread_name_prefix="VidTanium-Range") as executor:
+                list(executor.map(
+                    lambda part: self._download_file_part(task, segment_url, split, part, options),
+                    pending_parts))
+        finally:
+            split.close()
+
+        if split.invalidated:
+            logger.warning(f"{segment_url} changed during the split download, starting over")
+            return False
+        if not split.complete:
+            return False
+        os.replace(temp_filename, ts_filename)
+        return True
+
+    def _download_file_part(self, task: DownloadTask, segment_url: str, split: SplitFileDownload,
+                            part: FilePart, options: "SegmentFetchOptions") -> bool:
+        """Download the rest of one part of a split download; single attempt"""
+        lease: Optional[ConnectionLease] = None
+        start_time = time.time()
+        received = 0
+        try:
+            lease = self.connection_pool.acquire(segment_url, options.error_context)
+            headers = dict(options.headers, Range=range_header(part.offset, part.remaining))
+            if split.validator:
+                headers["If-Range"] = split.validator
+            response = lease.session.get(
+                segment_url, stream=True,
+                timeout=self.timeout_manager.get_timeouts(segment_url),
+                headers=headers)
+            part_validator = resume_validator(response.headers)
+            if split.validator and (response.status_code == 200 or (
+                    response.status_code == 206 and part_validator
+                    and part_validator != split.validator)):
+                # If-Range failed or the part comes from a newer version
+                response.close()
+                split.invalidate()
+                raise Exception("resource changed since the split download started")
+            if response.status_code != 206:
+                raise Exception(f"HTTP {response.status_code}: range request not honored")
+
+            for chunk in response.iter_content(chunk_size=options.chunk_size):
+                self._wait_while_paused(task)
+                if task.canceled_event.is_set() or split.invalidated:
+                    break
+                written = split.write(part, chunk)
+                received += written
+                with task.lock:
+                    task.progress["downloaded_bytes"] += written
+                self.bandwidth_limiter.consume(
+                    written, task.task_id, segment_url, task.canceled_event)
+                if part.complete:
+                    break
+
+            self.connection_pool.release(
+                lease, success=True, bytes_transferred=received,
+                response_time=time.time() - start_time)
+            lease = None
+            return part.complete
+        except Exception as e:
+            logger.warning(f"Range {part.offset}-{part.end - 1} of {segment_url} failed: {e}")
+            return False
+        finally:
+            if lease is not None:
+                self.connection_pool.release(lease, success=False)
+
+    def _start_live_follower(self, task: DownloadTask,
+                             options: "SegmentFetchOptions") -> Optional[LivePlaylistFollower]:
+        """Start following the playlist of a live task"""
+        if not task.live_playlist_url:
+            return None
+        if task.segment_manifest is None:
+            task.segment_manifest = SegmentManifest()
+
+        follower = LivePlaylistFollower(
+            task.live_playlist_url, task.segment_manifest, headers=options.headers)
+        with self.lock:
+            self.live_followers[task.task_id] = follower
+        follower.start()
+        return follower
+
+    def _take_live_segments(self, task: DownloadTask, follower: LivePlaylistFollower,
+                            segment_files: List[Optional[str]]) -> List[int]:
+        """Grow the task by the segments the live follower appended"""
+        new_indexes = follower.take_new_segments()
+        if new_indexes:
+            segment_files.extend([None] * (max(new_indexes) + 1 - len(segment_files)))
+            with task.lock:
+                task.segments = len(segment_files)
+                task.progress["total"] = task.segments
+        return new_indexes
+
+    def _stop_live_follower(self, task_id: str) -> None:
+        with self.lock:
+            follower = self.live_followers.pop(task_id, None)
+        if follower is not None:
+            follower.stop()
+
+    def stop_live_recording(self, task_id: str) -> bool:
+        """Stop following a live task's playlist.
+
+        The task finishes the segments found so far and merges them as usual.
+        """
+        with self.lock:
+            follower = self.live_followers.get(task_id)
+        if follower is None:
+            logger.warning(f"No live recording for task: {task_id}")
+            return False
+        follower.stop()
+        logger.info(f"Stopping live recording for task: {task_id}")
+        return True
+
+    def _record_segment_result(self, task: DownloadTask, index: int, ts_filename: Optional[str],
+                               segment_files: List[Optional[str]]) -> None:
+        """Record a finished segment in the task's segment table and counters"""
+        if ts_filename:
+            segment_files[index] = ts_filename
+            with task.lock:
+                task.progress["completed"] += 1
+        else:
+            with task.lock:
+                task.progress["failed"] += 1
+
+    def _get_merge_mode(self) -> str:
+        """Get how downloaded segments are merged into the output"""
+        if self.settings:
+            return str(self.settings.get("download", "merge_mode", "auto"))
+        return "auto"
+
+    def _use_incremental_merge(self, task: DownloadTask) -> bool:
+        """Whether segments are merged into the output while the task downloads
+
+        "append" always does and "concat" never does. "auto" does whenever
+        the segments can be joined by appending them: MPEG-TS and packed audio
+        segments, and fMP4 fragments behind their initialization sections.
+        Self-contained MP4 segments without an #EXT-X-MAP are left to the
+        FFmpeg concat merge after the download.
+        """
+        mode = self._get_merge_mode()
+        if mode != "auto":
+            return mode == "append"
+        manifest = task.segment_manifest
+        if manifest is None:
+            return True
+        return not any(
+            manifest.init_section(i) is None
+            and urllib.parse.urlsplit(manifest.url(i)).path.lower().endswith(_CONTAINER_SEGMENT_EXTENSIONS)
+            for i in range(len(manifest)))
+
+    def _advance_merge(self, options: "SegmentFetchOptions", index: int,
+                       ts_filename: Optional[str]) -> None:
+        """Hand a completed segment to the incremental merger, if any"""
+        if options.merger is None or not ts_filename:
+            return
+        try:
+            options.merger.add_segment(index, ts_filename)
+        except Exception as e:
+            # Leave the segment on disk; it is retried when the merge finishes
+            logger.error(f"Incremental merge of segment {index} failed: {e}", exc_info=True)
+
+    def _close_merge(self, options: Optional["SegmentFetchOptions"]) -> None:
+        """Close an unfinished incremental merge, keeping it resumable"""
+        if options is not None and options.merger is not None:
+            options.merger.abort()
+
+    def _record_segment_attempt(self, segment_url: str, attempt: int, response_time: float,
+                                error: Optional[Exception] = None, bytes_transferred: int = 0) -> None:
+        """Feed a segment request outcome to the adaptive timeout, retry and circuit breaker managers"""
+        # All managers learn per host; normalize once rather than per manager
+        host = host_key(segment_url)
+        if error is None:
+            # Record performance for adaptive timeout and throughput learning
+            self.timeout_manager.record_request(
+                host,
+                response_time,
+                success=True,
+                bytes_transferred=bytes_transferred
+            )
+
+            # Record successful attempt for adaptive retry learning
+            self.adaptive_retry_manager.record_attempt(
+                host,
+                attempt + 1,
+                RetryReason.UNKNOWN_ERROR,  # Success case
+                success=True,
+                response_time=response_time
+            )
+
+            # Record success for circuit breaker
+            self.circuit_breaker_manager.record_success(host, response_time)
+            return
+
+        self.timeout_manager.record_request(
+            host,
+            response_time,
+            success=False,
+            error_type=type(error).__name__
+        )
+
+        # Record failed attempt for adaptive retry learning
+        self.adaptive_retry_manager.record_attempt(
+            host,
+            attempt + 1,
+            self._classify_error_for_retry(error),
+            success=False,
+            response_time=response_time,
+            error_message=str(error)
+        )
+
+        # Record failure for circuit breaker
+        self.circuit_breaker_manager.record_failure(host, str(error))
+
+    def _accept_segment(self, task: DownloadTask, i: int, ts_filename: str,
+                        bytes_transferred: int) -> bool:
+        """Validate a downloaded segment and record it for recovery.
+
+        Invalid segments are deleted so the caller can retry them.
+        """
+        validation_report = self.segment_validator.validate_segment(
+            i, ts_filename, expected_size=bytes_transferred
+        )
+
+        if not validation_report.is_valid():
+            logger.warning(f"Segment {i} validation failed: {validation_report.error_message}")
+            # Remove invalid segment and retry
+            if os.path.exists(ts_filename):
+                os.remove(ts_filename)
+            return False
 
-                        except requests.exceptions.RequestException as e:
-                            logger.warning(f"Request error for segment: {segment_url} (attempt {attempt+1}/{max_retries_val}): {str(e)}")
+        # Additional integrity verification for critical segments
+        if validation_report.has_warnings():
+            integrity_result = self.integrity_verifier.verify_file_integrity(
+                ts_filename, expected_hash=""
+            )
+            if not integrity_result.is_valid:
+                logger.warning(f"Segment {i} integrity check failed: {integrity_result.error_message}")
+                if os.path.exists(ts_filename):
+                    os.remove(ts_filename)
+                return False
+
+        # Record the completed segment in the task's resume state
+        stat = os.stat(ts_filename)
+        task.record_segment(i, stat.st_size, stat.st_mtime_ns, file_crc32(ts_filename))
+        return True
+
+    def _download_segment(self, task: DownloadTask, i: int,
+                          options: "SegmentFetchOptions") -> Optional[str]:
+        """Download a single segment with retries.
+
+        Runs on a segment worker thread. Returns the path of the completed
+        segment file, or ``None`` if the segment failed or the task was canceled.
+        An interrupted attempt keeps its partial file, and the next one asks for
+        the rest of the segment with ``Range`` and ``If-Range``.
+        """
+        from .decryptor import AES_BLOCK_SIZE, SegmentDecryptor
+
+        task_id = task.task_id
+        self._wait_while_paused(task)
+        if task.canceled_event.is_set():
+            return None
+
+        ts_filename = os.path.join(options.temp_dir, f"segment_{i}.ts")
+        segment_url = self._get_segment_url(task, i)
+        temp_filename = f"{ts_filename}.temp"
+        task.progress["current_file"] = f"Segment {i+1}/{task.segments}"
+        max_retries_val = options.max_retries
+        retry_delay_val = options.retry_delay
+
+        # Byte-range segments are a slice of a larger resource
+        byte_range = self._get_segment_range(task, i)
+        request_headers = options.headers
+        if byte_range is not None:
+            request_headers = dict(options.headers, Range=range_header(*byte_range))
+        # Validator of the response the partial file came from, sent as If-Range
+        validator: Optional[str] = None
+
+        for attempt in range(max_retries_val):
+            if task.canceled_event.is_set():
+                return None
+            lease: Optional[ConnectionLease] = None
+            try:
+                logger.debug(
+                    f"Downloading segment {i+1}/{task.segments} from {segment_url}")
+
+                # Check circuit breaker before attempting download
+                if not self.circuit_breaker_manager.can_execute(segment_url):
+                    logger.warning(f"Circuit breaker is OPEN for {segment_url}, skipping attempt")
+                    time.sleep(retry_delay_val * (attempt + 1))
+                    continue
+
+                # Lease a pooled session, waiting for a free per-host connection slot
+                lease = self.connection_pool.acquire(
+                    segment_url,
+                    options.error_context
+                )
+
+                # Get adaptive timeouts based on network conditions
+                conn_timeout, read_timeout = self.timeout_manager.get_timeouts(segment_url)
+                adaptive_timeout = (conn_timeout, read_timeout)
+
+                key_data = self._get_segment_key(task, i, options)
+                partial = task.get_partial_segment(i)
+                resume_from = self._partial_offset(
+                    partial, temp_filename, AES_BLOCK_SIZE if key_data else 1)
+                # Encrypted segments are fetched from one block earlier: that
+                # ciphertext block is the CBC IV of the rest
+                fetch_from = resume_from - AES_BLOCK_SIZE if key_data and resume_from else resume_from
+                attempt_headers = request_headers
+                if resume_from:
+                    attempt_headers = dict(options.headers, Range=(
+                        range_header(byte_range[0] + fetch_from, byte_range[1] - fetch_from)
+                        if byte_range is not None else range_header(fetch_from)))
+                    if validator is not None and partial is not None and \
+                            validator_checksum(validator) == partial.checksum:
+                        attempt_headers["If-Range"] = validator
 
+                segment_start_time = time.time()
+                try:
+                    response = lease.session.get(
+                        segment_url, stream=True, timeout=adaptive_timeout,
+                        headers=attempt_headers)
+
+                    if response.status_code != 200 and not (
+                            (byte_range is not None or resume_from) and response.status_code == 206):
+                        # Enhanced error handling with specific status code handling
+                        error_msg = f"HTTP {response.status_code}: {response.reason}"
+                        retry_delay = retry_delay_val * (attempt + 1)
+
+                        if resume_from and response.status_code == 416:
+                            # The partial file does not fit the resource any more
+                            logger.warning(f"Cannot resume segment {i}, downloading it again")
+                            self._remove_partial_segment(temp_filename)
+                        elif response.status_code == 404:
+                            logger.error(f"Segment not found (404): {segment_url}")
+                            # For 404, don't retry as the segment likely doesn't exist
+                            if attempt >= max_retries_val - 1:
+                                raise Exception(f"Segment not found: {error_msg}")
+                        elif response.status_code == 403:
+                            logger.error(f"Access forbidden (403): {segment_url}")
+                            # For 403, try with different headers or authentication
                             if attempt >= max_retries_val - 1:
-                                raise Exception(f"Request failed after {max_retries_val} attempts: {str(e)}")
+                                raise Exception(f"Access denied: {error_msg}")
+                        elif response.status_code >= 500:
+                            logger.warning(f"Server error ({response.status_code}): {segment_url}")
+                            # Server errors are often temporary, retry with exponential backoff
+                            retry_delay = retry_delay_val * (2 ** attempt)
+                        else:
+                            logger.warning(f"Client error ({response.status_code}): {segment_url}")
 
-                            time.sleep(retry_delay_val * (attempt + 1))
-                            continue
+                        logger.warning(
+                            f"Segment download failed ({error_msg}), retry ({attempt+1}/{max_retries_val}) in {retry_delay:.1f}s")
+                        self.connection_pool.release(lease, success=False)
+                        lease = None
+                        time.sleep(retry_delay)
+                        continue
+
+                except requests.exceptions.Timeout as e:
+                    logger.warning(f"Segment download timeout: {segment_url} (attempt {attempt+1}/{max_retries_val})")
+                    # Record timeout for adaptive timeout adjustment
+                    self.timeout_manager.record_request(segment_url, 0, False, "timeout")
+                    if lease is not None:
+                        self.connection_pool.release(lease, success=False)
+                        lease = None
+
+                    if attempt >= max_retries_val - 1:
+                        raise Exception(f"Segment download timeout after {max_retries_val} attempts: {str(e)}")
+
+                    time.sleep(retry_delay_val * (attempt + 1))
+                    continue
+
+                except requests.exceptions.ConnectionError as e:
+                    logger.warning(f"Connection error for segment: {segment_url} (attempt {attempt+1}/{max_retries_val})")
+                    # Record connection error
+                    self.timeout_manager.record_request(segment_url, 0, False, "connection")
+                    if lease is not None:
+                        self.connection_pool.release(lease, success=False, error=e)
+                        lease = None
+
+                    if attempt >= max_retries_val - 1:
+                        raise Exception(f"Connection failed after {max_retries_val} attempts: {str(e)}")
+
+                    # Wait longer for connection errors
+                    time.sleep(retry_delay_val * (attempt + 2))
+                    continue
 
-                        total_size = int(
-                            response.headers.get('content-length', 0))
-                        downloaded_this_segment = 0
-                        chunk_start_time = time.time()
-                        last_speed_update = chunk_start_time
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"Request error for segment: {segment_url} (attempt {attempt+1}/{max_retries_val}): {str(e)}")
+                    if lease is not None:
+                        self.connection_pool.release(lease, success=False)
+                        lease = None
 
-                        # Create optimized streaming buffer for this segment
-                        buffer_context = f"segment_{task_id}_{i}"
-                        streaming_buffer = self.memory_optimizer.create_streaming_buffer(buffer_context)
+                    if attempt >= max_retries_val - 1:
+                        raise Exception(f"Request failed after {max_retries_val} attempts: {str(e)}")
 
-                        # Get optimal chunk size based on memory conditions
-                        optimal_chunk_size = self.memory_optimizer.get_optimal_buffer_size(buffer_context)
-                        chunk_size_val = min(chunk_size_val, optimal_chunk_size)
+                    time.sleep(retry_delay_val * (attempt + 1))
+                    continue
 
-                        with open(temp_filename, 'wb') as f:
-                            for chunk in response.iter_content(chunk_size=chunk_size_val):
-                                if task.canceled_event.is_set():
+                total_size = int(
+                    response.headers.get('content-length', 0))
+
+                resumed = bool(resume_from) and response.status_code == 206
+                if resumed and partial is not None and validator_checksum(
+                        resume_validator(response.headers) or "") != partial.checksum:
+                    # Without If-Range support the server cannot tell us the resource changed
+                    logger.warning(f"Segment {i} changed since it was interrupted, downloading it again")
+                    response.close()
+                    self.connection_pool.release(lease, success=True)
+                    lease = None
+                    self._remove_partial_segment(temp_filename)
+                    continue
+                validator = resume_validator(response.headers)
+                if not resumed and partial is not None:
+                    # The partial file is about to be overwritten
+                    task.record_partial_segment(i, 0, 0)
+                elif resumed:
+                    logger.debug(f"Resuming segment {i} from byte {resume_from}")
+
+                if not resumed and byte_range is None and \
+                        self._should_split_download(task, i, response, total_size, options):
+                    # Only the headers were read; fetch the body as parallel ranges instead
+                    response.close()
+                    self.connection_pool.release(lease, success=True)
+                    lease = None
+                    if not self._download_split_segment(
+                            task, segment_url, total_size, ts_filename, options, validator):
+                        if task.canceled_event.is_set():
+                            return None
+                        time.sleep(retry_delay_val * (attempt + 1))
+                        continue
+                    self._record_segment_attempt(segment_url, attempt, time.time() - segment_start_time,
+                                                 bytes_transferred=total_size)
+                    if not self._accept_segment(task, i, ts_filename, total_size):
+                        continue
+                    return ts_filename
+
+                trimmer: Optional[RangeTrimmer] = None
+                if byte_range is not None and resumed:
+                    trimmer = RangeTrimmer(0, byte_range[1] - fetch_from)
+                    total_size = byte_range[1]
+                elif byte_range is not None:
+                    # A 200 answer ignored the Range header and starts at byte 0
+                    trimmer = RangeTrimmer(
+                        byte_range[0] if response.status_code == 200 else 0, byte_range[1])
+                    total_size = byte_range[1]
+                elif resumed:
+                    total_size += fetch_from
+                downloaded_this_segment = fetch_from if resumed else 0
+                chunk_start_time = time.time()
+
+                # Create optimized streaming buffer for this segment
+                buffer_context = f"segment_{task_id}_{i}"
+                streaming_buffer = self.memory_optimizer.create_streaming_buffer(buffer_context)
+
+                # Get optimal chunk size based on memory conditions
+                optimal_chunk_size = self.memory_optimizer.get_optimal_buffer_size(buffer_context)
+                chunk_size_val = min(options.chunk_size, optimal_chunk_size)
+
+                # CBC state is carried across chunks; a resumed download takes
+                # its IV from the first block received
+                decryptor = SegmentDecryptor(
+                    key_data, None if resumed else self._get_segment_iv(task, i)) if key_data else None
+
+                with open(temp_filename, 'r+b' if resumed else 'wb') as f:
+                    if resumed:
+                        f.truncate(resume_from)
+                        f.seek(resume_from)
+                    recorded_size = resume_from
+                    try:
+                        for chunk in response.iter_content(chunk_size=chunk_size_val):
+                            if task.canceled_event.is_set():
+                                break
+                            self._wait_while_paused(task)
+                            if task.canceled_event.is_set():
+                                break  # Check again
+                            if trimmer is not None:
+                                if trimmer.done:
                                     break
-                                while not task.paused_event.is_set():  # Corrected: check if PAUSED
-                                    if task.canceled_event.is_set():
-                                        break
-                                    time.sleep(0.1)
-                                if task.canceled_event.is_set():
-                                    break  # Check again
-                                if not chunk:
-                                    continue
-
-                                chunk_process_start = time.time()
-
-                                # Process chunk (decrypt if needed)
-                                processed_chunk = chunk
-                                if task.key_data:  # Ensure key_data is present
-                                    processed_chunk = decrypt_data(chunk, task.key_data, iv, last_block=(
-                                        downloaded_this_segment + len(chunk) >= total_size and total_size > 0))
-
-                                # Use streaming buffer for efficient memory usage
-                                bytes_written = streaming_buffer.write(processed_chunk)
-                                if bytes_written < len(processed_chunk):
-                                    # Buffer full, flush to file
-                                    streaming_buffer.flush_to_file(f)
-                                    streaming_buffer.write(processed_chunk[bytes_written:])
-
-                                downloaded_this_segment += len(chunk)
+                                chunk = trimmer.trim(chunk)
+                            if not chunk:
+                                continue
+
+                            # Process chunk (decrypt if needed)
+                            processed_chunk = decryptor.update(chunk) if decryptor else chunk
+
+                            # Use streaming buffer for efficient memory usage
+                            bytes_written = streaming_buffer.write(processed_chunk)
+                            if bytes_written < len(processed_chunk):
+                                # Buffer full, flush to file
+                                streaming_buffer.flush_to_file(f)
+                                streaming_buffer.write(processed_chunk[bytes_written:])
+                                if validator is not None and f.tell() - recorded_size >= PARTIAL_RECORD_BYTES:
+                                    recorded_size = f.tell()
+                                    task.record_partial_segment(
+                                        i, recorded_size, validator_checksum(validator))
+
+                            downloaded_this_segment += len(chunk)
+                            with task.lock:
                                 task.progress["current_file_progress"] = downloaded_this_segment / \
                                     total_size if total_size > 0 else 0
                                 task.progress["downloaded_bytes"] += len(chunk)
 
-                                # Update speed calculation more accurately
-                                current_time = time.time()
-                                chunk_elapsed = current_time - chunk_process_start
-                                if current_time - last_speed_update >= 0.5:  # Update speed every 0.5 seconds
-                                    task.update_speed(
-                                        len(chunk), chunk_elapsed)
-                                    last_speed_update = current_time
-                                    self._emit_progress(task_id, task.progress)
+                            self.bandwidth_limiter.consume(
+                                len(chunk), task_id, segment_url, task.canceled_event)
+                    finally:
+                        # Write out what arrived, so an interrupted download resumes after it
+                        streaming_buffer.flush_to_file(f)
 
-                        if task.canceled_event.is_set():
-                            break  # Check after writing loop
+                    if decryptor and not task.canceled_event.is_set():
+                        final_chunk = decryptor.finalize()
+                        bytes_written = streaming_buffer.write(final_chunk)
+                        if bytes_written < len(final_chunk):
+                            streaming_buffer.flush_to_file(f)
+                            streaming_buffer.write(final_chunk[bytes_written:])
 
-                        # Flush any remaining data in buffer
-                        streaming_buffer.flush_to_file(f)
+                    # Flush any remaining data in buffer
+                    streaming_buffer.flush_to_file(f)
 
-                        # Record buffer performance for optimization
-                        buffer_duration = time.time() - chunk_start_time
-                        self.memory_optimizer.record_buffer_performance(
-                            buffer_context, downloaded_this_segment, buffer_duration
-                        )
-
-                        # Release streaming buffer
-                        self.memory_optimizer.release_streaming_buffer(buffer_context)
-
-                        os.rename(temp_filename, ts_filename)
-                        successful_files.append(ts_filename)
-                        task.segments_info[segment_key] = {"status": "completed", "size": os.path.getsize(
-                            ts_filename), "timestamp": time.time()}
-                        segment_success = True
-
-                        # Release session back to pool with success metrics
-                        segment_end_time = time.time()
-                        response_time = segment_end_time - segment_start_time
-                        bytes_transferred = os.path.getsize(ts_filename)
-
-                        # Record performance for adaptive timeout learning
-                        self.timeout_manager.record_request(
-                            segment_url,
-                            response_time,
-                            success=True
-                        )
-
-                        # Record successful attempt for adaptive retry learning
-                        self.adaptive_retry_manager.record_attempt(
-                            segment_url,
-                            attempt + 1,
-                            RetryReason.UNKNOWN_ERROR,  # Success case
-                            success=True,
-                            response_time=response_time
-                        )
-
-                        # Record success for circuit breaker
-                        self.circuit_breaker_manager.record_success(segment_url, response_time)
-
-                        # Validate downloaded segment
-                        validation_report = self.segment_validator.validate_segment(
-                            i, ts_filename, expected_size=downloaded_this_segment
-                        )
-
-                        if not validation_report.is_valid():
-                            logger.warning(f"Segment {i} validation failed: {validation_report.error_message}")
-                            # Remove invalid segment and retry
-                            if os.path.exists(ts_filename):
-                                os.remove(ts_filename)
-                            continue
+                if task.canceled_event.is_set():
+                    # Check after writing loop
+                    self.memory_optimizer.release_streaming_buffer(buffer_context)
+                    self.connection_pool.release(lease, success=True)
+                    self._keep_partial_segment(task, i, temp_filename, validator)
+                    return None
+
+                # Record buffer performance for optimization
+                buffer_duration = time.time() - chunk_start_time
+                self.memory_optimizer.record_buffer_performance(
+                    buffer_context, downloaded_this_segment, buffer_duration
+                )
 
-                        # Additional integrity verification for critical segments
-                        if validation_report.has_warnings():
-                            integrity_result = self.integrity_verifier.verify_file_integrity(
-                                ts_filename, expected_hash=""
-                            )
-                            if not integrity_result.is_valid:
-                                logger.warning(f"Segment {i} integrity check failed: {integrity_result.error_message}")
-                                if os.path.exists(ts_filename):
-                                    os.remove(ts_filename)
-                                continue
+                # Release streaming buffer
+                self.memory_optimizer.release_streaming_buffer(buffer_context)
 
-                        # Update recovery session with completed segment
-                        self.recovery_manager.mark_segment_complete(
-                            task_id, i, ts_filename, os.path.getsize(ts_filename)
-                        )
-
-                        self.connection_pool.release_session(
-                            pooled_session,
-                            segment_url,
-                            success=True,
-                            bytes_transferred=bytes_transferred,
-                            response_time=response_time
-                        )
-
-                        logger.debug(
-                            f"Successfully downloaded segment {i+1}/{task.segments}")
-                        break
-                    except Exception as e:
-                        # Clean up streaming buffer on error
-                        if 'buffer_context' in locals():
-                            self.memory_optimizer.release_streaming_buffer(buffer_context)
-
-                        # Determine retry reason based on exception type
-                        retry_reason = self._classify_error_for_retry(e)
-
-                        # Record failure for adaptive timeout learning
-                        if 'segment_start_time' in locals():
-                            failure_time = time.time() - segment_start_time
-                            error_type = type(e).__name__
-                            self.timeout_manager.record_request(
-                                segment_url,
-                                failure_time,
-                                success=False,
-                                error_type=error_type
-                            )
-
-                            # Record failed attempt for adaptive retry learning
-                            self.adaptive_retry_manager.record_attempt(
-                                segment_url,
-                                attempt + 1,
-                                retry_reason,
-                                success=False,
-                                response_time=failure_time,
-                                error_message=str(e)
-                            )
-
-                            # Record failure for circuit breaker
-                            self.circuit_breaker_manager.record_failure(segment_url, str(e))
-
-                        # Release session back to pool with failure metrics
-                        if 'pooled_session' in locals():
-                            self.connection_pool.release_session(
-                                pooled_session,
-                                segment_url,
-                                success=False,
-                                bytes_transferred=0,
-                                response_time=failure_time if 'failure_time' in locals() else 0.0
-                            )
+                os.replace(temp_filename, ts_filename)
 
-                        logger.error(
-                            f"Failed to download segment {i}: {e}", exc_info=True)
-                        if os.path.exists(temp_filename):
-                            try:
-                                os.remove(temp_filename)
-                            except OSError:
-                                pass
-                        time.sleep(retry_delay_val * (attempt + 1))
+                # Release session back to pool with success metrics
+                segment_end_time = time.time()
+                response_time = segment_end_time - segment_start_time
+                bytes_transferred = os.path.getsize(ts_filename)
 
-                if task.canceled_event.is_set():
-                    break
-                if segment_success:
-                    task.progress["completed"] += 1
-                else:
-                    task.progress["failed"] += 1
-                if i % 10 == 0 or not segment_success:
-                    task.save_progress()
-                self._emit_progress(task_id, task.progress)
+                self._record_segment_attempt(segment_url, attempt, response_time,
+                                             bytes_transferred=bytes_transferred)
 
-            if task.canceled_event.is_set():
-                logger.info(
-                    f"Task canceled during segments download: {task.name}")
-                task.status = TaskStatus.CANCELED
-            elif task.progress["failed"] > 0 and task.progress["completed"] == 0:
-                logger.error(
-                    f"All segments failed to download for task: {task.name}")
-                task.status = TaskStatus.FAILED
-            elif successful_files:
-                logger.info(
-                    f"Starting to merge {len(successful_files)} video segments for {task.name}")
-                task.progress["current_file"] = "Merging video"
-                # Update UI before merge
-                self._emit_progress(task_id, task.progress)
+                self.connection_pool.release(
+                    lease,
+                    success=True,
+                    bytes_transferred=bytes_transferred,
+                    response_time=response_time
+                )
+                lease = None
+
+                if not self._accept_segment(task, i, ts_filename, bytes_transferred):
+                    continue
+
+                logger.debug(
+                    f"Successfully downloaded segment {i+1}/{task.segments}")
+                return ts_filename
+            except Exception as e:
+                # Clean up streaming buffer on error
+                self.memory_optimizer.release_streaming_buffer(f"segment_{task_id}_{i}")
+
+                # Record failure for adaptive timeout, retry and circuit breaker learning
+                failure_time = 0.0
+                if 'segment_start_time' in locals():
+                    failure_time = time.time() - segment_start_time
+                    self._record_segment_attempt(segment_url, attempt, failure_time, e)
+
+                # Release session back to pool with failure metrics
+                if lease is not None:
+                    self.connection_pool.release(
+                        lease,
+                        success=False,
+                        bytes_transferred=0,
+                        response_time=failure_time,
+                        error=e
+                    )
 
-                merge_result: Dict[str, Any] = merge_files(
-                    successful_files, task.output_file, None)
-                if merge_result.get("success"):
-                    logger.success(
-                        f"Video merge successful: {task.output_file}")
-                    task.status = TaskStatus.COMPLETED
-                else:
-                    logger.error(
-                        f"Video merge failed: {merge_result.get('error', 'Unknown error')}")
-                    task.status = TaskStatus.FAILED
-            # No successful files and not canceled (e.g. all segments failed)
-            else:
                 logger.error(
-                    f"No successfully downloaded video segments to merge for task: {task.name}")
-                task.status = TaskStatus.FAILED
+                    f"Failed to download segment {i}: {e}", exc_info=True)
+                if not self._keep_partial_segment(task, i, temp_filename, validator):
+                    self._remove_partial_segment(temp_filename)
+                time.sleep(retry_delay_val * (attempt + 1))
 
-            task.progress["end_time"] = time.time()
-            # Assuming it was RUNNING
-            self._emit_status_changed(task_id, TaskStatus.RUNNING, task.status)
-            if task.status == TaskStatus.COMPLETED:
-                self._emit_completed(
-                    task_id, True, f"Video download and merge successful: {task.output_file}")
-            elif task.status != TaskStatus.CANCELED:  # FAILED or other non-canceled states
-                error_message = "Task failed."
-                if task.progress["failed"] > 0 and task.progress["completed"] == 0:
-                    error_message = "All segments failed to download."
-                elif not successful_files and task.segments > 0:  # task.segments should be > 0
-                    error_message = "No segments were successfully downloaded to merge."
-                elif 'error' in locals().get('merge_result', {}):  # Check if merge_result exists and has error
-                    error_message = f"Video merge failed: {locals()['merge_result']['error']}"
-
-                self._emit_completed(task_id, False, error_message)
-
-            auto_cleanup_val: bool = True
-            keep_temp_val: bool = False
-            if self.settings:
-                auto_cleanup_val = bool(self.settings.get(
-                    "general", "auto_cleanup", True))
-                keep_temp_val = bool(self.settings.get(
-                    "advanced", "keep_temp_files", False))
-
-            if auto_cleanup_val and not keep_temp_val and os.path.exists(temp_dir):
-                logger.info(f"Cleaning up temporary files in: {temp_dir}")
-                # successful_files list contains paths within temp_dir
-                for file_path in successful_files:  # These should have been merged
-                    if os.path.exists(file_path):
-                        try:
-                            os.remove(file_path)
-                        except OSError as e:
-                            logger.warning(
-                                f"Failed to clean up file: {file_path}, error: {e}")
-                # Attempt to remove other temp files if any (e.g. .temp parts)
-                for item in os.listdir(temp_dir):
-                    item_path = os.path.join(temp_dir, item)
-                    try:
-                        if os.path.isfile(item_path):
-                            os.remove(item_path)
-                    except OSError as e:
-                        logger.warning(
-                            f"Failed to clean up temp item: {item_path}, error: {e}")
-                try:
-                    os.rmdir(temp_dir)
-                except OSError as e:
-                    logger.warning(
-                        f"Failed to delete temporary directory: {temp_dir}, error: {e} (may not be empty)")
-            task.save_progress()
+        return None
 
-        except Exception as e:
-            # Handle error with enhanced error handling system
-            self._handle_task_error(task_id, e)
+    @staticmethod
+    def _partial_offset(partial: Optional[JournalEntry], temp_filename: str,
+                        block_size: int = 1) -> int:
+        """Get the offset an interrupted segment download can resume from
 
-            # Update task status
-            if task:
-                task.status = TaskStatus.FAILED
-                # Assuming it was RUNNING
-                self._emit_status_changed(task_id, TaskStatus.RUNNING, task.status)
+        Only bytes recorded with the validator of their response are trusted.
+        The offset is rounded down to a multiple of ``block_size``.
+        """
+        if partial is None or not partial.checksum:
+            return 0
+        try:
+            size = min(os.path.getsize(temp_filename), partial.size)
+        except OSError:
+            return 0
+        return size - size % block_size
 
-                # Create user-friendly error message
-                enhanced_exception = self.error_handler.handle_exception(
-                    e, error_context, f"task_{task_id}"
-                )
-                self._emit_completed(
-                    task_id, False, enhanced_exception.get_user_friendly_message()
-                )
-        finally:
-            with self.lock:
-                if task_id in self.active_tasks:
-                    self.active_tasks.remove(task_id)
+    def _keep_partial_segment(self, task: DownloadTask, i: int, temp_filename: str,
+                              validator: Optional[str]) -> bool:
+        """Record the partial file of an interrupted segment for resuming it
+
+        Returns False if it cannot be resumed: the server sent no validator,
+        or nothing was written.
+        """
+        if validator is None:
+            return False
+        try:
+            size = os.path.getsize(temp_filename)
+        except OSError:
+            return False
+        if size <= 0:
+            return False
+        task.record_partial_segment(i, size, validator_checksum(validator))
+        logger.debug(f"Kept {size} bytes of interrupted segment {i} for resuming")
+        return True
+
+    @staticmethod
+    def _remove_partial_segment(temp_filename: str) -> None:
+        if os.path.exists(temp_filename):
+            try:
+                os.remove(temp_filename)
+            except OSError:
+                pass
 
     def get_all_tasks(self) -> List[str]:
         """Get all task IDs"""
@@ -1721,10 +3153,23 @@ class DownloadManager:
         self.on_task_status_changed = callback  # Also set old-style callback for compatibility
 
     def set_bandwidth_limit(self, limit: Optional[int]) -> None:
-        """Set bandwidth limit in bytes per second"""
+        """Set the global bandwidth limit in bytes per second; takes effect immediately"""
         self.bandwidth_limit = limit or 0
+        self.bandwidth_limiter.set_global_limit(self.bandwidth_limit)
         logger.info(f"Bandwidth limit set to: {limit} bytes/sec" if limit else "Bandwidth limit removed")
 
+    def set_task_bandwidth_limit(self, task_id: str, limit: Optional[int]) -> None:
+        """Set a bandwidth limit in bytes per second for one task, within the global limit"""
+        self.bandwidth_limiter.set_task_limit(task_id, limit)
+        logger.info(f"Bandwidth limit for task {task_id} set to: {limit} bytes/sec"
+                    if limit else f"Bandwidth limit removed for task {task_id}")
+
+    def set_host_bandwidth_limit(self, host: str, limit: Optional[int]) -> None:
+        """Set a bandwidth limit in bytes per second for one host, within the global limit"""
+        self.bandwidth_limiter.set_host_limit(host, limit)
+        logger.info(f"Bandwidth limit for host {host} set to: {limit} bytes/sec"
+                    if limit else f"Bandwidth limit removed for host {host}")
+
     def set_task_completed_callback(self, callback: Callable[[str, str], None]) -> None:
         """Set task completed callback (DEPRECATED - use subscribe(EventType.TASK_COMPLETED, ...) instead)"""
         self.on_task_completed = callback
@@ -1748,6 +3193,10 @@ class DownloadManager:
             "resource_manager": resource_manager.get_enhanced_stats(),
             "adaptive_retry": self.adaptive_retry_manager.get_global_stats(),
             "circuit_breakers": self.circuit_breaker_manager.get_all_stats(),
+            "bandwidth_limiter": self.bandwidth_limiter.get_stats(),
+            "playlist_cache": playlist_cache.get_stats(),
+            "live_recordings": {task_id: follower.get_stats()
+                                for task_id, follower in list(self.live_followers.items())},
             "segment_validator": self.segment_validator.get_validation_stats(),
             "integrity_verifier": self.integrity_verifier.get_verification_stats(),
         }
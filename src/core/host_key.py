@@ -0,0 +1,73 @@
+"""
+Host Keys for VidTanium
+
+This module provides the host key shared by the circuit breaker, adaptive retry
+and adaptive timeout managers, plus a bounded LRU map for per-host state, so
+resilience learning aggregates per server instead of per segment URL and its
+memory stays flat on long downloads.
+"""
+
+from collections import OrderedDict
+from typing import Callable, Optional, TypeVar
+from urllib.parse import urlsplit
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_HOSTS = 256
+
+_DEFAULT_PORTS = {"http": 80, "https": 443, "ftp": 21}
+
+V = TypeVar("V")
+
+
+def host_key(url: str) -> str:
+    """Normalize a URL to its ``scheme://host[:port]`` key.
+
+    Scheme and host are lowercased, user info and default ports are dropped.
+    Values without a scheme (such as a bare host name) are returned lowercased
+    so already-normalized keys pass through unchanged.
+    """
+    parsed = urlsplit(url.strip())
+    if not parsed.scheme or not parsed.netloc:
+        return url.strip().lower()
+
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    return f"{scheme}://{host}"
+
+
+class HostLRU(OrderedDict):
+    """Per-host state that evicts the least recently used hosts.
+
+    Behaves like a normal dict for lookups and iteration; entries are only
+    reordered and evicted through ``get_or_create``. Callers hold their own
+    lock.
+    """
+
+    def __init__(self, max_hosts: int = DEFAULT_MAX_HOSTS) -> None:
+        super().__init__()
+        self.max_hosts = max(1, max_hosts)
+
+    def get_or_create(self, key: str, factory: Callable[[], V]) -> V:
+        """Get the state for a host, creating it and evicting old hosts if needed"""
+        value: Optional[V] = self.get(key)
+        if value is None:
+            value = factory()
+            self[key] = value
+            while len(self) > self.max_hosts:
+                evicted_key, _ = self.popitem(last=False)
+                logger.debug(f"Evicted resilience state for host: {evicted_key}")
+        else:
+            self.move_to_end(key)
+        return value
@@ -0,0 +1,210 @@
+"""
+HTTP/2 Transport for VidTanium
+
+This module provides the ``http2`` session transport of the connection pool.
+Sessions keep the ``requests`` API the downloader uses, but HTTPS requests are
+sent through one ``httpx`` client per host, which multiplexes concurrent
+segment requests as streams over a single HTTP/2 connection instead of
+opening a TCP and TLS connection per request. Requires ``httpx[http2]``.
+"""
+
+import threading
+import logging
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple, Union
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+
+from .connection_pool import EnhancedHTTPAdapter, HostPoolConfig, SessionTransport
+
+try:
+    import httpx
+    import h2  # noqa: F401  # HTTP/2 support of httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None  # type: ignore[assignment]
+    HTTPX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TimeoutValue = Union[None, float, Tuple[Optional[float], Optional[float]]]
+# Creates the client for a (verify, cert, proxy) combination
+ClientFactory = Callable[[Union[bool, str], Any, Optional[str]], "httpx.Client"]
+
+
+def _to_httpx_timeout(timeout: TimeoutValue, default: "httpx.Timeout") -> "httpx.Timeout":
+    """Convert a requests timeout (seconds or a (connect, read) tuple)"""
+    if timeout is None:
+        return default
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class HTTPXRawResponse:
+    """Body of an httpx response exposed like the urllib3 response requests reads"""
+
+    def __init__(self, response: "httpx.Response") -> None:
+        self.response = response
+        self._chunks: Optional[Iterator[bytes]] = None
+        self._buffer = b""
+
+    def stream(self, chunk_size: Optional[int] = None,
+               decode_content: bool = True) -> Iterator[bytes]:
+        """Yield the (content-decoded) body, mapping httpx errors to requests ones"""
+        try:
+            for chunk in self.response.iter_bytes(chunk_size):
+                yield chunk
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ConnectionError(e) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ChunkedEncodingError(e) from e
+        finally:
+            self.close()
+
+    def read(self, amt: Optional[int] = None, decode_content: bool = True) -> bytes:
+        """Read up to ``amt`` bytes of the body, all of it without ``amt``"""
+        if self._chunks is None:
+            self._chunks = self.stream()
+        while amt is None or len(self._buffer) < amt:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if amt is None:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def close(self) -> None:
+        """Close the stream, freeing its slot on the shared connection"""
+        self.response.close()
+
+    def release_conn(self) -> None:
+        self.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """requests adapter sending requests through a shared httpx client
+
+    An httpx client fixes its TLS verification, client certificate and proxy
+    when it is created, so requests whose ``verify``, ``cert`` or proxy differ
+    from the defaults are sent through the client ``client_factory`` returns
+    for that combination. Without a factory every request uses ``client``.
+    """
+
+    def __init__(self, client: "httpx.Client",
+                 client_factory: Optional[ClientFactory] = None) -> None:
+        super().__init__()
+        self.client = client
+        self.client_factory = client_factory
+
+    def _get_client(self, verify: Union[bool, str], cert: Any,
+                    proxy: Optional[str]) -> "httpx.Client":
+        """Get the client for a request's TLS and proxy settings"""
+        if self.client_factory is None or (verify is True and cert is None and proxy is None):
+            return self.client
+        return self.client_factory(verify, cert, proxy)
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False,
+             timeout: TimeoutValue = None, verify: Union[bool, str] = True,
+             cert: Any = None, proxies: Optional[Mapping[str, str]] = None) -> requests.Response:
+        """Send a prepared request with the session's TLS and proxy settings"""
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        client = self._get_client(
+            verify, cert, select_proxy(request.url or "", proxies) if proxies else None)
+        httpx_request = client.build_request(
+            request.method or "GET", request.url or "", headers=dict(request.headers),
+            content=request.body,
+            timeout=_to_httpx_timeout(timeout, client.timeout))
+        try:
+            response = client.send(httpx_request, stream=True)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(e, request=request) from e
+
+        return self.build_response(request, response, stream)
+
+    def build_response(self, request: requests.PreparedRequest, response: "httpx.Response",
+                       stream: bool) -> requests.Response:
+        """Wrap an httpx response in a requests response"""
+        result = requests.Response()
+        result.status_code = response.status_code
+        result.headers = CaseInsensitiveDict(response.headers.multi_items())
+        result.encoding = get_encoding_from_headers(result.headers)
+        result.reason = response.reason_phrase
+        result.url = request.url or ""
+        result.request = request
+        # Any BaseAdapter can be the connection; the stubs expect an HTTPAdapter
+        connection: BaseAdapter = self
+        result.connection = connection  # type: ignore[assignment]
+        result.raw = HTTPXRawResponse(response)
+        if not stream:
+            # Reads and closes the stream
+            result.content
+        return result
+
+    def close(self) -> None:
+        """The client is shared by the host's sessions and closed by the transport"""
+
+
+class HTTP2Transport(SessionTransport):
+    """Sessions of a host multiplexed over one HTTP/2 connection
+
+    Clients are kept per host and per TLS and proxy settings; sessions of a
+    host with the same settings share one client and its connection.
+    """
+
+    name = "http2"
+
+    def __init__(self) -> None:
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx[http2] is required for the HTTP/2 transport")
+        self.clients: Dict[Tuple[str, Union[bool, str], Any, Optional[str]], "httpx.Client"] = {}
+        self.lock = threading.RLock()
+
+    def create_session(self, host: str, config: HostPoolConfig) -> requests.Session:
+        """Create a session whose HTTPS requests share the host's HTTP/2 clients"""
+        session = requests.Session()
+        session.mount('https://', HTTP2Adapter(
+            self._get_client(host, config),
+            lambda verify, cert, proxy: self._get_client(host, config, verify, cert, proxy)))
+        # HTTP/2 is negotiated through TLS ALPN; plain HTTP stays on HTTP/1.1
+        session.mount('http://', EnhancedHTTPAdapter(config))
+        return session
+
+    def _get_client(self, host: str, config: HostPoolConfig, verify: Union[bool, str] = True,
+                    cert: Any = None, proxy: Optional[str] = None) -> "httpx.Client":
+        """Get the host's client for the TLS and proxy settings, creating it on first use"""
+        key = (host, verify, cert, proxy)
+        with self.lock:
+            client = self.clients.get(key)
+            if client is None:
+                client = httpx.Client(
+                    http2=True,
+                    verify=verify,
+                    cert=cert,
+                    proxy=proxy,
+                    timeout=httpx.Timeout(config.read_timeout, connect=config.connection_timeout),
+                    limits=httpx.Limits(max_connections=config.max_connections,
+                                        max_keepalive_connections=config.max_connections,
+                                        keepalive_expiry=config.keep_alive_timeout))
+                self.clients[key] = client
+                logger.debug(f"Created HTTP/2 client for host: {host}"
+                             f"{f' via proxy {proxy}' if proxy else ''}")
+            return client
+
+    def close(self) -> None:
+        """Close the shared connections of all hosts"""
+        with self.lock:
+            for client in self.clients.values():
+                client.close()
+            self.clients.clear()
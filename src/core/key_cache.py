@@ -0,0 +1,148 @@
+"""
+Encryption Key Cache for VidTanium
+
+This module provides a process-wide LRU cache for HLS encryption keys with
+TTL expiry and single-flight fetching, so concurrent tasks and rotating-key
+playlists request each key URI from the key server only once.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class KeyCacheConfig:
+    """Configuration for key cache behavior"""
+    max_entries: int = 256      # Maximum number of cached keys
+    ttl: float = 3600.0         # Seconds a cached key stays valid
+
+
+@dataclass
+class CachedKey:
+    """Cached key bytes with fetch time"""
+    data: bytes
+    fetched_at: float
+
+
+class _InFlightFetch:
+    """Fetch of a key URI that other callers can wait on"""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.data: Optional[bytes] = None
+        self.error: Optional[BaseException] = None
+
+
+class KeyCache:
+    """LRU cache of encryption keys keyed by key URI"""
+
+    def __init__(self, config: Optional[KeyCacheConfig] = None) -> None:
+        self.config = config or KeyCacheConfig()
+        self.entries: "OrderedDict[str, CachedKey]" = OrderedDict()
+        self.in_flight: Dict[str, _InFlightFetch] = {}
+        self.lock = threading.RLock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.shared_fetches = 0
+
+    def get_key(self, key_url: str, fetcher: Callable[[str], bytes]) -> bytes:
+        """Get key bytes for a URI, fetching them at most once across callers.
+
+        If another thread is already fetching the same URI, this call waits for
+        that fetch and shares its result. If that fetch fails or is canceled,
+        its error stays with its own caller and a waiting caller fetches again.
+        """
+        while True:
+            with self.lock:
+                cached = self._get_fresh(key_url)
+                if cached is not None:
+                    self.hits += 1
+                    return cached
+
+                flight = self.in_flight.get(key_url)
+                leader = flight is None
+                if leader:
+                    flight = _InFlightFetch()
+                    self.in_flight[key_url] = flight
+                    self.misses += 1
+                else:
+                    self.shared_fetches += 1
+
+            assert flight is not None
+            if not leader:
+                flight.done.wait()
+                if flight.data is not None:
+                    return flight.data
+                logger.debug(f"Shared fetch of key {key_url} failed, fetching again")
+                continue
+
+            try:
+                data = fetcher(key_url)
+                flight.data = data
+                self.put(key_url, data)
+                return data
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                with self.lock:
+                    self.in_flight.pop(key_url, None)
+                flight.done.set()
+
+    def get(self, key_url: str) -> Optional[bytes]:
+        """Get cached key bytes without fetching"""
+        with self.lock:
+            return self._get_fresh(key_url)
+
+    def put(self, key_url: str, data: bytes) -> None:
+        """Store key bytes, evicting the least recently used entries"""
+        with self.lock:
+            self.entries[key_url] = CachedKey(data, time.time())
+            self.entries.move_to_end(key_url)
+            while len(self.entries) > self.config.max_entries:
+                evicted_url, _ = self.entries.popitem(last=False)
+                logger.debug(f"Evicted encryption key from cache: {evicted_url}")
+
+    def invalidate(self, key_url: str) -> None:
+        """Drop a cached key, e.g. after it failed to decrypt"""
+        with self.lock:
+            self.entries.pop(key_url, None)
+
+    def clear(self) -> None:
+        """Drop all cached keys"""
+        with self.lock:
+            self.entries.clear()
+
+    def _get_fresh(self, key_url: str) -> Optional[bytes]:
+        """Get a cached key if it has not expired; caller holds the lock"""
+        cached = self.entries.get(key_url)
+        if cached is None:
+            return None
+        if time.time() - cached.fetched_at > self.config.ttl:
+            del self.entries[key_url]
+            return None
+        self.entries.move_to_end(key_url)
+        return cached.data
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get key cache statistics"""
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "in_flight": len(self.in_flight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_fetches": self.shared_fetches
+            }
+
+
+# Global key cache instance
+key_cache = KeyCache()
@@ -0,0 +1,203 @@
+"""
+Live Playlist Follower for VidTanium
+
+This module follows a live (or event) HLS media playlist: it reloads the
+playlist at the ``#EXT-X-TARGETDURATION`` cadence, appends segments with media
+sequence numbers it has not seen yet to the task's ``SegmentManifest`` and
+hands their indexes to the download loop, until ``#EXT-X-ENDLIST`` appears or
+recording is stopped.
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Any
+import logging
+
+from .m3u8_parser import EncryptionMethod, M3U8Parser, M3U8Stream
+from .segment_manifest import SegmentInit, SegmentKey, SegmentManifest
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LivePlaylistConfig:
+    """Configuration for live playlist reloading"""
+    default_target_duration: float = 6.0  # Used when the playlist has no target duration
+    min_reload_interval: float = 1.0      # Never reload faster than this
+    max_consecutive_failures: int = 10    # Reload failures before giving up
+    max_stale_reloads: int = 12           # Reloads without new segments before treating the stream as ended
+
+
+class LivePlaylistFollower:
+    """Reloads a live media playlist and appends new segments to a manifest"""
+
+    def __init__(self, playlist_url: str, manifest: SegmentManifest,
+                 headers: Optional[Dict[str, str]] = None,
+                 target_duration: float = 0.0,
+                 config: Optional[LivePlaylistConfig] = None) -> None:
+        self.playlist_url = playlist_url
+        self.manifest = manifest
+        self.config = config or LivePlaylistConfig()
+        self.parser = M3U8Parser()
+        self.parser.headers = headers or {}
+        self.target_duration = target_duration or self.config.default_target_duration
+
+        # Highest media sequence number already in the manifest
+        self.last_sequence = manifest.media_sequence + len(manifest) - 1
+
+        self.new_indexes: Deque[int] = deque()
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.ended = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+        # Statistics
+        self.reloads = 0
+        self.failures = 0
+        self.skipped_segments = 0
+
+    @property
+    def finished(self) -> bool:
+        """Whether following has ended and every new segment was taken"""
+        with self.condition:
+            return self.ended.is_set() and not self.new_indexes
+
+    def start(self) -> None:
+        """Start reloading the playlist in a background thread"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(
+            target=self._run, name="VidTanium-LivePlaylist", daemon=True)
+        self.thread.start()
+        logger.info(f"Following live playlist: {self.playlist_url}")
+
+    def stop(self) -> None:
+        """Stop following; segments already found are still handed out"""
+        self.stop_event.set()
+        self._mark_ended()
+
+    def take_new_segments(self) -> List[int]:
+        """Take the manifest indexes of segments appended since the last call"""
+        with self.condition:
+            indexes = list(self.new_indexes)
+            self.new_indexes.clear()
+            return indexes
+
+    def wait_for_segments(self, timeout: float) -> bool:
+        """Wait until new segments are available or following has ended"""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: bool(self.new_indexes) or self.ended.is_set(), timeout)
+
+    def refresh(self) -> List[int]:
+        """Reload the playlist once and append unseen segments to the manifest.
+
+        Returns the manifest indexes of the appended segments. Raises
+        ``ConnectionError`` if the playlist could not be downloaded.
+        """
+        content = self.parser._download_playlist(self.playlist_url)
+        if not content:
+            raise ConnectionError(f"Unable to reload live playlist: {self.playlist_url}")
+
+        stream = M3U8Stream()
+        stream.url = self.playlist_url
+        stream.base_url = self.parser._get_base_url(self.playlist_url)
+        self.parser._parse_media_playlist(content, stream)
+        self.reloads += 1
+        if stream.target_duration > 0:
+            self.target_duration = stream.target_duration
+
+        appended: List[int] = []
+        for position, segment in enumerate(stream.segments):
+            sequence = stream.media_sequence + position
+            if sequence <= self.last_sequence:
+                continue
+            if sequence > self.last_sequence + 1 and self.last_sequence >= self.manifest.media_sequence:
+                # The playlist window moved past segments we never saw
+                missed = sequence - self.last_sequence - 1
+                self.skipped_segments += missed
+                logger.warning(f"Live playlist skipped {missed} segments before sequence {sequence}")
+            if not len(self.manifest) and not appended:
+                self.manifest.media_sequence = sequence
+
+            key: Optional[SegmentKey] = None
+            if segment.encryption != EncryptionMethod.NONE:
+                iv = segment.key_iv
+                if iv is None and self.skipped_segments:
+                    # After a gap the manifest index no longer maps to the
+                    # media sequence number, so pin the sequence-derived IV
+                    iv = f"0x{sequence:032x}"
+                key = SegmentKey(method=segment.encryption.value, url=segment.key_url, iv=iv)
+            init = segment.init_section
+            appended.append(self.manifest.append(
+                segment.url, segment.duration, key,
+                init_section=SegmentInit(init.url, init.byte_range) if init is not None else None,
+                discontinuity=segment.discontinuity))
+            self.last_sequence = sequence
+
+        if appended:
+            with self.condition:
+                self.new_indexes.extend(appended)
+                self.condition.notify_all()
+            logger.debug(f"Live playlist added {len(appended)} segments "
+                         f"(last sequence {self.last_sequence})")
+
+        if not stream.is_live:
+            logger.info(f"Live playlist ended: {self.playlist_url}")
+            self._mark_ended()
+        return appended
+
+    def _run(self) -> None:
+        """Reload loop"""
+        stale_reloads = 0
+        consecutive_failures = 0
+        interval = self.target_duration
+
+        while not self.stop_event.is_set() and not self.ended.is_set():
+            if self.stop_event.wait(max(self.config.min_reload_interval, interval)):
+                break
+
+            try:
+                appended = self.refresh()
+                consecutive_failures = 0
+            except Exception as e:
+                consecutive_failures += 1
+                self.failures += 1
+                logger.warning(f"Live playlist reload failed "
+                               f"({consecutive_failures}/{self.config.max_consecutive_failures}): {e}")
+                if consecutive_failures >= self.config.max_consecutive_failures:
+                    logger.error(f"Giving up on live playlist: {self.playlist_url}")
+                    break
+                continue
+
+            if appended:
+                stale_reloads = 0
+                interval = self.target_duration
+            else:
+                # An unchanged playlist is retried at half the target duration
+                stale_reloads += 1
+                interval = self.target_duration / 2
+                if stale_reloads >= self.config.max_stale_reloads:
+                    logger.info(f"Live playlist stopped updating, ending recording: {self.playlist_url}")
+                    break
+
+        self._mark_ended()
+
+    def _mark_ended(self) -> None:
+        with self.condition:
+            self.ended.set()
+            self.condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get live follower statistics"""
+        return {
+            "playlist_url": self.playlist_url,
+            "segments": len(self.manifest),
+            "last_sequence": self.last_sequence,
+            "target_duration": self.target_duration,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "skipped_segments": self.skipped_segments,
+            "ended": self.ended.is_set()
+        }
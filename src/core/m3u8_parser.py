@@ -1,10 +1,17 @@
+import io
 import re
 import requests
 import urllib.parse
+from datetime import datetime
 from enum import Enum
-from typing import List, Dict, Optional, Any, Tuple, Union
+from typing import Iterator, List, Dict, Optional, Any, Tuple, Union
 from loguru import logger
 
+from .segment_manifest import SegmentManifest
+from .playlist_cache import playlist_cache
+from .variant_selector import variant_selector
+from .renditions import MediaRendition, load_rendition_manifests, parse_media_tag, select_renditions
+
 # ========================================================================
 # Enums - 枚举类型定义
 # ========================================================================
@@ -32,9 +39,23 @@ class EncryptionMethod(Enum):
 # ========================================================================
 
 
+class M3U8InitSection:
+    """Media initialization section (#EXT-X-MAP), shared by the segments it applies to"""
+
+    __slots__ = ("url", "byte_range")
+
+    def __init__(self, url: str = "", byte_range: Optional[Tuple[int, int]] = None) -> None:
+        self.url = url
+        self.byte_range = byte_range  # (offset, length) within url
+
+
 class M3U8Segment:
     """M3U8 video segment"""
 
+    # Large playlists create one record per segment, so skip the per-instance dict
+    __slots__ = ("url", "duration", "index", "encryption", "key_url", "key_iv",
+                 "discontinuity", "byte_range", "init_section", "program_date_time")
+
     def __init__(self) -> None:
         self.url: str = ""
         self.duration: float = 0.0
@@ -43,6 +64,9 @@ class M3U8Segment:
         self.key_url: Optional[str] = None
         self.key_iv: Optional[str] = None
         self.discontinuity: bool = False
+        self.byte_range: Optional[Tuple[int, int]] = None  # (offset, length) within url
+        self.init_section: Optional[M3U8InitSection] = None
+        self.program_date_time: Optional[datetime] = None
 
 
 class M3U8Stream:
@@ -62,6 +86,56 @@ class M3U8Stream:
         self.duration: float = 0.0
         self.segment_count: int = 0
         self.base_url: str = ""
+        self.media_sequence: int = 0
+        self.target_duration: float = 0.0
+        self.playlist_type: str = ""
+        self.is_live: bool = False  # No #EXT-X-ENDLIST yet; segments keep being added
+        self.discontinuity_sequence: int = 0
+        self.init_section: Optional[M3U8InitSection] = None  # First #EXT-X-MAP, if any
+        self.audio_group: Optional[str] = None  # GROUP-ID of the #EXT-X-MEDIA audio renditions
+        self.subtitles_group: Optional[str] = None
+
+
+# ========================================================================
+# Parsing helpers - 解析辅助函数
+# ========================================================================
+
+
+_ATTRIBUTE_PATTERN = re.compile(r'([A-Z0-9-]+)=(?:"([^"]*)"|([^",]*))(?:,|$)')
+
+
+def _iter_playlist_lines(content: str) -> Iterator[str]:
+    """Iterate over stripped, non-empty playlist lines without splitting the whole text"""
+    for raw_line in io.StringIO(content):
+        line = raw_line.strip()
+        if line:
+            yield line
+
+
+def _resolve_url(base_url: str, uri: str) -> str:
+    """Resolve a playlist URI against the playlist's base URL"""
+    if uri.startswith('http'):
+        return uri
+    # Plain file names are by far the most common case; skip urljoin for them
+    if (base_url.endswith('/') and '?' not in base_url and '#' not in base_url
+            and not uri.startswith(('/', '.', '?', '#')) and ':' not in uri):
+        return base_url + uri
+    return urllib.parse.urljoin(base_url, uri)
+
+
+def _parse_byte_range(value: str) -> Tuple[int, Optional[int]]:
+    """Parse ``<length>[@<offset>]`` into (length, offset)"""
+    length, _, offset = value.strip().strip('"').partition('@')
+    return int(length), int(offset) if offset else None
+
+
+def _parse_date_time(value: str) -> Optional[datetime]:
+    """Parse an #EXT-X-PROGRAM-DATE-TIME value"""
+    try:
+        return datetime.fromisoformat(value.strip())
+    except ValueError:
+        logger.warning(f"Invalid program date time: {value}")
+        return None
 
 
 # ========================================================================
@@ -79,6 +153,7 @@ class M3U8Parser:
         self.master_playlist: str = ""
         self.headers: Dict[str, str] = {}
         self.timeout: int = 30
+        self.renditions: List[MediaRendition] = []  # #EXT-X-MEDIA of the master playlist
 
     def parse_url(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 30) -> List[M3U8Stream]:
         """
@@ -97,6 +172,7 @@ class M3U8Parser:
         self.headers = headers or {}
         self.timeout = timeout
         self.streams = []
+        self.renditions = []
 
         try:
             # Download master playlist
@@ -136,11 +212,14 @@ class M3U8Parser:
         """Download playlist content"""
         try:
             logger.debug(f"Sending HTTP request to: {url}")
-            response = requests.get(
-                url, headers=self.headers, timeout=self.timeout)
+            response = playlist_cache.fetch(
+                url, self.headers,
+                lambda request_url, headers: requests.get(
+                    request_url, headers=headers, timeout=self.timeout))
             if response.status_code == 200:
                 logger.debug(
-                    f"Successfully received playlist ({len(response.text)} bytes)")
+                    f"Successfully received playlist ({len(response.text)} bytes"
+                    f"{', cached' if response.from_cache else ''})")
                 return response.text
             else:
                 logger.error(
@@ -179,72 +258,131 @@ class M3U8Parser:
     def _parse_master_playlist(self, content: str) -> None:
         """Parse master playlist"""
         logger.info("Parsing master playlist")
-        lines = content.splitlines()
         stream_info: Optional[Dict[str, str]] = None
 
-        for i, line in enumerate(lines):
-            line = line.strip()
-
+        for line in _iter_playlist_lines(content):
             if line.startswith('#EXT-X-STREAM-INF:'):
                 stream_info = self._parse_attributes(line[18:])
+                continue
+            if line.startswith('#EXT-X-MEDIA:'):
+                rendition = parse_media_tag(self._parse_attributes(line[13:]), self.base_url)
+                if rendition is not None:
+                    self.renditions.append(rendition)
+                continue
+            if line.startswith('#') or stream_info is None:
+                continue
+
+            # The URI line following #EXT-X-STREAM-INF
+            stream = M3U8Stream()
+            stream.url = _resolve_url(self.base_url, line)
+            stream.base_url = self._get_base_url(stream.url)
+            stream.type = StreamType.VIDEO
+
+            # Set stream attributes
+            if 'BANDWIDTH' in stream_info:
+                stream.bandwidth = int(stream_info['BANDWIDTH'])
+            if 'RESOLUTION' in stream_info:
+                stream.resolution = stream_info['RESOLUTION']
+            if 'CODECS' in stream_info:
+                stream.codecs = stream_info['CODECS']
+            if 'NAME' in stream_info:
+                stream.name = stream_info['NAME']
+            stream.audio_group = stream_info.get('AUDIO')
+            stream.subtitles_group = stream_info.get('SUBTITLES')
+            stream_info = None
 
-                # Make sure the next line is a URL
-                if i + 1 < len(lines) and not lines[i + 1].startswith('#'):
-                    stream = M3U8Stream()
-
-                    # Set URL (absolute or relative)
-                    stream_url = lines[i + 1]
-                    if stream_url.startswith('http'):
-                        stream.url = stream_url
-                    else:
-                        stream.url = urllib.parse.urljoin(
-                            self.base_url, stream_url)
-
-                    stream.base_url = self._get_base_url(stream.url)
-                    stream.type = StreamType.VIDEO
-
-                    # Set stream attributes
-                    if stream_info and 'BANDWIDTH' in stream_info:
-                        stream.bandwidth = int(stream_info['BANDWIDTH'])
-                    if stream_info and 'RESOLUTION' in stream_info:
-                        stream.resolution = stream_info['RESOLUTION']
-                    if stream_info and 'CODECS' in stream_info:
-                        stream.codecs = stream_info['CODECS']
-                    if stream_info and 'NAME' in stream_info:
-                        stream.name = stream_info['NAME']
-
-                    logger.debug(
-                        f"Found stream: {stream.resolution}, {stream.bandwidth} bps, URL: {stream.url}")
+            logger.debug(
+                f"Found stream: {stream.resolution}, {stream.bandwidth} bps, URL: {stream.url}")
 
-                    # Download and parse media playlist
-                    logger.debug(f"Downloading media playlist: {stream.url}")
-                    media_content = self._download_playlist(stream.url)
-                    if media_content:
-                        self._parse_media_playlist(media_content, stream)
-                    else:
-                        logger.warning(
-                            f"Unable to download media playlist: {stream.url}")
+            # Download and parse media playlist
+            logger.debug(f"Downloading media playlist: {stream.url}")
+            media_content = self._download_playlist(stream.url)
+            if media_content:
+                self._parse_media_playlist(media_content, stream)
+            else:
+                logger.warning(
+                    f"Unable to download media playlist: {stream.url}")
 
-                    self.streams.append(stream)
+            self.streams.append(stream)
 
         logger.debug(f"Found {len(self.streams)} streams in master playlist")
 
     def _parse_media_playlist(self, content: str, stream: M3U8Stream) -> None:
-        """Parse media playlist"""
+        """Parse media playlist in a single pass.
+
+        Tags that describe the next segment (#EXTINF, #EXT-X-BYTERANGE,
+        #EXT-X-DISCONTINUITY, #EXT-X-PROGRAM-DATE-TIME) are collected until
+        its URI line; #EXT-X-KEY and #EXT-X-MAP apply to all following
+        segments.
+        """
         logger.info(
             f"Parsing media playlist for stream: {stream.name or stream.url}")
-        lines = content.splitlines()
+        base_url = stream.base_url
+        segments = stream.segments
         current_key_url: Optional[str] = None
         current_key_iv: Optional[str] = None
         current_encryption = EncryptionMethod.NONE
+        current_init: Optional[M3U8InitSection] = None
         segment_index = 0
         total_duration: float = 0.0
+        ended = False
+
+        # Pending state for the next segment
+        duration: Optional[float] = None
+        byte_range: Optional[Tuple[int, Optional[int]]] = None
+        discontinuity = False
+        program_date_time: Optional[datetime] = None
+
+        # Where a byte range without an offset continues
+        last_range_url: Optional[str] = None
+        last_range_end = 0
+
+        for line in _iter_playlist_lines(content):
+            if not line.startswith('#'):
+                # URI line completes the pending segment
+                if duration is None:
+                    continue
+                segment = M3U8Segment()
+                segment.url = _resolve_url(base_url, line)
+                segment.duration = duration
+                segment.index = segment_index
+                segment.encryption = current_encryption
+                segment.key_url = current_key_url
+                segment.key_iv = current_key_iv
+                segment.discontinuity = discontinuity
+                segment.init_section = current_init
+                segment.program_date_time = program_date_time
+                if byte_range is not None:
+                    length, offset = byte_range
+                    if offset is None:
+                        offset = last_range_end if segment.url == last_range_url else 0
+                    segment.byte_range = (offset, length)
+                    last_range_url = segment.url
+                    last_range_end = offset + length
+
+                segments.append(segment)
+                total_duration += duration
+                segment_index += 1
+                duration = None
+                byte_range = None
+                discontinuity = False
+                program_date_time = None
 
-        for i, line in enumerate(lines):
-            line = line.strip()
+                # Log every 1000 segments to avoid flooding logs
+                if segment_index % 1000 == 0:
+                    logger.debug(f"Parsed {segment_index} segments so far")
+
+            elif line.startswith('#EXTINF:'):
+                duration = float(line[8:].split(',', 1)[0])
+            elif line.startswith('#EXT-X-BYTERANGE:'):
+                byte_range = _parse_byte_range(line[17:])
+            elif line == '#EXT-X-DISCONTINUITY':
+                discontinuity = True
+            elif line.startswith('#EXT-X-PROGRAM-DATE-TIME:'):
+                program_date_time = _parse_date_time(line[25:])
 
             # Parse key lines
-            if line.startswith('#EXT-X-KEY:'):
+            elif line.startswith('#EXT-X-KEY:'):
                 key_info = self._parse_attributes(line[11:])
                 if 'METHOD' in key_info:
                     method = key_info['METHOD']
@@ -258,52 +396,42 @@ class M3U8Parser:
                         logger.debug(f"Detected encryption: {method}")
 
                         if 'URI' in key_info:
-                            key_uri = key_info['URI'].strip('"')
-                            if key_uri.startswith('http'):
-                                current_key_url = key_uri
-                            else:
-                                current_key_url = urllib.parse.urljoin(
-                                    stream.base_url, key_uri)
+                            current_key_url = _resolve_url(base_url, key_info['URI'].strip('"'))
                             logger.debug(
                                 f"Encryption key URL: {current_key_url}")
 
-                        if 'IV' in key_info:
-                            current_key_iv = key_info['IV']
+                        # A new key tag without IV falls back to the sequence number
+                        current_key_iv = key_info.get('IV')
+                        if current_key_iv:
                             logger.debug(f"Encryption IV: {current_key_iv}")
 
-            # Parse segment lines
-            elif line.startswith('#EXTINF:'):
-                duration_str = line[8:].split(',')[0]
-                duration = float(duration_str)
-                total_duration += duration
-
-                # Make sure the next line is a URL
-                if i + 1 < len(lines) and not lines[i + 1].startswith('#'):
-                    segment = M3U8Segment()
-                    segment.duration = duration
-                    segment.index = segment_index
-                    segment.encryption = current_encryption
-                    segment.key_url = current_key_url
-                    segment.key_iv = current_key_iv
-
-                    # Set URL (absolute or relative)
-                    segment_url = lines[i + 1]
-                    if segment_url.startswith('http'):
-                        segment.url = segment_url
-                    else:
-                        segment.url = urllib.parse.urljoin(
-                            stream.base_url, segment_url)
-
-                    stream.segments.append(segment)
-                    segment_index += 1
-
-                    # Log every 50 segments to avoid flooding logs
-                    if segment_index % 50 == 0:
-                        logger.debug(f"Parsed {segment_index} segments so far")
+            elif line.startswith('#EXT-X-MAP:'):
+                map_info = self._parse_attributes(line[11:])
+                if 'URI' in map_info:
+                    init_range: Optional[Tuple[int, int]] = None
+                    if 'BYTERANGE' in map_info:
+                        length, offset = _parse_byte_range(map_info['BYTERANGE'])
+                        init_range = (offset or 0, length)
+                    current_init = M3U8InitSection(
+                        _resolve_url(base_url, map_info['URI']), init_range)
+                    if stream.init_section is None:
+                        stream.init_section = current_init
+
+            elif line.startswith('#EXT-X-MEDIA-SEQUENCE:'):
+                stream.media_sequence = int(line[22:])
+            elif line.startswith('#EXT-X-DISCONTINUITY-SEQUENCE:'):
+                stream.discontinuity_sequence = int(line[30:])
+            elif line.startswith('#EXT-X-TARGETDURATION:'):
+                stream.target_duration = float(line[22:])
+            elif line.startswith('#EXT-X-PLAYLIST-TYPE:'):
+                stream.playlist_type = line[21:].upper()
+            elif line == '#EXT-X-ENDLIST':
+                ended = True
 
         # Update stream information
         stream.duration = total_duration
         stream.segment_count = segment_index
+        stream.is_live = not ended and stream.playlist_type != "VOD"
         logger.debug(
             f"Found {segment_index} segments with total duration {total_duration:.2f} seconds")
 
@@ -320,8 +448,7 @@ class M3U8Parser:
     def _parse_attributes(self, attribute_string: str) -> Dict[str, str]:
         """Parse attribute string"""
         attributes: Dict[str, str] = {}
-        pattern = r'([A-Z0-9-]+)=(?:"([^"]*)"|([^",]*))(?:,|$)'
-        matches = re.findall(pattern, attribute_string)
+        matches = _ATTRIBUTE_PATTERN.findall(attribute_string)
 
         for match in matches:
             key = match[0]
@@ -330,12 +457,28 @@ class M3U8Parser:
 
         return attributes
 
-    def get_best_quality_stream(self) -> Optional[M3U8Stream]:
-        """Get highest quality stream"""
+    def get_best_quality_stream(self, deadline: Optional[float] = None,
+                                connections: int = 1) -> Optional[M3U8Stream]:
+        """Get highest quality stream.
+
+        With a ``deadline`` in seconds, get the highest quality stream that is
+        expected to download within it at the throughput measured to the
+        media host over ``connections`` connections.
+        """
         if not self.streams:
             logger.warning("No streams available to select best quality")
             return None
 
+        if deadline:
+            duration = max(stream.duration for stream in self.streams)
+            selected = variant_selector.select(
+                self.streams, duration, deadline, connections=connections)
+            if selected is not None:
+                logger.debug(
+                    f"Selected stream for {deadline:.0f}s deadline: {selected.resolution}, "
+                    f"{selected.bandwidth} bps")
+            return selected
+
         # Sort by bandwidth and select highest
         sorted_streams = sorted(
             self.streams, key=lambda s: s.bandwidth, reverse=True)
@@ -344,6 +487,26 @@ class M3U8Parser:
             f"Selected best quality stream: {best_stream.resolution}, {best_stream.bandwidth} bps")
         return best_stream
 
+    def get_renditions(self, stream: M3U8Stream, audio_language: Optional[str] = None,
+                       subtitle_language: Optional[str] = None) -> List[MediaRendition]:
+        """Get the separate audio and subtitle renditions of a stream with their segments.
+
+        Rendition playlists are downloaded in parallel; renditions muxed into
+        the stream itself are not returned.
+        """
+        selected = select_renditions(self.renditions, stream.audio_group, stream.subtitles_group,
+                                     audio_language, subtitle_language)
+        return load_rendition_manifests(selected, self._load_rendition_manifest)
+
+    def _load_rendition_manifest(self, url: str) -> Optional[SegmentManifest]:
+        """Download and parse a rendition's media playlist"""
+        content = self._download_playlist(url)
+        if not content:
+            return None
+        rendition_stream = parse_media_playlist(content, url, self._get_base_url(url))
+        return SegmentManifest.from_segments(
+            rendition_stream.segments, rendition_stream.media_sequence)
+
     def get_lowest_quality_stream(self) -> Optional[M3U8Stream]:
         """Get lowest quality stream"""
         if not self.streams:
@@ -358,6 +521,19 @@ class M3U8Parser:
         return lowest_stream
 
 
+def parse_media_playlist(content: str, url: str, base_url: Optional[str] = None) -> M3U8Stream:
+    """Parse a media playlist into a stream with its segments.
+
+    Relative URIs are resolved against ``base_url``, the playlist ``url``
+    itself by default.
+    """
+    stream = M3U8Stream()
+    stream.url = url
+    stream.base_url = base_url or url
+    M3U8Parser()._parse_media_playlist(content, stream)
+    return stream
+
+
 # ========================================================================
 # URL Pattern Utils - URL模式工具
 # ========================================================================
@@ -443,13 +619,16 @@ def extract_m3u8_url_from_page(url: str, headers: Optional[Dict[str, str]] = Non
         return ""
 
 
-def extract_m3u8_info(url: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+def extract_m3u8_info(url: str, headers: Optional[Dict[str, str]] = None,
+                      deadline: Optional[float] = None) -> Dict[str, Any]:
     """
     Extract M3U8 information from URL
 
     Args:
         url: M3U8 link or webpage containing M3U8 link
         headers: HTTP request headers
+        deadline: Seconds the download should finish within; selects the
+            best stream that fits instead of the highest bandwidth one
 
     Returns:
         Dictionary containing parsed information
@@ -462,7 +641,11 @@ def extract_m3u8_info(url: str, headers: Optional[Dict[str, str]] = None) -> Dic
         "key_url": "",
         "segments": 0,
         "duration": 0,
-        "encryption": "NONE"
+        "encryption": "NONE",
+        "manifest": None,
+        "is_live": False,
+        "playlist_url": "",
+        "renditions": []
     }
 
     try:
@@ -492,7 +675,7 @@ def extract_m3u8_info(url: str, headers: Optional[Dict[str, str]] = None) -> Dic
             return result
 
         # Get best quality stream
-        selected_stream = parser.get_best_quality_stream()
+        selected_stream = parser.get_best_quality_stream(deadline)
         logger.debug(
             f"Selected best quality stream from {len(streams)} available streams")
 
@@ -521,6 +704,12 @@ def extract_m3u8_info(url: str, headers: Optional[Dict[str, str]] = None) -> Dic
             result["segments"] = selected_stream.segment_count
             result["duration"] = selected_stream.duration
             result["encryption"] = selected_stream.encryption.value
+            result["manifest"] = SegmentManifest.from_segments(
+                selected_stream.segments, selected_stream.media_sequence)
+            result["is_live"] = selected_stream.is_live
+            result["playlist_url"] = selected_stream.url
+            if not selected_stream.is_live:
+                result["renditions"] = parser.get_renditions(selected_stream)
 
             logger.success(
                 f"Stream analysis complete: {result['segments']} segments, {result['duration']:.2f} seconds, encryption: {result['encryption']}")
@@ -52,7 +52,7 @@ class StreamingBuffer:
             self.size = new_size
             logger.debug(f"Buffer resized to {new_size} bytes")
     
-    def write(self, data: bytes) -> int:
+    def write(self, data: Union[bytes, memoryview]) -> int:
         """Write data to buffer"""
         data_len = len(data)
         if self.position + data_len > self.size:
@@ -127,12 +127,18 @@ class MemoryMappedFile:
                     with open(self.file_path, 'wb') as f:
                         f.seek(self.size - 1)
                         f.write(b'\0')
+            elif '+' in self.mode and self.size:
+                # Update mode keeps existing content; create or grow the file to size
+                self.file_path.parent.mkdir(parents=True, exist_ok=True)
+                if not self.file_path.exists() or self.file_path.stat().st_size < self.size:
+                    with open(self.file_path, 'ab') as f:
+                        f.truncate(self.size)
             
             self.file_handle = open(self.file_path, self.mode)  # 
 
             # Create memory map
             if self.file_handle is not None:
-                if 'r' in self.mode and 'w' not in self.mode:
+                if 'r' in self.mode and '+' not in self.mode:
                     self.mmap_handle = mmap.mmap(self.file_handle.fileno(), 0, access=mmap.ACCESS_READ)
                 else:
                     self.mmap_handle = mmap.mmap(self.file_handle.fileno(), 0)
@@ -1,8 +1,11 @@
+import hashlib
 import os
+import struct
 import subprocess
 import shutil
 import tempfile
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Sequence
 from loguru import logger
 from src.core.utils.version_checker import VersionChecker  # Added import
 
@@ -133,6 +136,290 @@ def merge_files_binary(files: List[str], output_file: str) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+# Sidecar index of SegmentAppendWriter: a header (magic and the digest of the
+# download's identity) followed by one fixed-size (segment index, size) record
+# per appended segment
+INDEX_MAGIC = b"VTIX\x02"
+INDEX_IDENTITY_SIZE = 16
+INDEX_HEADER_SIZE = len(INDEX_MAGIC) + INDEX_IDENTITY_SIZE
+INDEX_RECORD = struct.Struct("<IQ")
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _copy_file_into(src_fd: int, dst_fd: int, dst_offset: int, count: int) -> int:
+    """
+    Copy ``count`` bytes from the start of ``src_fd`` to ``dst_offset`` in ``dst_fd``
+
+    Uses ``os.copy_file_range`` (in-kernel, reflink on supporting filesystems)
+    or ``os.sendfile`` when available and falls back to buffered copying.
+
+    Returns:
+        int: Number of bytes copied
+    """
+    copied = 0
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < count:
+                n = os.copy_file_range(src_fd, dst_fd, count - copied,
+                                       offset_src=copied, offset_dst=dst_offset + copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError as e:
+            # Cross-device copies and some filesystems do not support it
+            logger.debug(f"copy_file_range unavailable, falling back: {e}")
+
+    if copied < count and hasattr(os, "sendfile"):
+        try:
+            os.lseek(dst_fd, dst_offset + copied, os.SEEK_SET)
+            while copied < count:
+                n = os.sendfile(dst_fd, src_fd, copied, count - copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError as e:
+            logger.debug(f"sendfile unavailable, falling back: {e}")
+
+    if copied < count:
+        os.lseek(src_fd, copied, os.SEEK_SET)
+        os.lseek(dst_fd, dst_offset + copied, os.SEEK_SET)
+        while copied < count:
+            chunk = os.read(src_fd, min(COPY_CHUNK_SIZE, count - copied))
+            if not chunk:
+                break
+            view = memoryview(chunk)
+            while view:
+                written = os.write(dst_fd, view)
+                view = view[written:]
+            copied += len(chunk)
+
+    return copied
+
+
+class SegmentAppendWriter:
+    """
+    Writes segments in index order directly into the final output file
+
+    Each segment lands at its final offset (the sum of the sizes of all
+    earlier segments), optionally into preallocated space. A small sidecar
+    index records every appended segment so an interrupted merge resumes
+    after the last complete segment instead of starting over.
+
+    The index is bound to ``identity`` (e.g. the task id): an output left by
+    a different download, or written without an identity, is started over.
+    """
+
+    def __init__(self, output_file: str, identity: Optional[str] = None) -> None:
+        self.output_file = output_file
+        self.index_file = f"{output_file}.idx"
+        self.identity_digest = _identity_digest(identity)
+        self.sizes: List[int] = []
+        self.offset = 0
+
+        self._load_index()
+        self.fd = os.open(output_file, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        # Drop any partially written segment beyond the last indexed one
+        os.ftruncate(self.fd, self.offset)
+
+        self.index_handle = open(self.index_file, "ab")
+        if self.index_handle.tell() == 0:
+            identity_digest = self.identity_digest or bytes(INDEX_IDENTITY_SIZE)
+            self.index_handle.write(INDEX_MAGIC + identity_digest)
+            self.index_handle.flush()
+
+    @property
+    def next_index(self) -> int:
+        """Index of the next segment to append"""
+        return len(self.sizes)
+
+    def _load_index(self) -> None:
+        """Restore appended segments from the sidecar index"""
+        if not os.path.exists(self.index_file) or not os.path.exists(self.output_file):
+            if os.path.exists(self.index_file):
+                os.remove(self.index_file)
+            return
+
+        with open(self.index_file, "rb") as f:
+            data = f.read()
+
+        if not data.startswith(INDEX_MAGIC) or len(data) < INDEX_HEADER_SIZE:
+            logger.warning(f"Ignoring invalid merge index: {self.index_file}")
+            os.remove(self.index_file)
+            return
+        if (self.identity_digest is None
+                or data[len(INDEX_MAGIC):INDEX_HEADER_SIZE] != self.identity_digest):
+            # Left by another download to the same output; its data is truncated
+            logger.warning(
+                f"Merge index {self.index_file} belongs to another download, starting over")
+            os.remove(self.index_file)
+            return
+
+        output_size = os.path.getsize(self.output_file)
+        body = data[INDEX_HEADER_SIZE:]
+        usable = len(body) - len(body) % INDEX_RECORD.size
+        for index, size in INDEX_RECORD.iter_unpack(body[:usable]):
+            if index != len(self.sizes) or self.offset + size > output_size:
+                break
+            self.sizes.append(size)
+            self.offset += size
+
+        # Rewrite the index if it had a torn or stale tail
+        valid_length = INDEX_HEADER_SIZE + len(self.sizes) * INDEX_RECORD.size
+        if valid_length != len(data):
+            with open(self.index_file, "r+b") as f:
+                f.truncate(valid_length)
+
+        if self.sizes:
+            logger.info(
+                f"Resuming merge into {self.output_file} after {len(self.sizes)} segments")
+
+    def preallocate(self, remaining_size: int) -> None:
+        """Reserve disk space for the segments still to be appended"""
+        if remaining_size > 0 and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(self.fd, self.offset, remaining_size)
+            except OSError as e:
+                logger.debug(f"Preallocation not supported for {self.output_file}: {e}")
+
+    def append_file(self, index: int, segment_file: str, init_file: Optional[str] = None) -> int:
+        """
+        Append a segment file at its final offset
+
+        Args:
+            index: Segment index; must equal ``next_index``
+            segment_file: Path of the downloaded segment
+            init_file: Initialization section written in front of the segment;
+                both are recorded as one entry of the index
+
+        Returns:
+            int: Number of bytes appended
+        """
+        if index != self.next_index:
+            raise ValueError(f"Segment {index} appended out of order, expected {self.next_index}")
+
+        size = 0
+        for file in ([init_file] if init_file else []) + [segment_file]:
+            file_size = os.path.getsize(file)
+            src_fd = os.open(file, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            try:
+                copied = _copy_file_into(src_fd, self.fd, self.offset + size, file_size)
+            finally:
+                os.close(src_fd)
+
+            if copied != file_size:
+                raise IOError(f"Short copy of {file}: {copied}/{file_size} bytes")
+            size += file_size
+
+        self._commit(index, size)
+        return size
+
+    def append_bytes(self, index: int, data: bytes) -> int:
+        """Append in-memory segment data at its final offset"""
+        if index != self.next_index:
+            raise ValueError(f"Segment {index} appended out of order, expected {self.next_index}")
+
+        os.lseek(self.fd, self.offset, os.SEEK_SET)
+        view = memoryview(data)
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
+
+        self._commit(index, len(data))
+        return len(data)
+
+    def truncate(self, count: int) -> None:
+        """Drop every appended segment from position ``count`` on"""
+        if count >= len(self.sizes):
+            return
+        del self.sizes[count:]
+        self.offset = sum(self.sizes)
+        os.ftruncate(self.fd, self.offset)
+        self.index_handle.truncate(INDEX_HEADER_SIZE + count * INDEX_RECORD.size)
+        self.index_handle.flush()
+
+    def _commit(self, index: int, size: int) -> None:
+        self.sizes.append(size)
+        self.offset += size
+        self.index_handle.write(INDEX_RECORD.pack(index, size))
+        self.index_handle.flush()
+
+    def close(self, complete: bool = False) -> None:
+        """
+        Close the output file
+
+        Args:
+            complete: Whether all segments were appended; removes the sidecar index
+        """
+        if self.fd < 0:
+            return
+        # Release unused preallocated space
+        os.ftruncate(self.fd, self.offset)
+        os.close(self.fd)
+        self.fd = -1
+        self.index_handle.close()
+        if complete and os.path.exists(self.index_file):
+            os.remove(self.index_file)
+
+
+def _identity_digest(identity: Optional[str]) -> Optional[bytes]:
+    """Digest of a download identity as stored in the merge index header"""
+    if identity is None:
+        return None
+    return hashlib.sha256(identity.encode("utf-8")).digest()[:INDEX_IDENTITY_SIZE]
+
+
+def merge_files_append(files: List[str], output_file: str, delete_segments: bool = True,
+                       init_files: Optional[Dict[int, str]] = None,
+                       identity: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Merge files by appending them in place into the output file
+
+    Segments are copied at their final offsets without an intermediate
+    concatenation, and each segment is deleted as soon as it has been
+    appended so peak disk usage stays close to the output size.
+
+    Args:
+        files: List of files to merge, in order
+        output_file: Output file path
+        delete_segments: Whether to delete each segment after appending it
+        init_files: Initialization sections to write in front of the files
+            at these positions of ``files``
+        identity: Identity of the download (e.g. task id); an interrupted
+            merge only resumes when it was started with the same identity
+
+    Returns:
+        dict: Result of the merge operation
+    """
+    writer: Optional[SegmentAppendWriter] = None
+    try:
+        writer = SegmentAppendWriter(output_file, identity)
+        init_files = init_files or {}
+        writer.preallocate(sum(os.path.getsize(file) for file in files[writer.next_index:]
+                               if os.path.exists(file)))
+
+        for index, file in enumerate(files):
+            if index < writer.next_index:
+                # Appended before an interruption
+                continue
+            if not os.path.exists(file):
+                raise FileNotFoundError(f"Segment file not found: {file}")
+
+            writer.append_file(index, file, init_files.get(index))
+            if delete_segments:
+                os.remove(file)
+
+        writer.close(complete=True)
+        logger.success(f"Successfully merged {len(files)} files by in-place append")
+        return {"success": True}
+
+    except Exception as e:
+        if writer is not None:
+            writer.close()
+        logger.error(f"Append merge failed: {str(e)}", exc_info=True)
+        return {"success": False, "error": str(e)}
+
+
 def convert_ts_to_mp4(ts_file: str, output_file: str, ffmpeg_path: Optional[str] = None) -> Dict[str, Any]:
     """
     Convert TS file to MP4 format
@@ -170,7 +457,156 @@ def convert_ts_to_mp4(ts_file: str, output_file: str, ffmpeg_path: Optional[str]
         return {"success": False, "error": str(e)}
 
 
-def merge_files(files: List[str], output_file: str, settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def merge_subtitle_segments(files: List[str], output_file: str) -> Dict[str, Any]:
+    """
+    Merge WebVTT subtitle segments into one subtitle file
+
+    Every segment starts with its own ``WEBVTT`` header block; only the first
+    one is kept and the cues of the others are appended after it.
+
+    Args:
+        files: Subtitle segment files, in order
+        output_file: Output file path
+
+    Returns:
+        dict: Result of the merge operation
+    """
+    try:
+        with open(output_file, 'w', encoding='utf-8') as outfile:
+            for index, file in enumerate(files):
+                with open(file, 'r', encoding='utf-8-sig', errors='replace') as infile:
+                    text = infile.read().replace('\r\n', '\n')
+                if index > 0 and text.startswith('WEBVTT'):
+                    # Drop the header block up to the first blank line
+                    _, _, text = text.partition('\n\n')
+                outfile.write(text.strip('\n') + '\n\n')
+
+        logger.success(f"Successfully merged {len(files)} subtitle segments")
+        return {"success": True}
+
+    except Exception as e:
+        logger.error(f"Subtitle merge failed: {str(e)}", exc_info=True)
+        return {"success": False, "error": str(e)}
+
+
+def _keep_rendition_sidecars(output_file: str, renditions: List[Dict[str, str]]) -> List[str]:
+    """Move rendition files next to the output as ``<name>.<type>.<language><ext>``"""
+    base = os.path.splitext(output_file)[0]
+    sidecars: List[str] = []
+    for index, rendition in enumerate(renditions):
+        suffix = rendition.get("language") or str(index)
+        sidecar = f"{base}.{rendition['type']}.{suffix}{os.path.splitext(rendition['path'])[1]}"
+        try:
+            shutil.move(rendition["path"], sidecar)
+            sidecars.append(sidecar)
+        except OSError as e:
+            logger.warning(f"Failed to keep {rendition['type']} rendition: {e}")
+    return sidecars
+
+
+def mux_renditions(output_file: str, renditions: List[Dict[str, str]],
+                   ffmpeg_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Mux separately downloaded audio and subtitle renditions into the video
+
+    All renditions are added in a single FFmpeg pass with stream copy. When
+    separate audio renditions are present they replace any audio muxed into
+    the video; subtitles are converted to ``mov_text`` for MP4. Renditions
+    that cannot be muxed (no FFmpeg, or subtitles in an MPEG-TS output) are
+    kept next to the output file instead.
+
+    Args:
+        output_file: Merged video file, replaced by the muxed output
+        renditions: Rendition files as dicts with ``path``, ``type``
+            ("audio" or "subtitles"), ``language`` and ``name``
+        ffmpeg_path: Path to FFmpeg executable
+
+    Returns:
+        dict: Result of the mux operation, with the kept files in ``sidecars``
+    """
+    if not renditions:
+        return {"success": True, "sidecars": []}
+
+    extension = os.path.splitext(output_file)[1].lower()
+    subtitles_supported = extension in (".mp4", ".m4v", ".mov", ".mkv")
+    muxed = [r for r in renditions if r["type"] == "audio" or subtitles_supported]
+    sidecars = [r for r in renditions if r not in muxed]
+
+    if not muxed or not is_ffmpeg_available(ffmpeg_path):
+        if muxed:
+            logger.warning("FFmpeg not available, keeping renditions as separate files")
+        return {"success": True, "sidecars": _keep_rendition_sidecars(output_file, renditions)}
+
+    video_file = f"{output_file}.video{extension}"
+    try:
+        shutil.move(output_file, video_file)
+
+        has_audio = any(r["type"] == "audio" for r in muxed)
+        cmd: List[str] = [ffmpeg_path or "ffmpeg", "-i", video_file]
+        for rendition in muxed:
+            cmd.extend(["-i", rendition["path"]])
+        cmd.extend(["-map", "0:v"] if has_audio else ["-map", "0:v", "-map", "0:a?"])
+        for input_index, rendition in enumerate(muxed, start=1):
+            stream = "a" if rendition["type"] == "audio" else "s"
+            cmd.extend(["-map", f"{input_index}:{stream}:0"])
+        cmd.extend(["-c", "copy"])
+        if extension != ".mkv" and not all(r["type"] == "audio" for r in muxed):
+            cmd.extend(["-c:s", "mov_text"])
+
+        # Audio renditions are numbered from 0 as the video's own audio is dropped
+        counters = {"a": 0, "s": 0}
+        for rendition in muxed:
+            stream = "a" if rendition["type"] == "audio" else "s"
+            specifier = f"-metadata:s:{stream}:{counters[stream]}"
+            counters[stream] += 1
+            if rendition.get("language"):
+                cmd.extend([specifier, f"language={rendition['language']}"])
+            if rendition.get("name"):
+                cmd.extend([specifier, f"title={rendition['name']}"])
+        cmd.extend(["-y", output_file])
+
+        logger.info(f"Executing FFmpeg mux command: {' '.join(cmd)}")
+        result = subprocess.run(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+        if result.returncode != 0:
+            logger.error(f"Mux failed, keeping renditions as separate files: {result.stderr}")
+            shutil.move(video_file, output_file)
+            return {"success": True, "sidecars": _keep_rendition_sidecars(output_file, renditions)}
+
+        os.remove(video_file)
+        for rendition in muxed:
+            if os.path.exists(rendition["path"]):
+                os.remove(rendition["path"])
+        logger.success(f"Successfully muxed {len(muxed)} renditions into {output_file}")
+        return {"success": True, "sidecars": _keep_rendition_sidecars(output_file, sidecars)}
+
+    except Exception as e:
+        logger.error(f"Mux failed: {str(e)}", exc_info=True)
+        if os.path.exists(video_file) and not os.path.exists(output_file):
+            shutil.move(video_file, output_file)
+        return {"success": False, "error": str(e)}
+
+
+def interleave_init_sections(files: List[str], init_files: Dict[int, str]) -> List[str]:
+    """Insert initialization sections in front of the files at their positions"""
+    merged: List[str] = []
+    for index, file in enumerate(files):
+        if index in init_files:
+            merged.append(init_files[index])
+        merged.append(file)
+    return merged
+
+
+def _segment_number(file: str) -> int:
+    """Get the segment number of a ``segment_<n>.ts`` file"""
+    return int(os.path.basename(file).split('_')[1].split('.')[0])
+
+
+def merge_files(files: List[str], output_file: str, settings: Optional[Dict[str, Any]] = None,
+                merge_mode: str = "auto", init_files: Optional[Dict[int, str]] = None,
+                identity: Optional[str] = None,
+                discontinuities: Optional[Sequence[int]] = None) -> Dict[str, Any]:
     """
     Choose appropriate method to merge video files based on available tools
 
@@ -178,6 +614,19 @@ def merge_files(files: List[str], output_file: str, settings: Optional[Dict[str,
         files: List of files to merge
         output_file: Output file path
         settings: Settings object containing configuration
+        merge_mode: "auto" and "concat" try an FFmpeg concat first; "append"
+            appends the segments in place into the TS output and only remuxes
+            it when an MP4 is requested
+        init_files: Initialization sections (``#EXT-X-MAP``) by the segment
+            number they are written in front of. Fragmented MP4 segments are
+            only playable behind their initialization section, so they are
+            concatenated as binary instead of with the FFmpeg concat demuxer
+        identity: Identity of the download; an interrupted append merge is
+            only resumed with the same identity
+        discontinuities: Segment numbers that follow a discontinuity (e.g. a
+            switch to another variant). The FFmpeg concat demuxer keeps the
+            stream parameters of the first file, so such segments are
+            concatenated as binary MPEG-TS instead
 
     Returns:
         dict: Dictionary containing merge results
@@ -186,15 +635,21 @@ def merge_files(files: List[str], output_file: str, settings: Optional[Dict[str,
         logger.error("No files to merge")
         return {"success": False, "error": "No files to merge"}
 
+    # Initialization sections by position in the sorted file list
+    positioned_inits: Dict[int, str] = {}
     # Sort files by name
     try:
-        sorted_files: List[str] = sorted(files, key=lambda x: int(
-            os.path.basename(x).split('_')[1].split('.')[0]))
+        sorted_files: List[str] = sorted(files, key=_segment_number)
+        if init_files:
+            positioned_inits = {position: init_files[_segment_number(file)]
+                                for position, file in enumerate(sorted_files)
+                                if _segment_number(file) in init_files}
     except (IndexError, ValueError):
         # Fallback to direct sorting if custom sort fails
         logger.warning(
             "Failed to sort files by segment number, using filename sort instead")
         sorted_files = sorted(files)
+        positioned_inits = dict(init_files or {})
 
     logger.info(
         f"Preparing to merge {len(sorted_files)} files into {output_file}")
@@ -204,8 +659,15 @@ def merge_files(files: List[str], output_file: str, settings: Optional[Dict[str,
     if settings:
         ffmpeg_path = settings.get("advanced", {}).get("ffmpeg_path", "")
 
-    # Check if FFmpeg is available
-    if is_ffmpeg_available(ffmpeg_path):
+    if merge_mode == "append":
+        return _merge_files_append_mode(sorted_files, output_file, ffmpeg_path, positioned_inits,
+                                        identity)
+
+    if positioned_inits:
+        sorted_files = interleave_init_sections(sorted_files, positioned_inits)
+    elif discontinuities:
+        logger.info("Segments contain discontinuities, merging them as binary MPEG-TS")
+    elif is_ffmpeg_available(ffmpeg_path):
         logger.info("FFmpeg is available, attempting direct MP4 merge")
         # Directly merge to MP4 using FFmpeg
         result = merge_files_ffmpeg(sorted_files, output_file, ffmpeg_path)
@@ -250,3 +712,152 @@ def merge_files(files: List[str], output_file: str, settings: Optional[Dict[str,
 
     logger.success(f"Successfully created output file: {output_file}")
     return {"success": True}
+
+
+def _merge_files_append_mode(files: List[str], output_file: str,
+                             ffmpeg_path: Optional[str] = None,
+                             init_files: Optional[Dict[int, str]] = None,
+                             identity: Optional[str] = None) -> Dict[str, Any]:
+    """Merge with in-place append, remuxing to MP4 if needed"""
+    ts_output = _append_target(output_file)
+
+    result = merge_files_append(files, ts_output, init_files=init_files, identity=identity)
+    if not result["success"]:
+        return result
+    return _finalize_append_output(ts_output, output_file, ffmpeg_path)
+
+
+def _append_target(output_file: str) -> str:
+    """Get the TS file that segments are appended to for an output file"""
+    return f"{output_file}.ts" if output_file.lower().endswith('.mp4') else output_file
+
+
+def _finalize_append_output(ts_output: str, output_file: str,
+                            ffmpeg_path: Optional[str] = None) -> Dict[str, Any]:
+    """Remux the appended TS file into the output file if it is an MP4"""
+    if ts_output == output_file:
+        return {"success": True}
+
+    if not is_ffmpeg_available(ffmpeg_path):
+        # Keep the TS data under the requested name, as the binary path does
+        logger.warning("FFmpeg not available, keeping MPEG-TS data in MP4 output")
+        shutil.move(ts_output, output_file)
+        return {"success": True}
+
+    logger.info(f"Remuxing appended TS file to MP4: {output_file}")
+    result = convert_ts_to_mp4(ts_output, output_file, ffmpeg_path)
+    if result["success"] and os.path.exists(ts_output):
+        try:
+            os.remove(ts_output)
+        except Exception as e:
+            logger.warning(f"Failed to delete temporary TS file: {e}")
+    return result
+
+
+class IncrementalMerger:
+    """
+    Merges segments into the output while the download is still running
+
+    Segments complete out of order; each one is appended as soon as every
+    earlier segment has been appended (the contiguous watermark), so at the
+    end only the tail and an optional MP4 remux remain. ``init_files`` maps
+    segment indexes to the initialization sections written in front of them.
+    A merged prefix is only resumed by a merger with the same ``identity``.
+    """
+
+    def __init__(self, output_file: str, ffmpeg_path: Optional[str] = None,
+                 delete_segments: bool = True,
+                 init_files: Optional[Dict[int, str]] = None,
+                 identity: Optional[str] = None) -> None:
+        self.output_file = output_file
+        self.ffmpeg_path = ffmpeg_path
+        self.delete_segments = delete_segments
+        self.init_files = init_files if init_files is not None else {}
+        self.ts_output = _append_target(output_file)
+        self.writer: Optional[SegmentAppendWriter] = SegmentAppendWriter(self.ts_output, identity)
+        self.ready: Dict[int, str] = {}
+        self.lock = threading.RLock()
+
+    @property
+    def watermark(self) -> int:
+        """Number of leading segments already merged into the output"""
+        return self.writer.next_index if self.writer else 0
+
+    @property
+    def merged_sizes(self) -> List[int]:
+        """Bytes merged for each segment below the watermark, with its init section"""
+        return list(self.writer.sizes) if self.writer else []
+
+    def rewind(self, watermark: int) -> None:
+        """Cut the merged output back to the first ``watermark`` segments"""
+        with self.lock:
+            if self.writer is not None:
+                self.writer.truncate(watermark)
+
+    def add_segment(self, index: int, segment_file: str) -> int:
+        """
+        Register a completed segment and merge every segment now contiguous
+
+        Returns:
+            int: The new watermark
+        """
+        with self.lock:
+            if self.writer is None or index < self.writer.next_index:
+                return self.watermark
+            self.ready[index] = segment_file
+            while self.writer.next_index in self.ready:
+                self._append(self.writer.next_index, self.ready.pop(self.writer.next_index))
+            return self.writer.next_index
+
+    def _append(self, position: int, segment_file: str) -> None:
+        assert self.writer is not None
+        self.writer.append_file(position, segment_file, self.init_files.get(position))
+        if self.delete_segments:
+            os.remove(segment_file)
+
+    def finish(self, total_segments: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Append the remaining segments and produce the final output
+
+        A gap (a segment that failed to download) stops the merge instead:
+        the segments after it are neither appended out of place nor deleted,
+        and the merged prefix and its index are kept, so the merge continues
+        once the missing segments have been downloaded. With
+        ``total_segments`` missing segments at the end count as a gap too.
+
+        Returns:
+            dict: Result of the merge operation; ``resumable`` is set when
+            the merge stopped at a gap
+        """
+        with self.lock:
+            if self.writer is None:
+                return {"success": False, "error": "Merger already closed"}
+            missing = self.writer.next_index
+            if self.ready or (total_segments is not None and missing < total_segments):
+                kept = len(self.ready)
+                self.abort()
+                logger.warning(f"Incremental merge stopped at missing segment {missing}, "
+                               f"keeping {kept} later segments for resuming")
+                return {"success": False, "resumable": True,
+                        "error": f"Segment {missing} is missing"}
+            try:
+                merged = self.writer.next_index
+                self.writer.close(complete=True)
+                self.writer = None
+            except Exception as e:
+                logger.error(f"Incremental merge failed: {str(e)}", exc_info=True)
+                self.abort()
+                return {"success": False, "error": str(e)}
+
+        if merged == 0:
+            return {"success": False, "error": "No files to merge"}
+
+        logger.success(f"Incrementally merged {merged} segments into {self.ts_output}")
+        return _finalize_append_output(self.ts_output, self.output_file, self.ffmpeg_path)
+
+    def abort(self) -> None:
+        """Close the output, keeping the merged prefix and index for resumption"""
+        with self.lock:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
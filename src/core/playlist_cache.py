@@ -0,0 +1,344 @@
+"""
+Playlist Cache for VidTanium
+
+This module provides a process-wide HTTP cache for playlist (and page)
+fetches made while analyzing URLs. Entries are keyed by URL plus the request
+headers that can change the response, follow ``Cache-Control``/``Expires``
+freshness, and are revalidated with conditional GETs (``If-None-Match`` /
+``If-Modified-Since``) once stale, so repeated analysis of the same playlists
+costs a 304 instead of a full download. An optional on-disk tier keeps
+entries across runs.
+"""
+
+import hashlib
+import json
+import os
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Request headers that select a different response for the same URL
+_VARY_HEADERS = ("authorization", "cookie", "referer", "origin", "accept-language")
+
+
+@dataclass
+class PlaylistCacheConfig:
+    """Configuration for playlist cache behavior"""
+    max_entries: int = 256                  # Entries kept in memory
+    max_bytes: int = 64 * 1024 * 1024       # Total text size kept in memory
+    max_disk_entries: int = 2048            # Entries kept in the disk tier
+    max_heuristic_ttl: float = 300.0        # Cap for Last-Modified based freshness
+
+
+@dataclass
+class CachedPlaylist:
+    """Cached response body with its validators and freshness"""
+    url: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    expires_at: float = 0.0     # Fresh until this time; 0 means revalidate on every use
+    stored_at: float = 0.0
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+@dataclass
+class PlaylistResponse:
+    """Result of a cached fetch; ``status_code`` is 200 for cache hits and 304s"""
+    status_code: int
+    text: str = ""
+    from_cache: bool = False
+
+
+Fetcher = Callable[[str, Dict[str, str]], Any]
+
+
+class PlaylistCache:
+    """Size-bounded HTTP cache for playlist text with an optional disk tier"""
+
+    def __init__(self, config: Optional[PlaylistCacheConfig] = None,
+                 disk_directory: Optional[str] = None) -> None:
+        self.config = config or PlaylistCacheConfig()
+        self.entries: "OrderedDict[str, CachedPlaylist]" = OrderedDict()
+        self.total_bytes = 0
+        self.disk_directory: Optional[str] = None
+        self.disk_entries: Optional[int] = None  # Counted on first disk write
+        self.enabled = True
+        self.lock = threading.RLock()
+
+        # Statistics
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        if disk_directory:
+            self.set_disk_directory(disk_directory)
+
+    def set_disk_directory(self, directory: Optional[str]) -> None:
+        """Enable the disk tier in ``directory``; ``None`` disables it"""
+        with self.lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.disk_directory = directory or None
+            self.disk_entries = None
+
+    def set_max_entries(self, max_entries: int) -> None:
+        """Resize the memory tier; 0 disables caching"""
+        with self.lock:
+            self.config.max_entries = max(0, max_entries)
+            self.enabled = self.config.max_entries > 0
+            self._evict()
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]], fetcher: Fetcher) -> PlaylistResponse:
+        """Get a URL through the cache.
+
+        ``fetcher(url, headers)`` performs the actual GET and returns a
+        ``requests``-style response; its exceptions propagate to the caller.
+        """
+        request_headers = dict(headers or {})
+        if not self.enabled:
+            response = fetcher(url, request_headers)
+            return PlaylistResponse(response.status_code, response.text)
+
+        key = self._cache_key(url, request_headers)
+        with self.lock:
+            cached = self._lookup(key)
+            if cached is not None and cached.fresh:
+                self.hits += 1
+                return PlaylistResponse(200, cached.text, from_cache=True)
+
+        if cached is not None:
+            if cached.etag:
+                request_headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request_headers["If-Modified-Since"] = cached.last_modified
+
+        response = fetcher(url, request_headers)
+
+        if response.status_code == 304 and cached is not None:
+            logger.debug(f"Playlist not modified: {url}")
+            cached.expires_at = self._expires_at(response, cached.last_modified)
+            with self.lock:
+                self.revalidated += 1
+                self._store(key, cached)
+            return PlaylistResponse(200, cached.text, from_cache=True)
+
+        with self.lock:
+            self.misses += 1
+            if response.status_code == 200:
+                entry = self._entry_from_response(url, response)
+                if entry is not None:
+                    self._store(key, entry)
+                else:
+                    self._remove(key)
+        return PlaylistResponse(response.status_code, response.text)
+
+    def invalidate(self, url: str, headers: Optional[Dict[str, str]] = None) -> None:
+        """Drop the cached response for a URL"""
+        with self.lock:
+            self._remove(self._cache_key(url, dict(headers or {})))
+
+    def clear(self) -> None:
+        """Drop all cached responses, including the disk tier"""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+            if self.disk_directory and os.path.isdir(self.disk_directory):
+                for name in os.listdir(self.disk_directory):
+                    if name.endswith(".json"):
+                        _remove_file(os.path.join(self.disk_directory, name))
+            self.disk_entries = None
+
+    def _cache_key(self, url: str, headers: Dict[str, str]) -> str:
+        varying = sorted((name.lower(), value) for name, value in headers.items()
+                         if name.lower() in _VARY_HEADERS)
+        raw = url if not varying else f"{url}\n{varying!r}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[CachedPlaylist]:
+        """Find an entry in memory, then on disk; caller holds the lock"""
+        cached = self.entries.get(key)
+        if cached is not None:
+            self.entries.move_to_end(key)
+            return cached
+
+        cached = self._load_from_disk(key)
+        if cached is not None:
+            self._put_in_memory(key, cached)
+        return cached
+
+    def _entry_from_response(self, url: str, response: Any) -> Optional[CachedPlaylist]:
+        """Build a cache entry, or ``None`` if the response may not or need not be cached"""
+        cache_control = _parse_cache_control(_header(response, "Cache-Control"))
+        if "no-store" in cache_control:
+            return None
+        etag = _header(response, "ETag")
+        last_modified = _header(response, "Last-Modified")
+        expires_at = 0.0 if "no-cache" in cache_control else self._expires_at(response, last_modified)
+        if expires_at <= time.time() and not etag and not last_modified:
+            return None  # Neither fresh nor revalidatable
+        return CachedPlaylist(url, response.text, etag, last_modified, expires_at, time.time())
+
+    def _expires_at(self, response: Any, last_modified: Optional[str]) -> float:
+        """Freshness lifetime from Cache-Control, Expires or Last-Modified"""
+        now = time.time()
+        cache_control = _parse_cache_control(_header(response, "Cache-Control"))
+        if "no-cache" in cache_control:
+            return 0.0
+        max_age = cache_control.get("max-age")
+        if max_age is not None:
+            try:
+                return now + max(0, int(max_age))
+            except ValueError:
+                return 0.0
+
+        expires = _parse_http_date(_header(response, "Expires"))
+        if expires is not None:
+            date = _parse_http_date(_header(response, "Date")) or now
+            return now + max(0.0, expires - date)
+
+        # Heuristic freshness: a tenth of the time since the last change
+        modified = _parse_http_date(last_modified)
+        if modified is not None:
+            return now + min(self.config.max_heuristic_ttl, max(0.0, (now - modified) / 10))
+        return 0.0
+
+    def _store(self, key: str, entry: CachedPlaylist) -> None:
+        """Store an entry in both tiers; caller holds the lock"""
+        self._put_in_memory(key, entry)
+        self._save_to_disk(key, entry)
+
+    def _put_in_memory(self, key: str, entry: CachedPlaylist) -> None:
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.total_bytes -= len(previous.text)
+        self.entries[key] = entry
+        self.total_bytes += len(entry.text)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Evict least recently used entries over the limits; caller holds the lock"""
+        while self.entries and (len(self.entries) > self.config.max_entries
+                                or self.total_bytes > self.config.max_bytes):
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= len(evicted.text)
+            logger.debug(f"Evicted playlist from cache: {evicted.url}")
+
+    def _remove(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= len(entry.text)
+        if self.disk_directory:
+            _remove_file(self._disk_path(key))
+
+    def _disk_path(self, key: str) -> str:
+        assert self.disk_directory is not None
+        return os.path.join(self.disk_directory, f"{key}.json")
+
+    def _load_from_disk(self, key: str) -> Optional[CachedPlaylist]:
+        if not self.disk_directory:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return CachedPlaylist(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            logger.debug(f"Ignoring unreadable playlist cache file {path}: {e}")
+            _remove_file(path)
+            return None
+
+    def _save_to_disk(self, key: str, entry: CachedPlaylist) -> None:
+        if not self.disk_directory:
+            return
+        path = self._disk_path(key)
+        try:
+            is_new = not os.path.exists(path)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(asdict(entry), f)
+            os.replace(temp_path, path)
+            if is_new:
+                self._trim_disk()
+        except OSError as e:
+            logger.warning(f"Failed to write playlist cache file {path}: {e}")
+
+    def _trim_disk(self) -> None:
+        """Keep the disk tier within its entry limit, dropping the oldest files"""
+        assert self.disk_directory is not None
+        if self.disk_entries is not None:
+            self.disk_entries += 1
+            if self.disk_entries <= self.config.max_disk_entries:
+                return
+
+        paths = [os.path.join(self.disk_directory, name)
+                 for name in os.listdir(self.disk_directory) if name.endswith(".json")]
+        excess = len(paths) - self.config.max_disk_entries
+        if excess > 0:
+            paths.sort(key=lambda p: os.path.getmtime(p))
+            for path in paths[:excess]:
+                _remove_file(path)
+        self.disk_entries = min(len(paths), self.config.max_disk_entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get playlist cache statistics"""
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "disk_directory": self.disk_directory,
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses
+            }
+
+
+def _header(response: Any, name: str) -> Optional[str]:
+    """Get a response header as a string, if present"""
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        return None
+    value = headers.get(name)
+    if value is None and isinstance(headers, dict):
+        # Plain dicts are case-sensitive, unlike requests' header mapping
+        value = headers.get(name.lower())
+    return value if isinstance(value, str) else None
+
+
+def _parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# Global playlist cache instance
+playlist_cache = PlaylistCache()
@@ -3,19 +3,23 @@ Progressive Download Recovery for VidTanium
 
 This module provides sophisticated resume functionality that can recover from any
 interruption point with byte-level precision and integrity verification.
+Sessions are views of the tasks' state in the resume store, which download
+tasks write to as well.
 """
 
 import os
 import json
-import hashlib
 import time
 import threading
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from pathlib import Path
 from enum import Enum
 import logging
 
+from .resume_journal import JournalEntry, RecordType, ResumeJournal, file_crc32
+from .resume_store import ResumeStore, resume_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -59,16 +63,12 @@ class SegmentRecoveryInfo:
                 self.state not in [RecoveryState.CORRUPTED, RecoveryState.INVALID])
     
     def calculate_checksum(self) -> str:
-        """Calculate checksum of downloaded segment"""
+        """Calculate the CRC-32 of the downloaded segment as hex"""
         if not self.file_path or not os.path.exists(self.file_path):
             return ""
         
         try:
-            hasher = hashlib.sha256()
-            with open(self.file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(8192), b""):
-                    hasher.update(chunk)
-            return hasher.hexdigest()
+            return f"{file_crc32(self.file_path):08x}"
         except Exception as e:
             logger.error(f"Error calculating checksum for {self.file_path}: {e}")
             return ""
@@ -88,6 +88,8 @@ class TaskRecoveryInfo:
     created_at: float = field(default_factory=time.time)
     last_updated: float = field(default_factory=time.time)
     recovery_version: str = "1.0"
+    # Directory of the segment files (segment_{index}.ts)
+    segment_dir: str = ""
     
     def get_completion_percentage(self) -> float:
         """Get download completion percentage"""
@@ -128,13 +130,15 @@ class TaskRecoveryInfo:
 class ProgressiveRecoveryManager:
     """Manager for progressive download recovery"""
     
-    def __init__(self, recovery_dir: str = ".vidtanium_recovery") -> None:
+    def __init__(self, recovery_dir: str = ".vidtanium_recovery",
+                 store: Optional[ResumeStore] = None) -> None:
         self.recovery_dir = Path(recovery_dir)
         self.recovery_dir.mkdir(exist_ok=True)
         self.lock = threading.RLock()
         
-        # Active recovery sessions
-        self.active_sessions: Dict[str, TaskRecoveryInfo] = {}
+        # Resume state of all tasks, shared with download tasks; sessions
+        # are built from it on demand
+        self.store = store or ResumeStore(recovery_dir)
         
         # Configuration
         self.auto_save_interval = 30.0  # Save every 30 seconds
@@ -144,25 +148,119 @@ class ProgressiveRecoveryManager:
         logger.info(f"Progressive recovery manager initialized with recovery dir: {self.recovery_dir}")
     
     def create_recovery_session(self, task_id: str, task_name: str, base_url: str,
-                               output_file: str, total_segments: int) -> TaskRecoveryInfo:
-        """Create a new recovery session"""
+                               output_file: str, total_segments: int,
+                               segment_dir: str = "") -> TaskRecoveryInfo:
+        """Create a recovery session, continuing the task's existing resume state"""
         with self.lock:
             recovery_info = TaskRecoveryInfo(
                 task_id=task_id,
                 task_name=task_name,
                 base_url=base_url,
                 output_file=output_file,
-                total_segments=total_segments
+                total_segments=total_segments,
+                segment_dir=segment_dir
             )
             
-            self.active_sessions[task_id] = recovery_info
             self._save_recovery_info(recovery_info)
+            journal = self.store.open(task_id)
+            recovery_info = self._recovery_info_from_journal(task_id, journal) or recovery_info
             
             logger.info(f"Created recovery session for task: {task_id}")
             return recovery_info
     
+    @property
+    def active_sessions(self) -> Dict[str, TaskRecoveryInfo]:
+        """Sessions of the tasks whose resume state is open in the store"""
+        with self.store.lock:
+            journals = dict(self.store.journals)
+        sessions = {}
+        for task_id, journal in journals.items():
+            recovery_info = self._recovery_info_from_journal(task_id, journal)
+            if recovery_info is not None:
+                sessions[task_id] = recovery_info
+        return sessions
+    
+    def _active_journal(self, task_id: str) -> Optional[ResumeJournal]:
+        """Get the journal of an active session, ``None`` if it is not open"""
+        with self.store.lock:
+            return self.store.journals.get(task_id)
+    
     def load_recovery_session(self, task_id: str) -> Optional[TaskRecoveryInfo]:
         """Load existing recovery session"""
+        journal = self.store.get(task_id)
+        if journal is not None:
+            recovery_info = self._recovery_info_from_journal(task_id, journal)
+        else:
+            recovery_info = self._load_legacy_session(task_id)
+        if recovery_info is None:
+            return None
+        
+        # Validate loaded data
+        is_valid, corrupted = recovery_info.validate_integrity()
+        if corrupted:
+            logger.warning(f"Found {len(corrupted)} corrupted segments in recovery session {task_id}")
+        
+        logger.info(f"Loaded recovery session for task: {task_id} "
+                   f"({recovery_info.get_completion_percentage():.1f}% complete)")
+        
+        return recovery_info
+    
+    def _recovery_info_from_journal(self, task_id: str,
+                                    journal: ResumeJournal) -> Optional[TaskRecoveryInfo]:
+        """Build a session from the journal's metadata and segment states"""
+        data = journal.metadata
+        try:
+            recovery_info = TaskRecoveryInfo(
+                task_id=data.get('task_id', task_id),
+                task_name=data['task_name'],
+                base_url=data['base_url'],
+                output_file=data['output_file'],
+                total_segments=data['total_segments'],
+                total_size=data.get('total_size', 0),
+                created_at=data.get('created_at', time.time()),
+                last_updated=data.get('last_updated', time.time()),
+                recovery_version=data.get('recovery_version', '1.0'),
+                segment_dir=data.get('segment_dir', "")
+            )
+        except KeyError as e:
+            logger.error(f"Error loading recovery session {task_id}: missing {e}")
+            return None
+        
+        with journal.lock:
+            entries = dict(journal.entries)
+        for index, entry in entries.items():
+            recovery_info.segments[index] = self._segment_from_entry(recovery_info, index, entry)
+        recovery_info.downloaded_size = sum(
+            seg.downloaded_size for seg in recovery_info.segments.values()
+        )
+        return recovery_info
+    
+    def _segment_from_entry(self, recovery_info: TaskRecoveryInfo, index: int,
+                            entry: JournalEntry) -> SegmentRecoveryInfo:
+        states = {
+            RecordType.COMPLETE: RecoveryState.COMPLETE,
+            RecordType.PARTIAL: RecoveryState.PARTIAL,
+            RecordType.FAILED: RecoveryState.INVALID,
+        }
+        file_path = ""
+        if recovery_info.segment_dir:
+            file_path = os.path.join(recovery_info.segment_dir, f"segment_{index}.ts")
+            if entry.state == RecordType.PARTIAL:
+                # Interrupted downloads are kept in the temporary file
+                file_path += ".temp"
+        return SegmentRecoveryInfo(
+            segment_index=index,
+            segment_url="",
+            downloaded_size=entry.size,
+            file_path=file_path,
+            checksum=f"{entry.checksum:08x}" if entry.is_complete and entry.checksum else "",
+            last_modified=entry.mtime_ns / 1e9,
+            retry_count=entry.failures,
+            state=states.get(entry.state, RecoveryState.NONE)
+        )
+    
+    def _load_legacy_session(self, task_id: str) -> Optional[TaskRecoveryInfo]:
+        """Load a session saved as JSON before sessions were journaled"""
         recovery_file = self.recovery_dir / f"{task_id}.json"
         
         if not recovery_file.exists():
@@ -175,9 +273,10 @@ class ProgressiveRecoveryManager:
             # Convert segments data back to SegmentRecoveryInfo objects
             segments = {}
             for seg_idx, seg_data in data.get('segments', {}).items():
+                seg_data['state'] = RecoveryState(seg_data.get('state', RecoveryState.NONE.value))
                 segments[int(seg_idx)] = SegmentRecoveryInfo(**seg_data)
             
-            recovery_info = TaskRecoveryInfo(
+            return TaskRecoveryInfo(
                 task_id=data['task_id'],
                 task_name=data['task_name'],
                 base_url=data['base_url'],
@@ -191,17 +290,6 @@ class ProgressiveRecoveryManager:
                 recovery_version=data.get('recovery_version', '1.0')
             )
             
-            # Validate loaded data
-            is_valid, corrupted = recovery_info.validate_integrity()
-            if corrupted:
-                logger.warning(f"Found {len(corrupted)} corrupted segments in recovery session {task_id}")
-            
-            self.active_sessions[task_id] = recovery_info
-            logger.info(f"Loaded recovery session for task: {task_id} "
-                       f"({recovery_info.get_completion_percentage():.1f}% complete)")
-            
-            return recovery_info
-            
         except Exception as e:
             logger.error(f"Error loading recovery session {task_id}: {e}")
             return None
@@ -211,77 +299,70 @@ class ProgressiveRecoveryManager:
                               file_path: str = "", expected_size: int = 0) -> None:
         """Update progress for a specific segment"""
         with self.lock:
-            if task_id not in self.active_sessions:
+            if self._active_journal(task_id) is None:
                 logger.warning(f"No active recovery session for task: {task_id}")
                 return
             
-            recovery_info = self.active_sessions[task_id]
-            
-            if segment_index not in recovery_info.segments:
-                recovery_info.segments[segment_index] = SegmentRecoveryInfo(
+            # Update state based on progress
+            if expected_size > 0 and downloaded_size >= expected_size:
+                segment_info = SegmentRecoveryInfo(
                     segment_index=segment_index,
                     segment_url=segment_url,
-                    download_start_time=time.time()
+                    expected_size=expected_size,
+                    downloaded_size=downloaded_size,
+                    file_path=file_path,
+                    state=RecoveryState.COMPLETE
                 )
-            
-            segment_info = recovery_info.segments[segment_index]
-            segment_info.downloaded_size = downloaded_size
-            segment_info.file_path = file_path
-            segment_info.expected_size = expected_size
-            segment_info.last_modified = time.time()
-            
-            # Update state based on progress
-            if expected_size > 0 and downloaded_size >= expected_size:
-                segment_info.state = RecoveryState.COMPLETE
-                segment_info.download_end_time = time.time()
                 segment_info.checksum = segment_info.calculate_checksum()
+                self._record_complete(task_id, segment_info)
             elif downloaded_size > 0:
-                segment_info.state = RecoveryState.PARTIAL
-            
-            # Update task totals
-            recovery_info.downloaded_size = sum(
-                seg.downloaded_size for seg in recovery_info.segments.values()
-            )
-            recovery_info.last_updated = time.time()
-            
-            # Auto-save periodically
-            if (time.time() - getattr(self, '_last_save_time', 0) > self.auto_save_interval):
-                self._save_recovery_info(recovery_info)
-                self._last_save_time = time.time()
+                self.store.record_partial(task_id, segment_index, downloaded_size)
+            self.store.update_metadata(task_id, {"last_updated": time.time()})
     
     def mark_segment_complete(self, task_id: str, segment_index: int, 
                             file_path: str, final_size: int) -> None:
         """Mark a segment as completely downloaded"""
         with self.lock:
-            if task_id not in self.active_sessions:
+            if self._active_journal(task_id) is None:
                 return
             
-            recovery_info = self.active_sessions[task_id]
+            segment_info = SegmentRecoveryInfo(
+                segment_index=segment_index,
+                segment_url="",
+                downloaded_size=final_size,
+                file_path=file_path,
+                state=RecoveryState.COMPLETE
+            )
+            segment_info.checksum = segment_info.calculate_checksum()
             
-            if segment_index in recovery_info.segments:
-                segment_info = recovery_info.segments[segment_index]
-                segment_info.state = RecoveryState.COMPLETE
-                segment_info.downloaded_size = final_size
-                segment_info.file_path = file_path
-                segment_info.download_end_time = time.time()
-                segment_info.checksum = segment_info.calculate_checksum()
-                
-                recovery_info.last_updated = time.time()
-                
-                logger.debug(f"Marked segment {segment_index} as complete for task {task_id}")
+            self._record_complete(task_id, segment_info)
+            self.store.update_metadata(task_id, {"last_updated": time.time()})
+            
+            logger.debug(f"Marked segment {segment_index} as complete for task {task_id}")
+    
+    def _record_complete(self, task_id: str, segment_info: SegmentRecoveryInfo) -> None:
+        """Record a completed segment, with its file's mtime and checksum, in the store"""
+        mtime_ns = 0
+        if segment_info.file_path:
+            try:
+                mtime_ns = os.stat(segment_info.file_path).st_mtime_ns
+            except OSError:
+                pass
+        checksum = int(segment_info.checksum, 16) if segment_info.checksum else 0
+        self.store.record_complete(task_id, segment_info.segment_index,
+                                   segment_info.downloaded_size, mtime_ns, checksum)
     
     def mark_segment_failed(self, task_id: str, segment_index: int, error_message: str) -> None:
         """Mark a segment as failed"""
         with self.lock:
-            if task_id not in self.active_sessions:
+            journal = self._active_journal(task_id)
+            if journal is None:
                 return
             
-            recovery_info = self.active_sessions[task_id]
-            
-            if segment_index in recovery_info.segments:
-                segment_info = recovery_info.segments[segment_index]
-                segment_info.retry_count += 1
-                segment_info.state = RecoveryState.INVALID
+            with journal.lock:
+                known = segment_index in journal.entries
+            if known:
+                self.store.record_failed(task_id, segment_index)
                 
                 logger.warning(f"Segment {segment_index} failed for task {task_id}: {error_message}")
     
@@ -318,49 +399,47 @@ class ProgressiveRecoveryManager:
     def complete_recovery_session(self, task_id: str) -> None:
         """Mark recovery session as complete and clean up"""
         with self.lock:
-            if task_id in self.active_sessions:
-                recovery_info = self.active_sessions[task_id]
-                
-                # Final save
-                self._save_recovery_info(recovery_info)
-                
-                # Remove from active sessions
-                del self.active_sessions[task_id]
+            if self._active_journal(task_id) is not None:
+                # Final save; closing the journal ends the session
+                self.store.update_metadata(task_id, {"last_updated": time.time()})
+                self.store.close(task_id)
                 
                 logger.info(f"Completed recovery session for task: {task_id}")
     
     def cleanup_recovery_session(self, task_id: str) -> None:
         """Clean up recovery session and files"""
         with self.lock:
-            # Remove from active sessions
-            if task_id in self.active_sessions:
-                del self.active_sessions[task_id]
-            
-            # Remove recovery file
-            recovery_file = self.recovery_dir / f"{task_id}.json"
-            if recovery_file.exists():
-                try:
-                    recovery_file.unlink()
-                    logger.info(f"Cleaned up recovery session for task: {task_id}")
-                except Exception as e:
-                    logger.error(f"Error cleaning up recovery session {task_id}: {e}")
+            # Remove recovery files, which also ends the session
+            if self._remove_session_files(task_id):
+                logger.info(f"Cleaned up recovery session for task: {task_id}")
+    
+    def _remove_session_files(self, task_id: str) -> bool:
+        """Remove the resume state (and any legacy JSON file) of a session"""
+        removed = self.store.exists(task_id)
+        self.store.delete(task_id)
+        recovery_file = self.recovery_dir / f"{task_id}.json"
+        if recovery_file.exists():
+            try:
+                recovery_file.unlink()
+                removed = True
+            except Exception as e:
+                logger.error(f"Error cleaning up recovery session {task_id}: {e}")
+        return removed
+    
+    def _session_metadata(self, recovery_info: TaskRecoveryInfo) -> Dict[str, Any]:
+        """Session fields stored in the journal header"""
+        return {
+            f.name: getattr(recovery_info, f.name) for f in fields(recovery_info)
+            if f.name not in ('segments', 'downloaded_size')
+        }
     
     def _save_recovery_info(self, recovery_info: TaskRecoveryInfo) -> None:
-        """Save recovery information to disk"""
-        recovery_file = self.recovery_dir / f"{recovery_info.task_id}.json"
-        
+        """Save the session fields to the task's resume state"""
         try:
-            # Convert to serializable format
-            data = asdict(recovery_info)
-            
-            # Convert segments to serializable format
-            data['segments'] = {
-                str(idx): asdict(seg) for idx, seg in recovery_info.segments.items()
-            }
-            
-            with open(recovery_file, 'w') as f:
-                json.dump(data, f, indent=2)
-                
+            metadata = self._session_metadata(recovery_info)
+            self.store.open(recovery_info.task_id, metadata)
+            self.store.update_metadata(recovery_info.task_id, metadata)
+            self.store.flush(recovery_info.task_id)
         except Exception as e:
             logger.error(f"Error saving recovery info for {recovery_info.task_id}: {e}")
     
@@ -369,7 +448,11 @@ class ProgressiveRecoveryManager:
         cutoff_time = time.time() - (self.max_recovery_age_days * 24 * 3600)
         
         try:
-            for recovery_file in self.recovery_dir.glob("*.json"):
+            recovery_files = (list(self.recovery_dir.glob("*.journal")) +
+                              list(self.recovery_dir.glob("*.json")))
+            for recovery_file in recovery_files:
+                if recovery_file.stem in self.store.journals:
+                    continue
                 if recovery_file.stat().st_mtime < cutoff_time:
                     recovery_file.unlink()
                     logger.debug(f"Cleaned up old recovery file: {recovery_file}")
@@ -381,8 +464,9 @@ class ProgressiveRecoveryManager:
         sessions = []
         
         try:
-            for recovery_file in self.recovery_dir.glob("*.json"):
-                task_id = recovery_file.stem
+            task_ids = sorted(set(self.store.task_ids()) |
+                              {f.stem for f in self.recovery_dir.glob("*.json")})
+            for task_id in task_ids:
                 recovery_info = self.load_recovery_session(task_id)
                 
                 if recovery_info:
@@ -402,4 +486,4 @@ class ProgressiveRecoveryManager:
 
 
 # Global progressive recovery manager instance
-progressive_recovery_manager = ProgressiveRecoveryManager()
+progressive_recovery_manager = ProgressiveRecoveryManager(store=resume_store)
@@ -0,0 +1,121 @@
+"""
+Alternate Renditions for VidTanium
+
+This module handles the ``#EXT-X-MEDIA`` renditions of a master playlist:
+separate audio and subtitle playlists that a variant refers to through its
+``AUDIO``/``SUBTITLES`` group. It parses the tags, selects the renditions to
+download alongside a variant, and loads their segment manifests in parallel.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+import urllib.parse
+import logging
+
+from .segment_manifest import SegmentManifest
+
+logger = logging.getLogger(__name__)
+
+# Rendition types downloaded as their own media playlists; closed captions
+# are carried inside the video stream and video renditions are variants
+DOWNLOADABLE_TYPES = ("audio", "subtitles")
+
+
+@dataclass
+class MediaRendition:
+    """An #EXT-X-MEDIA rendition and, once loaded, its segments"""
+    type: str                   # "audio", "subtitles", "video" or "closed-captions"
+    group_id: str
+    name: str = ""
+    language: Optional[str] = None
+    default: bool = False
+    autoselect: bool = False
+    url: Optional[str] = None   # None when the rendition is muxed into the variant
+    manifest: Optional[SegmentManifest] = None
+
+    @property
+    def file_extension(self) -> str:
+        """Extension of the merged rendition file"""
+        return ".vtt" if self.type == "subtitles" else ".ts"
+
+
+def parse_media_tag(attributes: Dict[str, str], base_url: str) -> Optional[MediaRendition]:
+    """Build a rendition from the parsed attributes of an #EXT-X-MEDIA tag"""
+    media_type = attributes.get("TYPE", "").lower()
+    group_id = attributes.get("GROUP-ID")
+    if not media_type or group_id is None:
+        logger.warning(f"Ignoring #EXT-X-MEDIA without TYPE or GROUP-ID: {attributes}")
+        return None
+
+    uri = attributes.get("URI")
+    return MediaRendition(
+        type=media_type,
+        group_id=group_id,
+        name=attributes.get("NAME", ""),
+        language=attributes.get("LANGUAGE") or None,
+        default=attributes.get("DEFAULT", "NO").upper() == "YES",
+        autoselect=attributes.get("AUTOSELECT", "NO").upper() == "YES",
+        url=urllib.parse.urljoin(base_url, uri) if uri else None
+    )
+
+
+def _matches_language(rendition: MediaRendition, language: Optional[str]) -> bool:
+    """Whether a rendition is in the preferred language (``en`` matches ``en-US``)"""
+    if not language or not rendition.language:
+        return False
+    wanted = language.lower()
+    have = rendition.language.lower()
+    return have == wanted or have.split("-")[0] == wanted.split("-")[0]
+
+
+def select_renditions(renditions: List[MediaRendition], audio_group: Optional[str],
+                      subtitles_group: Optional[str], audio_language: Optional[str] = None,
+                      subtitle_language: Optional[str] = None) -> List[MediaRendition]:
+    """Select the separate renditions to download with a variant.
+
+    One audio rendition of the variant's audio group is selected: the
+    preferred language, else the default, else the first. Subtitles are only
+    selected in the preferred language or when marked default. Renditions
+    without a URI are muxed into the variant and need no download.
+    """
+    selected: List[MediaRendition] = []
+    for media_type, group, language, required in (
+            ("audio", audio_group, audio_language, True),
+            ("subtitles", subtitles_group, subtitle_language, False)):
+        if group is None:
+            continue
+        candidates = [r for r in renditions if r.type == media_type and r.group_id == group]
+        choice = (next((r for r in candidates if _matches_language(r, language)), None)
+                  or next((r for r in candidates if r.default), None)
+                  or (candidates[0] if candidates and required else None))
+        if choice is not None and choice.url:
+            selected.append(choice)
+    return selected
+
+
+def load_rendition_manifests(renditions: List[MediaRendition],
+                             load: Callable[[str], Optional[SegmentManifest]]
+                             ) -> List[MediaRendition]:
+    """Load the segment manifests of renditions in parallel.
+
+    ``load(url)`` returns a rendition playlist's manifest, or ``None`` if it
+    cannot be loaded; such renditions are left out of the result.
+    """
+    pending = [r for r in renditions if r.url]
+    if not pending:
+        return []
+
+    with ThreadPoolExecutor(max_workers=len(pending),
+                            thread_name_prefix="VidTanium-Rendition") as executor:
+        manifests = list(executor.map(lambda r: load(r.url or ""), pending))
+
+    loaded: List[MediaRendition] = []
+    for rendition, manifest in zip(pending, manifests):
+        if manifest is None or len(manifest) == 0:
+            logger.warning(f"Skipping {rendition.type} rendition '{rendition.name}': "
+                           f"playlist could not be loaded")
+            continue
+        rendition.manifest = manifest
+        loaded.append(rendition)
+    return loaded
@@ -0,0 +1,377 @@
+"""
+Resume Journal for VidTanium
+
+This module stores per-segment resume state in a compact, append-only binary
+file instead of rewriting a JSON document of every segment. A journal starts
+with a small header (magic, version and JSON metadata written once) followed by
+fixed-size records, each describing one state change of one segment and
+protected by its own CRC-32. Recording a segment appends 29 bytes; the state is
+rebuilt by replaying the records, the last record of a segment winning.
+
+Appends are buffered and written with a single ``write`` + ``fsync`` per batch
+(every ``batch_records`` records or ``sync_interval`` seconds, and on
+``flush``/``close``), so a crash loses at most the last unsynced batch. A torn
+or corrupt tail is detected by the record CRC on load and cut off. Once most
+records are superseded (e.g. many partial-progress updates) the journal is
+compacted into one record per segment and atomically replaces the old file.
+"""
+
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Dict, Optional
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_MAGIC = b"VTRJ"
+JOURNAL_VERSION = 1
+
+# Magic, version, metadata length
+_HEADER = struct.Struct("<4sHI")
+# Record type, segment index, size, mtime (ns), checksum or failure count
+_RECORD = struct.Struct("<BIQqI")
+_RECORD_CRC = struct.Struct("<I")
+RECORD_SIZE = _RECORD.size + _RECORD_CRC.size
+
+
+class RecordType(IntEnum):
+    """Segment state carried by a journal record"""
+    COMPLETE = 1
+    PARTIAL = 2
+    FAILED = 3
+    RESET = 4
+
+
+@dataclass
+class JournalEntry:
+    """Current state of one segment after replaying the journal
+
+    ``checksum`` is the CRC-32 of the file of a complete segment, or of the
+    HTTP validator (ETag or Last-Modified) a partial segment was fetched with.
+    """
+    state: RecordType
+    size: int = 0
+    mtime_ns: int = 0
+    checksum: int = 0
+    failures: int = 0
+
+    @property
+    def is_complete(self) -> bool:
+        return self.state == RecordType.COMPLETE
+
+    def matches(self, size: int, mtime_ns: int) -> bool:
+        """Check whether a file still has the recorded size and mtime
+
+        Entries without a recorded mtime are matched by size only.
+        """
+        return size == self.size and (not self.mtime_ns or mtime_ns == self.mtime_ns)
+
+
+def file_crc32(path: str, chunk_size: int = 1024 * 1024) -> int:
+    """Calculate the CRC-32 of a file"""
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc & 0xFFFFFFFF
+
+
+def _pack_record(kind: RecordType, index: int, size: int, mtime_ns: int, value: int) -> bytes:
+    body = _RECORD.pack(int(kind), index, max(0, size), mtime_ns, value & 0xFFFFFFFF)
+    return body + _RECORD_CRC.pack(zlib.crc32(body) & 0xFFFFFFFF)
+
+
+class ResumeJournal:
+    """Append-only journal of segment states"""
+
+    def __init__(self, path: Optional[str], metadata: Optional[Dict[str, Any]] = None,
+                 sync_interval: float = 1.0, batch_records: int = 64,
+                 compact_min_records: int = 1024) -> None:
+        """Open the journal at ``path``, replaying it if it exists
+
+        ``metadata`` is written to the header when the journal is created; an
+        existing journal keeps its own metadata. Without a ``path`` the state
+        is only kept in memory.
+        """
+        self.path = path
+        self.metadata: Dict[str, Any] = dict(metadata or {})
+        self.sync_interval = sync_interval
+        self.batch_records = max(1, batch_records)
+        self.compact_min_records = compact_min_records
+        self.entries: Dict[int, JournalEntry] = {}
+        self.record_count = 0
+        self.lock = threading.RLock()
+
+        self._fd: Optional[int] = None
+        self._buffer = bytearray()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        # Length of the valid prefix of the file; anything after it is cut off
+        self._valid_length = 0
+
+        if path and os.path.exists(path):
+            self._load()
+
+    @classmethod
+    def read(cls, path: str) -> Optional["ResumeJournal"]:
+        """Replay an existing journal, or return None if there is none"""
+        if not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def _load(self) -> None:
+        """Replay the journal file into ``entries``"""
+        assert self.path is not None
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            logger.error(f"Failed to read resume journal {self.path}: {e}")
+            return
+
+        if len(data) < _HEADER.size:
+            return
+        magic, version, meta_length = _HEADER.unpack_from(data, 0)
+        offset = _HEADER.size + meta_length
+        if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION or offset > len(data):
+            logger.warning(f"Ignoring unreadable resume journal: {self.path}")
+            return
+        try:
+            self.metadata = json.loads(data[_HEADER.size:offset].decode("utf-8")) or {}
+        except ValueError:
+            logger.warning(f"Ignoring resume journal with corrupt header: {self.path}")
+            return
+
+        body_size = _RECORD.size
+        while offset + RECORD_SIZE <= len(data):
+            body = data[offset:offset + body_size]
+            (crc,) = _RECORD_CRC.unpack_from(data, offset + body_size)
+            if zlib.crc32(body) & 0xFFFFFFFF != crc:
+                break
+            kind, index, size, mtime_ns, value = _RECORD.unpack(body)
+            try:
+                self._apply(RecordType(kind), index, size, mtime_ns, value)
+            except ValueError:
+                break
+            self.record_count += 1
+            offset += RECORD_SIZE
+
+        self._valid_length = offset
+        if offset < len(data):
+            logger.warning(f"Discarding {len(data) - offset} bytes of torn or corrupt "
+                           f"records in resume journal {self.path}")
+
+    def _apply(self, kind: RecordType, index: int, size: int, mtime_ns: int, value: int) -> None:
+        """Apply one record to the in-memory state"""
+        previous = self.entries.get(index)
+        failures = previous.failures if previous else 0
+        if kind == RecordType.RESET:
+            self.entries.pop(index, None)
+        elif kind == RecordType.FAILED:
+            self.entries[index] = JournalEntry(kind, size, mtime_ns, failures=value)
+        elif kind == RecordType.COMPLETE:
+            self.entries[index] = JournalEntry(kind, size, mtime_ns, value, failures)
+        else:
+            self.entries[index] = JournalEntry(kind, size, mtime_ns, value, failures)
+
+    def _append(self, kind: RecordType, index: int, size: int = 0,
+                mtime_ns: int = 0, value: int = 0) -> None:
+        with self.lock:
+            self._apply(kind, index, size, mtime_ns, value)
+            self._buffer += _pack_record(kind, index, size, mtime_ns, value)
+            self._pending += 1
+            self.record_count += 1
+            if (self._pending >= self.batch_records or
+                    time.monotonic() - self._last_sync >= self.sync_interval):
+                self.flush()
+
+    def record_complete(self, index: int, size: int, mtime_ns: int = 0, checksum: int = 0) -> None:
+        """Record a completely downloaded segment
+
+        ``mtime_ns`` and ``checksum`` (CRC-32, 0 if not calculated) let a
+        resume tell whether the segment file changed since.
+        """
+        self._append(RecordType.COMPLETE, index, size, mtime_ns, checksum)
+
+    def record_partial(self, index: int, size: int, validator_checksum: int = 0) -> None:
+        """Record the number of bytes of a segment downloaded so far
+
+        ``validator_checksum`` is the CRC-32 of the validator of the response
+        the bytes came from, so a resume can tell whether they are still valid.
+        """
+        self._append(RecordType.PARTIAL, index, size, time.time_ns(), validator_checksum)
+
+    def record_failed(self, index: int) -> None:
+        """Record a failed download attempt of a segment"""
+        with self.lock:
+            entry = self.entries.get(index)
+            failures = (entry.failures if entry else 0) + 1
+            self._append(RecordType.FAILED, index, 0, time.time_ns(), failures)
+
+    def reset(self, index: int) -> None:
+        """Forget a segment, e.g. because its file turned out to be invalid"""
+        with self.lock:
+            if index in self.entries:
+                self._append(RecordType.RESET, index)
+
+    def get(self, index: int) -> Optional[JournalEntry]:
+        with self.lock:
+            return self.entries.get(index)
+
+    def completed(self) -> Dict[int, JournalEntry]:
+        """Get the entries of all completed segments"""
+        with self.lock:
+            return {i: e for i, e in self.entries.items() if e.is_complete}
+
+    def _open(self) -> int:
+        """Open the file for appending, creating it or cutting off a torn tail"""
+        if self._fd is not None:
+            return self._fd
+        assert self.path is not None
+        flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        fd = os.open(self.path, flags, 0o644)
+        try:
+            if self._valid_length == 0:
+                os.ftruncate(fd, 0)
+                header = self._header()
+                os.write(fd, header)
+                self._valid_length = len(header)
+            elif os.fstat(fd).st_size != self._valid_length:
+                os.ftruncate(fd, self._valid_length)
+            os.lseek(fd, 0, os.SEEK_END)
+        except OSError:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return fd
+
+    def _header(self) -> bytes:
+        meta = json.dumps(self.metadata, ensure_ascii=False).encode("utf-8")
+        return _HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, len(meta)) + meta
+
+    def flush(self, sync: bool = True) -> None:
+        """Write buffered records, and fsync them unless ``sync`` is False"""
+        with self.lock:
+            if self.path is None:
+                self._buffer.clear()
+                self._pending = 0
+                return
+            try:
+                fd = self._open()
+                if self._buffer:
+                    os.write(fd, bytes(self._buffer))
+                    self._valid_length += len(self._buffer)
+                    self._buffer.clear()
+                if sync:
+                    os.fsync(fd)
+                    self._last_sync = time.monotonic()
+                self._pending = 0
+            except OSError as e:
+                logger.error(f"Failed to write resume journal {self.path}: {e}")
+                return
+            if self._needs_compaction():
+                self.compact()
+
+    def _needs_compaction(self) -> bool:
+        return (self.record_count >= self.compact_min_records and
+                self.record_count > 2 * len(self.entries))
+
+    def compact(self, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Rewrite the journal with one record per segment
+
+        The new journal is written next to the old one and atomically replaces
+        it, so a crash during compaction leaves either of them intact.
+        ``metadata`` replaces the header metadata.
+        """
+        with self.lock:
+            if metadata is not None:
+                self.metadata = dict(metadata)
+            if self.path is None:
+                self._buffer.clear()
+                self._pending = 0
+                return
+            records = bytearray(self._header())
+            count = 0
+            for index, entry in sorted(self.entries.items()):
+                if entry.failures:
+                    records += _pack_record(RecordType.FAILED, index, 0, entry.mtime_ns,
+                                            entry.failures)
+                    count += 1
+                if entry.state == RecordType.COMPLETE:
+                    records += _pack_record(entry.state, index, entry.size, entry.mtime_ns,
+                                            entry.checksum)
+                    count += 1
+                elif entry.state == RecordType.PARTIAL:
+                    records += _pack_record(entry.state, index, entry.size, entry.mtime_ns,
+                                            entry.checksum)
+                    count += 1
+
+            temp_path = f"{self.path}.tmp"
+            try:
+                with open(temp_path, "wb") as f:
+                    f.write(records)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._close_fd()
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.error(f"Failed to compact resume journal {self.path}: {e}")
+                return
+
+            self._buffer.clear()
+            self._pending = 0
+            self._valid_length = len(records)
+            self.record_count = count
+            logger.debug(f"Compacted resume journal {self.path} to {count} records")
+
+    def update_metadata(self, values: Dict[str, Any]) -> None:
+        """Merge ``values`` into the header metadata
+
+        Changing the header of a journal already on disk compacts it, so this
+        is meant for rare changes such as the task status.
+        """
+        with self.lock:
+            if all(self.metadata.get(k) == v for k, v in values.items()):
+                return
+            metadata = {**self.metadata, **values}
+            if self._valid_length == 0:
+                # Not written yet; the header is written on the first flush
+                self.metadata = metadata
+            else:
+                self.compact(metadata)
+
+    def _close_fd(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def close(self) -> None:
+        """Write and sync pending records and close the file"""
+        with self.lock:
+            if self._buffer or self._fd is not None:
+                self.flush()
+            self._close_fd()
+
+    def delete(self) -> None:
+        """Close the journal and remove its file"""
+        with self.lock:
+            self._buffer.clear()
+            self._pending = 0
+            self._close_fd()
+            self.entries.clear()
+            self.record_count = 0
+            self._valid_length = 0
+            if self.path is None:
+                return
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Failed to delete resume journal {self.path}: {e}")
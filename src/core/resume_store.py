@@ -0,0 +1,172 @@
+"""
+Resume Store for VidTanium
+
+This module is the single source of resume state of download tasks. Each task
+has one resume journal in the state directory, named after the task ID, whose
+header holds the task metadata (name, output file, status, ...) and whose
+records hold the segment states; playlist tasks also keep their segment list
+next to it, so they can be restored after a restart. Download tasks and the progressive recovery
+manager both read and write segment state through this store, so a completed
+segment is recorded once, in one place.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import os
+import threading
+import logging
+
+from .resume_journal import JournalEntry, ResumeJournal
+from .segment_manifest import SegmentManifest
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".journal"
+MANIFEST_SUFFIX = ".manifest"
+
+
+class ResumeStore:
+    """Resume journals of all tasks, keyed by task ID"""
+
+    def __init__(self, state_dir: str = ".vidtanium_recovery",
+                 sync_interval: float = 1.0) -> None:
+        self.state_dir = Path(state_dir)
+        self.sync_interval = sync_interval
+        # Journals opened in this process
+        self.journals: Dict[str, ResumeJournal] = {}
+        self.lock = threading.RLock()
+
+    def journal_path(self, task_id: str) -> Path:
+        return self.state_dir / f"{task_id}{JOURNAL_SUFFIX}"
+
+    def manifest_path(self, task_id: str) -> Path:
+        return self.state_dir / f"{task_id}{MANIFEST_SUFFIX}"
+
+    def exists(self, task_id: str) -> bool:
+        """Check whether a task has resume state"""
+        with self.lock:
+            return task_id in self.journals or self.journal_path(task_id).exists()
+
+    def open(self, task_id: str, metadata: Optional[Dict[str, Any]] = None) -> ResumeJournal:
+        """Get a task's journal, replaying it from disk or creating it
+
+        ``metadata`` is the header of a new journal; use ``update_metadata``
+        to change that of an existing one.
+        """
+        with self.lock:
+            journal = self.journals.get(task_id)
+            if journal is None:
+                self.state_dir.mkdir(parents=True, exist_ok=True)
+                journal = ResumeJournal(str(self.journal_path(task_id)), metadata,
+                                        sync_interval=self.sync_interval)
+                self.journals[task_id] = journal
+            return journal
+
+    def get(self, task_id: str) -> Optional[ResumeJournal]:
+        """Get a task's journal if it has resume state"""
+        with self.lock:
+            if not self.exists(task_id):
+                return None
+            return self.open(task_id)
+
+    def read(self, task_id: str) -> Optional[ResumeJournal]:
+        """Get a task's journal for reading without keeping it open
+
+        A journal that is not open is replayed from disk and not cached; use
+        ``open`` to change it.
+        """
+        with self.lock:
+            journal = self.journals.get(task_id)
+        if journal is not None:
+            return journal
+        return ResumeJournal.read(str(self.journal_path(task_id)))
+
+    def update_metadata(self, task_id: str, values: Dict[str, Any]) -> None:
+        self.open(task_id).update_metadata(values)
+
+    def record_complete(self, task_id: str, index: int, size: int,
+                        mtime_ns: int = 0, checksum: int = 0) -> None:
+        self.open(task_id).record_complete(index, size, mtime_ns, checksum)
+
+    def record_partial(self, task_id: str, index: int, size: int,
+                       validator_checksum: int = 0) -> None:
+        self.open(task_id).record_partial(index, size, validator_checksum)
+
+    def record_failed(self, task_id: str, index: int) -> None:
+        self.open(task_id).record_failed(index)
+
+    def completed(self, task_id: str) -> Dict[int, JournalEntry]:
+        """Get the completed segments of a task"""
+        journal = self.get(task_id)
+        return journal.completed() if journal is not None else {}
+
+    def save_manifest(self, task_id: str, manifest: SegmentManifest) -> None:
+        """Save the segment list of a task"""
+        path = self.manifest_path(task_id)
+        temp_path = f"{path}.tmp"
+        try:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest.to_dict(), f, separators=(",", ":"))
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to save segment list of task {task_id}: {e}")
+
+    def load_manifest(self, task_id: str) -> Optional[SegmentManifest]:
+        """Load the saved segment list of a task"""
+        path = self.manifest_path(task_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return SegmentManifest.from_dict(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load segment list of task {task_id}: {e}")
+            return None
+
+    def flush(self, task_id: Optional[str] = None) -> None:
+        """Write and sync pending records of a task, or of all tasks"""
+        with self.lock:
+            if task_id is None:
+                journals = list(self.journals.values())
+            else:
+                journals = [j for j in [self.journals.get(task_id)] if j is not None]
+        for journal in journals:
+            journal.flush()
+
+    def close(self, task_id: str) -> None:
+        """Sync a task's journal and release it; it is replayed again when needed"""
+        with self.lock:
+            journal = self.journals.pop(task_id, None)
+        if journal is not None:
+            journal.close()
+
+    def delete(self, task_id: str) -> None:
+        """Remove a task's resume state"""
+        with self.lock:
+            journal = self.journals.pop(task_id, None)
+        if journal is not None:
+            journal.delete()
+        paths = [self.manifest_path(task_id)]
+        if journal is None:
+            paths.append(self.journal_path(task_id))
+        for path in paths:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Failed to delete resume state of task {task_id}: {e}")
+
+    def task_ids(self) -> List[str]:
+        """Get the IDs of all tasks with resume state"""
+        with self.lock:
+            task_ids = set(self.journals)
+        if self.state_dir.exists():
+            task_ids.update(p.stem for p in self.state_dir.glob(f"*{JOURNAL_SUFFIX}"))
+        return sorted(task_ids)
+
+
+# Global resume store instance
+resume_store = ResumeStore()
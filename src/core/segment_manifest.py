@@ -0,0 +1,350 @@
+"""
+Segment Manifest for VidTanium
+
+This module provides a compact, array-backed table of the media segments of a
+playlist so download tasks can fetch the exact segment URLs resolved by the
+M3U8 parser instead of synthesizing them from a base URL.
+"""
+
+import os
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class SegmentKey:
+    """Encryption key reference shared by one or more segments"""
+    method: str = "AES-128"
+    url: Optional[str] = None
+    iv: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class SegmentInit:
+    """Media initialization section (``#EXT-X-MAP``) shared by segments"""
+    url: str
+    byte_range: Optional[Tuple[int, int]] = None  # (offset, length) within url
+
+
+@dataclass(frozen=True)
+class SegmentEntry:
+    """Read-only view of a single manifest row"""
+    index: int
+    url: str
+    duration: float
+    key: Optional[SegmentKey]
+    byte_range: Optional[Tuple[int, int]] = None  # (offset, length) within url
+    init_section: Optional[SegmentInit] = None
+
+
+class SegmentManifest:
+    """Array-backed table of segment URLs, durations and key references.
+
+    Segment URLs are stored as suffixes of a shared prefix, durations in a
+    ``array('d')`` and key references as indexes into a de-duplicated key
+    table, which keeps 10k+ segment playlists small in memory. Byte ranges
+    (``#EXT-X-BYTERANGE``) are stored in two more arrays that are only
+    allocated once a ranged segment is appended. Initialization sections
+    (``#EXT-X-MAP``) are de-duplicated like keys; ``init_starts`` lists the
+    segments in front of which one has to be written. ``discontinuities``
+    lists the segments that follow a discontinuity (``#EXT-X-DISCONTINUITY``
+    or a switch to another variant).
+    """
+
+    __slots__ = ("url_prefix", "media_sequence", "_url_suffixes",
+                 "_durations", "_key_refs", "_keys", "_key_lookup",
+                 "_range_offsets", "_range_lengths", "_init_refs",
+                 "_inits", "_init_lookup", "_init_starts", "_discontinuities")
+
+    def __init__(self, url_prefix: str = "", media_sequence: int = 0) -> None:
+        self.url_prefix = url_prefix
+        self.media_sequence = media_sequence
+        self._url_suffixes: List[str] = []
+        self._durations = array('d')
+        self._key_refs = array('i')
+        self._keys: List[SegmentKey] = []
+        self._key_lookup: Dict[SegmentKey, int] = {}
+        self._range_offsets: Optional[array] = None
+        self._range_lengths: Optional[array] = None
+        self._init_refs: Optional[array] = None
+        self._inits: List[SegmentInit] = []
+        self._init_lookup: Dict[SegmentInit, int] = {}
+        self._init_starts: List[int] = []
+        self._discontinuities: List[int] = []
+
+    def append(self, url: str, duration: float = 0.0,
+               key: Optional[SegmentKey] = None,
+               byte_range: Optional[Tuple[int, int]] = None,
+               init_section: Optional[SegmentInit] = None,
+               discontinuity: bool = False) -> int:
+        """Append a segment and return its index.
+
+        ``byte_range`` is the segment's ``(offset, length)`` within ``url``.
+        The segment starts a new initialization section when it is the first
+        one with ``init_section``, the section changes or it follows a
+        discontinuity.
+        """
+        suffix = self._suffix(url)
+        if byte_range is not None:
+            self._ensure_range_arrays()
+        if init_section is not None and self._init_refs is None:
+            # Earlier segments have no initialization section
+            self._init_refs = array('i', [-1] * len(self._url_suffixes))
+        index = len(self._url_suffixes)
+        if discontinuity:
+            self._discontinuities.append(index)
+        self._url_suffixes.append(suffix)
+        self._durations.append(duration)
+        self._key_refs.append(self._key_ref(key))
+        if self._range_offsets is not None and self._range_lengths is not None:
+            offset, length = byte_range if byte_range is not None else (-1, 0)
+            self._range_offsets.append(offset)
+            self._range_lengths.append(length)
+        if self._init_refs is not None:
+            ref = self._init_ref(init_section)
+            if ref >= 0 and (discontinuity or index == 0 or self._init_refs[index - 1] != ref):
+                self._init_starts.append(index)
+            self._init_refs.append(ref)
+        return index
+
+    def replace_from(self, start: int, other: "SegmentManifest") -> None:
+        """Replace the segments from ``start`` on with those of ``other``.
+
+        Used to continue a download from another variant of the same
+        presentation; both manifests must be aligned by media sequence number
+        and ``other`` must cover every segment being replaced. The segment at
+        ``start`` is marked as following a discontinuity.
+        """
+        if other.media_sequence != self.media_sequence or len(other) < len(self):
+            raise ValueError("Manifests are not aligned by media sequence")
+        if other.has_byte_ranges:
+            self._ensure_range_arrays()
+        if other._init_refs is not None and self._init_refs is None:
+            self._init_refs = array('i', [-1] * len(self))
+
+        for index in range(start, len(self)):
+            self._url_suffixes[index] = self._suffix(other.url(index))
+            self._durations[index] = other.duration(index)
+            self._key_refs[index] = self._key_ref(other.key(index))
+            if self._range_offsets is not None and self._range_lengths is not None:
+                offset, length = other.byte_range(index) or (-1, 0)
+                self._range_offsets[index] = offset
+                self._range_lengths[index] = length
+            if self._init_refs is not None:
+                self._init_refs[index] = self._init_ref(other.init_section(index))
+
+        if self._init_refs is not None:
+            # The other variant's initialization section is needed from the
+            # switch on, even if it is the same resource
+            starts = [i for i in self._init_starts if i < start]
+            if start < len(self) and self._init_refs[start] >= 0:
+                starts.append(start)
+            starts.extend(i for i in other.init_starts if i > start)
+            self._init_starts = starts
+
+        if start < len(self):
+            self._discontinuities = (
+                [i for i in self._discontinuities if i < start] + [start]
+                + [i for i in other._discontinuities if start < i < len(self)])
+
+    def _suffix(self, url: str) -> str:
+        """Get the stored form of a URL relative to the shared prefix"""
+        if url.startswith(self.url_prefix):
+            return url[len(self.url_prefix):]
+        # URL outside the shared prefix; store it verbatim behind a marker
+        return "\0" + url
+
+    def _ensure_range_arrays(self) -> None:
+        """Allocate byte range arrays on the first ranged segment"""
+        if self._range_offsets is None:
+            # Earlier segments are whole resources
+            self._range_offsets = array('q', [-1] * len(self._url_suffixes))
+            self._range_lengths = array('q', [0] * len(self._url_suffixes))
+
+    def _key_ref(self, key: Optional[SegmentKey]) -> int:
+        """Get index of key in the key table, adding it if needed"""
+        if key is None or key.method == "NONE":
+            return -1
+        ref = self._key_lookup.get(key)
+        if ref is None:
+            ref = len(self._keys)
+            self._keys.append(key)
+            self._key_lookup[key] = ref
+        return ref
+
+    def _init_ref(self, init_section: Optional[SegmentInit]) -> int:
+        """Get index of an initialization section in its table, adding it if needed"""
+        if init_section is None:
+            return -1
+        ref = self._init_lookup.get(init_section)
+        if ref is None:
+            ref = len(self._inits)
+            self._inits.append(init_section)
+            self._init_lookup[init_section] = ref
+        return ref
+
+    def __len__(self) -> int:
+        return len(self._url_suffixes)
+
+    def __iter__(self) -> Iterator[SegmentEntry]:
+        for index in range(len(self)):
+            yield self.entry(index)
+
+    def url(self, index: int) -> str:
+        """Get the fully resolved URL of a segment"""
+        suffix = self._url_suffixes[index]
+        if suffix.startswith("\0"):
+            return suffix[1:]
+        return self.url_prefix + suffix
+
+    def duration(self, index: int) -> float:
+        """Get the duration of a segment in seconds"""
+        return self._durations[index]
+
+    def key(self, index: int) -> Optional[SegmentKey]:
+        """Get the encryption key reference of a segment"""
+        ref = self._key_refs[index]
+        return self._keys[ref] if ref >= 0 else None
+
+    def byte_range(self, index: int) -> Optional[Tuple[int, int]]:
+        """Get the ``(offset, length)`` of a segment within its URL, if ranged"""
+        if self._range_offsets is None or self._range_lengths is None:
+            return None
+        offset = self._range_offsets[index]
+        return (offset, self._range_lengths[index]) if offset >= 0 else None
+
+    def init_section(self, index: int) -> Optional[SegmentInit]:
+        """Get the initialization section a segment depends on, if any"""
+        if self._init_refs is None:
+            return None
+        ref = self._init_refs[index]
+        return self._inits[ref] if ref >= 0 else None
+
+    @property
+    def init_starts(self) -> Sequence[int]:
+        """Indexes of the segments an initialization section is written before"""
+        return tuple(self._init_starts)
+
+    @property
+    def discontinuities(self) -> Sequence[int]:
+        """Indexes of the segments that follow a discontinuity"""
+        return tuple(self._discontinuities)
+
+    @property
+    def has_byte_ranges(self) -> bool:
+        """Whether any segment is a byte range of a larger resource"""
+        return self._range_offsets is not None
+
+    def sequence_number(self, index: int) -> int:
+        """Get the media sequence number of a segment"""
+        return self.media_sequence + index
+
+    def entry(self, index: int) -> SegmentEntry:
+        """Get a read-only view of a segment"""
+        return SegmentEntry(
+            index=index,
+            url=self.url(index),
+            duration=self._durations[index],
+            key=self.key(index),
+            byte_range=self.byte_range(index),
+            init_section=self.init_section(index)
+        )
+
+    @property
+    def keys(self) -> Sequence[SegmentKey]:
+        """Distinct encryption keys referenced by the manifest"""
+        return tuple(self._keys)
+
+    @property
+    def total_duration(self) -> float:
+        """Total duration of all segments in seconds"""
+        return sum(self._durations)
+
+    @classmethod
+    def from_segments(cls, segments: Sequence[Any], media_sequence: int = 0) -> "SegmentManifest":
+        """Build a manifest from parsed ``M3U8Segment`` objects"""
+        urls = [segment.url for segment in segments]
+        manifest = cls(_common_url_prefix(urls), media_sequence)
+
+        for segment in segments:
+            key: Optional[SegmentKey] = None
+            method = getattr(segment.encryption, "value", segment.encryption)
+            if method and method != "NONE":
+                key = SegmentKey(method=method, url=segment.key_url, iv=segment.key_iv)
+            init = getattr(segment, "init_section", None)
+            manifest.append(segment.url, segment.duration, key,
+                            getattr(segment, "byte_range", None),
+                            SegmentInit(init.url, init.byte_range) if init is not None else None,
+                            bool(getattr(segment, "discontinuity", False)))
+
+        return manifest
+
+    @classmethod
+    def from_urls(cls, urls: Sequence[str], durations: Optional[Sequence[float]] = None,
+                  key: Optional[SegmentKey] = None, media_sequence: int = 0,
+                  keys: Optional[Sequence[Optional[SegmentKey]]] = None) -> "SegmentManifest":
+        """Build a manifest from plain segment URLs.
+
+        All segments share ``key`` unless ``keys`` gives a key per segment.
+        """
+        manifest = cls(_common_url_prefix(urls), media_sequence)
+        for index, url in enumerate(urls):
+            duration = durations[index] if durations and index < len(durations) else 0.0
+            segment_key = keys[index] if keys is not None and index < len(keys) else key
+            manifest.append(url, duration, segment_key)
+        return manifest
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert manifest to a JSON-serializable dictionary"""
+        data: Dict[str, Any] = {
+            "url_prefix": self.url_prefix,
+            "media_sequence": self.media_sequence,
+            "urls": list(self._url_suffixes),
+            "durations": self._durations.tolist(),
+            "key_refs": self._key_refs.tolist(),
+            "keys": [[k.method, k.url, k.iv] for k in self._keys]
+        }
+        if self._range_offsets is not None and self._range_lengths is not None:
+            data["range_offsets"] = self._range_offsets.tolist()
+            data["range_lengths"] = self._range_lengths.tolist()
+        if self._init_refs is not None:
+            data["inits"] = [[i.url, list(i.byte_range) if i.byte_range else None]
+                             for i in self._inits]
+            data["init_refs"] = self._init_refs.tolist()
+            data["init_starts"] = list(self._init_starts)
+        if self._discontinuities:
+            data["discontinuities"] = list(self._discontinuities)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SegmentManifest":
+        """Restore a manifest created by ``to_dict``"""
+        manifest = cls(data.get("url_prefix", ""), data.get("media_sequence", 0))
+        keys: List[Tuple[str, Optional[str], Optional[str]]] = data.get("keys", [])
+        manifest._keys = [SegmentKey(*k) for k in keys]
+        manifest._key_lookup = {k: i for i, k in enumerate(manifest._keys)}
+        manifest._url_suffixes = list(data.get("urls", []))
+        manifest._durations = array('d', data.get("durations", []))
+        manifest._key_refs = array('i', data.get("key_refs", []))
+        if "range_offsets" in data:
+            manifest._range_offsets = array('q', data["range_offsets"])
+            manifest._range_lengths = array('q', data.get("range_lengths", []))
+        if "init_refs" in data:
+            manifest._inits = [SegmentInit(url, tuple(byte_range) if byte_range else None)
+                               for url, byte_range in data.get("inits", [])]
+            manifest._init_lookup = {init: i for i, init in enumerate(manifest._inits)}
+            manifest._init_refs = array('i', data["init_refs"])
+            manifest._init_starts = list(data.get("init_starts", []))
+        manifest._discontinuities = list(data.get("discontinuities", []))
+        return manifest
+
+
+def _common_url_prefix(urls: Iterable[str]) -> str:
+    """Get the longest common prefix of URLs, cut back to a path separator"""
+    url_list = list(urls)
+    if not url_list:
+        return ""
+    prefix = os.path.commonprefix(url_list)
+    cut = prefix.rfind("/")
+    return prefix[:cut + 1] if cut >= 0 else ""
@@ -0,0 +1,165 @@
+"""
+Split Downloads for VidTanium
+
+This module downloads one large resource as several byte ranges fetched in
+parallel, each written straight into its place in a preallocated,
+memory-mapped file. Part progress is kept in a small JSON state file next to
+the target so an interrupted download resumes every part where it stopped,
+as long as the resource still has the same size and validator (ETag or
+Last-Modified). The HTTP side (connection leases, retries, bandwidth) stays
+in the downloader.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+import logging
+
+from .memory_optimizer import MemoryMappedFile
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FilePart:
+    """A byte range of the target file and how much of it is written"""
+    start: int
+    end: int  # Exclusive
+    done: int = 0
+
+    @property
+    def offset(self) -> int:
+        """Next byte of the part to download"""
+        return self.start + self.done
+
+    @property
+    def remaining(self) -> int:
+        return self.end - self.offset
+
+    @property
+    def complete(self) -> bool:
+        return self.remaining <= 0
+
+
+class SplitFileDownload:
+    """Parallel range download of one resource into a preallocated file
+
+    ``validator`` is the ETag or Last-Modified of the resource; parts are
+    requested with it in ``If-Range``. Once a part finds the resource
+    changed, the download is ``invalidate``d and discarded on ``close``.
+    """
+
+    def __init__(self, target_path: str, total_size: int, part_count: int,
+                 state_path: Optional[str] = None,
+                 save_interval: int = 4 * 1024 * 1024,
+                 validator: Optional[str] = None) -> None:
+        self.target_path = target_path
+        self.total_size = total_size
+        self.validator = validator
+        self.invalidated = False
+        self.state_path = state_path or f"{target_path}.parts"
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.target: Optional[MemoryMappedFile] = None
+        self.unsaved_bytes = 0
+
+        self.parts = self._load_state() or self._plan_parts(part_count)
+
+    def _plan_parts(self, part_count: int) -> List[FilePart]:
+        """Split the file into equal parts"""
+        part_count = max(1, min(part_count, self.total_size))
+        part_size = max(1, -(-self.total_size // part_count))
+        return [FilePart(start, min(start + part_size, self.total_size))
+                for start in range(0, self.total_size, part_size)]
+
+    def _load_state(self) -> Optional[List[FilePart]]:
+        """Load part progress of an interrupted download of the same file"""
+        if not os.path.exists(self.state_path) or not os.path.exists(self.target_path):
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("total_size") != self.total_size:
+                logger.info(f"Resource size changed, restarting split download: {self.target_path}")
+                return None
+            if state.get("validator") != self.validator:
+                logger.info(f"Resource changed, restarting split download: {self.target_path}")
+                return None
+            parts = [FilePart(**part) for part in state["parts"]]
+            logger.info(f"Resuming split download of {self.target_path} "
+                        f"({sum(p.done for p in parts)}/{self.total_size} bytes)")
+            return parts
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable split download state {self.state_path}: {e}")
+            return None
+
+    def save_state(self) -> None:
+        """Persist part progress; data is flushed first so it never lags the state"""
+        with self.lock:
+            # Parts count bytes after writing them, so this snapshot is covered by the flush
+            state = {"total_size": self.total_size, "validator": self.validator,
+                     "parts": [asdict(p) for p in self.parts]}
+            if self.target is not None and self.target.mmap_handle is not None:
+                self.target.mmap_handle.flush()
+            temp_path = f"{self.state_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.state_path)
+            self.unsaved_bytes = 0
+
+    @property
+    def pending_parts(self) -> List[FilePart]:
+        return [part for part in self.parts if not part.complete]
+
+    @property
+    def complete(self) -> bool:
+        return all(part.complete for part in self.parts)
+
+    def open(self) -> None:
+        """Preallocate and map the target file"""
+        self.target = MemoryMappedFile(self.target_path, "r+b", size=self.total_size)
+        self.target.open()
+
+    def write(self, part: FilePart, data: bytes) -> int:
+        """Write the next bytes of a part; returns how many belonged to it"""
+        if self.target is None:
+            raise RuntimeError("Split download not open")
+        data = data[:part.remaining]
+        if not data:
+            return 0
+        self.target.write(data, part.offset)
+        part.done += len(data)
+
+        self.unsaved_bytes += len(data)
+        if self.unsaved_bytes >= self.save_interval:
+            self.save_state()
+        return len(data)
+
+    def invalidate(self) -> None:
+        """Mark the resource as changed; the written parts no longer fit together"""
+        self.invalidated = True
+
+    def close(self) -> None:
+        """Unmap the file, keeping the state for a later resume if unfinished
+
+        An invalidated download is discarded: its file and state are removed.
+        """
+        if self.target is None:
+            return
+        if self.invalidated:
+            self.target.close()
+            self.target = None
+            for path in (self.target_path, self.state_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        elif self.complete:
+            self.target.close()
+            self.target = None
+            if os.path.exists(self.state_path):
+                os.remove(self.state_path)
+        else:
+            self.save_state()
+            self.target.close()
+            self.target = None
@@ -0,0 +1,143 @@
+"""
+Variant Selector for VidTanium
+
+This module picks the variant of a master playlist to download from the
+throughput actually measured to the media host rather than from declared
+``BANDWIDTH`` alone: given a deadline, it selects the highest variant whose
+estimated download time fits, and during a download it decides when the
+remaining segments should continue from a lower variant.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence, TypeVar
+import logging
+
+from .adaptive_timeout import AdaptiveTimeoutManager, adaptive_timeout_manager
+from .bandwidth_monitor import BandwidthMonitor, bandwidth_monitor
+
+logger = logging.getLogger(__name__)
+
+Variant = TypeVar("Variant")
+
+
+@dataclass
+class VariantSelectionConfig:
+    """Configuration for throughput-based variant selection"""
+    safety_margin: float = 0.8          # Fraction of measured throughput to rely on
+    min_samples: int = 3                # Transfers needed before trusting a host measurement
+    switch_check_interval: float = 10.0  # Seconds between mid-download projections
+    switch_tolerance: float = 1.2       # Projected overrun ratio tolerated before switching
+
+
+def variant_bandwidth(variant: Any) -> int:
+    """Declared bandwidth of a parsed stream or an analyzer variant dict"""
+    if isinstance(variant, dict):
+        return int(variant.get("bandwidth", 0) or 0)
+    return int(getattr(variant, "bandwidth", 0) or 0)
+
+
+def variant_url(variant: Any) -> str:
+    """Playlist URL of a parsed stream or an analyzer variant dict"""
+    if isinstance(variant, dict):
+        return str(variant.get("url", ""))
+    return str(getattr(variant, "url", ""))
+
+
+class VariantSelector:
+    """Selects variants that can be downloaded within a deadline"""
+
+    def __init__(self, timeout_manager: Optional[AdaptiveTimeoutManager] = None,
+                 monitor: Optional[BandwidthMonitor] = None,
+                 config: Optional[VariantSelectionConfig] = None) -> None:
+        self.timeout_manager = timeout_manager or adaptive_timeout_manager
+        self.monitor = monitor or bandwidth_monitor
+        self.config = config or VariantSelectionConfig()
+
+    def estimate_throughput(self, url: str, connections: int = 1) -> float:
+        """Estimate achievable download throughput from a host in bytes per second.
+
+        Uses the per-connection throughput measured by the adaptive timeout
+        manager scaled by ``connections``, falling back to the average speed
+        seen by the bandwidth monitor. Returns 0 when nothing is known.
+        """
+        per_connection = self.timeout_manager.get_host_throughput(
+            url, min_samples=self.config.min_samples) if url else 0.0
+        if per_connection > 0:
+            return per_connection * max(1, connections)
+
+        stats = self.monitor.get_current_stats()
+        if stats is not None and stats.average_download_speed > 0:
+            return stats.average_download_speed
+        return 0.0
+
+    @staticmethod
+    def estimate_download_time(bandwidth: int, duration: float, throughput: float) -> float:
+        """Seconds needed to download ``duration`` seconds of media at ``bandwidth`` bps"""
+        if throughput <= 0:
+            return float("inf")
+        return bandwidth / 8 * duration / throughput
+
+    def select(self, variants: Sequence[Variant], duration: float = 0.0,
+               deadline: Optional[float] = None, url: Optional[str] = None,
+               connections: int = 1, throughput: Optional[float] = None) -> Optional[Variant]:
+        """Select the highest variant expected to finish within ``deadline`` seconds.
+
+        Without a deadline, a known duration or a throughput measurement this
+        is simply the highest bandwidth variant; when no variant fits, the
+        lowest one is returned.
+        """
+        if not variants:
+            return None
+        ordered = sorted(variants, key=variant_bandwidth, reverse=True)
+        if not deadline or deadline <= 0 or duration <= 0:
+            return ordered[0]
+
+        if throughput is None:
+            throughput = self.estimate_throughput(url or variant_url(ordered[0]), connections)
+        if throughput <= 0:
+            logger.debug("No throughput measurement yet, selecting the highest variant")
+            return ordered[0]
+
+        usable = throughput * self.config.safety_margin
+        for variant in ordered:
+            estimate = self.estimate_download_time(variant_bandwidth(variant), duration, usable)
+            if estimate <= deadline:
+                logger.debug(f"Selected {variant_bandwidth(variant)} bps variant: "
+                             f"~{estimate:.0f}s of {deadline:.0f}s at {throughput:.0f} B/s")
+                return variant
+
+        logger.info(f"No variant fits the {deadline:.0f}s deadline at {throughput:.0f} B/s, "
+                    f"selecting the lowest")
+        return ordered[-1]
+
+    def plan_switch(self, variants: Sequence[Variant], current_url: str,
+                    remaining_duration: float, time_left: float,
+                    throughput: float) -> Optional[Variant]:
+        """Get a lower variant to continue with, or ``None`` to stay.
+
+        ``throughput`` is the task's current download speed. Only switches
+        down, and only once the current variant is projected to overrun the
+        remaining time by more than ``switch_tolerance``.
+        """
+        current = next((v for v in variants if variant_url(v) == current_url), None)
+        if current is None or throughput <= 0 or remaining_duration <= 0:
+            return None
+
+        current_bandwidth = variant_bandwidth(current)
+        projected = self.estimate_download_time(current_bandwidth, remaining_duration, throughput)
+        if projected <= max(0.0, time_left) * self.config.switch_tolerance:
+            return None
+
+        lower = [v for v in variants if variant_bandwidth(v) < current_bandwidth]
+        if not lower:
+            return None
+        candidate = self.select(lower, remaining_duration, max(time_left, 1.0),
+                                throughput=throughput)
+        logger.info(f"Projected {projected:.0f}s for {remaining_duration:.0f}s of media with "
+                    f"{max(0.0, time_left):.0f}s left; switching down to "
+                    f"{variant_bandwidth(candidate)} bps")
+        return candidate
+
+
+# Global variant selector instance
+variant_selector = VariantSelector()
@@ -1,10 +1,11 @@
 from PySide6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QWidget, QFileDialog, QDialog, QScrollArea, QFormLayout, QApplication
 )
-from PySide6.QtCore import Qt, Signal, Slot
+from PySide6.QtCore import Qt, Signal, Slot, QThread, QObject
 from PySide6.QtGui import QIcon
 import os
 import logging
+from typing import Any, Dict, List, Optional
 
 from qfluentwidgets import (
     # Navigation
@@ -24,11 +25,50 @@ from qfluentwidgets import (
 )
 
 from src.core.url_extractor import URLExtractor
+from src.core.analyzer import DEFAULT_ANALYSIS_CONCURRENCY, MediaAnalyzer
+from src.core.connection_pool import connection_pool_manager
 from src.gui.utils.i18n import tr
 
 logger = logging.getLogger(__name__)
 
 
+class BatchAnalysisWorker(QObject):
+    """在后台线程中并发分析URL，逐个报告结果"""
+
+    result_ready = Signal(str, dict)  # URL, 分析结果
+    finished = Signal()
+
+    def __init__(self, urls, analyzer_settings, concurrency: int = DEFAULT_ANALYSIS_CONCURRENCY) -> None:
+        super().__init__()
+        self.urls = list(urls)
+        self.analyzer_settings = analyzer_settings
+        self.concurrency = concurrency
+        self._canceled = False
+
+    def cancel(self) -> None:
+        """停止分析，尚未开始的URL不再分析（可从其他线程调用）"""
+        self._canceled = True
+
+    def run(self) -> None:
+        """执行批量分析"""
+        try:
+            analyzer = MediaAnalyzer(self.analyzer_settings,
+                                     connection_pool=connection_pool_manager)
+            results = analyzer.analyze_many(self.urls, concurrency=self.concurrency)
+            try:
+                for url, result in results:
+                    if self._canceled:
+                        break
+                    self.result_ready.emit(url, result)
+            finally:
+                # 关闭生成器以取消尚未开始的分析
+                results.close()
+        except Exception as e:
+            logger.error(f"Batch analysis failed: {e}", exc_info=True)
+        finally:
+            self.finished.emit()
+
+
 class BatchURLDialog(QDialog):
     """批量URL导入对话框"""
 
@@ -39,7 +79,10 @@ class BatchURLDialog(QDialog):
         super().__init__(parent)
 
         self.settings = settings
-        self.urls = []
+        self.urls: List[str] = []
+        self.analysis_results: Dict[str, Dict[str, Any]] = {}
+        self.analysis_thread: Optional[QThread] = None
+        self.analysis_worker: Optional[BatchAnalysisWorker] = None
 
         self.setWindowTitle(tr("batch_url_dialog.title"))
         self.setMinimumSize(750, 550)
@@ -138,6 +181,13 @@ class BatchURLDialog(QDialog):
         self.cancel_button.clicked.connect(self.reject)
         button_layout.addWidget(self.cancel_button)
 
+        self.analyze_button = PushButton(tr("batch_url_dialog.buttons.analyze"))
+        self.analyze_button.setIcon(FIF.SEARCH)
+        self.analyze_button.setFixedSize(100, 36)
+        self.analyze_button.setEnabled(False)
+        self.analyze_button.clicked.connect(self._analyze_urls)
+        button_layout.addWidget(self.analyze_button)
+
         self.ok_button = PrimaryPushButton(
             tr("batch_url_dialog.buttons.import"))
         self.ok_button.setIcon(FIF.DOWNLOAD)
@@ -499,6 +549,89 @@ class BatchURLDialog(QDialog):
         self.url_preview.setText(preview_text)
         self.url_count_label.setText(f"已检测到 {len(urls)} 个URL")
         self.ok_button.setEnabled(len(urls) > 0)
+        self.analyze_button.setEnabled(len(urls) > 0 and self.analysis_thread is None)
+        self.analysis_results = {}
+
+    def _analyze_urls(self) -> None:
+        """并发分析预览中的URL，结果到达时即更新预览"""
+        if not self.urls or self.analysis_thread is not None:
+            return
+
+        self.analysis_results = {}
+        self.analyze_button.setEnabled(False)
+        self.ok_button.setEnabled(False)
+        self.url_count_label.setText(f"正在分析 {len(self.urls)} 个URL...")
+
+        analyzer_settings = {
+            "user_agent": self.settings.get("advanced", "user_agent", "") or None,
+            "timeout": self.settings.get("download", "request_timeout", 30),
+            "verify_ssl": self.settings.get("advanced", "verify_ssl", True),
+            "proxy": self.settings.get("advanced", "proxy", None) or None
+        }
+        analyzer_settings = {k: v for k, v in analyzer_settings.items() if v is not None}
+        concurrency = self.settings.get(
+            "download", "analysis_concurrency", DEFAULT_ANALYSIS_CONCURRENCY)
+
+        worker = BatchAnalysisWorker(self.urls, analyzer_settings, concurrency)
+        thread = QThread()
+        worker.moveToThread(thread)
+
+        thread.started.connect(worker.run)
+        worker.result_ready.connect(self._on_analysis_result)
+        worker.finished.connect(self._on_analysis_finished)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(thread.deleteLater)
+
+        self.analysis_worker = worker
+        self.analysis_thread = thread
+        thread.start()
+
+    def _stop_analysis(self) -> None:
+        """停止进行中的分析并等待分析线程退出"""
+        worker, thread = self.analysis_worker, self.analysis_thread
+        self.analysis_worker = None
+        self.analysis_thread = None
+        if worker is not None:
+            worker.result_ready.disconnect(self._on_analysis_result)
+            worker.finished.disconnect(self._on_analysis_finished)
+            worker.cancel()
+        if thread is not None:
+            thread.quit()
+            thread.wait()
+
+    @Slot(str, dict)
+    def _on_analysis_result(self, url: str, result: dict) -> None:
+        """显示单个URL的分析结果"""
+        self.analysis_results[url] = result
+        lines = []
+        for preview_url in self.urls:
+            analysis = self.analysis_results.get(preview_url)
+            if analysis is None:
+                lines.append(preview_url)
+            elif analysis.get("success"):
+                variant = analysis.get("selected_variant")
+                detail = f"{analysis.get('segment_count', 0)} 个分片"
+                if variant:
+                    detail = f"{variant.get('resolution', 'unknown')}, {detail}"
+                lines.append(f"✓ {preview_url} ({detail})")
+            else:
+                lines.append(f"✗ {preview_url} ({analysis.get('error', '未知错误')})")
+        self.url_preview.setText("\n".join(lines))
+        self.url_count_label.setText(
+            f"已分析 {len(self.analysis_results)}/{len(self.urls)} 个URL")
+
+    @Slot()
+    def _on_analysis_finished(self) -> None:
+        """分析结束，仅保留可用的URL"""
+        self.analysis_thread = None
+        self.analysis_worker = None
+        failed = [url for url, result in self.analysis_results.items()
+                  if not result.get("success")]
+        self.urls = [url for url in self.urls if url not in failed]
+        self.url_count_label.setText(
+            f"可导入 {len(self.urls)} 个URL，{len(failed)} 个分析失败")
+        self.ok_button.setEnabled(len(self.urls) > 0)
+        self.analyze_button.setEnabled(False)
 
     def _import_urls(self) -> None:
         """导入URL"""
@@ -511,6 +644,16 @@ class BatchURLDialog(QDialog):
         # 关闭对话框
         self.accept()
 
-    def get_urls(self) -> None:
+    def reject(self) -> None:
+        """取消对话框，停止进行中的分析"""
+        self._stop_analysis()
+        super().reject()
+
+    def closeEvent(self, event) -> None:
+        """关闭对话框，停止进行中的分析"""
+        self._stop_analysis()
+        super().closeEvent(event)
+
+    def get_urls(self) -> List[str]:
         """获取导入的URL"""
         return self.urls
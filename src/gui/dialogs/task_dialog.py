@@ -41,6 +41,7 @@ from src.gui.utils.responsive import ResponsiveWidget, ResponsiveManager
 from src.gui.utils.theme import VidTaniumTheme
 from src.gui.theme_manager import EnhancedThemeManager
 from src.core.advanced_validator import advanced_validator, ContentInfo, SmartDefaults
+from src.core.renditions import MediaRendition
 from loguru import logger
 
 
@@ -271,6 +272,14 @@ class EnhancedTaskDialog(QDialog):
         self._validation_cache: dict[str, bool] = {}
         self._last_validation_time = 0
         self._validation_debounce_interval = 300  # ms
+
+        # Segment list resolved by the last playlist extraction
+        self._segment_manifest = None
+        self._live_playlist_url = None
+        self._renditions: List[MediaRendition] = []
+        # 主播放列表的其他码率，用于按截止时间在下载中切换
+        self._variants: Optional[List[Dict[str, Any]]] = None
+        self._variant_url: Optional[str] = None
         
         # Auto-save timer for draft functionality
         self.auto_save_timer = QTimer()
@@ -846,7 +855,7 @@ class EnhancedTaskDialog(QDialog):
             headers = {"User-Agent": user_agent} if user_agent else None
 
             # 提取信息
-            result = extract_m3u8_info(url, headers)            # 关闭进度对话框
+            result = extract_m3u8_info(url, headers, self._variant_deadline())            # 关闭进度对话框
             progress.close()
 
             if not result["success"]:
@@ -864,6 +873,12 @@ class EnhancedTaskDialog(QDialog):
             if result["segments"]:
                 self.segments_input.setValue(result["segments"])
 
+            self._segment_manifest = result.get("manifest")
+            self._live_playlist_url = result.get("playlist_url") if result.get("is_live") else None
+            self._renditions = result.get("renditions", [])
+            self._variants = result["streams"] if len(result.get("streams", [])) > 1 else None
+            self._variant_url = (result.get("selected_stream") or {}).get("url")
+
             # 如果没有提供任务名称，从URL创建一个
             if not self.name_input.text():
                 from urllib.parse import urlparse
@@ -894,7 +909,7 @@ class EnhancedTaskDialog(QDialog):
             self._show_error(
                 tr("task_dialog.errors.extract_error").format(error=str(e)))
 
-    def get_task_data(self) -> None:
+    def get_task_data(self) -> Dict[str, Any]:
         """获取任务数据"""
         # Save to history when task is created
         url = self.base_url_input.text().strip()
@@ -904,17 +919,36 @@ class EnhancedTaskDialog(QDialog):
             self.history_manager.add_url(url)
         if output:
             self.history_manager.add_output_path(output)
-            
+
+        segment_manifest = self._current_segment_manifest()
         return {
             "name": self.name_input.text(),
             "base_url": url,
             "key_url": self.key_url_input.text(),
             "segments": self.segments_input.value(),
+            "segment_manifest": segment_manifest,
+            "live_playlist_url": self._live_playlist_url if segment_manifest is not None else None,
+            "renditions": self._renditions if segment_manifest is not None else [],
+            "variants": self._variants if segment_manifest is not None else None,
+            "variant_url": self._variant_url if segment_manifest is not None else None,
+            "deadline": self._variant_deadline(),
             "output_file": output,
             "priority": self.priority_combo.currentData(),
             "auto_start": self.auto_start_check.isChecked()
         }
 
+    def _variant_deadline(self) -> Optional[float]:
+        """下载应完成的秒数（variant_deadline_minutes 设置），未设置时为 None"""
+        minutes = self.settings.get("download", "variant_deadline_minutes", 0)
+        return minutes * 60 if minutes else None
+
+    def _current_segment_manifest(self):
+        """Get the extracted segment manifest if the form still matches it"""
+        manifest = self._segment_manifest
+        if manifest is None or len(manifest) != self.segments_input.value():
+            return None
+        return manifest
+
     # ====== New Performance and Feature Methods ======
     
     def _setup_keyboard_shortcuts(self) -> None:
@@ -1873,7 +1907,7 @@ Extraction Count: {metrics['extraction_count']}
             headers = {"User-Agent": user_agent} if user_agent else None
 
             # Extract information
-            result = extract_m3u8_info(url, headers)
+            result = extract_m3u8_info(url, headers, self._variant_deadline())
             
             # Stop progress animation
             progress_timer.stop()
@@ -1894,6 +1928,12 @@ Extraction Count: {metrics['extraction_count']}
             if result["segments"]:
                 self.segments_input.setValue(result["segments"])
 
+            self._segment_manifest = result.get("manifest")
+            self._live_playlist_url = result.get("playlist_url") if result.get("is_live") else None
+            self._renditions = result.get("renditions", [])
+            self._variants = result["streams"] if len(result.get("streams", [])) > 1 else None
+            self._variant_url = (result.get("selected_stream") or {}).get("url")
+
             # Auto-generate task name if empty
             if not self.name_input.text():
                 parsed_url = urlparse(url)
@@ -1049,7 +1049,13 @@ class MainWindow(FluentWindow):
                     segments=task_data.get("segments", 200),
                     output_file=task_data.get("output_file"),
                     settings=self.settings,
-                    priority=priority
+                    priority=priority,
+                    segment_manifest=task_data.get("segment_manifest"),
+                    live_playlist_url=task_data.get("live_playlist_url"),
+                    variants=task_data.get("variants"),
+                    variant_url=task_data.get("variant_url"),
+                    deadline=task_data.get("deadline"),
+                    renditions=task_data.get("renditions")
                 )
 
                 # Add task to download manager
@@ -1419,6 +1425,10 @@ class MainWindow(FluentWindow):
             theme = self.settings.get("general", "theme", "system")
             self.app._apply_theme()
 
+            # Apply bandwidth limit to running downloads
+            self.download_manager.set_bandwidth_limit(
+                int(self.settings.get("download", "bandwidth_limit", 0)))
+
             # Save settings to disk
             self.settings.save_settings()
 
@@ -355,6 +355,17 @@ def pytest_collection_modifyitems(config, items) -> None:
             item.add_marker(pytest.mark.network)
 
 
+@pytest.fixture(autouse=True)
+def isolated_resume_store(tmp_path_factory, monkeypatch) -> None:
+    """Keep resume state written by tests out of the working directory."""
+    module = sys.modules.get("src.core.resume_store")
+    if module is not None:
+        store = module.resume_store
+        monkeypatch.setattr(store, "state_dir", tmp_path_factory.mktemp("resume"))
+        monkeypatch.setattr(store, "journals", {})
+    yield
+
+
 # Cleanup after tests
 @pytest.fixture(autouse=True)
 def cleanup_after_test() -> None:
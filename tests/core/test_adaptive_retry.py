@@ -363,6 +363,25 @@ class TestAdaptiveRetryManager:
         retry_manager.reset_host_metrics(host)
         assert host not in retry_manager.host_metrics
 
+    def test_urls_aggregate_per_host(self, retry_manager) -> None:
+        """Test attempts for different URLs on one host share metrics"""
+        for i in range(20):
+            retry_manager.record_attempt(
+                f"https://cdn.example.com/seg{i}.ts", 1, RetryReason.NETWORK_TIMEOUT, True, 1.0)
+
+        assert list(retry_manager.host_metrics) == ["https://cdn.example.com"]
+        assert retry_manager.get_host_stats("https://cdn.example.com/other.ts")["total_attempts"] == 20
+
+    def test_max_hosts_bound(self) -> None:
+        """Test metrics are kept for a bounded number of hosts"""
+        retry_manager = AdaptiveRetryManager(max_hosts=2)
+        for i in range(5):
+            retry_manager.record_attempt(
+                f"https://host{i}.example.com/seg.ts", 1, RetryReason.NETWORK_TIMEOUT, True, 1.0)
+
+        assert len(retry_manager.host_metrics) == 2
+        assert retry_manager.get_global_stats()["tracked_hosts"] == 2
+
 
 class TestGlobalAdaptiveRetryManager:
     """Test global adaptive retry manager instance"""
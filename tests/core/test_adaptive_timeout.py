@@ -292,6 +292,35 @@ class TestAdaptiveTimeoutManager:
             # Old metrics should be removed
             assert "example.com" not in timeout_manager.host_metrics
 
+    def test_urls_aggregate_per_host(self, timeout_manager) -> None:
+        """Test requests for different segment URLs share host metrics"""
+        for i in range(20):
+            timeout_manager.record_request(f"https://cdn.example.com/seg{i}.ts", 1.0, success=True)
+
+        assert list(timeout_manager.host_metrics) == ["https://cdn.example.com"]
+        assert timeout_manager.get_host_stats("https://cdn.example.com/x.ts")["total_requests"] == 20
+
+    def test_host_throughput(self, timeout_manager) -> None:
+        """Test successful transfers give a per-host throughput estimate"""
+        url = "https://cdn.example.com/seg0.ts"
+        assert timeout_manager.get_host_throughput(url) == 0.0
+
+        timeout_manager.record_request(url, 2.0, success=True, bytes_transferred=1_000_000)
+        timeout_manager.record_request(url, 2.0, success=True, bytes_transferred=3_000_000)
+        timeout_manager.record_request(url, 5.0, success=False, bytes_transferred=0)
+
+        assert timeout_manager.get_host_throughput(url) == 1_000_000
+        assert timeout_manager.get_host_throughput(url, min_samples=3) == 0.0
+        assert timeout_manager.get_host_stats(url)["throughput"] == 1_000_000
+
+    def test_max_hosts_bound(self) -> None:
+        """Test metrics are kept for a bounded number of hosts"""
+        timeout_manager = AdaptiveTimeoutManager(max_hosts=2)
+        for i in range(5):
+            timeout_manager.record_request(f"https://host{i}.example.com/seg.ts", 1.0, success=True)
+
+        assert len(timeout_manager.host_metrics) == 2
+
 
 class TestGlobalAdaptiveTimeoutManager:
     """Test global adaptive timeout manager instance"""
@@ -237,6 +237,44 @@ class TestMediaAnalyzer:
         assert "encryption_details" in result
         assert result["encryption_details"]["method"] == "AES-128"
 
+        manifest = result["manifest"]
+        assert len(manifest) == 2
+        assert manifest.url(1) == "http://example.com/segment2.ts"
+        assert manifest.duration(0) == 10.0
+        assert manifest.key(0).url == "http://example.com/key.bin"
+        assert manifest.key(0).iv == "0x1234567890ABCDEF1234567890ABCDEF"
+
+    @patch('requests.get')
+    def test_analyze_url_byte_range_playlist(self, mock_get: Mock) -> None:
+        """测试 analyze_url 保留 BYTERANGE 分片和 MAP 初始化段。"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.text = """
+        #EXTM3U
+        #EXT-X-VERSION:7
+        #EXT-X-MEDIA-SEQUENCE:5
+        #EXT-X-MAP:URI="init.mp4",BYTERANGE="720@0"
+        #EXTINF:6.0,
+        #EXT-X-BYTERANGE:1000@720
+        media.mp4
+        #EXTINF:6.0,
+        #EXT-X-BYTERANGE:1500
+        media.mp4
+        #EXT-X-ENDLIST
+        """
+        mock_get.return_value = mock_response
+
+        result = self.default_analyzer.analyze_url("http://example.com/vod/playlist.m3u8")
+
+        assert result["success"] is True
+        assert result["segment_count"] == 2
+        manifest = result["manifest"]
+        assert manifest.media_sequence == 5
+        assert [manifest.byte_range(i) for i in range(2)] == [(720, 1000), (1720, 1500)]
+        init = manifest.init_section(0)
+        assert init is not None
+        assert (init.url, init.byte_range) == ("http://example.com/vod/init.mp4", (0, 720))
+
     @patch('requests.get')
     def test_analyze_m3u8_invalid_format(self, mock_get: Mock) -> None:
         """测试无效 M3U8 格式的 analyze_m3u8。"""
@@ -371,6 +409,100 @@ class TestMediaAnalyzer:
         result = self.default_analyzer.analyze_url("http://example.com/page")
         assert result["success"] is True
 
+    @patch('requests.get')
+    def test_analyze_many_resolves_master_variants(self, mock_get: Mock) -> None:
+        """测试 analyze_many 并发分析并将主播放列表解析为所选变体。"""
+        playlists = {
+            "http://example.com/master.m3u8": """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=1280000,RESOLUTION=640x360
+low.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=2560000,RESOLUTION=1280x720
+high.m3u8
+""",
+            "http://example.com/high.m3u8": "#EXTM3U\n#EXTINF:10.0,\nhigh0.ts\n#EXTINF:10.0,\nhigh1.ts\n#EXT-X-ENDLIST\n",
+            "http://example.com/other.m3u8": "#EXTM3U\n#EXTINF:5.0,\nother0.ts\n#EXT-X-ENDLIST\n",
+        }
+
+        def get_side_effect(url: str, **kwargs: Dict[str, Any]) -> Mock:
+            response = Mock()
+            response.status_code = 200 if url in playlists else 404
+            response.text = playlists.get(url, "")
+            return response
+
+        mock_get.side_effect = get_side_effect
+
+        results = dict(self.default_analyzer.analyze_many(
+            ["http://example.com/master.m3u8", "http://example.com/other.m3u8",
+             "http://example.com/missing.m3u8"], concurrency=3))
+
+        master = results["http://example.com/master.m3u8"]
+        assert master["success"] is True
+        assert master["type"] == "media"
+        assert master["segment_count"] == 2
+        assert master["selected_variant"]["resolution"] == "1280x720"
+        assert master["master_url"] == "http://example.com/master.m3u8"
+        assert len(master["variants"]) == 2
+        assert results["http://example.com/other.m3u8"]["segment_count"] == 1
+        assert results["http://example.com/missing.m3u8"]["success"] is False
+        requested = [call.args[0] for call in mock_get.call_args_list]
+        assert "http://example.com/low.m3u8" not in requested
+
+    def test_analyze_many_uses_connection_pool(self) -> None:
+        """测试提供连接池时 analyze_many 通过池化会话请求并归还连接。"""
+        pool = Mock()
+        response = Mock()
+        response.status_code = 200
+        response.text = "#EXTM3U\n#EXTINF:10.0,\nseg0.ts\n#EXT-X-ENDLIST\n"
+        response.content = response.text.encode()
+        pool.acquire.return_value.session.get.return_value = response
+        analyzer = MediaAnalyzer(connection_pool=pool)
+
+        results = list(analyzer.analyze_many(
+            [f"http://example.com/video{i}.m3u8" for i in range(4)], concurrency=2))
+
+        assert len(results) == 4
+        assert all(result["success"] for _, result in results)
+        assert pool.acquire.call_count == 4
+        assert pool.release.call_count == 4
+        assert pool.release.call_args.args[1] is True
+
+    @patch('src.core.analyzer.variant_selector.estimate_throughput', return_value=125_000)
+    @patch('requests.get')
+    def test_resolve_variant_with_deadline(self, mock_get: Mock, mock_throughput: Mock) -> None:
+        """测试设置截止时间时选择能按时下载完成的最高变体。"""
+        playlists = {
+            "http://example.com/master.m3u8": """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=1000000,RESOLUTION=640x360
+low.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=4000000,RESOLUTION=1920x1080
+high.m3u8
+""",
+            "http://example.com/high.m3u8": "#EXTM3U\n#EXTINF:600.0,\nhigh0.ts\n#EXT-X-ENDLIST\n",
+            "http://example.com/low.m3u8": "#EXTM3U\n#EXTINF:600.0,\nlow0.ts\n#EXT-X-ENDLIST\n",
+        }
+
+        def get_side_effect(url: str, **kwargs: Dict[str, Any]) -> Mock:
+            response = Mock()
+            response.status_code = 200
+            response.text = playlists[url]
+            return response
+
+        mock_get.side_effect = get_side_effect
+        # 10 minutes of 4 Mbps media needs 2400s at 125 kB/s, 1 Mbps needs 600s
+        analyzer = MediaAnalyzer({"deadline": 1000})
+
+        master = analyzer.analyze_m3u8("http://example.com/master.m3u8")
+        result = analyzer.resolve_variant(master)
+
+        assert result["success"] is True
+        assert result["selected_variant"]["resolution"] == "640x360"
+        assert result["segments"] == ["http://example.com/low0.ts"]
+
+    def test_analyze_many_empty(self) -> None:
+        """测试空 URL 列表不产生结果。"""
+        assert list(self.default_analyzer.analyze_many([])) == []
+
+
 
 # 如果直接执行文件，则运行测试
 if __name__ == "__main__":
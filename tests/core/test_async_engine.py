@@ -0,0 +1,372 @@
+"""
+Tests for the asyncio download engine
+"""
+
+import pytest
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List
+from unittest.mock import Mock, patch
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+
+from src.core.downloader import DownloadManager, DownloadTask, TaskStatus
+from src.core.segment_manifest import SegmentManifest
+
+
+class MockSettings:
+    """Mock settings provider for testing."""
+
+    def __init__(self, engine: str = "async") -> None:
+        self.settings = {
+            "download": {"engine": engine, "segment_workers": 3,
+                         "max_retries": 2, "retry_delay": 0},
+            "advanced": {"user_agent": "TestAgent/1.0"}
+        }
+
+    def get(self, section: str, key: str, default: Any = None) -> Any:
+        return self.settings.get(section, {}).get(key, default)
+
+
+class SegmentServer(str):
+    """Base URL of the test server, with the state of its handlers"""
+
+    state: Dict[str, Any]
+
+
+@pytest.fixture
+def segment_server():
+    """Serve ten small segments from a local HTTP server."""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state: Dict[str, Any] = {}
+
+    async def handle_segment(request: web.Request) -> web.Response:
+        index = int(request.match_info["index"])
+        return web.Response(body=f"segment-{index:02d}".encode())
+
+    async def handle_large(request: web.Request) -> web.Response:
+        return web.Response(body=bytes(range(256)) * 4096)
+
+    async def handle_ranged(request: web.Request) -> web.Response:
+        body = bytes(range(256)) * 64
+        range_value = request.headers.get("Range")
+        state.setdefault("ranges", []).append(range_value)
+        headers = {"ETag": '"v1"', "Accept-Ranges": "bytes"}
+        if range_value is None:
+            return web.Response(body=body, headers=headers)
+        start, _, end = range_value[len("bytes="):].partition("-")
+        stop = int(end) + 1 if end else len(body)
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{len(body)}"
+        return web.Response(status=206, body=body[int(start):stop], headers=headers)
+
+    async def start() -> None:
+        app = web.Application()
+        app.router.add_get("/hls/seg{index}.ts", handle_segment)
+        app.router.add_get("/hls/large.ts", handle_large)
+        app.router.add_get("/hls/ranged.ts", handle_ranged)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        state["runner"] = runner
+        state["port"] = runner.addresses[0][1]
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(start())
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait(5)
+    server = SegmentServer(f"http://127.0.0.1:{state['port']}/hls")
+    server.state = state
+    yield server
+
+    asyncio.run_coroutine_threadsafe(state["runner"].cleanup(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+class TestAsyncDownloadEngine:
+    """Test AsyncDownloadEngine class"""
+
+    def test_engine_selected_from_settings(self) -> None:
+        """Test the async engine is used when configured"""
+        manager = DownloadManager(settings=MockSettings())
+        try:
+            assert manager.engine == "async"
+            assert manager.async_engine is not None
+        finally:
+            manager.async_engine.shutdown()
+
+    def test_falls_back_without_aiohttp(self) -> None:
+        """Test the thread engine is used when aiohttp is missing"""
+        with patch('src.core.async_engine.AIOHTTP_AVAILABLE', False):
+            manager = DownloadManager(settings=MockSettings())
+
+        assert manager.engine == "thread"
+        assert manager.async_engine is None
+
+    @patch('src.core.merger.merge_files')
+    def test_downloads_task_on_event_loop(self, mock_merge, segment_server, tmp_path) -> None:
+        """Test a task is downloaded and merged in order by the async engine"""
+        manager = DownloadManager(settings=MockSettings())
+        manager.recovery_manager = Mock()
+        manager.recovery_manager.get_resume_info.return_value = None
+        manager.segment_validator = Mock()
+        manager.segment_validator.validate_segment.return_value = Mock(
+            is_valid=Mock(return_value=True), has_warnings=Mock(return_value=False))
+        statuses: List[TaskStatus] = []
+        manager.status_callbacks.append(lambda task_id, old, new: statuses.append(new))
+
+        task = DownloadTask(
+            name="Async Task",
+            output_file=str(tmp_path / "video.ts"),
+            segment_manifest=SegmentManifest.from_urls(
+                [f"{segment_server}/seg{i}.ts" for i in range(10)])
+        )
+        manager.add_task(task)
+
+        try:
+            assert manager.start_task(task.task_id)
+            deadline = time.time() + 10
+            while task.task_id in manager.active_tasks and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            manager.async_engine.shutdown()
+
+        assert task.status == TaskStatus.COMPLETED
+        assert task.worker_thread is None
+        # Segments are appended into the output while they download
+        mock_merge.assert_not_called()
+        assert (tmp_path / "video.ts").read_bytes() == b"".join(
+            f"segment-{i:02d}".encode() for i in range(10))
+        assert statuses == [TaskStatus.RUNNING, TaskStatus.COMPLETED]
+        assert task.task_id not in manager.active_tasks
+
+    @patch('src.core.merger.mux_renditions')
+    @patch('src.core.merger.merge_files')
+    def test_renditions_downloaded_and_muxed(self, mock_merge, mock_mux, segment_server, tmp_path) -> None:
+        """Test audio renditions are downloaded next to the video and muxed after the merge"""
+        from src.core.renditions import MediaRendition
+
+        mock_merge.return_value = {"success": True}
+        mock_mux.return_value = {"success": True, "sidecars": []}
+        manager = DownloadManager(settings=MockSettings())
+        manager.recovery_manager = Mock()
+        manager.segment_validator = Mock()
+        manager.segment_validator.validate_segment.return_value = Mock(
+            is_valid=Mock(return_value=True), has_warnings=Mock(return_value=False))
+
+        audio = MediaRendition(
+            type="audio", group_id="aac", name="English", language="en",
+            url=f"{segment_server}/audio.m3u8",
+            manifest=SegmentManifest.from_urls([f"{segment_server}/seg{i}.ts" for i in range(5, 8)]))
+        task = DownloadTask(
+            name="Async Rendition Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=SegmentManifest.from_urls(
+                [f"{segment_server}/seg{i}.ts" for i in range(3)]),
+            renditions=[audio]
+        )
+        manager.add_task(task)
+
+        try:
+            assert manager.start_task(task.task_id)
+            deadline = time.time() + 10
+            while task.task_id in manager.active_tasks and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            manager.async_engine.shutdown()
+
+        assert task.status == TaskStatus.COMPLETED
+        output, renditions, _ = mock_mux.call_args[0]
+        assert output == task.output_file
+        assert [(r["type"], r["language"]) for r in renditions] == [("audio", "en")]
+
+
+class TestAsyncSegmentStreaming:
+    """Test segments are streamed to disk by the async engine"""
+
+    def test_large_segment_written_in_pieces(self, segment_server, tmp_path) -> None:
+        """Test a segment larger than the write buffer is written as it arrives"""
+        from src.core.downloader import SegmentFetchOptions
+
+        manager = DownloadManager(settings=MockSettings())
+        manager.segment_validator = Mock()
+        manager.segment_validator.validate_segment.return_value = Mock(
+            is_valid=Mock(return_value=True), has_warnings=Mock(return_value=False))
+        task = DownloadTask(
+            name="Large Segment",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=SegmentManifest.from_urls([f"{segment_server}/large.ts"])
+        )
+        options = SegmentFetchOptions(temp_dir=str(tmp_path), retry_delay=0)
+        writes: List[int] = []
+        original_open = open
+
+        class RecordingFile:
+            def __init__(self, *args: Any) -> None:
+                self.file = original_open(*args)
+
+            def write(self, data: Any) -> int:
+                writes.append(len(data))
+                return self.file.write(data)
+
+            def close(self) -> None:
+                self.file.close()
+
+        engine = manager.async_engine
+        try:
+            with patch('src.core.async_engine._WRITE_BUFFER_SIZE', 64 * 1024), \
+                    patch('src.core.async_engine.open', RecordingFile, create=True):
+                engine.start()
+
+                async def download() -> Any:
+                    session = await engine._get_session()
+                    return await engine._download_segment(session, task, 0, options)
+
+                path = asyncio.run_coroutine_threadsafe(download(), engine.loop).result(10)
+        finally:
+            engine.shutdown()
+
+        with open(path, "rb") as f:
+            assert f.read() == bytes(range(256)) * 4096
+        assert len(writes) > 1
+        assert max(writes) < 64 * 1024 + 2 * options.chunk_size
+
+
+class TestAsyncEngineControl:
+    """Test pausing and worker failure handling of the async engine"""
+
+    def test_paused_wait_wakes_on_resume(self) -> None:
+        """Test a paused segment wait returns as soon as the task is resumed"""
+        manager = DownloadManager(settings=MockSettings())
+        engine = manager.async_engine
+        task = DownloadTask(name="Paused Task")
+        task.status = TaskStatus.RUNNING
+        engine.start()
+        try:
+            async def wait_paused() -> float:
+                loop = asyncio.get_running_loop()
+                state_event = asyncio.Event()
+                engine.state_events[task.task_id] = state_event
+                task.state_listener = lambda: engine._wake(loop, state_event)
+                task.pause()
+                start = time.monotonic()
+                loop.call_later(0.2, threading.Thread(target=task.resume).start)
+                await engine._wait_while_paused(task)
+                return time.monotonic() - start
+
+            waited = asyncio.run_coroutine_threadsafe(wait_paused(), engine.loop).result(5)
+        finally:
+            engine.shutdown()
+
+        assert 0.15 <= waited < 1.0
+        assert not task.paused_event.is_set()
+
+    def test_failed_worker_cancels_siblings(self) -> None:
+        """Test the other segment workers are canceled when one raises"""
+        manager = DownloadManager(settings=MockSettings())
+        engine = manager.async_engine
+        canceled: List[int] = []
+
+        async def failing() -> None:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("segment failed")
+
+        async def slow(index: int) -> None:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                canceled.append(index)
+                raise
+
+        async def run() -> None:
+            await engine._run_workers([failing(), slow(1), slow(2)])
+
+        engine.start()
+        try:
+            with pytest.raises(RuntimeError, match="segment failed"):
+                asyncio.run_coroutine_threadsafe(run(), engine.loop).result(5)
+        finally:
+            engine.shutdown()
+
+        assert sorted(canceled) == [1, 2]
+
+
+class TestAsyncSegmentResume:
+    """Test the async engine resumes and coalesces segments like the thread engine"""
+
+    @staticmethod
+    def _make_manager() -> DownloadManager:
+        manager = DownloadManager(settings=MockSettings())
+        manager.segment_validator = Mock()
+        manager.segment_validator.validate_segment.return_value = Mock(
+            is_valid=Mock(return_value=True), has_warnings=Mock(return_value=False))
+        return manager
+
+    def test_partial_segment_resumed(self, segment_server, tmp_path) -> None:
+        """Test an interrupted segment continues from its journaled partial file"""
+        from src.core.byte_ranges import validator_checksum
+        from src.core.downloader import SegmentFetchOptions
+
+        body = bytes(range(256)) * 64
+        manager = self._make_manager()
+        task = DownloadTask(
+            name="Resumed Segment",
+            output_file=str(tmp_path / "video.ts"),
+            segment_manifest=SegmentManifest.from_urls([f"{segment_server}/ranged.ts"])
+        )
+        (tmp_path / "segment_0.ts.temp").write_bytes(body[:4096])
+        task.record_partial_segment(0, 4096, validator_checksum('"v1"'))
+        options = SegmentFetchOptions(temp_dir=str(tmp_path), retry_delay=0)
+
+        engine = manager.async_engine
+        try:
+            engine.start()
+
+            async def download() -> Any:
+                session = await engine._get_session()
+                return await engine._download_segment(session, task, 0, options)
+
+            path = asyncio.run_coroutine_threadsafe(download(), engine.loop).result(10)
+        finally:
+            engine.shutdown()
+
+        with open(path, "rb") as f:
+            assert f.read() == body
+        assert segment_server.state["ranges"] == ["bytes=4096-"]
+
+    def test_contiguous_ranges_coalesced(self, segment_server, tmp_path) -> None:
+        """Test adjacent byte-range segments are fetched with one request"""
+        body = bytes(range(256)) * 64
+        manager = self._make_manager()
+        manager.recovery_manager = Mock()
+        manager.recovery_manager.get_resume_info.return_value = None
+        manifest = SegmentManifest()
+        for i in range(4):
+            manifest.append(f"{segment_server}/ranged.ts", byte_range=(i * 1024, 1024))
+        task = DownloadTask(
+            name="Coalesced Segments",
+            output_file=str(tmp_path / "video.ts"),
+            segment_manifest=manifest
+        )
+        manager.add_task(task)
+
+        try:
+            assert manager.start_task(task.task_id)
+            deadline = time.time() + 10
+            while task.task_id in manager.active_tasks and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            manager.async_engine.shutdown()
+
+        assert task.status == TaskStatus.COMPLETED
+        assert (tmp_path / "video.ts").read_bytes() == body[:4096]
+        assert len(segment_server.state["ranges"]) < 4
@@ -0,0 +1,129 @@
+"""
+Tests for the hierarchical token bucket bandwidth limiter
+"""
+
+import pytest
+import threading
+import time
+from unittest.mock import patch
+
+from src.core.bandwidth_limiter import (
+    BandwidthLimiter, BandwidthLimiterConfig, TokenBucket, bandwidth_limiter
+)
+
+
+class TestTokenBucket:
+    """Test TokenBucket class"""
+
+    def test_unlimited_bucket_never_waits(self) -> None:
+        """Test a zero rate means no limit"""
+        bucket = TokenBucket(0)
+        assert bucket.reserve(10 * 1024 * 1024) == 0.0
+
+    def test_burst_then_debt(self) -> None:
+        """Test the burst is free and further bytes wait at the configured rate"""
+        with patch('src.core.bandwidth_limiter.time.monotonic', return_value=100.0):
+            bucket = TokenBucket(100_000)
+            assert bucket.reserve(100_000) == 0.0
+            assert bucket.reserve(50_000) == pytest.approx(0.5)
+            assert bucket.reserve(50_000) == pytest.approx(1.0)
+
+    def test_refill_over_time(self) -> None:
+        """Test tokens are replenished as time passes"""
+        with patch('src.core.bandwidth_limiter.time.monotonic') as mock_time:
+            mock_time.return_value = 100.0
+            bucket = TokenBucket(100_000)
+            assert bucket.reserve(200_000) == pytest.approx(1.0)
+
+            mock_time.return_value = 102.0
+            assert bucket.reserve(50_000) == 0.0
+
+    def test_set_rate_keeps_debt(self) -> None:
+        """Test changing the rate recomputes waits for existing debt"""
+        with patch('src.core.bandwidth_limiter.time.monotonic', return_value=100.0):
+            bucket = TokenBucket(100_000)
+            bucket.reserve(200_000)
+            bucket.set_rate(200_000)
+            assert bucket.reserve(0) == pytest.approx(0.5)
+
+
+class TestBandwidthLimiter:
+    """Test BandwidthLimiter class"""
+
+    def test_disabled_by_default(self) -> None:
+        """Test no limit means no waiting"""
+        limiter = BandwidthLimiter()
+        assert not limiter.enabled
+        assert limiter.reserve(10 * 1024 * 1024, "task", "https://example.com/a.ts") == 0.0
+
+    def test_strictest_level_wins(self) -> None:
+        """Test a chunk waits for the most constrained of global, task and host"""
+        with patch('src.core.bandwidth_limiter.time.monotonic', return_value=100.0):
+            limiter = BandwidthLimiter(BandwidthLimiterConfig(max_wait=60.0))
+            limiter.set_global_limit(1_000_000)
+            limiter.set_task_limit("slow", 100_000)
+            limiter.set_host_limit("https://cdn.example.com", 200_000)
+
+            assert limiter.reserve(300_000, "slow", "https://cdn.example.com/a.ts") == pytest.approx(2.0)
+            assert limiter.reserve(300_000, "other", "https://cdn.example.com/b.ts") == pytest.approx(2.0)
+            assert limiter.reserve(300_000, "other", "https://other.example.com/c.ts") == 0.0
+
+    def test_limits_reconfigured_and_removed(self) -> None:
+        """Test limits can be changed and removed at runtime"""
+        limiter = BandwidthLimiter()
+        limiter.set_task_limit("task", 100_000)
+        limiter.set_task_limit("task", 300_000)
+        assert limiter.get_stats()["task_limits"] == {"task": 300_000}
+
+        limiter.remove_task("task")
+        limiter.set_host_limit("https://cdn.example.com/seg.ts", 0)
+        assert not limiter.enabled
+
+    def test_wait_is_capped(self) -> None:
+        """Test a single wait never exceeds max_wait"""
+        limiter = BandwidthLimiter(BandwidthLimiterConfig(max_wait=0.5))
+        limiter.set_global_limit(1000)
+        assert limiter.reserve(1_000_000) == pytest.approx(0.5)
+
+    def test_consume_stops_waiting_on_cancel(self) -> None:
+        """Test a canceled download does not sleep out its throttle"""
+        limiter = BandwidthLimiter()
+        limiter.set_global_limit(1000)
+        cancel_event = threading.Event()
+        cancel_event.set()
+
+        start = time.time()
+        limiter.consume(1_000_000, cancel_event=cancel_event)
+        assert time.time() - start < 1.0
+
+    def test_concurrent_consumers_share_budget(self) -> None:
+        """Test parallel downloads together stay near the global rate"""
+        limiter = BandwidthLimiter(BandwidthLimiterConfig(min_burst=1))
+        limiter.set_global_limit(400_000)
+        limiter.global_bucket.tokens = 0
+
+        def download() -> None:
+            for _ in range(10):
+                limiter.consume(10_000)
+
+        threads = [threading.Thread(target=download) for _ in range(4)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        # 400 KB at 400 KB/s takes about one second, not four
+        assert 0.8 < time.time() - start < 2.0
+
+
+class TestGlobalBandwidthLimiter:
+    """Test global bandwidth limiter instance"""
+
+    def test_global_instance_exists(self) -> None:
+        """Test that global instance exists"""
+        assert isinstance(bandwidth_limiter, BandwidthLimiter)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,55 @@
+"""
+Tests for the byte range helpers
+"""
+
+import pytest
+
+from src.core.byte_ranges import (
+    ChunkSplitter, RangeTrimmer, range_header, resume_validator, validator_checksum
+)
+
+
+class TestByteRanges:
+    """Test byte range helpers"""
+
+    def test_range_header_is_inclusive(self) -> None:
+        """Test the Range header covers exactly length bytes"""
+        assert range_header(0, 1) == "bytes=0-0"
+        assert range_header(1000, 500) == "bytes=1000-1499"
+        assert range_header(1000) == "bytes=1000-"
+
+    def test_resume_validator(self) -> None:
+        """Test a strong ETag is preferred and weak ETags are skipped"""
+        last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"
+
+        assert resume_validator({"ETag": '"abc"', "Last-Modified": last_modified}) == '"abc"'
+        assert resume_validator({"ETag": 'W/"abc"', "Last-Modified": last_modified}) == last_modified
+        assert resume_validator({}) is None
+        assert validator_checksum('"abc"') != validator_checksum('"abd"')
+
+    def test_trimmer_skips_and_limits(self) -> None:
+        """Test a full response is trimmed to the requested range"""
+        trimmer = RangeTrimmer(skip=5, length=6)
+        pieces = [trimmer.trim(chunk) for chunk in (b"abc", b"defgh", b"ijklmnop")]
+
+        assert b"".join(pieces) == b"fghijk"
+        assert trimmer.done
+
+    def test_splitter_carries_leftovers(self) -> None:
+        """Test segment boundaries inside chunks are honored"""
+        splitter = ChunkSplitter([b"aaab", b"", b"bbbbc", b"cc"])
+
+        assert b"".join(splitter.take(3)) == b"aaa"
+        assert b"".join(splitter.take(5)) == b"bbbbb"
+        assert b"".join(splitter.take(3)) == b"ccc"
+        assert list(splitter.take(1)) == []
+
+    def test_splitter_stops_at_end_of_stream(self) -> None:
+        """Test a short stream yields what it has"""
+        splitter = ChunkSplitter([b"abc"])
+
+        assert b"".join(splitter.take(10)) == b"abc"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
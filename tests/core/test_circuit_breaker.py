@@ -270,6 +270,24 @@ class TestCircuitBreakerManager:
         assert "circuit_breakers" in stats
         assert "state_summary" in stats
 
+    def test_urls_share_host_breaker(self) -> None:
+        """Test segment URLs on one host feed a single circuit breaker"""
+        manager = CircuitBreakerManager()
+        for i in range(50):
+            manager.record_failure(f"https://cdn.example.com/seg{i}.ts", "timeout")
+
+        assert list(manager.circuit_breakers) == ["https://cdn.example.com"]
+        assert manager.can_execute("https://cdn.example.com/seg99.ts") is False
+
+    def test_max_hosts_bound(self) -> None:
+        """Test least recently used breakers are evicted"""
+        manager = CircuitBreakerManager(max_hosts=3)
+        for i in range(10):
+            manager.record_success(f"https://host{i}.example.com/seg.ts", 1.0)
+
+        assert len(manager.circuit_breakers) == 3
+        assert "https://host9.example.com" in manager.circuit_breakers
+
 
 class TestGlobalCircuitBreakerManager:
     """Test global circuit breaker manager instance"""
@@ -11,10 +11,10 @@ from requests import Session, RequestException
 from urllib.parse import urlparse
 
 from src.core.connection_pool import (
-    ConnectionPoolManager, HostPoolConfig, ConnectionInfo,
-    connection_pool_manager
+    ConnectionPoolManager, HostPoolConfig, ConnectionInfo, HostConnectionSlots,
+    SessionTransport, EnhancedHTTPAdapter, connection_pool_manager
 )
-from src.core.exceptions import NetworkException, ErrorContext
+from src.core.exceptions import NetworkException, ConnectionTimeoutException, ErrorContext
 
 
 class TestHostPoolConfig:
@@ -84,6 +84,67 @@ class TestConnectionInfo:
         assert connection_info.needs_health_check()
 
 
+class TestHostConnectionSlots:
+    """Test HostConnectionSlots semaphore"""
+
+    def test_acquire_up_to_limit(self) -> None:
+        """Test slots are granted until the limit is reached"""
+        slots = HostConnectionSlots(2)
+        assert slots.acquire(timeout=0)
+        assert slots.acquire(timeout=0)
+        assert not slots.acquire(timeout=0.05)
+        assert len(slots.waiters) == 0
+
+        slots.release()
+        assert slots.acquire(timeout=0)
+
+    def test_waiters_served_in_fifo_order(self) -> None:
+        """Test released slots go to the longest waiting caller"""
+        slots = HostConnectionSlots(1)
+        assert slots.acquire()
+        order = []
+
+        def waiter(name: str) -> None:
+            slots.acquire()
+            order.append(name)
+            slots.release()
+
+        threads = []
+        for name in ["first", "second", "third"]:
+            thread = threading.Thread(target=waiter, args=(name,))
+            thread.start()
+            threads.append(thread)
+            while len(slots.waiters) < len(threads):
+                time.sleep(0.01)
+
+        slots.release()
+        for thread in threads:
+            thread.join(5)
+
+        assert order == ["first", "second", "third"]
+        assert slots.in_use == 0
+
+    def test_set_limit_wakes_waiters(self) -> None:
+        """Test raising the limit grants slots to waiting callers"""
+        slots = HostConnectionSlots(1)
+        assert slots.acquire()
+        acquired = threading.Event()
+
+        def waiter() -> None:
+            if slots.acquire(timeout=5):
+                acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        while not slots.waiters:
+            time.sleep(0.01)
+
+        slots.set_limit(2)
+        thread.join(5)
+        assert acquired.is_set()
+        assert slots.in_use == 2
+
+
 class TestConnectionPoolManager:
     """Test ConnectionPoolManager class"""
     
@@ -194,6 +255,40 @@ class TestConnectionPoolManager:
             host = "https://example.com"
             assert host in pool_manager.connection_pools
     
+    def test_sessions_never_shared_at_limit(self, pool_manager) -> None:
+        """Test callers wait for a free slot instead of sharing active sessions"""
+        pool_manager.configure_host(
+            "https://example.com", HostPoolConfig(max_connections_per_host=2))
+        url = "https://example.com/seg.ts"
+
+        lease1 = pool_manager.acquire(url)
+        lease2 = pool_manager.acquire(url)
+        assert lease1.session is not lease2.session
+
+        with pytest.raises(ConnectionTimeoutException):
+            pool_manager.acquire(url, timeout=0.05)
+
+        pool_manager.release(lease1)
+        lease3 = pool_manager.acquire(url, timeout=0)
+        assert lease3.session is lease1.session
+
+        pool_manager.release(lease2)
+        pool_manager.release(lease3)
+        pool_manager.release(lease3)  # Releasing twice is a no-op
+        assert pool_manager.host_slots["https://example.com"].in_use == 0
+        assert pool_manager.leases == {}
+
+    def test_release_session_frees_slot(self, pool_manager) -> None:
+        """Test the session-based API releases the underlying lease"""
+        pool_manager.configure_host(
+            "https://example.com", HostPoolConfig(max_connections_per_host=1))
+        url = "https://example.com/seg.ts"
+
+        session = pool_manager.get_session(url)
+        pool_manager.release_session(session, url, success=True)
+
+        assert pool_manager.get_session(url) is session
+
     def test_start_stop_monitoring(self, pool_manager) -> None:
         """Test starting and stopping monitoring"""
         assert pool_manager.monitoring_active is False
@@ -215,6 +310,76 @@ class TestConnectionPoolManager:
         # Should start with 0 hosts
         assert stats["total_hosts"] == 0
 
+    def test_default_transport_is_http1(self, pool_manager) -> None:
+        """Test sessions use the HTTP/1.1 adapter unless a host selects another transport"""
+        lease = pool_manager.acquire("https://example.com/a.ts")
+
+        assert isinstance(lease.session.get_adapter("https://example.com/a.ts"), EnhancedHTTPAdapter)
+        pool_manager.release(lease)
+        assert pool_manager.get_stats()["hosts"]["https://example.com"]["transport"] == "http1"
+
+    def test_transport_selected_per_host(self, pool_manager) -> None:
+        """Test a host's HostPoolConfig.transport picks the registered transport"""
+        transport = Mock(spec=SessionTransport)
+        transport.name = "custom"
+        transport.create_session.return_value = Mock(spec=Session)
+        pool_manager.register_transport(transport)
+        pool_manager.configure_host("https://multiplexed.example.com",
+                                    HostPoolConfig(transport="custom"))
+
+        lease = pool_manager.acquire("https://multiplexed.example.com/a.ts")
+        other = pool_manager.acquire("https://example.com/a.ts")
+
+        assert lease.session is transport.create_session.return_value
+        assert transport.create_session.call_count == 1
+        assert other.session is not lease.session
+        pool_manager.release(lease)
+        pool_manager.release(other)
+        pool_manager.cleanup_all_connections()
+        transport.close.assert_called()
+
+    def test_prewarm_opens_connections(self, pool_manager) -> None:
+        """Test pre-warming opens distinct connections once and then reuses them"""
+        with patch('requests.Session.head') as mock_head:
+            assert pool_manager.prewarm("https://example.com/seg0.ts", 3) == 3
+            assert pool_manager.prewarm("https://example.com/seg0.ts", 3) == 0
+
+        assert mock_head.call_count == 3
+        assert len(pool_manager.connection_pools["https://example.com"]) == 3
+        assert pool_manager.host_slots["https://example.com"].in_use == 0
+
+    def test_prewarm_failure_not_pooled(self, pool_manager) -> None:
+        """Test connections that fail to pre-warm are closed"""
+        with patch('requests.Session.head', side_effect=requests.exceptions.ConnectionError()):
+            assert pool_manager.prewarm("https://example.com/seg0.ts", 2) == 0
+
+        assert pool_manager.connection_pools["https://example.com"] == []
+        assert pool_manager.host_slots["https://example.com"].in_use == 0
+
+    def test_dns_invalidated_only_on_connection_errors(self, pool_manager) -> None:
+        """Test cached DNS results survive HTTP failures but not connection errors"""
+        with patch('src.core.connection_pool.dns_cache') as mock_dns:
+            lease = pool_manager.acquire("https://example.com/a.ts")
+            pool_manager.release(lease, success=False)
+            lease = pool_manager.acquire("https://example.com/a.ts")
+            pool_manager.release(lease, success=False, error=requests.exceptions.ReadTimeout())
+            mock_dns.invalidate.assert_not_called()
+
+            lease = pool_manager.acquire("https://example.com/a.ts")
+            pool_manager.release(lease, success=False, error=requests.exceptions.ConnectionError())
+            mock_dns.invalidate.assert_called_once_with("example.com")
+
+    def test_http2_falls_back_without_httpx(self, pool_manager) -> None:
+        """Test the HTTP/2 transport falls back to HTTP/1.1 when httpx is missing"""
+        pool_manager.configure_host("https://example.com", HostPoolConfig(transport="http2"))
+
+        with patch('src.core.http2_transport.HTTPX_AVAILABLE', False):
+            lease = pool_manager.acquire("https://example.com/a.ts")
+
+        assert isinstance(lease.session.get_adapter("https://example.com/a.ts"), EnhancedHTTPAdapter)
+        assert pool_manager.transports["http2"] is pool_manager.transports["http1"]
+        pool_manager.release(lease)
+
 
 class TestGlobalConnectionPoolManager:
     """Test global connection pool manager instance"""
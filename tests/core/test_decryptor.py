@@ -1,8 +1,9 @@
 import pytest
 from unittest.mock import patch, Mock
 import os
-from src.core.decryptor import decrypt_data
+from src.core.decryptor import block_boundary, decrypt_data, derive_iv, SegmentDecryptor
 from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
 
 
 class TestDecryptor:
@@ -176,6 +177,68 @@ class TestDecryptor:
         assert decrypted_data == plaintext
 
 
+class TestSegmentDecryptor:
+    """测试流式分段解密器的测试套件。"""
+
+    def setup_method(self) -> None:
+        """设置测试装置。"""
+        self.key = bytes(range(16))
+        self.iv = derive_iv(None, 42)
+
+    def _decrypt_in_chunks(self, ciphertext: bytes, chunk_size: int) -> bytes:
+        decryptor = SegmentDecryptor(self.key, self.iv)
+        output = bytearray()
+        for offset in range(0, len(ciphertext), chunk_size):
+            output += decryptor.update(ciphertext[offset:offset + chunk_size])
+        output += decryptor.finalize()
+        return bytes(output)
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 16, 33, 8192])
+    def test_unaligned_chunks(self, chunk_size: int) -> None:
+        """测试任意块大小下 CBC 状态跨块保持且去除 PKCS7 填充。"""
+        plaintext = os.urandom(1000)
+        ciphertext = AES.new(self.key, AES.MODE_CBC, self.iv).encrypt(pad(plaintext, 16))
+
+        assert self._decrypt_in_chunks(ciphertext, chunk_size) == plaintext
+
+    def test_truncated_segment(self) -> None:
+        """测试截断的密文在结束时报错。"""
+        ciphertext = AES.new(self.key, AES.MODE_CBC, self.iv).encrypt(pad(b"data", 16))
+
+        decryptor = SegmentDecryptor(self.key, self.iv)
+        decryptor.update(ciphertext[:-3])
+        with pytest.raises(ValueError):
+            decryptor.finalize()
+
+    @pytest.mark.parametrize("chunk_size", [5, 16, 8192])
+    def test_resume_at_block_boundary(self, chunk_size: int) -> None:
+        """测试从块边界续传时以前一个密文块作为 IV 继续解密。"""
+        plaintext = os.urandom(1000)
+        ciphertext = AES.new(self.key, AES.MODE_CBC, self.iv).encrypt(pad(plaintext, 16))
+        offset = block_boundary(517)
+
+        decryptor = SegmentDecryptor(self.key)
+        output = bytearray()
+        resumed = ciphertext[offset - 16:]
+        for start in range(0, len(resumed), chunk_size):
+            output += decryptor.update(resumed[start:start + chunk_size])
+        output += decryptor.finalize()
+
+        assert offset == 512
+        assert bytes(output) == plaintext[offset:]
+
+    def test_invalid_key_size(self) -> None:
+        """测试无效密钥长度被拒绝。"""
+        with pytest.raises(ValueError):
+            SegmentDecryptor(b"short", self.iv)
+
+    def test_derive_iv(self) -> None:
+        """测试从 IV 属性或媒体序列号推导 IV。"""
+        assert derive_iv("0x000102030405060708090A0B0C0D0E0F", 5) == bytes(range(16))
+        assert derive_iv("0x1", 5) == b"\x00" * 15 + b"\x01"
+        assert derive_iv(None, 258) == b"\x00" * 14 + b"\x01\x02"
+
+
 # 如果直接执行文件，则运行测试
 if __name__ == "__main__":
     pytest.main(["-v", __file__])
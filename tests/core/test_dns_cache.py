@@ -0,0 +1,73 @@
+"""
+Tests for the process-wide DNS cache
+"""
+
+import socket
+import pytest
+from unittest.mock import Mock, patch
+
+from src.core.dns_cache import DNSCache
+
+
+ADDRESSES = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("203.0.113.7", 443))]
+
+
+@pytest.fixture
+def cache() -> DNSCache:
+    """Create a cache in front of a fake resolver"""
+    dns = DNSCache(ttl=60.0, max_entries=2)
+    dns._resolver = Mock(return_value=ADDRESSES)
+    return dns
+
+
+class TestDNSCache:
+    """Test DNSCache class"""
+
+    def test_lookups_cached_until_ttl(self, cache) -> None:
+        """Test repeated lookups are answered from the cache until they expire"""
+        with patch('src.core.dns_cache.time.monotonic', return_value=100.0):
+            assert cache.resolve("CDN.example.com", 443) == ADDRESSES
+            assert cache.resolve("cdn.example.com", 443) == ADDRESSES
+        assert cache._resolver.call_count == 1
+
+        with patch('src.core.dns_cache.time.monotonic', return_value=161.0):
+            cache.resolve("cdn.example.com", 443)
+        assert cache._resolver.call_count == 2
+        assert cache.get_stats()["hits"] == 1
+
+    def test_invalidate_and_eviction(self, cache) -> None:
+        """Test invalidated and least recently used hosts are resolved again"""
+        cache.resolve("a.example.com", 443)
+        cache.resolve("b.example.com", 443)
+        cache.invalidate("a.example.com")
+        cache.resolve("a.example.com", 443)
+        cache.resolve("c.example.com", 443)
+
+        assert cache._resolver.call_count == 4
+        assert len(cache.entries) == 2
+        assert ("b.example.com", 443, 0, 0, 0, 0) not in cache.entries
+
+    def test_disabled(self, cache) -> None:
+        """Test a zero TTL passes every lookup through"""
+        cache.set_ttl(0)
+        cache.resolve("cdn.example.com", 443)
+        cache.resolve("cdn.example.com", 443)
+
+        assert cache._resolver.call_count == 2
+        assert cache.entries == {}
+
+    def test_install_wraps_getaddrinfo(self) -> None:
+        """Test installing routes socket.getaddrinfo through the cache and back"""
+        original = socket.getaddrinfo
+        dns = DNSCache()
+        try:
+            dns.install()
+            assert socket.getaddrinfo == dns.resolve
+            assert dns._resolver is original
+        finally:
+            dns.uninstall()
+        assert socket.getaddrinfo is original
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
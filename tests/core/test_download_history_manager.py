@@ -182,9 +182,8 @@ class TestDownloadHistoryManager:
         """Clean up after tests."""
         # Close any open connections and remove temporary database
         if hasattr(self, 'manager') and self.manager:
-            # Close any open database connections
-            if hasattr(self.manager, '_connection') and self.manager._connection:
-                self.manager._connection.close()
+            # Write queued entries and close the database connection
+            self.manager.close()
 
         # Remove temporary database file
         if hasattr(self, 'temp_db') and os.path.exists(self.temp_db.name):
@@ -212,12 +211,17 @@ class TestDownloadHistoryManager:
         assert os.path.exists(self.temp_db.name)
         
         # Check if tables exist
-        with sqlite3.connect(self.temp_db.name) as conn:
+        conn = sqlite3.connect(self.temp_db.name)
+        try:
             cursor = conn.execute("""
                 SELECT name FROM sqlite_master 
                 WHERE type='table' AND name='download_history'
             """)
             assert cursor.fetchone() is not None
+            # The database is kept in WAL mode
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        finally:
+            conn.close()
 
     def test_add_entry(self) -> None:
         """Test adding history entry."""
@@ -368,6 +372,168 @@ class TestDownloadHistoryManager:
         retrieved = self.manager.get_entry("test_entry")
         assert retrieved.task_name == "Updated Task"
 
+    def test_update_nonexistent_entry(self) -> None:
+        """Test updating an entry that was never added."""
+        entry = DownloadHistoryEntry(
+            entry_id="missing", task_name="Missing Task", original_url="url",
+            output_file="file", file_size=1000, status=HistoryEntryStatus.COMPLETED,
+            start_time=0, end_time=1, duration=1, average_speed=1000, peak_speed=1500,
+            segments_total=100, segments_completed=100, retry_count=0
+        )
+
+        assert self.manager.update_entry(entry) is False
+
+    def test_writes_batched_in_background(self) -> None:
+        """Test queued entries are committed together by the writer thread."""
+        manager = DownloadHistoryManager(db_path=self.temp_db.name, flush_interval=0.05)
+        for i in range(20):
+            manager.add_entry(DownloadHistoryEntry(
+                entry_id=f"entry_{i}", task_name=f"Task {i}", original_url="url",
+                output_file="file", file_size=1000, status=HistoryEntryStatus.COMPLETED,
+                start_time=i, end_time=i + 1, duration=1, average_speed=1000, peak_speed=1500,
+                segments_total=100, segments_completed=100, retry_count=0
+            ))
+
+        deadline = time.time() + 5
+        while manager._writer_thread is not None and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert manager._writer_thread is None
+        assert manager._pending == []
+        # Visible to another connection without an explicit flush
+        conn = sqlite3.connect(self.temp_db.name)
+        try:
+            assert conn.execute("SELECT COUNT(*) FROM download_history").fetchone()[0] == 20
+        finally:
+            conn.close()
+        manager.close()
+
+    def test_reads_see_queued_writes(self) -> None:
+        """Test reads write the queue out first."""
+        manager = DownloadHistoryManager(db_path=self.temp_db.name, flush_interval=60)
+        entry = DownloadHistoryEntry(
+            entry_id="queued", task_name="Queued Task", original_url="url",
+            output_file="file", file_size=1000, status=HistoryEntryStatus.COMPLETED,
+            start_time=0, end_time=1, duration=1, average_speed=1000, peak_speed=1500,
+            segments_total=100, segments_completed=100, retry_count=0
+        )
+        manager.add_entry(entry)
+        entry.task_name = "Updated Task"
+        manager.update_entry(entry)
+
+        assert len(manager._pending) == 2
+        assert manager.get_entry("queued").task_name == "Updated Task"
+        assert manager._pending == []
+        manager.close()
+
+    def test_close_writes_queue(self) -> None:
+        """Test closing commits queued entries and rejects new ones."""
+        manager = DownloadHistoryManager(db_path=self.temp_db.name, flush_interval=60)
+        entry = DownloadHistoryEntry(
+            entry_id="last", task_name="Last Task", original_url="url",
+            output_file="file", file_size=1000, status=HistoryEntryStatus.COMPLETED,
+            start_time=0, end_time=1, duration=1, average_speed=1000, peak_speed=1500,
+            segments_total=100, segments_completed=100, retry_count=0
+        )
+        manager.add_entry(entry)
+
+        manager.close()
+
+        assert self.manager.get_entry("last") is not None
+        assert manager.add_entry(entry) is False
+
+    def test_failed_write_kept_for_retry(self) -> None:
+        """Test a batch that fails to commit is queued again and written later."""
+        manager = DownloadHistoryManager(db_path=self.temp_db.name, flush_interval=60)
+        entry = DownloadHistoryEntry(
+            entry_id="retried", task_name="Retried Task", original_url="url",
+            output_file="file", file_size=1000, status=HistoryEntryStatus.COMPLETED,
+            start_time=0, end_time=1, duration=1, average_speed=1000, peak_speed=1500,
+            segments_total=100, segments_completed=100, retry_count=0
+        )
+        manager.add_entry(entry)
+        connection = manager._connection
+        manager._connection = MagicMock()
+        manager._connection.__enter__.side_effect = sqlite3.OperationalError("database is locked")
+
+        assert manager.flush() == 0
+        assert len(manager._pending) == 1
+        assert "retried" in manager._pending_ids
+
+        manager._connection = connection
+        assert manager.flush() == 1
+        assert manager.get_entry("retried") is not None
+        manager.close()
+
+    def test_failed_statement_dropped_from_batch(self) -> None:
+        """Test a batch failing with a non-transient error is written one statement at a time."""
+        manager = DownloadHistoryManager(db_path=self.temp_db.name, flush_interval=60)
+        for entry_id in ("first", "second"):
+            manager.add_entry(DownloadHistoryEntry(
+                entry_id=entry_id, task_name="Task", original_url="url",
+                output_file="file", file_size=1000, status=HistoryEntryStatus.COMPLETED,
+                start_time=0, end_time=1, duration=1, average_speed=1000, peak_speed=1500,
+                segments_total=100, segments_completed=100, retry_count=0
+            ))
+        # An entry without a task name violates its NOT NULL constraint
+        statement, params = manager._pending[0][1:]
+        manager._enqueue("broken", statement, ("broken", None) + params[2:])
+
+        assert manager.flush() == 2
+        assert manager._pending == []
+        assert manager.get_entry("first") is not None
+        assert manager.get_entry("second") is not None
+        assert manager.get_entry("broken") is None
+        manager.close()
+
+    def test_failed_write_retries_capped(self) -> None:
+        """Test a batch is written one statement at a time once its retries are used up."""
+        manager = DownloadHistoryManager(db_path=self.temp_db.name, flush_interval=60,
+                                         max_retries=2)
+        manager.add_entry(DownloadHistoryEntry(
+            entry_id="stuck", task_name="Stuck Task", original_url="url",
+            output_file="file", file_size=1000, status=HistoryEntryStatus.COMPLETED,
+            start_time=0, end_time=1, duration=1, average_speed=1000, peak_speed=1500,
+            segments_total=100, segments_completed=100, retry_count=0
+        ))
+        connection = manager._connection
+        failing = MagicMock()
+        failing.__enter__.side_effect = sqlite3.OperationalError("database is locked")
+        manager._connection = failing
+
+        try:
+            assert manager.flush() == 0
+            assert manager.flush() == 0
+            assert len(manager._pending) == 1
+            assert manager.flush() == 0
+            assert manager._pending == []
+        finally:
+            manager._connection = connection
+        manager.close()
+
+    def test_close_survives_failed_write(self) -> None:
+        """Test closing still closes the database when the last writes fail."""
+        manager = DownloadHistoryManager(db_path=self.temp_db.name, flush_interval=60)
+        manager.add_entry(DownloadHistoryEntry(
+            entry_id="lost", task_name="Lost Task", original_url="url",
+            output_file="file", file_size=1000, status=HistoryEntryStatus.COMPLETED,
+            start_time=0, end_time=1, duration=1, average_speed=1000, peak_speed=1500,
+            segments_total=100, segments_completed=100, retry_count=0
+        ))
+        connection = manager._connection
+        failing = MagicMock()
+        failing.__enter__.side_effect = sqlite3.OperationalError("disk I/O error")
+        manager._connection = failing
+
+        try:
+            manager.close()
+        finally:
+            connection.close()
+
+        failing.close.assert_called_once()
+        assert manager._pending == []
+        assert manager._writer_thread is None
+
     def test_delete_entry(self) -> None:
         """Test deleting entry."""
         entry = DownloadHistoryEntry(
@@ -3,7 +3,9 @@ import time
 import threading
 import tempfile
 import os
+import json
 import uuid
+import requests
 from unittest.mock import patch, Mock, MagicMock, mock_open
 from queue import PriorityQueue, Queue, Empty
 from typing import Dict, List, Optional, Any
@@ -15,6 +17,10 @@ from src.core.downloader import (
 from src.core.exceptions import (
     VidTaniumException, NetworkException, FilesystemException
 )
+from src.core.segment_manifest import SegmentInit, SegmentManifest
+from src.core.renditions import MediaRendition
+from src.core.resume_journal import file_crc32
+from src.core.resume_store import ResumeStore
 
 
 class MockSettings:
@@ -176,49 +182,70 @@ class TestDownloadTask:
         task.segments = 0
         assert task.get_progress_percentage() == 0.0
 
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('json.dump')
-    def test_save_progress(self, mock_json_dump, mock_file) -> None:
+    def test_save_progress(self, tmp_path) -> None:
         """Test progress saving."""
+        store = ResumeStore(str(tmp_path / "resume"))
         task = DownloadTask(
             task_id="test_task",
-            output_file="/downloads/video.mp4"
+            output_file="/downloads/video.mp4",
+            store=store
         )
-        task.progress["completed"] = 25
-        
+        task.record_segment(0, 100)
+
         task.save_progress()
-        
-        # Verify file operations
-        mock_file.assert_called()
-        mock_json_dump.assert_called_once()
 
-    @patch('builtins.open', new_callable=mock_open, read_data='{"completed": 25, "total": 100}')
-    @patch('json.load')
-    @patch('os.path.exists')
-    def test_load_progress(self, mock_exists, mock_json_load, mock_file) -> None:
+        journal = ResumeStore(str(tmp_path / "resume")).get("test_task")
+        assert journal is not None
+        assert journal.metadata["output_file"] == "/downloads/video.mp4"
+        assert list(journal.completed()) == [0]
+
+    def test_load_progress(self, tmp_path) -> None:
         """Test progress loading."""
-        mock_exists.return_value = True
-        mock_json_load.return_value = {"completed": 25, "total": 100}
-        
-        task = DownloadTask(
-            task_id="test_task",
-            output_file="/downloads/video.mp4"
-        )
-        
-        task.load_progress()
-        
-        mock_file.assert_called()
-        mock_json_load.assert_called_once()
+        store = ResumeStore(str(tmp_path / "resume"))
+        task = DownloadTask(task_id="test_task", name="Saved",
+                            output_file=str(tmp_path / "video.mp4"), segments=3, store=store)
+        task.record_segment(0, 100, mtime_ns=1_000_000_000)
+        task.record_segment(2, 300)
+        task.status = TaskStatus.PAUSED
+        task.save_progress()
+        task.close_journal()
 
-    @patch('os.path.exists')
-    def test_load_progress_no_file(self, mock_exists) -> None:
-        """Test progress loading when file doesn't exist."""
-        mock_exists.return_value = False
-        
-        task = DownloadTask()
-        
-        # Should not raise exception
-        task.load_progress()
+        restored = DownloadTask(task_id="test_task", output_file=str(tmp_path / "video.mp4"),
+                                segments=3, store=ResumeStore(str(tmp_path / "resume")))
+
+        assert restored.load_progress()
+        assert restored.name == "Saved"
+        assert restored.status == TaskStatus.PAUSED
+        assert restored.progress["completed"] == 2
+        assert restored.progress["downloaded_bytes"] == 400
+        assert set(restored.segments_info) == {"0", "2"}
+        assert restored.segments_info["0"] == {
+            "status": "completed", "size": 100, "timestamp": 1.0}
+
+        restored.delete_progress()
+        assert not restored.store.exists("test_task")
+
+    def test_load_progress_no_file(self, tmp_path) -> None:
+        """Test progress loading when there is no saved progress."""
+        task = DownloadTask(output_file=str(tmp_path / "video.mp4"),
+                            store=ResumeStore(str(tmp_path / "resume")))
+
+        assert not task.load_progress()
+        assert not DownloadTask().load_progress()
+
+    def test_load_legacy_progress_file(self, tmp_path) -> None:
+        """Test segments of a JSON progress file are moved into the resume store."""
+        output_file = str(tmp_path / "video.mp4")
+        with open(f"{output_file}.progress", "w", encoding="utf-8") as f:
+            json.dump({"task_id": "test_task", "name": "Old", "status": "paused",
+                       "segments_info": {"1": {"status": "completed", "size": 50}}}, f)
+        task = DownloadTask(task_id="test_task", output_file=output_file,
+                            store=ResumeStore(str(tmp_path / "resume")))
+
+        assert task.load_progress()
+        assert task.name == "Old"
+        assert set(task.segments_info) == {"1"}
+        assert not os.path.exists(f"{output_file}.progress")
 
 
 class TestDownloadManager:
@@ -244,6 +271,33 @@ class TestDownloadManager:
         assert self.manager.scheduler_thread is None
         assert self.manager.bandwidth_limit == 0
 
+    def test_dns_cache_installed_only_when_enabled(self) -> None:
+        """Test the process-wide DNS cache is opt-in."""
+        import socket
+        from src.core.dns_cache import dns_cache
+
+        assert socket.getaddrinfo != dns_cache.resolve
+
+        settings = MockSettings()
+        settings.settings["network"] = {"dns_cache_enabled": True}
+        try:
+            DownloadManager(settings=settings)
+            assert socket.getaddrinfo == dns_cache.resolve
+        finally:
+            dns_cache.uninstall()
+        assert socket.getaddrinfo != dns_cache.resolve
+
+    def test_http2_hosts_configured_per_host(self) -> None:
+        """Test hosts listed in http2_hosts use the HTTP/2 transport."""
+        settings = MockSettings()
+        settings.settings["download"]["http2_hosts"] = ["CDN.example.com"]
+        manager = DownloadManager(settings=settings)
+
+        config = manager.connection_pool.host_configs["https://cdn.example.com"]
+        assert config.transport == "http2"
+        assert config.max_connections_per_host == manager.default_pool_config.max_connections_per_host
+        assert manager.default_pool_config.transport == "http1"
+
     def test_manager_start(self) -> None:
         """Test starting download manager."""
         self.manager.start()
@@ -470,6 +524,985 @@ class TestDownloadManager:
         assert len(self.manager.active_tasks) <= 3
 
 
+class TestSegmentWorkerPool:
+    """Test suite for parallel per-task segment fetching."""
+
+    def setup_method(self) -> None:
+        """Set up test fixtures."""
+        settings_dict = MockSettings().settings
+        settings_dict["download"]["segment_workers"] = 3
+        settings_dict["download"]["retry_delay"] = 0
+        # Merge after the download so tests can inspect the files handed to merge_files
+        settings_dict["download"]["merge_mode"] = "concat"
+        self.manager = DownloadManager(settings=MockSettings(settings_dict))
+        self.manager.recovery_manager = Mock()
+        self.manager.segment_validator = Mock()
+        self.manager.segment_validator.validate_segment.return_value = Mock(
+            is_valid=Mock(return_value=True), has_warnings=Mock(return_value=False))
+
+        self.active = 0
+        self.max_active = 0
+        self.active_lock = threading.Lock()
+
+        def fake_get(url: str, **kwargs: Any) -> Mock:
+            with self.active_lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            # Later segments finish first to force out-of-order completion
+            index = int(url.rsplit("index", 1)[1].split(".")[0])
+            time.sleep(0.05 * (6 - index))
+            with self.active_lock:
+                self.active -= 1
+            response = Mock()
+            response.status_code = 200
+            response.headers = {"content-length": "6"}
+            response.iter_content.return_value = [f"seg{index:03d}".encode()]
+            return response
+
+        session = Mock()
+        session.get.side_effect = fake_get
+        self.manager.connection_pool = Mock()
+        self.manager.connection_pool.acquire.return_value.session = session
+
+    def test_get_segment_workers_capped_by_host_limit(self) -> None:
+        """Segment workers never exceed the per-host connection budget."""
+        assert self.manager._get_segment_workers() == 3
+        self.manager.default_pool_config.max_connections_per_host = 2
+        assert self.manager._get_segment_workers() == 2
+
+    @patch('src.core.merger.merge_files')
+    def test_segments_downloaded_in_parallel_and_merged_in_order(self, mock_merge, tmp_path) -> None:
+        """Segments complete out of order but are merged in index order."""
+        mock_merge.return_value = {"success": True}
+        task = DownloadTask(
+            name="Parallel Task",
+            base_url="https://example.com/stream",
+            segments=6,
+            output_file=str(tmp_path / "video.mp4")
+        )
+        self.manager.add_task(task)
+
+        self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        assert self.max_active > 1
+        assert task.progress["completed"] == 6
+        # The resume state is deleted once the task is complete
+        assert task.segments_info == {}
+        merged_files = mock_merge.call_args[0][0]
+        assert [os.path.basename(f) for f in merged_files] == [
+            f"segment_{i}.ts" for i in range(6)]
+
+    @patch('src.core.merger.merge_files')
+    def test_segments_fetched_from_manifest_urls(self, mock_merge, tmp_path) -> None:
+        """Segment URLs come from the parsed manifest, not the base URL."""
+        mock_merge.return_value = {"success": True}
+        urls = [f"https://cdn.example.com/hls/720p/chunk-index{i}.ts?token=abc"
+                for i in range(3)]
+        task = DownloadTask(
+            name="Manifest Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=SegmentManifest.from_urls(urls)
+        )
+        self.manager.add_task(task)
+
+        self.manager._task_worker(task.task_id)
+
+        session = self.manager.connection_pool.acquire.return_value.session
+        requested = sorted(c.args[0] for c in session.get.call_args_list)
+        assert task.status == TaskStatus.COMPLETED
+        assert task.segments == 3
+        assert requested == urls
+
+    @patch('src.core.merger.merge_files')
+    def test_resumed_segments_verified_before_merge(self, mock_merge, tmp_path) -> None:
+        """Resumed segments are kept by size and mtime and their checksums checked before merging."""
+        mock_merge.return_value = {"success": True}
+        temp_dir = tmp_path / "video.mp4_temp"
+        temp_dir.mkdir()
+        task = DownloadTask(
+            name="Resumed Task",
+            base_url="https://example.com/stream",
+            segments=6,
+            output_file=str(tmp_path / "video.mp4")
+        )
+        for i in (0, 1):
+            path = temp_dir / f"segment_{i}.ts"
+            path.write_bytes(f"seg{i:03d}".encode())
+            stat = path.stat()
+            task.record_segment(i, stat.st_size, stat.st_mtime_ns, file_crc32(str(path)))
+        # Same size and mtime, different content: only the checksum notices
+        corrupted = temp_dir / "segment_1.ts"
+        mtime_ns = corrupted.stat().st_mtime_ns
+        corrupted.write_bytes(b"xxxxxx")
+        os.utime(corrupted, ns=(mtime_ns, mtime_ns))
+        self.manager.add_task(task)
+
+        self.manager._task_worker(task.task_id)
+
+        session = self.manager.connection_pool.acquire.return_value.session
+        requested = sorted(int(c.args[0].rsplit("index", 1)[1].split(".")[0])
+                           for c in session.get.call_args_list)
+        assert task.status == TaskStatus.COMPLETED
+        assert requested == [1, 2, 3, 4, 5]
+        assert len(mock_merge.call_args[0][0]) == 6
+        assert task.progress["completed"] == 6
+        # Nothing is left to resume
+        assert not task.store.exists(task.task_id)
+
+    def test_interrupted_tasks_queued_again(self, tmp_path) -> None:
+        """Tasks left running in the resume store are restored and queued."""
+        urls = [f"https://cdn.example.com/hls/index{i}.ts" for i in range(3)]
+        task = DownloadTask(
+            task_id="interrupted",
+            name="Interrupted Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=SegmentManifest.from_urls(urls),
+            priority=TaskPriority.HIGH
+        )
+        segment_dir = tmp_path / "video.mp4_temp"
+        segment_dir.mkdir()
+        segment = segment_dir / "segment_0.ts"
+        segment.write_bytes(b"seg000")
+        task.record_segment(0, 6, segment.stat().st_mtime_ns)
+        task.status = TaskStatus.RUNNING
+        task.save_progress()
+        task.save_manifest()
+        task.close_journal()
+
+        assert self.manager.resume_interrupted_tasks() == ["interrupted"]
+
+        restored = self.manager.tasks["interrupted"]
+        assert restored.name == "Interrupted Task"
+        assert restored.priority == TaskPriority.HIGH
+        assert restored.status == TaskStatus.PENDING
+        assert restored.segment_manifest.url(2) == urls[2]
+        assert restored.progress["completed"] == 1
+        assert self.manager.resume_interrupted_tasks() == []
+
+    def test_stopped_tasks_resumed_by_next_manager(self, tmp_path) -> None:
+        """Tasks running when the manager stops are queued again by the next one."""
+        store = ResumeStore(str(tmp_path / "resume"))
+        urls = [f"https://cdn.example.com/hls/index{i}.ts" for i in range(3)]
+        task = DownloadTask(
+            task_id="stopped",
+            name="Stopped Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=SegmentManifest.from_urls(urls),
+            store=store
+        )
+        task.save_manifest()
+        self.manager.resume_store = store
+        self.manager.start()
+        task.status = TaskStatus.RUNNING
+        self.manager.tasks[task.task_id] = task
+        self.manager.active_tasks.add(task.task_id)
+
+        self.manager.stop()
+        store.close(task.task_id)
+
+        assert task.status == TaskStatus.PAUSED
+        next_manager = DownloadManager(settings=MockSettings())
+        next_manager.resume_store = ResumeStore(str(tmp_path / "resume"))
+        assert next_manager.resume_interrupted_tasks() == ["stopped"]
+        assert next_manager.tasks["stopped"].status == TaskStatus.PENDING
+
+    def test_prewarm_started_for_segment_host(self) -> None:
+        """Connections to the first segment's host are pre-warmed in the background."""
+        task = DownloadTask(
+            name="Prewarm Task",
+            output_file="video.mp4",
+            segment_manifest=SegmentManifest.from_urls(
+                [f"https://cdn.example.com/hls/index{i}.ts" for i in range(3)])
+        )
+
+        self.manager._start_prewarm(task)
+
+        deadline = time.time() + 2
+        while not self.manager.connection_pool.prewarm.called and time.time() < deadline:
+            time.sleep(0.01)
+        self.manager.connection_pool.prewarm.assert_called_once_with(
+            "https://cdn.example.com/hls/index0.ts", 2)
+
+    @patch('src.core.merger.mux_renditions')
+    @patch('src.core.merger.merge_files')
+    def test_renditions_downloaded_and_muxed(self, mock_merge, mock_mux, tmp_path) -> None:
+        """Audio renditions download alongside the video and are muxed after the merge."""
+        mock_merge.return_value = {"success": True}
+        mock_mux.return_value = {"success": True, "sidecars": []}
+        audio = MediaRendition(
+            type="audio", group_id="aac", name="English", language="en",
+            url="https://cdn.example.com/audio/en.m3u8",
+            manifest=SegmentManifest.from_urls(
+                [f"https://cdn.example.com/audio/index{i}.aac" for i in range(3)]))
+        task = DownloadTask(
+            name="Rendition Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=SegmentManifest.from_urls(
+                [f"https://cdn.example.com/video/index{i}.ts" for i in range(3)]),
+            renditions=[audio]
+        )
+        self.manager.add_task(task)
+        self.manager._task_worker(task.task_id)
+
+        session = self.manager.connection_pool.acquire.return_value.session
+        requested = [c.args[0] for c in session.get.call_args_list]
+        assert task.status == TaskStatus.COMPLETED
+        assert sum("/audio/" in url for url in requested) == 3
+        assert task.progress["completed"] == 3
+
+        output, renditions, _ = mock_mux.call_args[0]
+        assert output == task.output_file
+        assert [(r["type"], r["language"], r["name"]) for r in renditions] == [("audio", "en", "English")]
+        assert os.path.basename(renditions[0]["path"]) == "audio_0.ts"
+
+    def test_renditions_stopped_and_joined_when_video_fails(self, tmp_path) -> None:
+        """A failing video stops its rendition downloads and waits for them to exit."""
+        audio = MediaRendition(
+            type="audio", group_id="aac", name="English", language="en",
+            url="https://cdn.example.com/audio/en.m3u8",
+            manifest=SegmentManifest.from_urls(["https://cdn.example.com/audio/index0.aac"]))
+        task = DownloadTask(
+            name="Failing Rendition Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=SegmentManifest.from_urls(["https://cdn.example.com/video/index0.ts"]),
+            renditions=[audio]
+        )
+        exited = threading.Event()
+
+        def download_rendition(task, rendition, index, options, workers):
+            task.rendition_stop_event.wait(5)
+            exited.set()
+            return None
+
+        self.manager.add_task(task)
+        with patch.object(self.manager, '_download_rendition', side_effect=download_rendition), \
+                patch.object(self.manager, '_run_segment_pool', side_effect=RuntimeError("boom")):
+            self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.FAILED
+        assert task.rendition_stop_event.is_set()
+        assert exited.is_set()
+
+    def _ranged_manifest(self, lengths: List[int]) -> SegmentManifest:
+        manifest = SegmentManifest("https://cdn.example.com/vod/")
+        offset = 0
+        for length in lengths:
+            manifest.append("https://cdn.example.com/vod/all.mp4", 4.0, byte_range=(offset, length))
+            offset += length
+        return manifest
+
+    def _serve_resource(self, resource: bytes, honor_range: bool = True) -> List[str]:
+        """Serve resource from the mocked session, recording Range headers."""
+        requested: List[str] = []
+
+        def fake_get(url: str, headers: Dict[str, str], **kwargs: Any) -> Mock:
+            requested.append(headers.get("Range", ""))
+            data = resource
+            response = Mock()
+            response.status_code = 200
+            if honor_range and "Range" in headers:
+                start, end = map(int, headers["Range"][6:].split("-"))
+                data = resource[start:end + 1]
+                response.status_code = 206
+            response.headers = {"content-length": str(len(data))}
+            response.iter_content.return_value = [data[j:j + 7] for j in range(0, len(data), 7)]
+            return response
+
+        self.manager.connection_pool.acquire.return_value.session.get.side_effect = fake_get
+        return requested
+
+    def _merged_contents(self, mock_merge: Mock) -> List[bytes]:
+        merged: List[bytes] = []
+
+        def fake_merge(files: List[str], output_file: str, settings: Any, **kwargs: Any) -> Dict[str, Any]:
+            for path in files:
+                with open(path, "rb") as f:
+                    merged.append(f.read())
+            return {"success": True}
+
+        mock_merge.side_effect = fake_merge
+        return merged
+
+    @patch('src.core.merger.merge_files')
+    def test_adjacent_byte_ranges_coalesced(self, mock_merge, tmp_path) -> None:
+        """Contiguous byte-range segments are fetched with one Range request and split."""
+        lengths = [10, 20, 15, 5]
+        resource = os.urandom(sum(lengths))
+        requested = self._serve_resource(resource)
+        merged = self._merged_contents(mock_merge)
+        task = DownloadTask(
+            name="Range Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=self._ranged_manifest(lengths)
+        )
+        self.manager.add_task(task)
+
+        with patch.object(self.manager, '_get_segment_workers', return_value=1):
+            self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        assert requested == ["bytes=0-49"]
+        assert b"".join(merged) == resource
+        assert [len(m) for m in merged] == lengths
+
+    @patch('src.core.merger.merge_files')
+    def test_byte_ranges_fall_back_when_range_ignored(self, mock_merge, tmp_path) -> None:
+        """A server answering 200 to a coalesced request gets per-segment requests."""
+        lengths = [10, 20, 15]
+        resource = os.urandom(sum(lengths))
+        requested = self._serve_resource(resource, honor_range=False)
+        merged = self._merged_contents(mock_merge)
+        task = DownloadTask(
+            name="Range Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=self._ranged_manifest(lengths)
+        )
+        self.manager.add_task(task)
+
+        with patch.object(self.manager, '_get_segment_workers', return_value=1):
+            self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        assert requested == ["bytes=0-44", "bytes=0-9", "bytes=10-29", "bytes=30-44"]
+        assert b"".join(merged) == resource
+
+    def _serve_large_file(self, resource: bytes, fail_ranges: int = 0) -> List[str]:
+        """Serve a large resource that supports Range requests."""
+        requested: List[str] = []
+        lock = threading.Lock()
+        failures = {"left": fail_ranges}
+
+        def fake_get(url: str, headers: Dict[str, str], **kwargs: Any) -> Mock:
+            response = Mock()
+            response.headers = {"content-length": str(len(resource)), "accept-ranges": "bytes"}
+            if "Range" not in headers:
+                response.status_code = 200
+                response.iter_content.side_effect = AssertionError("body read without range")
+                return response
+            with lock:
+                requested.append(headers["Range"])
+                fail = failures["left"] > 0 and headers["Range"].startswith("bytes=0-")
+                if fail:
+                    failures["left"] -= 1
+            start, end = map(int, headers["Range"][6:].split("-"))
+            data = resource[start:end + 1]
+            if fail:
+                # Connection drops after the first half of the range
+                data = data[:len(data) // 2]
+            response.status_code = 206
+            response.iter_content.return_value = [data[j:j + 4096] for j in range(0, len(data), 4096)]
+            return response
+
+        self.manager.connection_pool.acquire.return_value.session.get.side_effect = fake_get
+        return requested
+
+    @patch('src.core.merger.merge_files')
+    def test_large_file_split_into_parallel_ranges(self, mock_merge, tmp_path) -> None:
+        """A large file is fetched as parallel ranges into a preallocated file."""
+        resource = os.urandom(100_000)
+        self.manager.settings.settings["download"]["split_threshold"] = 50_000
+        self.manager.settings.settings["download"]["split_connections"] = 3
+        requested = self._serve_large_file(resource)
+        merged = self._merged_contents(mock_merge)
+        task = DownloadTask(
+            name="Large File",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=SegmentManifest.from_urls(["https://cdn.example.com/video.mp4"])
+        )
+        self.manager.add_task(task)
+
+        self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        assert sorted(requested) == sorted(["bytes=0-33333", "bytes=33334-66667", "bytes=66668-99999"])
+        assert merged == [resource]
+        assert task.progress["downloaded_bytes"] == len(resource)
+
+    @patch('src.core.merger.merge_files')
+    def test_failed_range_resumes_where_it_stopped(self, mock_merge, tmp_path) -> None:
+        """A range that breaks off is resumed from its last byte, not refetched."""
+        resource = os.urandom(100_000)
+        self.manager.settings.settings["download"]["split_threshold"] = 50_000
+        self.manager.settings.settings["download"]["split_connections"] = 2
+        requested = self._serve_large_file(resource, fail_ranges=1)
+        merged = self._merged_contents(mock_merge)
+        task = DownloadTask(
+            name="Large File",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=SegmentManifest.from_urls(["https://cdn.example.com/video.mp4"])
+        )
+        self.manager.add_task(task)
+
+        self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        assert sorted(requested) == ["bytes=0-49999", "bytes=25000-49999", "bytes=50000-99999"]
+        assert merged == [resource]
+
+    @patch('src.core.merger.merge_files')
+    def test_split_download_restarts_when_resource_changes(self, mock_merge, tmp_path) -> None:
+        """Parts fetched from a changed resource are discarded instead of stitched together."""
+        versions = {'"v1"': os.urandom(100_000), '"v2"': os.urandom(100_000)}
+        self.manager.settings.settings["download"]["split_threshold"] = 50_000
+        self.manager.settings.settings["download"]["split_connections"] = 2
+        merged = self._merged_contents(mock_merge)
+        lock = threading.Lock()
+        state = {"etag": '"v1"', "served": 0}
+        if_ranges: List[Optional[str]] = []
+
+        def fake_get(url: str, headers: Dict[str, str], **kwargs: Any) -> Mock:
+            response = Mock()
+            with lock:
+                etag = state["etag"]
+                if "Range" in headers:
+                    if_ranges.append(headers.get("If-Range"))
+                    state["served"] += 1
+                    if state["served"] == 1:
+                        # The resource is replaced after its first part was served
+                        state["etag"] = '"v2"'
+            resource = versions[etag]
+            response.headers = {"content-length": str(len(resource)), "accept-ranges": "bytes",
+                                "ETag": etag}
+            if "Range" not in headers or headers.get("If-Range") != etag:
+                response.status_code = 200
+                response.iter_content.return_value = [resource]
+                return response
+            start, end = map(int, headers["Range"][6:].split("-"))
+            response.status_code = 206
+            response.iter_content.return_value = [resource[start:end + 1]]
+            return response
+
+        self.manager.connection_pool.acquire.return_value.session.get.side_effect = fake_get
+        task = DownloadTask(
+            name="Changing File",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=SegmentManifest.from_urls(["https://cdn.example.com/video.mp4"])
+        )
+        self.manager.add_task(task)
+
+        with patch.object(self.manager, '_get_segment_workers', return_value=1):
+            self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        assert merged == [versions['"v2"']]
+        assert if_ranges[:2] == ['"v1"', '"v1"'] and if_ranges[2:] == ['"v2"', '"v2"']
+
+    def test_segment_groups_respect_coalesce_size(self) -> None:
+        """Groups stop at the coalesce size, at gaps and at other resources."""
+        from collections import deque
+
+        manifest = self._ranged_manifest([10, 10, 10, 10])
+        manifest.append("https://cdn.example.com/vod/all.mp4", 4.0, byte_range=(100, 10))
+        manifest.append("https://cdn.example.com/vod/other.mp4", 4.0, byte_range=(110, 10))
+        task = DownloadTask(name="Range Task", segment_manifest=manifest)
+        pending = deque(range(6))
+
+        groups = []
+        while pending:
+            groups.append(self.manager._take_segment_group(task, pending, 25))
+        assert groups == [[0, 1], [2, 3], [4], [5]]
+
+        pending = deque(range(4))
+        assert self.manager._take_segment_group(task, pending, 0) == [0]
+
+    @patch('src.core.merger.merge_files')
+    def test_live_task_downloads_segments_as_playlist_grows(self, mock_merge, tmp_path) -> None:
+        """Segments appended by the live playlist follower are downloaded and merged."""
+        from functools import partial
+        from src.core.live_playlist import LivePlaylistConfig, LivePlaylistFollower
+
+        mock_merge.return_value = {"success": True}
+        playlist = "\n".join(
+            ["#EXTM3U", "#EXT-X-MEDIA-SEQUENCE:0"]
+            + [line for i in range(5) for line in ("#EXTINF:4.0,", f"index{i}.ts")]
+            + ["#EXT-X-ENDLIST"])
+        manifest = SegmentManifest.from_urls(
+            [f"https://cdn.example.com/live/index{i}.ts" for i in range(2)])
+        task = DownloadTask(
+            name="Live Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=manifest,
+            live_playlist_url="https://cdn.example.com/live/stream.m3u8"
+        )
+        self.manager.add_task(task)
+
+        fast_follower = partial(LivePlaylistFollower, target_duration=0.01,
+                                config=LivePlaylistConfig(min_reload_interval=0.01))
+        with patch('src.core.downloader.LivePlaylistFollower', fast_follower), \
+                patch('src.core.m3u8_parser.M3U8Parser._download_playlist', return_value=playlist):
+            self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        assert task.segments == 5
+        assert task.progress["total"] == 5
+        assert task.progress["completed"] == 5
+        assert task.task_id not in self.manager.live_followers
+        merged_files = mock_merge.call_args[0][0]
+        assert [os.path.basename(f) for f in merged_files] == [
+            f"segment_{i}.ts" for i in range(5)]
+
+    def test_pending_segments_switch_to_lower_variant(self) -> None:
+        """Pending segments continue from a lower aligned variant when the deadline would be missed."""
+        from collections import deque
+
+        base = "https://cdn.example.com/vod/"
+        variants = [
+            {"url": base + "high.m3u8", "bandwidth": 4_000_000, "resolution": "1920x1080"},
+            {"url": base + "low.m3u8", "bandwidth": 1_000_000, "resolution": "640x360"},
+        ]
+        manifest = SegmentManifest.from_urls(
+            [f"{base}high/index{i}.ts" for i in range(6)], [10.0] * 6)
+        task = DownloadTask(name="Deadline Task", segment_manifest=manifest,
+                            variants=variants, variant_url=base + "high.m3u8", deadline=60)
+        task.progress["start_time"] = time.time() - 30
+        task.progress["speed"] = 125_000  # 40s of 4 Mbps media would take 160s
+
+        def playlist(count: int) -> str:
+            return "\n".join(["#EXTM3U"] + [line for i in range(count)
+                                            for line in ("#EXTINF:10.0,", f"low/index{i}.ts")]
+                             + ["#EXT-X-ENDLIST"])
+
+        with patch('src.core.m3u8_parser.M3U8Parser._download_playlist', return_value=playlist(6)):
+            self.manager._maybe_switch_variant(task, deque([2, 3, 4, 5]), Mock(headers={}))
+
+        assert task.variant_url == base + "low.m3u8"
+        assert manifest.url(1) == f"{base}high/index1.ts"
+        assert manifest.url(2) == f"{base}low/index2.ts"
+        assert task.variant_switches == [
+            {"segment": 2, "url": base + "low.m3u8", "bandwidth": 1_000_000}]
+        assert manifest.discontinuities == (2,)
+
+        # A variant that is not aligned is dropped instead of switched to
+        task.variant_url = base + "high.m3u8"
+        with patch('src.core.m3u8_parser.M3U8Parser._download_playlist', return_value=playlist(4)):
+            self.manager._maybe_switch_variant(task, deque([4, 5]), Mock(headers={}))
+        assert task.variant_url == base + "high.m3u8"
+        assert task.variants == variants[:1]
+
+    def test_resumed_task_switches_after_last_taken_segment(self) -> None:
+        """A resumed task switches variants only where every later segment is pending."""
+        from collections import deque
+
+        base = "https://cdn.example.com/vod/"
+        variants = [
+            {"url": base + "high.m3u8", "bandwidth": 4_000_000, "resolution": "1920x1080"},
+            {"url": base + "low.m3u8", "bandwidth": 1_000_000, "resolution": "640x360"},
+        ]
+        manifest = SegmentManifest.from_urls(
+            [f"{base}high/index{i}.ts" for i in range(6)], [10.0] * 6)
+        task = DownloadTask(name="Resumed Deadline Task", segment_manifest=manifest,
+                            variants=variants, variant_url=base + "high.m3u8", deadline=60)
+        task.progress["start_time"] = time.time() - 30
+        task.progress["speed"] = 125_000
+        playlist = "\n".join(["#EXTM3U"] + [line for i in range(6)
+                                             for line in ("#EXTINF:10.0,", f"low/index{i}.ts")]
+                             + ["#EXT-X-ENDLIST"])
+
+        # Segment 3 was downloaded by an earlier run; 1 and 2 are still missing
+        with patch('src.core.m3u8_parser.M3U8Parser._download_playlist', return_value=playlist):
+            self.manager._maybe_switch_variant(task, deque([1, 2, 4, 5]), Mock(headers={}))
+
+        assert [manifest.url(i) for i in range(6)] == [
+            f"{base}high/index{i}.ts" for i in range(4)] + [
+            f"{base}low/index{i}.ts" for i in range(4, 6)]
+        assert task.variant_switches[0]["segment"] == 4
+        assert manifest.discontinuities == (4,)
+
+        # Nothing is left to switch once the last segment has been taken
+        task.variant_url = base + "high.m3u8"
+        task.variant_switches.clear()
+        with patch('src.core.m3u8_parser.M3U8Parser._download_playlist', return_value=playlist):
+            self.manager._maybe_switch_variant(task, deque([1, 2]), Mock(headers={}))
+        assert task.variant_switches == []
+
+    def test_stop_live_recording(self) -> None:
+        """Stopping a live recording ends its follower."""
+        follower = Mock()
+        self.manager.live_followers["live-task"] = follower
+
+        assert self.manager.stop_live_recording("live-task")
+        follower.stop.assert_called_once()
+        assert not self.manager.stop_live_recording("unknown-task")
+
+    @patch('src.core.merger.merge_files')
+    def test_encrypted_segments_decrypted_with_sequence_iv(self, mock_merge, tmp_path) -> None:
+        """Encrypted segments are decrypted across unaligned chunks."""
+        from Crypto.Cipher import AES
+        from Crypto.Util.Padding import pad
+        from src.core.segment_manifest import SegmentKey
+
+        key = bytes(range(16))
+        plaintexts = [os.urandom(100 + i) for i in range(2)]
+        manifest = SegmentManifest.from_urls(
+            [f"https://cdn.example.com/hls/index{i}.ts" for i in range(2)],
+            key=SegmentKey(url="https://cdn.example.com/key"), media_sequence=9)
+
+        def fake_get(url: str, **kwargs: Any) -> Mock:
+            index = int(url.rsplit("index", 1)[1].split(".")[0])
+            iv = (9 + index).to_bytes(16, "big")
+            data = AES.new(key, AES.MODE_CBC, iv).encrypt(pad(plaintexts[index], 16))
+            response = Mock()
+            response.status_code = 200
+            response.headers = {"content-length": str(len(data))}
+            response.iter_content.return_value = [data[j:j + 7] for j in range(0, len(data), 7)]
+            return response
+
+        merged: List[bytes] = []
+
+        def fake_merge(files: List[str], output_file: str, settings: Any, **kwargs: Any) -> Dict[str, Any]:
+            for path in files:
+                with open(path, "rb") as f:
+                    merged.append(f.read())
+            return {"success": True}
+
+        mock_merge.side_effect = fake_merge
+        self.manager.connection_pool.acquire.return_value.session.get.side_effect = fake_get
+        task = DownloadTask(
+            name="Encrypted Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=manifest
+        )
+        task.key_data = key
+        self.manager.add_task(task)
+
+        self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        assert merged == plaintexts
+
+    @patch('src.core.merger.merge_files')
+    def test_rotating_keys_fetched_once_each(self, mock_merge, tmp_path) -> None:
+        """Each rotated key URI is fetched once and used for its segments."""
+        from Crypto.Cipher import AES
+        from Crypto.Util.Padding import pad
+        from src.core.key_cache import key_cache
+        from src.core.segment_manifest import SegmentKey
+
+        keys = {f"https://keys.example.com/rotate-{n}": bytes([n]) * 16 for n in range(2)}
+        segment_keys = [SegmentKey(url=f"https://keys.example.com/rotate-{i // 2}", iv="0x01")
+                        for i in range(4)]
+        manifest = SegmentManifest.from_urls(
+            [f"https://cdn.example.com/hls/index{i}.ts" for i in range(4)], keys=segment_keys)
+        for url in keys:
+            key_cache.invalidate(url)
+
+        key_requests: List[str] = []
+
+        def fake_get(url: str, **kwargs: Any) -> Mock:
+            index = int(url.rsplit("index", 1)[1].split(".")[0])
+            key = keys[segment_keys[index].url]
+            data = AES.new(key, AES.MODE_CBC, b"\x00" * 15 + b"\x01").encrypt(
+                pad(f"segment {index}".encode(), 16))
+            response = Mock()
+            response.status_code = 200
+            response.headers = {"content-length": str(len(data))}
+            response.iter_content.return_value = [data]
+            return response
+
+        def fake_key_get(url: str, **kwargs: Any) -> Mock:
+            key_requests.append(url)
+            return Mock(status_code=200, content=keys[url])
+
+        merged: List[bytes] = []
+
+        def fake_merge(files: List[str], output_file: str, settings: Any, **kwargs: Any) -> Dict[str, Any]:
+            for path in files:
+                with open(path, "rb") as f:
+                    merged.append(f.read())
+            return {"success": True}
+
+        mock_merge.side_effect = fake_merge
+        self.manager.connection_pool.acquire.return_value.session.get.side_effect = fake_get
+        task = DownloadTask(
+            name="Rotating Keys Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=manifest
+        )
+        self.manager.add_task(task)
+
+        with patch('src.core.downloader.requests.Session') as mock_session:
+            mock_session.return_value.get.side_effect = fake_key_get
+            self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        assert sorted(key_requests) == sorted(keys)
+        assert merged == [f"segment {i}".encode() for i in range(4)]
+
+    def _serve_interrupted(self, versions: List[bytes], cut: int) -> List[Any]:
+        """Serve a resource whose first response breaks off after ``cut`` bytes.
+
+        Each request gets the next version of the resource, tagged with its ETag.
+        """
+        requested: List[Any] = []
+
+        def broken_stream(data: bytes) -> Any:
+            for j in range(0, cut, 100):
+                yield data[j:min(j + 100, cut)]
+            raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+        def fake_get(url: str, headers: Dict[str, str], **kwargs: Any) -> Mock:
+            version = min(len(requested), len(versions) - 1)
+            requested.append((headers.get("Range", ""), headers.get("If-Range")))
+            data = versions[version]
+            response = Mock()
+            response.status_code = 200
+            if "Range" in headers:
+                data = data[int(headers["Range"][6:-1]):]
+                response.status_code = 206
+            response.headers = {"content-length": str(len(data)), "ETag": f'"v{version}"'}
+            if len(requested) == 1:
+                response.iter_content.return_value = broken_stream(data)
+            else:
+                response.iter_content.return_value = [data[j:j + 100] for j in range(0, len(data), 100)]
+            return response
+
+        self.manager.connection_pool.acquire.return_value.session.get.side_effect = fake_get
+        return requested
+
+    def _download_one_segment(self, tmp_path: Any, mock_merge: Mock,
+                              manifest: Optional[SegmentManifest] = None,
+                              key: Optional[bytes] = None) -> List[bytes]:
+        merged: List[bytes] = []
+
+        def fake_merge(files: List[str], output_file: str, settings: Any, **kwargs: Any) -> Dict[str, Any]:
+            for path in files:
+                with open(path, "rb") as f:
+                    merged.append(f.read())
+            return {"success": True}
+
+        mock_merge.side_effect = fake_merge
+        task = DownloadTask(
+            name="Resume Task",
+            output_file=str(tmp_path / "video.mp4"),
+            segment_manifest=manifest or SegmentManifest.from_urls(
+                ["https://cdn.example.com/hls/index0.ts"])
+        )
+        task.key_data = key
+        self.manager.add_task(task)
+        self.manager._task_worker(task.task_id)
+        assert task.status == TaskStatus.COMPLETED
+        return merged
+
+    @patch('src.core.merger.merge_files')
+    def test_interrupted_segment_resumed_with_range(self, mock_merge, tmp_path) -> None:
+        """An interrupted segment continues after the bytes already written."""
+        resource = os.urandom(5000)
+        requested = self._serve_interrupted([resource], cut=3000)
+
+        merged = self._download_one_segment(tmp_path, mock_merge)
+
+        assert requested == [("", None), ("bytes=3000-", '"v0"')]
+        assert merged == [resource]
+
+    @patch('src.core.merger.merge_files')
+    def test_encrypted_segment_resumed_at_block_boundary(self, mock_merge, tmp_path) -> None:
+        """An encrypted segment resumes one block early to restore the CBC chain."""
+        from Crypto.Cipher import AES
+        from Crypto.Util.Padding import pad
+        from src.core.segment_manifest import SegmentKey
+
+        key = bytes(range(16))
+        plaintext = os.urandom(1000)
+        ciphertext = AES.new(key, AES.MODE_CBC, b"\x00" * 15 + b"\x01").encrypt(pad(plaintext, 16))
+        requested = self._serve_interrupted([ciphertext], cut=500)
+        manifest = SegmentManifest.from_urls(
+            ["https://cdn.example.com/hls/index0.ts"],
+            key=SegmentKey(url="https://cdn.example.com/key"), media_sequence=1)
+        merged = self._download_one_segment(tmp_path, mock_merge, manifest, key)
+
+        # 496 plaintext bytes were written; the block before them is the IV
+        assert requested[1] == ("bytes=480-", '"v0"')
+        assert merged == [plaintext]
+
+    @patch('src.core.merger.merge_files')
+    def test_partial_segment_dropped_when_resource_changed(self, mock_merge, tmp_path) -> None:
+        """A partial file is not continued with bytes of a changed resource."""
+        versions = [os.urandom(5000), os.urandom(5000)]
+        requested = self._serve_interrupted(versions, cut=3000)
+
+        merged = self._download_one_segment(tmp_path, mock_merge)
+
+        assert [r[0] for r in requested] == ["", "bytes=3000-", ""]
+        assert merged == [versions[1]]
+
+    @patch('src.core.merger.merge_files')
+    def test_append_mode_merges_during_download(self, mock_merge, tmp_path) -> None:
+        """Segments are merged behind the watermark while later ones download."""
+        self.manager.settings.settings["download"]["merge_mode"] = "append"
+        watermarks: List[int] = []
+        original_advance = self.manager._advance_merge
+
+        def record_advance(options: Any, index: int, ts_filename: Optional[str]) -> None:
+            original_advance(options, index, ts_filename)
+            watermarks.append(options.merger.watermark)
+
+        self.manager._advance_merge = record_advance
+        output = tmp_path / "video.ts"
+        task = DownloadTask(
+            name="Append Task",
+            base_url="https://example.com/stream",
+            segments=6,
+            output_file=str(output)
+        )
+        self.manager.add_task(task)
+
+        self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        mock_merge.assert_not_called()
+        # Segments complete out of order; the watermark only ever moves forward
+        assert watermarks == sorted(watermarks) and watermarks[-1] == 6
+        assert output.read_bytes() == b"".join(f"seg{i:03d}".encode() for i in range(6))
+
+    @patch('src.core.merger.merge_files')
+    def test_auto_mode_merges_while_downloading(self, mock_merge, tmp_path) -> None:
+        """The default merge mode appends TS segments during the download."""
+        from src.core.merger import IncrementalMerger
+
+        self.manager.settings.settings["download"]["merge_mode"] = "auto"
+        self.manager.settings.settings["advanced"]["ffmpeg_path"] = "/opt/ffmpeg/bin/ffmpeg"
+        output = tmp_path / "video.ts"
+        task = DownloadTask(name="Auto Merge Task", base_url="https://example.com/stream",
+                            segments=6, output_file=str(output))
+        self.manager.add_task(task)
+
+        with patch('src.core.downloader.IncrementalMerger', wraps=IncrementalMerger) as merger_class:
+            self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        mock_merge.assert_not_called()
+        assert merger_class.call_args.kwargs["ffmpeg_path"] == "/opt/ffmpeg/bin/ffmpeg"
+        assert output.read_bytes() == b"".join(f"seg{i:03d}".encode() for i in range(6))
+
+    @pytest.mark.parametrize("merge_mode,init,expected", [
+        ("auto", False, False),
+        ("auto", True, True),
+        ("append", False, True),
+        ("concat", True, False),
+    ])
+    def test_incremental_merge_of_mp4_segments(self, merge_mode: str, init: bool,
+                                               expected: bool) -> None:
+        """Auto mode only appends MP4 segments that are fragments behind an init section."""
+        self.manager.settings.settings["download"]["merge_mode"] = merge_mode
+        manifest = SegmentManifest("https://cdn.example.com/vod/")
+        for i in range(3):
+            manifest.append(f"https://cdn.example.com/vod/part{i}.mp4?sig=1", 4.0,
+                            init_section=SegmentInit("https://cdn.example.com/vod/init.mp4") if init else None)
+        task = DownloadTask(name="MP4 Task", segment_manifest=manifest)
+
+        assert self.manager._use_incremental_merge(task) is expected
+
+    @pytest.mark.parametrize("merge_mode", ["auto", "append"])
+    def test_init_sections_prepended_at_merge(self, merge_mode: str, tmp_path) -> None:
+        """EXT-X-MAP sections are fetched once by byte range and written before their segments."""
+        from src.core.m3u8_parser import M3U8Parser, M3U8Stream
+
+        self.manager.settings.settings["download"]["merge_mode"] = merge_mode
+        playlist = "\n".join([
+            "#EXTM3U",
+            "#EXT-X-VERSION:7",
+            "#EXT-X-TARGETDURATION:4",
+            '#EXT-X-MAP:URI="init.mp4",BYTERANGE="4@2"',
+            "#EXTINF:4.0,",
+            "index0.m4s",
+            "#EXTINF:4.0,",
+            "index1.m4s",
+            "#EXT-X-DISCONTINUITY",
+            '#EXT-X-MAP:URI="init.mp4",BYTERANGE="4@2"',
+            "#EXTINF:4.0,",
+            "index2.m4s",
+            "#EXT-X-ENDLIST",
+        ])
+        stream = M3U8Stream()
+        stream.base_url = "https://cdn.example.com/vod/"
+        M3U8Parser()._parse_media_playlist(playlist, stream)
+
+        session_get = self.manager.connection_pool.acquire.return_value.session.get
+        serve_segment = session_get.side_effect
+        init_requests: List[Dict[str, str]] = []
+
+        def fake_get(url: str, **kwargs: Any) -> Mock:
+            if url.endswith("init.mp4"):
+                init_requests.append(kwargs["headers"])
+                return Mock(status_code=206, content=b"INIT")
+            return serve_segment(url, **kwargs)
+
+        session_get.side_effect = fake_get
+        output = tmp_path / "video.ts"
+        task = DownloadTask(
+            name="fMP4 Task",
+            segment_manifest=SegmentManifest.from_segments(stream.segments),
+            output_file=str(output)
+        )
+        self.manager.add_task(task)
+
+        self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        assert output.read_bytes() == b"INITseg000seg001INITseg002"
+        assert [headers["Range"] for headers in init_requests] == ["bytes=2-5"]
+
+    @patch('src.core.merger.merge_files')
+    def test_append_mode_keeps_segments_after_gap(self, mock_merge, tmp_path) -> None:
+        """A failed segment stops the append merge and keeps later segments for resuming."""
+        self.manager.settings.settings["download"]["merge_mode"] = "append"
+        session_get = self.manager.connection_pool.acquire.return_value.session.get
+        serve_segment = session_get.side_effect
+
+        def fake_get(url: str, **kwargs: Any) -> Mock:
+            if "index2." in url:
+                return Mock(status_code=404, reason="Not Found", headers={})
+            return serve_segment(url, **kwargs)
+
+        session_get.side_effect = fake_get
+        output = tmp_path / "video.ts"
+        task = DownloadTask(
+            name="Gap Task",
+            base_url="https://example.com/stream",
+            segments=6,
+            output_file=str(output)
+        )
+        self.manager.add_task(task)
+
+        self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.FAILED
+        assert output.read_bytes() == b"seg000seg001"
+        assert os.path.exists(f"{output}.idx")
+        temp_dir = tmp_path / "video.ts_temp"
+        assert sorted(os.listdir(temp_dir)) == [f"segment_{i}.ts" for i in range(3, 6)]
+
+
+    @pytest.mark.parametrize("index_owner", ["other-task", "same-task"])
+    def test_append_mode_ignores_unconfirmed_merge(self, index_owner: str, tmp_path) -> None:
+        """A merge index of another download or unconfirmed by the journal is not resumed."""
+        from src.core.merger import IncrementalMerger
+
+        self.manager.settings.settings["download"]["merge_mode"] = "append"
+        output = tmp_path / "video.ts"
+        task = DownloadTask(
+            name="Stale Merge Task",
+            base_url="https://example.com/stream",
+            segments=4,
+            output_file=str(output)
+        )
+        # An earlier merge left two segments behind without journal records
+        stale = IncrementalMerger(
+            str(output), identity=task.task_id if index_owner == "same-task" else index_owner)
+        for i in range(2):
+            segment = tmp_path / f"stale_{i}.ts"
+            segment.write_bytes(f"old{i:03d}".encode())
+            stale.add_segment(i, str(segment))
+        stale.abort()
+        self.manager.add_task(task)
+
+        self.manager._task_worker(task.task_id)
+
+        assert task.status == TaskStatus.COMPLETED
+        assert output.read_bytes() == b"".join(f"seg{i:03d}".encode() for i in range(4))
+
+
 # Run tests if executed directly
 if __name__ == "__main__":
     pytest.main(["-v", __file__])
@@ -0,0 +1,56 @@
+"""
+Tests for host key normalization
+"""
+
+import pytest
+
+from src.core.host_key import HostLRU, host_key
+
+
+class TestHostKey:
+    """Test host_key function"""
+
+    def test_segment_urls_share_host_key(self) -> None:
+        """Test URLs on the same server map to one key"""
+        assert host_key("https://cdn.example.com/hls/seg1.ts?token=a") == "https://cdn.example.com"
+        assert host_key("https://CDN.Example.com/hls/seg2.ts") == "https://cdn.example.com"
+
+    def test_default_port_and_user_info_dropped(self) -> None:
+        """Test default ports and credentials are not part of the key"""
+        assert host_key("https://user:pw@example.com:443/a") == "https://example.com"
+        assert host_key("http://example.com:80/a") == "http://example.com"
+        assert host_key("http://example.com:8080/a") == "http://example.com:8080"
+
+    def test_ipv6_host(self) -> None:
+        """Test IPv6 literals keep their brackets"""
+        assert host_key("http://[::1]:8000/seg.ts") == "http://[::1]:8000"
+
+    def test_bare_host_passes_through(self) -> None:
+        """Test values without a scheme are returned lowercased"""
+        assert host_key("Example.com") == "example.com"
+        assert host_key(host_key("https://example.com/x")) == "https://example.com"
+
+
+class TestHostLRU:
+    """Test HostLRU class"""
+
+    def test_get_or_create_reuses_entry(self) -> None:
+        """Test the factory runs once per host"""
+        hosts = HostLRU(max_hosts=2)
+        first = hosts.get_or_create("a", object)
+        assert hosts.get_or_create("a", object) is first
+        assert len(hosts) == 1
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Test the oldest untouched host is evicted"""
+        hosts = HostLRU(max_hosts=2)
+        hosts.get_or_create("a", object)
+        hosts.get_or_create("b", object)
+        hosts.get_or_create("a", object)
+        hosts.get_or_create("c", object)
+
+        assert list(hosts) == ["a", "c"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,112 @@
+"""
+Tests for the HTTP/2 session transport
+"""
+
+import pytest
+import requests
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("h2")
+
+from src.core.connection_pool import HostPoolConfig
+from src.core.http2_transport import HTTP2Adapter, HTTP2Transport
+
+
+def make_client(handler) -> "httpx.Client":
+    """Create an httpx client answering requests with ``handler``"""
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+class TestHTTP2Adapter:
+    """Test HTTP2Adapter class"""
+
+    def test_streamed_response(self) -> None:
+        """Test responses keep the requests API used by the segment workers"""
+        seen = {}
+
+        def handler(request: "httpx.Request") -> "httpx.Response":
+            seen.update(request.headers)
+            return httpx.Response(206, headers={"Content-Length": "6"}, content=b"abcdef")
+
+        session = requests.Session()
+        session.mount("https://", HTTP2Adapter(make_client(handler)))
+        response = session.get("https://cdn.example.com/seg.ts", stream=True, timeout=(5, 10),
+                               headers={"Range": "bytes=0-5"})
+
+        assert response.status_code == 206
+        assert response.headers["content-length"] == "6"
+        assert b"".join(response.iter_content(4)) == b"abcdef"
+        assert seen["range"] == "bytes=0-5"
+
+    def test_errors_mapped_to_requests(self) -> None:
+        """Test httpx transport errors surface as requests exceptions"""
+        def handler(request: "httpx.Request") -> "httpx.Response":
+            raise httpx.ConnectTimeout("timed out", request=request)
+
+        session = requests.Session()
+        session.mount("https://", HTTP2Adapter(make_client(handler)))
+
+        with pytest.raises(requests.exceptions.Timeout):
+            session.get("https://cdn.example.com/seg.ts")
+
+    def test_tls_and_proxy_settings_select_client(self) -> None:
+        """Test verify, cert and the request's proxy choose the client"""
+        def handler(request: "httpx.Request") -> "httpx.Response":
+            return httpx.Response(200, content=b"ok")
+
+        default = make_client(handler)
+        configured = make_client(handler)
+        calls = []
+
+        def factory(verify, cert, proxy) -> "httpx.Client":
+            calls.append((verify, cert, proxy))
+            return configured
+
+        session = requests.Session()
+        session.trust_env = False
+        session.mount("https://", HTTP2Adapter(default, factory))
+        assert session.get("https://cdn.example.com/seg.ts").content == b"ok"
+        assert calls == []
+
+        session.verify = False
+        session.cert = ("client.pem", "client.key")
+        session.proxies = {"https": "http://proxy.example.com:8080"}
+        session.get("https://cdn.example.com/seg.ts")
+        assert calls == [(False, ("client.pem", "client.key"), "http://proxy.example.com:8080")]
+
+
+class TestHTTP2Transport:
+    """Test HTTP2Transport class"""
+
+    def test_sessions_share_host_client(self) -> None:
+        """Test all sessions of a host multiplex over one client"""
+        transport = HTTP2Transport()
+        config = HostPoolConfig(transport="http2")
+
+        first = transport.create_session("https://cdn.example.com", config)
+        second = transport.create_session("https://cdn.example.com", config)
+        other = transport.create_session("https://other.example.com", config)
+
+        client = first.get_adapter("https://cdn.example.com/a.ts").client
+        assert second.get_adapter("https://cdn.example.com/a.ts").client is client
+        assert other.get_adapter("https://other.example.com/a.ts").client is not client
+        transport.close()
+        assert transport.clients == {}
+
+    def test_clients_kept_per_tls_and_proxy_settings(self) -> None:
+        """Test a host gets one client per verify and proxy combination"""
+        transport = HTTP2Transport()
+        config = HostPoolConfig(transport="http2")
+        host = "https://cdn.example.com"
+
+        default = transport._get_client(host, config)
+        unverified = transport._get_client(host, config, verify=False)
+        proxied = transport._get_client(host, config, proxy="http://proxy.example.com:8080")
+
+        assert len({id(default), id(unverified), id(proxied)}) == 3
+        assert transport._get_client(host, config, verify=False) is unverified
+        transport.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,131 @@
+"""
+Tests for the encryption key cache
+"""
+
+import pytest
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from src.core.key_cache import KeyCache, KeyCacheConfig, key_cache
+
+
+class TestKeyCache:
+    """Test KeyCache class"""
+
+    def test_fetches_once_then_hits(self) -> None:
+        """Test a cached key is not fetched again"""
+        cache = KeyCache()
+        fetcher = Mock(return_value=b"k" * 16)
+
+        assert cache.get_key("https://example.com/key", fetcher) == b"k" * 16
+        assert cache.get_key("https://example.com/key", fetcher) == b"k" * 16
+
+        fetcher.assert_called_once_with("https://example.com/key")
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_ttl_expiry(self) -> None:
+        """Test expired keys are fetched again"""
+        cache = KeyCache(KeyCacheConfig(ttl=10.0))
+        fetcher = Mock(return_value=b"k" * 16)
+
+        with patch('src.core.key_cache.time.time', return_value=1000.0):
+            cache.get_key("https://example.com/key", fetcher)
+        with patch('src.core.key_cache.time.time', return_value=1011.0):
+            assert cache.get("https://example.com/key") is None
+            cache.get_key("https://example.com/key", fetcher)
+
+        assert fetcher.call_count == 2
+
+    def test_lru_eviction(self) -> None:
+        """Test least recently used keys are evicted first"""
+        cache = KeyCache(KeyCacheConfig(max_entries=2))
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        cache.get("a")
+        cache.put("c", b"3")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1"
+        assert cache.get("c") == b"3"
+
+    def test_single_flight(self) -> None:
+        """Test concurrent callers share a single fetch"""
+        cache = KeyCache()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_fetch(url: str) -> bytes:
+            calls.append(url)
+            started.set()
+            release.wait(5)
+            return b"k" * 16
+
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(cache.get_key("https://example.com/key", slow_fetch)))
+            for _ in range(5)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while cache.get_stats()["shared_fetches"] < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert calls == ["https://example.com/key"]
+        assert results == [b"k" * 16] * 5
+
+    def test_fetch_error_not_cached(self) -> None:
+        """Test a failed fetch raises and is retried on the next call"""
+        cache = KeyCache()
+        fetcher = Mock(side_effect=[RuntimeError("boom"), b"k" * 16])
+
+        with pytest.raises(RuntimeError):
+            cache.get_key("https://example.com/key", fetcher)
+        assert cache.get_key("https://example.com/key", fetcher) == b"k" * 16
+
+    def test_waiter_fetches_again_after_leader_fails(self) -> None:
+        """Test a failed shared fetch is retried by a waiter instead of failing it"""
+        cache = KeyCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def failing_fetch(url: str) -> bytes:
+            started.set()
+            release.wait(5)
+            raise RuntimeError("leader canceled")
+
+        errors = []
+        results = []
+
+        def leader() -> None:
+            try:
+                cache.get_key("https://example.com/key", failing_fetch)
+            except RuntimeError as e:
+                errors.append(e)
+
+        leader_thread = threading.Thread(target=leader)
+        leader_thread.start()
+        started.wait(5)
+        waiter = threading.Thread(target=lambda: results.append(
+            cache.get_key("https://example.com/key", lambda url: b"k" * 16)))
+        waiter.start()
+        while cache.get_stats()["shared_fetches"] < 1:
+            time.sleep(0.01)
+        release.set()
+        leader_thread.join(5)
+        waiter.join(5)
+
+        assert len(errors) == 1
+        assert results == [b"k" * 16]
+        assert cache.get("https://example.com/key") == b"k" * 16
+
+    def test_global_instance(self) -> None:
+        """Test global key cache instance"""
+        assert isinstance(key_cache, KeyCache)
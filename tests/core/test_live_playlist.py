@@ -0,0 +1,131 @@
+"""
+Tests for the live HLS playlist follower
+"""
+
+import pytest
+from typing import List
+from unittest.mock import patch
+
+from src.core.live_playlist import LivePlaylistConfig, LivePlaylistFollower
+from src.core.segment_manifest import SegmentManifest
+
+
+PLAYLIST_URL = "https://live.example.com/hls/stream.m3u8"
+
+
+def make_playlist(first_sequence: int, count: int, ended: bool = False,
+                  key: bool = False, target_duration: int = 4) -> str:
+    """Build a sliding-window media playlist"""
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-MEDIA-SEQUENCE:{first_sequence}"]
+    if target_duration:
+        lines.append(f"#EXT-X-TARGETDURATION:{target_duration}")
+    if key:
+        lines.append('#EXT-X-KEY:METHOD=AES-128,URI="https://live.example.com/key"')
+    for sequence in range(first_sequence, first_sequence + count):
+        lines.extend(["#EXTINF:4.0,", f"seg{sequence}.ts"])
+    if ended:
+        lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+def make_follower(playlists: List[str], manifest: SegmentManifest,
+                  **config_kwargs: float) -> LivePlaylistFollower:
+    """Create a follower whose reloads return the given playlists in turn"""
+    config = LivePlaylistConfig(min_reload_interval=0.01, **config_kwargs)
+    follower = LivePlaylistFollower(PLAYLIST_URL, manifest, target_duration=0.01, config=config)
+    responses = iter(playlists)
+    patcher = patch.object(follower.parser, "_download_playlist",
+                           side_effect=lambda url: next(responses, playlists[-1]))
+    patcher.start()
+    return follower
+
+
+class TestLivePlaylistFollower:
+    """Test LivePlaylistFollower class"""
+
+    def test_refresh_appends_only_new_sequences(self) -> None:
+        """Test overlapping reloads append each media sequence once"""
+        manifest = SegmentManifest.from_urls(
+            [f"https://live.example.com/hls/seg{i}.ts" for i in range(10, 13)], media_sequence=10)
+        follower = make_follower([make_playlist(11, 3), make_playlist(12, 4)], manifest)
+
+        assert follower.refresh() == [3]
+        assert follower.refresh() == [4, 5]
+        assert follower.take_new_segments() == [3, 4, 5]
+        assert follower.take_new_segments() == []
+        assert [manifest.url(i) for i in range(3, 6)] == [
+            f"https://live.example.com/hls/seg{i}.ts" for i in (13, 14, 15)]
+        assert manifest.sequence_number(5) == 15
+        assert follower.target_duration == 4.0
+        assert follower.skipped_segments == 0
+
+    def test_refresh_into_empty_manifest_sets_media_sequence(self) -> None:
+        """Test the first reload of an empty manifest starts at the playlist's sequence"""
+        manifest = SegmentManifest()
+        follower = make_follower([make_playlist(100, 3)], manifest)
+
+        assert follower.refresh() == [0, 1, 2]
+        assert manifest.media_sequence == 100
+        assert manifest.sequence_number(2) == 102
+
+    def test_gap_pins_sequence_iv(self) -> None:
+        """Test segments after a missed window keep their sequence-derived IV"""
+        manifest = SegmentManifest()
+        follower = make_follower(
+            [make_playlist(0, 2, key=True), make_playlist(5, 2, key=True)], manifest)
+
+        follower.refresh()
+        assert manifest.key(1).iv is None
+        assert follower.refresh() == [2, 3]
+        assert follower.skipped_segments == 3
+        assert manifest.key(2).iv == f"0x{5:032x}"
+        assert manifest.key(3).iv == f"0x{6:032x}"
+
+    def test_endlist_ends_following(self) -> None:
+        """Test the follower stops once the playlist has EXT-X-ENDLIST"""
+        manifest = SegmentManifest()
+        follower = make_follower(
+            [make_playlist(0, 2, target_duration=0), make_playlist(0, 4, ended=True)], manifest)
+
+        follower.start()
+        follower.thread.join(2.0)
+
+        assert follower.ended.is_set()
+        assert not follower.finished  # Segments not taken yet
+        assert follower.take_new_segments() == [0, 1, 2, 3]
+        assert follower.finished
+        assert follower.get_stats()["reloads"] == 2
+
+    def test_unchanged_playlist_ends_after_stale_reloads(self) -> None:
+        """Test a playlist that stops updating without ENDLIST ends the follower"""
+        follower = make_follower(
+            [make_playlist(0, 2, target_duration=0)], SegmentManifest(), max_stale_reloads=3)
+
+        follower.start()
+        follower.thread.join(2.0)
+
+        assert follower.ended.is_set()
+        assert follower.reloads == 4
+
+    def test_failures_end_following(self) -> None:
+        """Test repeated reload failures end the follower"""
+        follower = make_follower([""], SegmentManifest(), max_consecutive_failures=2)
+
+        follower.start()
+        follower.thread.join(2.0)
+
+        assert follower.ended.is_set()
+        assert follower.failures == 2
+
+    def test_stop_wakes_waiters(self) -> None:
+        """Test stopping the follower ends waits for new segments"""
+        follower = LivePlaylistFollower(PLAYLIST_URL, SegmentManifest())
+
+        follower.stop()
+
+        assert follower.wait_for_segments(1.0)
+        assert follower.finished
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -608,5 +608,147 @@ class TestExtractors:
         assert "Parsing error" in result["message"]
 
 
+
+class TestMediaPlaylistParsing:
+    """Test suite for single-pass media playlist parsing."""
+
+    def parse(self, content: str, url: str = "https://cdn.example.com/vod/index.m3u8") -> M3U8Stream:
+        """Parse a media playlist served at url."""
+        parser = M3U8Parser()
+        with patch.object(parser, '_download_playlist', return_value=content):
+            streams = parser.parse_url(url)
+        assert len(streams) == 1
+        return streams[0]
+
+    def test_byte_ranges_and_init_section(self) -> None:
+        """Test BYTERANGE offsets continue within a resource and MAP applies to following segments."""
+        stream = self.parse("\n".join([
+            "#EXTM3U",
+            "#EXT-X-VERSION:7",
+            "#EXT-X-TARGETDURATION:4",
+            '#EXT-X-MAP:URI="main.mp4",BYTERANGE="720@0"',
+            "#EXTINF:4.0,",
+            "#EXT-X-BYTERANGE:1000@720",
+            "main.mp4",
+            "#EXTINF:4.0,",
+            "#EXT-X-BYTERANGE:2000",
+            "main.mp4",
+            "#EXTINF:4.0,",
+            "#EXT-X-BYTERANGE:500",
+            "other.mp4",
+            "#EXT-X-ENDLIST",
+        ]))
+
+        assert [s.byte_range for s in stream.segments] == [(720, 1000), (1720, 2000), (0, 500)]
+        assert stream.segments[0].url == "https://cdn.example.com/vod/main.mp4"
+        assert stream.init_section is not None
+        assert stream.init_section.url == "https://cdn.example.com/vod/main.mp4"
+        assert stream.init_section.byte_range == (0, 720)
+        assert all(s.init_section is stream.init_section for s in stream.segments)
+        assert stream.is_live is False
+
+    def test_discontinuity_date_time_and_sequence(self) -> None:
+        """Test per-segment tags apply only to the next segment."""
+        stream = self.parse("\n".join([
+            "#EXTM3U",
+            "#EXT-X-MEDIA-SEQUENCE:42",
+            "#EXT-X-DISCONTINUITY-SEQUENCE:3",
+            "#EXT-X-PROGRAM-DATE-TIME:2024-05-01T12:00:00.000Z",
+            "#EXTINF:6.0,",
+            "a.ts",
+            "#EXT-X-DISCONTINUITY",
+            "#EXTINF:5.5,",
+            "b.ts",
+            "#EXTINF:6.0,",
+            "c.ts",
+        ]))
+
+        assert stream.media_sequence == 42
+        assert stream.discontinuity_sequence == 3
+        assert [s.discontinuity for s in stream.segments] == [False, True, False]
+        assert stream.segments[0].program_date_time.isoformat() == "2024-05-01T12:00:00+00:00"
+        assert stream.segments[1].program_date_time is None
+        assert stream.duration == pytest.approx(17.5)
+        assert stream.is_live is True
+
+    def test_key_without_iv_resets_previous_iv(self) -> None:
+        """Test a key rotation without IV does not inherit the previous explicit IV."""
+        stream = self.parse("\n".join([
+            "#EXTM3U",
+            '#EXT-X-KEY:METHOD=AES-128,URI="k1",IV=0x01',
+            "#EXTINF:4,",
+            "a.ts",
+            '#EXT-X-KEY:METHOD=AES-128,URI="https://keys.example.com/k2"',
+            "#EXTINF:4,",
+            "b.ts",
+            "#EXT-X-ENDLIST",
+        ]))
+
+        assert [(s.key_url, s.key_iv) for s in stream.segments] == [
+            ("https://cdn.example.com/vod/k1", "0x01"),
+            ("https://keys.example.com/k2", None),
+        ]
+
+    def test_relative_urls_with_query_base(self) -> None:
+        """Test URIs resolve like urljoin, including parent paths and query strings."""
+        stream = self.parse("\n".join([
+            "#EXTM3U",
+            "#EXTINF:4,",
+            "../shared/a.ts",
+            "#EXTINF:4,",
+            "/root/b.ts",
+            "#EXTINF:4,",
+            "c.ts?token=1",
+        ]), url="https://cdn.example.com/vod/index.m3u8?auth=x")
+
+        assert [s.url for s in stream.segments] == [
+            "https://cdn.example.com/shared/a.ts",
+            "https://cdn.example.com/root/b.ts",
+            "https://cdn.example.com/vod/c.ts?token=1",
+        ]
+
+    def test_large_playlist(self) -> None:
+        """Test a 100k-line playlist parses into slotted segment records."""
+        lines = ["#EXTM3U", "#EXT-X-TARGETDURATION:2"]
+        for i in range(50_000):
+            lines.extend(["#EXTINF:2.0,", f"seg{i}.ts"])
+        stream = self.parse("\n".join(lines))
+
+        assert stream.segment_count == 50_000
+        assert stream.segments[-1].url == "https://cdn.example.com/vod/seg49999.ts"
+        assert stream.segments[-1].index == 49_999
+        assert not hasattr(stream.segments[0], "__dict__")
+
+    def test_master_playlist_renditions(self) -> None:
+        """Test EXT-X-MEDIA renditions are parsed and loaded for the stream's groups."""
+        playlists = {
+            "https://cdn.example.com/vod/master.m3u8": "\n".join([
+                "#EXTM3U",
+                '#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aac",NAME="English",LANGUAGE="en",'
+                'DEFAULT=YES,URI="audio/en.m3u8"',
+                '#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aac",NAME="Deutsch",LANGUAGE="de",'
+                'URI="audio/de.m3u8"',
+                '#EXT-X-MEDIA:TYPE=SUBTITLES,GROUP-ID="subs",NAME="English",LANGUAGE="en",'
+                'URI="subs/en.m3u8"',
+                '#EXT-X-STREAM-INF:BANDWIDTH=2000000,AUDIO="aac",SUBTITLES="subs"',
+                "video/720p.m3u8",
+            ]),
+            "https://cdn.example.com/vod/video/720p.m3u8": "#EXTM3U\n#EXTINF:4,\nv0.ts\n#EXT-X-ENDLIST",
+            "https://cdn.example.com/vod/audio/de.m3u8": "#EXTM3U\n#EXTINF:4,\na0.aac\n#EXT-X-ENDLIST",
+            "https://cdn.example.com/vod/subs/en.m3u8": "#EXTM3U\n#EXTINF:4,\ns0.vtt\n#EXT-X-ENDLIST",
+        }
+        parser = M3U8Parser()
+        with patch.object(parser, '_download_playlist', side_effect=playlists.get):
+            streams = parser.parse_url("https://cdn.example.com/vod/master.m3u8")
+            renditions = parser.get_renditions(streams[0], audio_language="de",
+                                               subtitle_language="en")
+
+        assert len(parser.renditions) == 3
+        assert (streams[0].audio_group, streams[0].subtitles_group) == ("aac", "subs")
+        assert [(r.type, r.language) for r in renditions] == [("audio", "de"), ("subtitles", "en")]
+        assert renditions[0].manifest.url(0) == "https://cdn.example.com/vod/audio/a0.aac"
+        assert renditions[1].manifest.url(0) == "https://cdn.example.com/vod/subs/s0.vtt"
+
+
 if __name__ == "__main__":
     pytest.main(["-v", "test_m3u8_parser.py"])
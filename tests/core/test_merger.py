@@ -1,8 +1,11 @@
+import os
 import pytest
 import subprocess
 from unittest.mock import patch, MagicMock, mock_open, ANY
 
 from src.core.merger import is_ffmpeg_available, merge_files_ffmpeg, merge_files_binary, convert_ts_to_mp4, merge_files
+from src.core.merger import SegmentAppendWriter, merge_files_append, _copy_file_into, IncrementalMerger
+from src.core.merger import mux_renditions, merge_subtitle_segments
 
 
 class TestMerger:
@@ -258,6 +261,23 @@ class TestMerger:
             # Verify result is success
             assert result["success"] is True
 
+    def test_merge_files_discontinuities_skip_concat_demuxer(self) -> None:
+        """Test segments with discontinuities are merged as binary, then converted."""
+        with patch('src.core.merger.is_ffmpeg_available', return_value=True), \
+                patch('src.core.merger.merge_files_ffmpeg') as mock_merge_ffmpeg, \
+                patch('src.core.merger.merge_files_binary', return_value={"success": True}) as mock_merge_binary, \
+                patch('src.core.merger.convert_ts_to_mp4', return_value={"success": True}) as mock_convert, \
+                patch('os.path.exists', return_value=False):
+
+            result = merge_files(
+                self.test_files, self.output_file, self.settings, discontinuities=[1])
+
+            mock_merge_ffmpeg.assert_not_called()
+            assert mock_merge_binary.call_count == 1
+            mock_convert.assert_called_with(
+                f"{self.output_file}.ts", self.output_file, self.ffmpeg_path)
+            assert result["success"] is True
+
     def test_merge_files_ffmpeg_direct_failure_binary_success(self) -> None:
         """Test merge_files when FFmpeg direct merge fails but binary merge succeeds."""
         with patch('src.core.merger.is_ffmpeg_available', return_value=True) as mock_is_ffmpeg_available, \
@@ -439,5 +459,317 @@ class TestMerger:
             assert result["success"] is True
 
 
+class TestSegmentAppendWriter:
+    """Test suite for in-place append merging."""
+
+    def _make_segments(self, tmp_path, count: int = 4) -> list:
+        files = []
+        for i in range(count):
+            path = tmp_path / f"segment_{i}.ts"
+            path.write_bytes(bytes([i]) * (100 + i))
+            files.append(str(path))
+        return files
+
+    def test_merge_files_append(self, tmp_path) -> None:
+        """Test segments are appended in order and deleted afterwards."""
+        files = self._make_segments(tmp_path)
+        output = str(tmp_path / "video.ts")
+
+        result = merge_files_append(files, output)
+
+        assert result["success"] is True
+        with open(output, "rb") as f:
+            assert f.read() == b"".join(bytes([i]) * (100 + i) for i in range(4))
+        assert not any(os.path.exists(file) for file in files)
+        assert not os.path.exists(f"{output}.idx")
+
+    def test_resume_after_interruption(self, tmp_path) -> None:
+        """Test the sidecar index resumes after the last complete segment."""
+        files = self._make_segments(tmp_path)
+        output = str(tmp_path / "video.ts")
+
+        writer = SegmentAppendWriter(output, "task-1")
+        writer.append_file(0, files[0])
+        writer.append_file(1, files[1])
+        writer.close()
+        # Simulate a torn write of the third segment
+        with open(output, "ab") as f:
+            f.write(b"partial")
+        os.remove(files[0])
+        os.remove(files[1])
+
+        result = merge_files_append(files, output, identity="task-1")
+
+        assert result["success"] is True
+        with open(output, "rb") as f:
+            assert f.read() == b"".join(bytes([i]) * (100 + i) for i in range(4))
+
+    def test_index_of_other_download_discarded(self, tmp_path) -> None:
+        """Test an index left by a different download is not resumed."""
+        files = self._make_segments(tmp_path)
+        output = str(tmp_path / "video.ts")
+
+        writer = SegmentAppendWriter(output, "task-1")
+        writer.append_bytes(0, b"stale-0" * 20)
+        writer.append_bytes(1, b"stale-1" * 20)
+        writer.close()
+
+        resumed = SegmentAppendWriter(output, "task-2")
+        assert resumed.next_index == 0
+        resumed.close()
+        assert os.path.getsize(output) == 0
+
+        result = merge_files_append(files, output, identity="task-2")
+
+        assert result["success"] is True
+        with open(output, "rb") as f:
+            assert f.read() == b"".join(bytes([i]) * (100 + i) for i in range(4))
+
+    def test_index_without_identity_not_resumed(self, tmp_path) -> None:
+        """Test a writer without an identity always starts over."""
+        output = str(tmp_path / "video.ts")
+        writer = SegmentAppendWriter(output)
+        writer.append_bytes(0, b"abc")
+        writer.close()
+
+        resumed = SegmentAppendWriter(output)
+        try:
+            assert resumed.next_index == 0
+        finally:
+            resumed.close()
+
+    def test_out_of_order_append_rejected(self, tmp_path) -> None:
+        """Test appending a segment ahead of the next index fails."""
+        files = self._make_segments(tmp_path, 2)
+        writer = SegmentAppendWriter(str(tmp_path / "video.ts"))
+        try:
+            with pytest.raises(ValueError):
+                writer.append_file(1, files[1])
+            writer.append_bytes(0, b"abc")
+            assert writer.next_index == 1
+        finally:
+            writer.close()
+
+    def test_copy_fallback(self, tmp_path) -> None:
+        """Test buffered copy is used without kernel copy support."""
+        src = tmp_path / "src.bin"
+        src.write_bytes(b"0123456789")
+        dst = tmp_path / "dst.bin"
+        dst.write_bytes(b"ab")
+        src_fd = os.open(src, os.O_RDONLY)
+        dst_fd = os.open(dst, os.O_RDWR)
+        try:
+            with patch('src.core.merger.os.copy_file_range', side_effect=OSError, create=True), \
+                    patch('src.core.merger.os.sendfile', side_effect=OSError, create=True):
+                assert _copy_file_into(src_fd, dst_fd, 2, 10) == 10
+        finally:
+            os.close(src_fd)
+            os.close(dst_fd)
+        assert dst.read_bytes() == b"ab0123456789"
+
+    def test_merge_files_append_mode_remuxes_mp4(self, tmp_path) -> None:
+        """Test append mode writes a TS file and remuxes it for MP4 output."""
+        files = self._make_segments(tmp_path, 2)
+        output = str(tmp_path / "video.mp4")
+
+        with patch('src.core.merger.is_ffmpeg_available', return_value=True), \
+                patch('src.core.merger.merge_files_ffmpeg') as mock_concat, \
+                patch('src.core.merger.convert_ts_to_mp4', return_value={"success": True}) as mock_convert:
+            result = merge_files(files, output, merge_mode="append")
+
+        assert result["success"] is True
+        mock_concat.assert_not_called()
+        mock_convert.assert_called_once_with(f"{output}.ts", output, None)
+        assert not os.path.exists(f"{output}.ts")
+
+    def test_init_sections_written_before_segments(self, tmp_path) -> None:
+        """Test initialization sections are prepended to their segments, recorded with them."""
+        files = self._make_segments(tmp_path, 3)
+        init = tmp_path / "init_0.mp4"
+        init.write_bytes(b"INIT")
+        output = str(tmp_path / "video.ts")
+
+        with patch('src.core.merger.merge_files_ffmpeg') as mock_concat:
+            result = merge_files(files[1:], output, init_files={1: str(init)})
+
+        assert result["success"] is True
+        mock_concat.assert_not_called()
+        with open(output, "rb") as f:
+            assert f.read() == b"INIT" + bytes([1]) * 101 + bytes([2]) * 102
+
+        writer = SegmentAppendWriter(str(tmp_path / "append.ts"))
+        try:
+            assert writer.append_file(0, files[0], str(init)) == 104
+            assert writer.sizes == [104]
+        finally:
+            writer.close()
+
+
+class TestRenditionMux:
+    """Test suite for muxing separately downloaded renditions."""
+
+    def _renditions(self, tmp_path) -> list:
+        audio = tmp_path / "audio_0.ts"
+        subtitles = tmp_path / "subtitles_1.vtt"
+        audio.write_bytes(b"audio")
+        subtitles.write_text("WEBVTT\n")
+        return [
+            {"path": str(audio), "type": "audio", "language": "en", "name": "English"},
+            {"path": str(subtitles), "type": "subtitles", "language": "fr", "name": ""},
+        ]
+
+    def test_mux_renditions_single_pass(self, tmp_path) -> None:
+        """Test all renditions are muxed with one FFmpeg command."""
+        output = tmp_path / "video.mp4"
+        output.write_bytes(b"video")
+        renditions = self._renditions(tmp_path)
+
+        with patch('src.core.merger.is_ffmpeg_available', return_value=True), \
+                patch('subprocess.run', return_value=MagicMock(returncode=0)) as mock_run:
+            result = mux_renditions(str(output), renditions, "ffmpeg")
+
+        assert result == {"success": True, "sidecars": []}
+        video = f"{output}.video.mp4"
+        mock_run.assert_called_once_with(
+            ["ffmpeg", "-i", video, "-i", renditions[0]["path"], "-i", renditions[1]["path"],
+             "-map", "0:v", "-map", "1:a:0", "-map", "2:s:0", "-c", "copy", "-c:s", "mov_text",
+             "-metadata:s:a:0", "language=en", "-metadata:s:a:0", "title=English",
+             "-metadata:s:s:0", "language=fr", "-y", str(output)],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        assert not os.path.exists(video)
+        assert not os.path.exists(renditions[0]["path"])
+
+    def test_mux_renditions_without_ffmpeg_keeps_sidecars(self, tmp_path) -> None:
+        """Test renditions are kept next to the output when FFmpeg is missing."""
+        output = tmp_path / "video.ts"
+        output.write_bytes(b"video")
+
+        with patch('src.core.merger.is_ffmpeg_available', return_value=False):
+            result = mux_renditions(str(output), self._renditions(tmp_path))
+
+        assert result["success"] is True
+        assert sorted(os.path.basename(p) for p in result["sidecars"]) == [
+            "video.audio.en.ts", "video.subtitles.fr.vtt"]
+        assert output.read_bytes() == b"video"
+
+    def test_merge_subtitle_segments(self, tmp_path) -> None:
+        """Test only the first WebVTT header is kept."""
+        first = tmp_path / "segment_0.ts"
+        second = tmp_path / "segment_1.ts"
+        first.write_text("WEBVTT\nX-TIMESTAMP-MAP=MPEGTS:0,LOCAL:00:00:00.000\n\n"
+                         "00:00.000 --> 00:01.000\nHello\n")
+        second.write_text("WEBVTT\nX-TIMESTAMP-MAP=MPEGTS:0,LOCAL:00:00:00.000\n\n"
+                          "00:04.000 --> 00:05.000\nWorld\n")
+        output = tmp_path / "subtitles.vtt"
+
+        assert merge_subtitle_segments([str(first), str(second)], str(output))["success"] is True
+        text = output.read_text()
+        assert text.count("WEBVTT") == 1
+        assert text.index("Hello") < text.index("World")
+
+
+class TestIncrementalMerger:
+    """Test suite for merging behind the contiguous watermark."""
+
+    def _segment(self, tmp_path, index: int) -> str:
+        path = tmp_path / f"segment_{index}.ts"
+        path.write_bytes(f"<{index}>".encode())
+        return str(path)
+
+    def test_watermark_advances_with_contiguous_prefix(self, tmp_path) -> None:
+        """Test segments are merged only once all earlier ones are merged."""
+        output = str(tmp_path / "video.ts")
+        merger = IncrementalMerger(output)
+
+        assert merger.add_segment(2, self._segment(tmp_path, 2)) == 0
+        assert merger.add_segment(0, self._segment(tmp_path, 0)) == 1
+        assert os.path.exists(tmp_path / "segment_2.ts")
+        assert merger.add_segment(1, self._segment(tmp_path, 1)) == 3
+        assert not os.path.exists(tmp_path / "segment_2.ts")
+
+        result = merger.finish()
+
+        assert result["success"] is True
+        with open(output, "rb") as f:
+            assert f.read() == b"<0><1><2>"
+
+    def test_finish_stops_at_gap(self, tmp_path) -> None:
+        """Test segments after a failed one are kept until the gap is filled."""
+        output = str(tmp_path / "video.ts")
+        merger = IncrementalMerger(output, identity="task-1")
+        merger.add_segment(0, self._segment(tmp_path, 0))
+        merger.add_segment(2, self._segment(tmp_path, 2))
+
+        result = merger.finish()
+
+        assert result["success"] is False
+        assert result["resumable"] is True
+        assert os.path.exists(tmp_path / "segment_2.ts")
+        assert os.path.exists(f"{output}.idx")
+
+        resumed = IncrementalMerger(output, identity="task-1")
+        assert resumed.watermark == 1
+        resumed.add_segment(2, str(tmp_path / "segment_2.ts"))
+        resumed.add_segment(1, self._segment(tmp_path, 1))
+        assert resumed.finish()["success"] is True
+        with open(output, "rb") as f:
+            assert f.read() == b"<0><1><2>"
+
+    def test_finish_requires_all_segments(self, tmp_path) -> None:
+        """Test missing trailing segments keep the merge from being finalized."""
+        output = str(tmp_path / "video.ts")
+        merger = IncrementalMerger(output)
+        merger.add_segment(0, self._segment(tmp_path, 0))
+
+        result = merger.finish(total_segments=2)
+
+        assert result["resumable"] is True
+        assert os.path.exists(f"{output}.idx")
+
+    def test_abort_keeps_merged_prefix(self, tmp_path) -> None:
+        """Test an aborted merge resumes from its watermark."""
+        output = str(tmp_path / "video.ts")
+        merger = IncrementalMerger(output, identity="task-1")
+        merger.add_segment(0, self._segment(tmp_path, 0))
+        merger.add_segment(1, self._segment(tmp_path, 1))
+        merger.abort()
+
+        other = IncrementalMerger(output, identity="task-2")
+        assert other.watermark == 0
+        other.abort()
+
+        merger = IncrementalMerger(output, identity="task-1")
+        merger.add_segment(0, self._segment(tmp_path, 0))
+        merger.add_segment(1, self._segment(tmp_path, 1))
+        merger.abort()
+
+        resumed = IncrementalMerger(output, identity="task-1")
+        assert resumed.watermark == 2
+        resumed.add_segment(2, self._segment(tmp_path, 2))
+        assert resumed.finish()["success"] is True
+        with open(output, "rb") as f:
+            assert f.read() == b"<0><1><2>"
+
+
+    def test_rewind_drops_merged_tail(self, tmp_path) -> None:
+        """Test a rewound merge continues from the shorter watermark."""
+        output = str(tmp_path / "video.ts")
+        merger = IncrementalMerger(output, identity="task-1")
+        for i in range(3):
+            merger.add_segment(i, self._segment(tmp_path, i))
+
+        merger.rewind(1)
+        assert merger.watermark == 1
+        merger.abort()
+
+        resumed = IncrementalMerger(output, identity="task-1")
+        assert resumed.merged_sizes == [3]
+        resumed.add_segment(1, self._segment(tmp_path, 1))
+        resumed.add_segment(2, self._segment(tmp_path, 2))
+        assert resumed.finish()["success"] is True
+        with open(output, "rb") as f:
+            assert f.read() == b"<0><1><2>"
+
+
 if __name__ == "__main__":
     pytest.main(["-v", "test_merger.py"])
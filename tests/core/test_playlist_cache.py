@@ -0,0 +1,129 @@
+"""
+Tests for the playlist HTTP cache
+"""
+
+import pytest
+from typing import Dict, List, Optional
+from unittest.mock import Mock
+
+from src.core.playlist_cache import PlaylistCache, PlaylistCacheConfig
+
+
+URL = "https://cdn.example.com/vod/index.m3u8"
+PLAYLIST = "#EXTM3U\n#EXTINF:4,\nseg0.ts\n#EXT-X-ENDLIST\n"
+
+
+class FakeOrigin:
+    """Serves one playlist and records the request headers"""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, text: str = PLAYLIST) -> None:
+        self.headers = headers or {}
+        self.text = text
+        self.requests: List[Dict[str, str]] = []
+
+    def __call__(self, url: str, headers: Dict[str, str]) -> Mock:
+        self.requests.append(dict(headers))
+        response = Mock()
+        etag = self.headers.get("ETag")
+        if etag and headers.get("If-None-Match") == etag:
+            response.status_code = 304
+            response.text = ""
+        else:
+            response.status_code = 200
+            response.text = self.text
+        response.headers = dict(self.headers)
+        return response
+
+
+class TestPlaylistCache:
+    """Test PlaylistCache class"""
+
+    def test_fresh_entry_served_without_request(self) -> None:
+        """Test max-age keeps an entry fresh"""
+        cache = PlaylistCache()
+        origin = FakeOrigin({"Cache-Control": "max-age=60"})
+
+        first = cache.fetch(URL, {}, origin)
+        second = cache.fetch(URL, {}, origin)
+
+        assert (first.status_code, first.from_cache) == (200, False)
+        assert (second.status_code, second.text, second.from_cache) == (200, PLAYLIST, True)
+        assert len(origin.requests) == 1
+        assert cache.get_stats()["hits"] == 1
+
+    def test_stale_entry_revalidated_with_etag(self) -> None:
+        """Test an ETag entry is revalidated and a 304 serves the cached text"""
+        cache = PlaylistCache()
+        origin = FakeOrigin({"ETag": '"v1"', "Cache-Control": "no-cache"})
+
+        cache.fetch(URL, {"User-Agent": "Test"}, origin)
+        response = cache.fetch(URL, {"User-Agent": "Test"}, origin)
+
+        assert response.text == PLAYLIST
+        assert response.from_cache
+        assert origin.requests[1]["If-None-Match"] == '"v1"'
+        assert cache.get_stats()["revalidated"] == 1
+
+    def test_uncacheable_responses_not_stored(self) -> None:
+        """Test no-store and validator-less responses always go to the origin"""
+        for headers in ({"Cache-Control": "no-store, max-age=60"}, {}):
+            cache = PlaylistCache()
+            origin = FakeOrigin(headers)
+            cache.fetch(URL, {}, origin)
+            cache.fetch(URL, {}, origin)
+
+            assert len(origin.requests) == 2
+            assert "If-None-Match" not in origin.requests[1]
+            assert cache.get_stats()["entries"] == 0
+
+    def test_key_includes_varying_headers(self) -> None:
+        """Test responses for different cookies are cached separately"""
+        cache = PlaylistCache()
+        origin = FakeOrigin({"Cache-Control": "max-age=60"})
+
+        cache.fetch(URL, {"Cookie": "a=1", "User-Agent": "One"}, origin)
+        cache.fetch(URL, {"Cookie": "a=1", "User-Agent": "Two"}, origin)
+        cache.fetch(URL, {"Cookie": "a=2"}, origin)
+
+        assert len(origin.requests) == 2
+
+    def test_memory_tier_bounded(self) -> None:
+        """Test least recently used entries are evicted"""
+        cache = PlaylistCache(PlaylistCacheConfig(max_entries=2))
+        origin = FakeOrigin({"Cache-Control": "max-age=60"})
+
+        for name in ("a", "b", "a", "c"):
+            cache.fetch(f"https://cdn.example.com/{name}.m3u8", {}, origin)
+        cache.fetch("https://cdn.example.com/a.m3u8", {}, origin)
+
+        assert len(origin.requests) == 3
+        assert cache.get_stats()["entries"] == 2
+
+    def test_disk_tier_survives_restart(self, tmp_path) -> None:
+        """Test a new cache instance finds entries written by an earlier one"""
+        origin = FakeOrigin({"ETag": '"v1"'})
+        PlaylistCache(disk_directory=str(tmp_path)).fetch(URL, {}, origin)
+
+        restarted = PlaylistCache(disk_directory=str(tmp_path))
+        response = restarted.fetch(URL, {}, origin)
+
+        assert response.from_cache
+        assert origin.requests[1]["If-None-Match"] == '"v1"'
+
+        restarted.clear()
+        assert list(tmp_path.iterdir()) == []
+
+    def test_disabled_cache_passes_through(self) -> None:
+        """Test a zero-size cache stores nothing"""
+        cache = PlaylistCache()
+        cache.set_max_entries(0)
+        origin = FakeOrigin({"Cache-Control": "max-age=60"})
+
+        cache.fetch(URL, {}, origin)
+        cache.fetch(URL, {}, origin)
+
+        assert len(origin.requests) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -215,6 +215,69 @@ class TestProgressiveRecoveryManager:
         assert task.segments[0].state == RecoveryState.COMPLETE
         assert task.segments[0].downloaded_size == 9
     
+    def test_segments_restored_from_journal(self, temp_recovery_dir, tmp_path) -> None:
+        """Test completed segments survive a restart through the journal"""
+        manager = ProgressiveRecoveryManager(recovery_dir=temp_recovery_dir)
+        manager.create_recovery_session(
+            "test_task", "Test Task", "https://example.com/video.m3u8",
+            str(tmp_path / "output.mp4"), 4, segment_dir=str(tmp_path)
+        )
+        segment_file = tmp_path / "segment_1.ts"
+        segment_file.write_bytes(b"test data")
+        manager.mark_segment_complete("test_task", 1, str(segment_file), 9)
+        manager.complete_recovery_session("test_task")
+
+        assert not (Path(temp_recovery_dir) / "test_task.json").exists()
+        loaded = ProgressiveRecoveryManager(recovery_dir=temp_recovery_dir) \
+            .load_recovery_session("test_task")
+
+        assert loaded is not None
+        assert loaded.get_completed_segments() == [1]
+        assert loaded.segments[1].file_path == str(segment_file)
+        assert loaded.segments[1].checksum == loaded.segments[1].calculate_checksum()
+        assert loaded.downloaded_size == 9
+    
+    def test_sessions_share_task_resume_state(self, recovery_manager, tmp_path) -> None:
+        """Test segments recorded by a download task are visible to the recovery manager"""
+        from src.core.downloader import DownloadTask
+
+        task = DownloadTask(task_id="shared_task", name="Shared", segments=4,
+                            output_file=str(tmp_path / "video.mp4"),
+                            store=recovery_manager.store)
+        segment_dir = tmp_path / "video.mp4_temp"
+        segment_dir.mkdir()
+        for i in range(2):
+            (segment_dir / f"segment_{i}.ts").write_bytes(b"x" * 100)
+            task.record_segment(i, 100)
+        task.save_progress()
+
+        resume_info = recovery_manager.get_resume_info("shared_task")
+
+        assert resume_info["completed_segments"] == [0, 1]
+        assert resume_info["resumable_segments"] == [2, 3]
+        assert resume_info["downloaded_size"] == 200
+        assert resume_info["can_resume"]
+    
+    def test_active_sessions_follow_store(self, recovery_manager, tmp_path) -> None:
+        """Test active sessions are read from the store rather than a separate copy"""
+        from src.core.downloader import DownloadTask
+
+        task = DownloadTask(task_id="live_task", name="Live", segments=3,
+                            output_file=str(tmp_path / "video.mp4"),
+                            store=recovery_manager.store)
+        segment_dir = tmp_path / "video.mp4_temp"
+        segment_dir.mkdir()
+        (segment_dir / "segment_0.ts").write_bytes(b"x" * 100)
+        task.record_segment(0, 100)
+
+        session = recovery_manager.active_sessions["live_task"]
+        assert session.get_completed_segments() == [0]
+
+        recovery_manager.complete_recovery_session("live_task")
+
+        assert "live_task" not in recovery_manager.active_sessions
+        assert recovery_manager.get_resume_info("live_task")["completed_segments"] == [0]
+    
     def test_get_resume_info(self, recovery_manager) -> None:
         """Test getting resume information"""
         task_id = "test_task"
@@ -0,0 +1,100 @@
+"""
+Tests for #EXT-X-MEDIA rendition parsing and selection
+"""
+
+import pytest
+
+from src.core.renditions import (
+    MediaRendition, load_rendition_manifests, parse_media_tag, select_renditions
+)
+from src.core.segment_manifest import SegmentManifest
+
+
+BASE_URL = "https://cdn.example.com/vod/"
+
+
+def rendition(media_type: str, group: str, language: str, default: bool = False,
+              uri: bool = True) -> MediaRendition:
+    """Create a rendition of the given group and language"""
+    return MediaRendition(
+        type=media_type, group_id=group, name=language.upper(), language=language,
+        default=default, url=f"{BASE_URL}{media_type}/{language}.m3u8" if uri else None)
+
+
+class TestParseMediaTag:
+    """Test parse_media_tag function"""
+
+    def test_parse_attributes(self) -> None:
+        """Test attributes are mapped and the URI is resolved"""
+        parsed = parse_media_tag({
+            "TYPE": "AUDIO", "GROUP-ID": "aac", "NAME": "English", "LANGUAGE": "en",
+            "DEFAULT": "YES", "AUTOSELECT": "YES", "URI": "audio/en.m3u8"
+        }, BASE_URL)
+
+        assert parsed == MediaRendition(
+            type="audio", group_id="aac", name="English", language="en", default=True,
+            autoselect=True, url="https://cdn.example.com/vod/audio/en.m3u8")
+        assert parsed.file_extension == ".ts"
+
+    def test_without_uri_or_group(self) -> None:
+        """Test muxed renditions have no URL and incomplete tags are ignored"""
+        parsed = parse_media_tag({"TYPE": "SUBTITLES", "GROUP-ID": "subs"}, BASE_URL)
+
+        assert parsed.url is None
+        assert parsed.file_extension == ".vtt"
+        assert parse_media_tag({"TYPE": "AUDIO"}, BASE_URL) is None
+
+
+class TestSelectRenditions:
+    """Test select_renditions function"""
+
+    def setup_method(self) -> None:
+        self.renditions = [
+            rendition("audio", "aac", "en", default=True),
+            rendition("audio", "aac", "de"),
+            rendition("audio", "ac3", "en"),
+            rendition("subtitles", "subs", "en"),
+            rendition("subtitles", "subs", "fr"),
+        ]
+
+    def test_preferred_language(self) -> None:
+        """Test the preferred language wins within the variant's groups"""
+        selected = select_renditions(self.renditions, "aac", "subs", "de-DE", "fr")
+
+        assert [(r.type, r.language) for r in selected] == [("audio", "de"), ("subtitles", "fr")]
+
+    def test_defaults(self) -> None:
+        """Test audio falls back to the default while subtitles need a preference"""
+        selected = select_renditions(self.renditions, "aac", "subs")
+
+        assert [(r.type, r.language) for r in selected] == [("audio", "en")]
+        assert select_renditions(self.renditions, None, None) == []
+
+    def test_muxed_rendition_skipped(self) -> None:
+        """Test renditions without a URI are not downloaded"""
+        renditions = [rendition("audio", "aac", "en", default=True, uri=False)]
+
+        assert select_renditions(renditions, "aac", None) == []
+
+
+class TestLoadRenditionManifests:
+    """Test load_rendition_manifests function"""
+
+    def test_failed_renditions_dropped(self) -> None:
+        """Test manifests are attached and unloadable renditions left out"""
+        renditions = [rendition("audio", "aac", "en"), rendition("subtitles", "subs", "en")]
+
+        def load(url: str):
+            if "subtitles" in url:
+                return None
+            return SegmentManifest.from_urls([f"{BASE_URL}audio/en/0.aac"])
+
+        loaded = load_rendition_manifests(renditions, load)
+
+        assert loaded == [renditions[0]]
+        assert len(loaded[0].manifest) == 1
+        assert load_rendition_manifests([], load) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
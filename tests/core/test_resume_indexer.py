@@ -0,0 +1,110 @@
+"""
+Tests for the startup resume indexer
+"""
+
+import os
+
+import pytest
+
+from src.core.resume_indexer import ResumeIndexer, scan_segment_dir
+from src.core.resume_store import ResumeStore
+from src.core.segment_manifest import SegmentManifest
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResumeStore(str(tmp_path / "resume"))
+
+
+def add_task(store: ResumeStore, tmp_path, task_id: str, status: str = "running",
+             segments: int = 4, written: int = 2) -> str:
+    """Record a task whose first ``written`` segments are on disk"""
+    segment_dir = tmp_path / f"{task_id}.mp4_temp"
+    segment_dir.mkdir()
+    journal = store.open(task_id, {
+        "task_id": task_id, "task_name": task_id, "status": status,
+        "base_url": "https://example.com/stream", "total_segments": segments,
+        "output_file": str(tmp_path / f"{task_id}.mp4"), "segment_dir": str(segment_dir)
+    })
+    for i in range(written):
+        path = segment_dir / f"segment_{i}.ts"
+        path.write_bytes(b"x" * 10)
+        journal.record_complete(i, 10, path.stat().st_mtime_ns)
+    store.flush(task_id)
+    store.close(task_id)
+    return str(segment_dir)
+
+
+class TestResumeIndexer:
+    """Test ResumeIndexer class"""
+
+    def test_finds_interrupted_tasks(self, store, tmp_path) -> None:
+        """Test interrupted tasks are found and finished ones skipped"""
+        add_task(store, tmp_path, "running")
+        add_task(store, tmp_path, "pending", status="pending", written=0)
+        add_task(store, tmp_path, "done", status="completed")
+        add_task(store, tmp_path, "paused", status="paused")
+
+        add_task(store, tmp_path, "interrupted", status="interrupted")
+
+        indexed_store = ResumeStore(store.state_dir)
+        found = {t.task_id: t for t in ResumeIndexer(indexed_store).scan()}
+
+        assert set(found) == {"running", "pending", "interrupted"}
+        # Journals are read without being kept open
+        assert indexed_store.journals == {}
+        assert found["running"].completed_segments == 2
+        assert found["running"].downloaded_bytes == 20
+        assert found["running"].total_segments == 4
+        assert found["running"].manifest is None
+
+    def test_changed_segments_dropped(self, store, tmp_path) -> None:
+        """Test segments are checked by size and mtime and changed ones forgotten"""
+        segment_dir = add_task(store, tmp_path, "task", written=3)
+        with open(os.path.join(segment_dir, "segment_0.ts"), "ab") as f:
+            f.write(b"more")
+        os.remove(os.path.join(segment_dir, "segment_1.ts"))
+
+        indexed_store = ResumeStore(store.state_dir)
+        (found,) = ResumeIndexer(indexed_store).scan()
+
+        assert found.completed_segments == 1
+        assert list(indexed_store.completed("task")) == [2]
+
+    def test_manifest_restored(self, store, tmp_path) -> None:
+        """Test the saved segment list of a playlist task is loaded"""
+        add_task(store, tmp_path, "task")
+        urls = [f"https://cdn.example.com/hls/index{i}.ts" for i in range(5)]
+        store.save_manifest("task", SegmentManifest.from_urls(urls))
+
+        (found,) = ResumeIndexer(store).scan()
+
+        assert found.total_segments == 5
+        assert found.manifest.url(4) == urls[4]
+
+    def test_many_tasks(self, store, tmp_path) -> None:
+        """Test journals of many tasks are indexed"""
+        for i in range(50):
+            add_task(store, tmp_path, f"task_{i}")
+
+        found = ResumeIndexer(ResumeStore(store.state_dir), max_workers=4).scan()
+
+        assert len(found) == 50
+        assert all(t.completed_segments == 2 for t in found)
+
+
+def test_scan_segment_dir(tmp_path) -> None:
+    """Test only segment files are listed"""
+    (tmp_path / "segment_3.ts").write_bytes(b"abc")
+    (tmp_path / "segment_3.ts.temp").write_bytes(b"abcdef")
+    (tmp_path / "notes.txt").write_bytes(b"")
+
+    files = scan_segment_dir(str(tmp_path))
+
+    assert list(files) == [3]
+    assert files[3][0] == 3
+    assert scan_segment_dir(str(tmp_path / "missing")) == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
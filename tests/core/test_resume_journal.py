@@ -0,0 +1,124 @@
+"""
+Tests for the append-only resume journal
+"""
+
+import os
+
+import pytest
+
+from src.core.resume_journal import (
+    RECORD_SIZE, RecordType, ResumeJournal, file_crc32
+)
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "video.mp4.journal")
+
+
+class TestResumeJournal:
+    """Test ResumeJournal class"""
+
+    def test_replay(self, journal_path) -> None:
+        """Test records are replayed with the last record of a segment winning"""
+        journal = ResumeJournal(journal_path, {"task_id": "task"})
+        journal.record_partial(0, 100)
+        journal.record_complete(0, 200, mtime_ns=5, checksum=0xDEADBEEF)
+        journal.record_failed(1)
+        journal.record_failed(1)
+        journal.record_complete(2, 300)
+        journal.reset(2)
+        journal.close()
+
+        replayed = ResumeJournal.read(journal_path)
+
+        assert replayed is not None
+        assert replayed.metadata == {"task_id": "task"}
+        assert set(replayed.entries) == {0, 1}
+        assert replayed.entries[0].is_complete
+        assert (replayed.entries[0].size, replayed.entries[0].mtime_ns,
+                replayed.entries[0].checksum) == (200, 5, 0xDEADBEEF)
+        assert replayed.entries[1].state == RecordType.FAILED
+        assert replayed.entries[1].failures == 2
+        assert list(replayed.completed()) == [0]
+        assert ResumeJournal.read(journal_path + ".missing") is None
+
+    def test_appends_are_batched(self, journal_path) -> None:
+        """Test records are buffered until a batch is full or flushed"""
+        journal = ResumeJournal(journal_path, sync_interval=3600, batch_records=3)
+        journal.record_complete(0, 10)
+        journal.record_complete(1, 10)
+
+        assert not os.path.exists(journal_path)
+
+        journal.record_complete(2, 10)
+        size = os.path.getsize(journal_path)
+        journal.record_complete(3, 10)
+
+        assert os.path.getsize(journal_path) == size
+        journal.flush()
+        assert os.path.getsize(journal_path) == size + RECORD_SIZE
+        journal.close()
+
+    def test_torn_tail_discarded(self, journal_path) -> None:
+        """Test a partially written or corrupt record ends the replay and is cut off"""
+        journal = ResumeJournal(journal_path)
+        for i in range(3):
+            journal.record_complete(i, 10)
+        journal.close()
+        with open(journal_path, "r+b") as f:
+            f.seek(-RECORD_SIZE + 2, os.SEEK_END)
+            f.write(b"\xff\xff")
+        with open(journal_path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+
+        replayed = ResumeJournal(journal_path)
+        assert set(replayed.entries) == {0, 1}
+
+        replayed.record_complete(5, 10)
+        replayed.close()
+        assert set(ResumeJournal(journal_path).entries) == {0, 1, 5}
+
+    def test_compaction(self, journal_path) -> None:
+        """Test superseded records are dropped once they dominate the journal"""
+        journal = ResumeJournal(journal_path, {"name": "video"}, batch_records=10,
+                                compact_min_records=50)
+        for size in range(1, 60):
+            journal.record_partial(0, size, validator_checksum=0xABC)
+        journal.record_failed(1)
+        journal.close()
+
+        assert journal.record_count < 50
+        replayed = ResumeJournal(journal_path)
+        assert replayed.metadata == {"name": "video"}
+        assert replayed.entries[0].state == RecordType.PARTIAL
+        assert replayed.entries[0].size == 59
+        assert replayed.entries[0].checksum == 0xABC
+        assert replayed.entries[1].failures == 1
+
+        replayed.compact({"name": "renamed"})
+        assert os.path.getsize(journal_path) < 200
+        assert ResumeJournal(journal_path).metadata == {"name": "renamed"}
+
+    def test_delete(self, journal_path) -> None:
+        """Test deleting the journal removes its file and state"""
+        journal = ResumeJournal(journal_path)
+        journal.record_complete(0, 10)
+        journal.flush()
+
+        journal.delete()
+
+        assert not os.path.exists(journal_path)
+        assert journal.entries == {}
+
+
+def test_file_crc32(tmp_path) -> None:
+    """Test the CRC-32 of a file is calculated across chunks"""
+    path = tmp_path / "segment_0.ts"
+    path.write_bytes(b"123456789")
+
+    assert file_crc32(str(path), chunk_size=4) == 0xCBF43926
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
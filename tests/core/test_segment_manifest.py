@@ -0,0 +1,163 @@
+import pytest
+from types import SimpleNamespace
+
+from src.core.segment_manifest import SegmentManifest, SegmentKey, SegmentEntry, SegmentInit
+
+
+class TestSegmentManifest:
+    """Test suite for SegmentManifest class."""
+
+    def test_urls_share_prefix(self) -> None:
+        """Test URLs are stored relative to their common prefix."""
+        urls = [f"https://cdn.example.com/hls/720p/seg_{i:05d}.ts" for i in range(3)]
+        manifest = SegmentManifest.from_urls(urls, [4.0, 4.0, 2.5])
+
+        assert manifest.url_prefix == "https://cdn.example.com/hls/720p/"
+        assert len(manifest) == 3
+        assert [manifest.url(i) for i in range(3)] == urls
+        assert manifest.total_duration == 10.5
+
+    def test_url_outside_prefix(self) -> None:
+        """Test appending a URL that does not share the prefix."""
+        manifest = SegmentManifest("https://cdn.example.com/hls/")
+        manifest.append("https://cdn.example.com/hls/a.ts", 4.0)
+        manifest.append("https://backup.example.net/b.ts", 4.0)
+
+        assert manifest.url(0) == "https://cdn.example.com/hls/a.ts"
+        assert manifest.url(1) == "https://backup.example.net/b.ts"
+
+    def test_keys_are_deduplicated(self) -> None:
+        """Test segments sharing a key reference a single key table entry."""
+        key_a = SegmentKey(url="https://example.com/a.key")
+        key_b = SegmentKey(url="https://example.com/b.key", iv="0x01")
+        manifest = SegmentManifest.from_urls(
+            ["https://example.com/0.ts", "https://example.com/1.ts",
+             "https://example.com/2.ts", "https://example.com/3.ts"],
+            keys=[key_a, key_a, None, key_b])
+
+        assert manifest.keys == (key_a, key_b)
+        assert manifest.key(1) is key_a
+        assert manifest.key(2) is None
+        assert manifest.key(3) == key_b
+
+    def test_entry_and_sequence_number(self) -> None:
+        """Test row views and media sequence numbering."""
+        manifest = SegmentManifest.from_urls(
+            ["https://example.com/7.ts", "https://example.com/8.ts"], [6.0, 6.0],
+            media_sequence=7)
+
+        assert manifest.sequence_number(1) == 8
+        assert list(manifest)[1] == SegmentEntry(
+            index=1, url="https://example.com/8.ts", duration=6.0, key=None)
+
+    def test_from_segments(self) -> None:
+        """Test building from parsed M3U8 segments."""
+        segments = [
+            SimpleNamespace(url="https://example.com/v/0.ts", duration=5.0,
+                            encryption=SimpleNamespace(value="AES-128"),
+                            key_url="https://example.com/k", key_iv=None),
+            SimpleNamespace(url="https://example.com/v/1.ts", duration=3.0,
+                            encryption=SimpleNamespace(value="NONE"),
+                            key_url=None, key_iv=None),
+        ]
+        manifest = SegmentManifest.from_segments(segments)
+
+        assert manifest.key(0) == SegmentKey("AES-128", "https://example.com/k", None)
+        assert manifest.key(1) is None
+        assert manifest.duration(1) == 3.0
+
+    def test_dict_round_trip(self) -> None:
+        """Test to_dict/from_dict preserve every row."""
+        key = SegmentKey(url="https://example.com/k", iv="0x02")
+        manifest = SegmentManifest.from_urls(
+            ["https://example.com/0.ts", "https://other.example.com/1.ts"],
+            [1.0, 2.0], key=key, media_sequence=3)
+
+        restored = SegmentManifest.from_dict(manifest.to_dict())
+
+        assert list(restored) == list(manifest)
+        assert restored.media_sequence == 3
+        assert restored.keys == (key,)
+
+
+    def test_byte_ranges(self) -> None:
+        """Test byte ranges are stored per segment and survive a round trip."""
+        manifest = SegmentManifest("https://example.com/v/")
+        manifest.append("https://example.com/v/init.ts", 1.0)
+        assert not manifest.has_byte_ranges
+        manifest.append("https://example.com/v/all.mp4", 4.0, byte_range=(0, 1000))
+        manifest.append("https://example.com/v/all.mp4", 4.0, byte_range=(1000, 500))
+
+        assert manifest.has_byte_ranges
+        assert manifest.byte_range(0) is None
+        assert manifest.byte_range(2) == (1000, 500)
+        assert manifest.entry(1).byte_range == (0, 1000)
+
+        restored = SegmentManifest.from_dict(manifest.to_dict())
+        assert list(restored) == list(manifest)
+        assert "range_offsets" not in SegmentManifest.from_urls(["https://example.com/0.ts"]).to_dict()
+
+    def test_replace_from(self) -> None:
+        """Test the tail of a manifest can continue from an aligned variant."""
+        high = SegmentManifest.from_urls(
+            [f"https://example.com/high/{i}.ts" for i in range(4)], [4.0] * 4, media_sequence=7)
+        key = SegmentKey(url="https://example.com/low.key")
+        low = SegmentManifest.from_urls(
+            [f"https://cdn.example.com/low/{i}.ts" for i in range(4)], [3.9] * 4,
+            key=key, media_sequence=7)
+
+        high.replace_from(2, low)
+
+        assert [high.url(i) for i in range(4)] == [
+            "https://example.com/high/0.ts", "https://example.com/high/1.ts",
+            "https://cdn.example.com/low/2.ts", "https://cdn.example.com/low/3.ts"]
+        assert high.key(1) is None
+        assert high.key(3) == key
+        assert high.duration(2) == 3.9
+        assert high.sequence_number(3) == 10
+
+        with pytest.raises(ValueError):
+            high.replace_from(0, SegmentManifest.from_urls(["https://example.com/x.ts"] * 4))
+
+    def test_discontinuities(self) -> None:
+        """Test discontinuities are recorded, persisted and set at variant switches."""
+        manifest = SegmentManifest("https://example.com/v/")
+        for i in range(5):
+            manifest.append(f"https://example.com/v/{i}.ts", 4.0, discontinuity=i == 3)
+        assert manifest.discontinuities == (3,)
+        assert SegmentManifest.from_dict(manifest.to_dict()).discontinuities == (3,)
+
+        other = SegmentManifest.from_urls([f"https://example.com/low/{i}.ts" for i in range(5)])
+        manifest.replace_from(2, other)
+        assert manifest.discontinuities == (2,)
+        assert "discontinuities" not in SegmentManifest.from_urls(["https://example.com/0.ts"]).to_dict()
+
+    def test_init_sections(self) -> None:
+        """Test initialization sections are written again after changes and discontinuities."""
+        init_a = SegmentInit("https://example.com/v/init.mp4", (0, 720))
+        init_b = SegmentInit("https://example.com/v/init2.mp4")
+        manifest = SegmentManifest("https://example.com/v/")
+        manifest.append("https://example.com/v/0.m4s", 4.0, init_section=init_a)
+        manifest.append("https://example.com/v/1.m4s", 4.0, init_section=init_a)
+        manifest.append("https://example.com/v/2.m4s", 4.0, init_section=init_a, discontinuity=True)
+        manifest.append("https://example.com/v/3.m4s", 4.0, init_section=init_b)
+
+        assert manifest.init_starts == (0, 2, 3)
+        assert manifest.init_section(1) == init_a
+        assert manifest.entry(3).init_section == init_b
+
+        restored = SegmentManifest.from_dict(manifest.to_dict())
+        assert list(restored) == list(manifest)
+        assert restored.init_starts == (0, 2, 3)
+        assert "inits" not in SegmentManifest.from_urls(["https://example.com/0.ts"]).to_dict()
+
+        other = SegmentManifest("https://example.com/low/")
+        for i in range(4):
+            other.append(f"https://example.com/low/{i}.m4s", 4.0, init_section=init_b)
+        manifest.replace_from(1, other)
+        assert manifest.init_starts == (0, 1)
+        assert manifest.init_section(2) == init_b
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,94 @@
+"""
+Tests for parallel range downloads into a preallocated file
+"""
+
+import os
+import pytest
+
+from src.core.split_download import FilePart, SplitFileDownload
+
+
+class TestSplitFileDownload:
+    """Test SplitFileDownload class"""
+
+    def test_parts_cover_file(self, tmp_path) -> None:
+        """Test the file is split into contiguous parts"""
+        split = SplitFileDownload(str(tmp_path / "big.bin"), 10, 3)
+
+        assert [(p.start, p.end) for p in split.parts] == [(0, 4), (4, 8), (8, 10)]
+        assert SplitFileDownload(str(tmp_path / "tiny.bin"), 2, 8).parts == [
+            FilePart(0, 1), FilePart(1, 2)]
+
+    def test_writes_land_in_place(self, tmp_path) -> None:
+        """Test parts written out of order produce the right file"""
+        target = tmp_path / "big.bin"
+        split = SplitFileDownload(str(target), 10, 2)
+        split.open()
+        assert split.write(split.parts[1], b"fghijXYZ") == 5
+        split.write(split.parts[0], b"ab")
+        split.write(split.parts[0], b"cde")
+        split.close()
+
+        assert split.complete
+        assert target.read_bytes() == b"abcdefghij"
+        assert not os.path.exists(split.state_path)
+
+    def test_unfinished_download_resumes(self, tmp_path) -> None:
+        """Test part progress survives and resumes from the state file"""
+        target = str(tmp_path / "big.bin")
+        split = SplitFileDownload(target, 10, 2)
+        split.open()
+        split.write(split.parts[0], b"abc")
+        split.write(split.parts[1], b"fghij")
+        split.close()
+        assert os.path.exists(split.state_path)
+
+        resumed = SplitFileDownload(target, 10, 4)
+        assert resumed.pending_parts == [FilePart(0, 5, 3)]
+        assert resumed.pending_parts[0].offset == 3
+        resumed.open()
+        resumed.write(resumed.parts[0], b"de")
+        resumed.close()
+
+        with open(target, "rb") as f:
+            assert f.read() == b"abcdefghij"
+
+    def test_size_change_restarts(self, tmp_path) -> None:
+        """Test a state for a different size is ignored"""
+        target = str(tmp_path / "big.bin")
+        split = SplitFileDownload(target, 10, 2)
+        split.open()
+        split.write(split.parts[0], b"abc")
+        split.close()
+
+        restarted = SplitFileDownload(target, 12, 2)
+        assert all(part.done == 0 for part in restarted.parts)
+
+
+    def test_validator_change_restarts(self, tmp_path) -> None:
+        """Test a state saved for another version of the resource is ignored"""
+        target = str(tmp_path / "big.bin")
+        split = SplitFileDownload(target, 10, 2, validator='"v1"')
+        split.open()
+        split.write(split.parts[0], b"abc")
+        split.close()
+
+        assert SplitFileDownload(target, 10, 2, validator='"v1"').parts[0].done == 3
+        restarted = SplitFileDownload(target, 10, 2, validator='"v2"')
+        assert all(part.done == 0 for part in restarted.parts)
+
+    def test_invalidated_download_discarded(self, tmp_path) -> None:
+        """Test an invalidated download removes its file and state on close"""
+        target = str(tmp_path / "big.bin")
+        split = SplitFileDownload(target, 10, 2, validator='"v1"')
+        split.open()
+        split.write(split.parts[0], b"abc")
+        split.invalidate()
+        split.close()
+
+        assert not os.path.exists(target)
+        assert not os.path.exists(split.state_path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,90 @@
+"""
+Tests for throughput-based variant selection
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from src.core.adaptive_timeout import AdaptiveTimeoutManager
+from src.core.variant_selector import VariantSelectionConfig, VariantSelector
+
+
+# 1, 2 and 4 Mbps variants of a 10 minute presentation
+VARIANTS = [
+    {"url": "https://cdn.example.com/low.m3u8", "bandwidth": 1_000_000, "resolution": "640x360"},
+    {"url": "https://cdn.example.com/high.m3u8", "bandwidth": 4_000_000, "resolution": "1920x1080"},
+    {"url": "https://cdn.example.com/mid.m3u8", "bandwidth": 2_000_000, "resolution": "1280x720"},
+]
+DURATION = 600.0
+
+
+def make_selector(throughput: float = 0.0) -> VariantSelector:
+    """Create a selector whose host measurements give ``throughput`` bytes/s per connection"""
+    timeout_manager = AdaptiveTimeoutManager()
+    if throughput:
+        for _ in range(3):
+            timeout_manager.record_request("https://cdn.example.com/seg.ts", 1.0,
+                                           success=True, bytes_transferred=int(throughput))
+    monitor = Mock()
+    monitor.get_current_stats.return_value = None
+    return VariantSelector(timeout_manager, monitor, VariantSelectionConfig(safety_margin=1.0))
+
+
+class TestVariantSelector:
+    """Test VariantSelector class"""
+
+    def test_without_deadline_selects_highest(self) -> None:
+        """Test selection falls back to declared bandwidth without a deadline"""
+        selector = make_selector(throughput=10_000)
+
+        assert selector.select(VARIANTS, DURATION)["resolution"] == "1920x1080"
+        assert selector.select(VARIANTS, 0.0, deadline=60)["resolution"] == "1920x1080"
+        assert selector.select([]) is None
+
+    def test_deadline_selects_highest_that_fits(self) -> None:
+        """Test the highest variant downloadable within the deadline is selected"""
+        # 125 kB/s downloads 10 minutes of 1 Mbps media in 600s, 2 Mbps in 1200s
+        selector = make_selector(throughput=125_000)
+
+        assert selector.select(VARIANTS, DURATION, deadline=1300)["resolution"] == "1280x720"
+        assert selector.select(VARIANTS, DURATION, deadline=700)["resolution"] == "640x360"
+        assert selector.select(VARIANTS, DURATION, deadline=1300,
+                               connections=2)["resolution"] == "1920x1080"
+
+    def test_no_fit_selects_lowest(self) -> None:
+        """Test the lowest variant is selected when none fits"""
+        selector = make_selector(throughput=125_000)
+
+        assert selector.select(VARIANTS, DURATION, deadline=60)["resolution"] == "640x360"
+
+    def test_unmeasured_host_selects_highest(self) -> None:
+        """Test selection without throughput data keeps the highest variant"""
+        selector = make_selector()
+
+        assert selector.estimate_throughput("https://cdn.example.com/seg.ts") == 0.0
+        assert selector.select(VARIANTS, DURATION, deadline=60)["resolution"] == "1920x1080"
+
+    def test_monitor_fallback(self) -> None:
+        """Test the bandwidth monitor average is used for unmeasured hosts"""
+        selector = make_selector()
+        selector.monitor.get_current_stats.return_value = Mock(average_download_speed=125_000)
+
+        assert selector.estimate_throughput("https://other.example.com/a.m3u8") == 125_000
+        assert selector.select(VARIANTS, DURATION, deadline=1300)["resolution"] == "1280x720"
+
+    def test_plan_switch(self) -> None:
+        """Test switching down only when the current variant would overrun"""
+        selector = make_selector()
+        high = "https://cdn.example.com/high.m3u8"
+
+        # 4 Mbps needs 2400s at 125 kB/s
+        assert selector.plan_switch(VARIANTS, high, DURATION, 3000, 125_000) is None
+        switched = selector.plan_switch(VARIANTS, high, DURATION, 1300, 125_000)
+        assert switched["resolution"] == "1280x720"
+        assert selector.plan_switch(VARIANTS, "https://cdn.example.com/low.m3u8",
+                                    DURATION, 10, 125_000) is None
+        assert selector.plan_switch(VARIANTS, high, DURATION, 1300, 0.0) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])